@@ -3,13 +3,23 @@ import requests
 import json
 import uuid
 import re
+import time
+from contextvars import ContextVar
 from datetime import datetime, timedelta
+from urllib.request import urlopen
 from langchain_core.tools import tool
 from dotenv import load_dotenv
 from amadeus import Client, ResponseError
+from amadeus_service import amadeus_service, AmadeusServiceError
+from geocode_cache import geocode_cache, normalize_city
+from offer_cache import offer_cache
+from search_results import (
+    SearchResults, flight_results, hotel_results, activity_results,
+    render_flight_results, render_hotel_results, render_activity_results
+)
 from tools.payment import WALLET_TOOLS
 from tools.ipfs import retrieve_referrals_by_wallet
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from database import get_db
 from db_service import create_booking, get_booking_by_id, update_booking_status, update_booking_payment_status
 
@@ -17,6 +27,23 @@ load_dotenv()
 OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY")
 AMADEUS_CLIENT_ID = os.getenv("AMADEUS_CLIENT_ID")
 AMADEUS_CLIENT_SECRET = os.getenv("AMADEUS_CLIENT_SECRET")
+AMADEUS_TIMEOUT = float(os.getenv("AMADEUS_TIMEOUT", "10"))
+
+# time.monotonic() by which blocking SDK calls in the current context must be
+# done; the travel planner nodes set it so a search that misses its deadline
+# gives its thread back instead of waiting on the socket indefinitely.
+SDK_DEADLINE: ContextVar[Optional[float]] = ContextVar("amadeus_sdk_deadline", default=None)
+
+def _sdk_http(request):
+    """urlopen for the Amadeus SDK, with socket timeouts bounded by SDK_DEADLINE"""
+    timeout = AMADEUS_TIMEOUT
+    deadline = SDK_DEADLINE.get()
+    if deadline is not None:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("search deadline passed")
+        timeout = min(timeout, remaining)
+    return urlopen(request, timeout=timeout)
 
 # Initialize Amadeus client
 amadeus = None
@@ -24,7 +51,8 @@ if AMADEUS_CLIENT_ID and AMADEUS_CLIENT_SECRET:
     try:
         amadeus = Client(
             client_id=AMADEUS_CLIENT_ID,
-            client_secret=AMADEUS_CLIENT_SECRET
+            client_secret=AMADEUS_CLIENT_SECRET,
+            http=_sdk_http
         )
     except Exception as e:
         print(f"Failed to initialize Amadeus client: {e}")
@@ -55,53 +83,8 @@ def search_flights(origin: str, destination: str, departure_date: str) -> str:
     Use IATA airport codes (e.g., 'LAX', 'JFK', 'LHR').
     Date format should be YYYY-MM-DD.
     """
-    if not amadeus:
-        return "Amadeus API credentials not configured."
-    
-    try:
-        response = amadeus.shopping.flight_offers_search.get(
-            originLocationCode=origin,
-            destinationLocationCode=destination,
-            departureDate=departure_date,
-            adults=1
-        )
-        
-        if not response.data:
-            return f"No flights found from {origin} to {destination} on {departure_date}."
-        
-        flights = []
-        for i, flight in enumerate(response.data[:5]):  # Limit to 5 results
-            try:
-                # Handle different pricing structures
-                if 'pricing_options' in flight and flight['pricing_options']:
-                    price = flight['pricing_options'][0]['price']['total']
-                elif 'price' in flight:
-                    price = flight['price']['total']
-                else:
-                    price = "Price not available"
-                
-                # Handle different airline structures
-                if 'validatingAirlineCodes' in flight and flight['validatingAirlineCodes']:
-                    airline = flight['validatingAirlineCodes'][0]
-                elif 'airlines' in flight and flight['airlines']:
-                    airline = flight['airlines'][0]
-                else:
-                    airline = "Airline not specified"
-                
-                flights.append(f"{i+1}. {airline} - ${price}")
-            except (KeyError, IndexError) as e:
-                # If we can't parse this flight, skip it
-                continue
-        
-        if not flights:
-            return f"Found flights from {origin} to {destination} on {departure_date}, but couldn't parse pricing information."
-        
-        return f"Found {len(response.data)} flights from {origin} to {destination} on {departure_date}:\n" + "\n".join(flights)
-    
-    except ResponseError as error:
-        return f"Error searching flights: {error}"
-    except Exception as e:
-        return f"Unexpected error searching flights: {str(e)}"
+    results = search_flights_direct(origin, destination, departure_date)
+    return render_flight_results(results, origin, destination, departure_date)
 
 @tool
 def get_airport_info(airport_code: str) -> str:
@@ -297,11 +280,20 @@ def confirm_booking_payment(booking_id: str, payment_transaction_hash: str = Non
                 "payment_status": "completed",
                 "transaction_hash": payment_transaction_hash
             })
-        else:
+        
+        # Not updated: either no such booking, or it is no longer awaiting payment
+        existing = get_booking_by_id(db, booking_id)
+        if existing:
             return json.dumps({
-                "error": "Booking not found",
-                "message": "Please provide a valid booking reference"
+                "error": "Booking cannot be confirmed",
+                "message": f"This booking is already {existing.status}.",
+                "booking_status": existing.status,
+                "payment_status": existing.payment_status
             })
+        return json.dumps({
+            "error": "Booking not found",
+            "message": "Please provide a valid booking reference"
+        })
     
     except Exception as e:
         return f"Error confirming booking payment: {str(e)}"
@@ -394,64 +386,7 @@ def search_hotels(city: str, check_in_date: str, check_out_date: str, adults: in
     Use city names (e.g., 'Paris', 'London', 'New York').
     Date format should be YYYY-MM-DD.
     """
-    if not amadeus:
-        return "Amadeus API credentials not configured."
-    
-    try:
-        # First get city coordinates for hotel search
-        city_response = amadeus.reference_data.locations.get(
-            keyword=city,
-            subType="CITY"
-        )
-        
-        if not city_response.data:
-            return f"No city found with name {city}."
-        
-        city_data = city_response.data[0]
-        latitude = city_data['geoCode']['latitude']
-        longitude = city_data['geoCode']['longitude']
-        
-        # Search for hotels
-        response = amadeus.shopping.hotel_offers_search.get(
-            latitude=latitude,
-            longitude=longitude,
-            checkInDate=check_in_date,
-            checkOutDate=check_out_date,
-            adults=adults,
-            radius=5,  # 5km radius
-            radiusUnit="KM"
-        )
-        
-        if not response.data:
-            return f"No hotels found in {city} for the specified dates."
-        
-        hotels = []
-        for i, hotel in enumerate(response.data[:5]):  # Limit to 5 results
-            try:
-                hotel_name = hotel['hotel']['name']
-                hotel_rating = hotel['hotel'].get('rating', 'N/A')
-                
-                # Get pricing from offers
-                if 'offers' in hotel and hotel['offers']:
-                    offer = hotel['offers'][0]
-                    price = offer['price']['total']
-                    currency = offer['price']['currency']
-                    hotels.append(f"{i+1}. {hotel_name} ({hotel_rating}★) - {price} {currency}")
-                else:
-                    hotels.append(f"{i+1}. {hotel_name} ({hotel_rating}★) - Price not available")
-                    
-            except (KeyError, IndexError) as e:
-                continue
-        
-        if not hotels:
-            return f"Found hotels in {city}, but couldn't parse pricing information."
-        
-        return f"Found {len(response.data)} hotels in {city}:\n" + "\n".join(hotels)
-    
-    except ResponseError as error:
-        return f"Error searching hotels: {error}"
-    except Exception as e:
-        return f"Unexpected error searching hotels: {str(e)}"
+    return render_hotel_results(search_hotels_direct(city, check_in_date, check_out_date, adults), city)
 
 @tool
 def search_activities(city: str) -> str:
@@ -459,174 +394,7 @@ def search_activities(city: str) -> str:
     Search for activities and points of interest in a city.
     Use city names (e.g., 'Paris', 'London', 'New York').
     """
-    if not amadeus:
-        return "Amadeus API credentials not configured."
-    
-    try:
-        # First get city coordinates
-        city_response = amadeus.reference_data.locations.get(
-            keyword=city,
-            subType="CITY"
-        )
-        
-        if not city_response.data:
-            return f"No city found with name {city}."
-        
-        city_data = city_response.data[0]
-        latitude = city_data['geoCode']['latitude']
-        longitude = city_data['geoCode']['longitude']
-        
-        # Search for points of interest
-        response = amadeus.reference_data.locations.points_of_interest.get(
-            latitude=latitude,
-            longitude=longitude,
-            radius=10  # 10km radius
-        )
-        
-        if not response.data:
-            return f"No activities found in {city}."
-        
-        activities = []
-        for i, poi in enumerate(response.data[:10]):  # Limit to 10 results
-            try:
-                name = poi['name']
-                category = poi.get('category', 'Attraction')
-                activities.append(f"{i+1}. {name} ({category})")
-            except (KeyError, IndexError) as e:
-                continue
-        
-        if not activities:
-            return f"Found points of interest in {city}, but couldn't parse information."
-        
-        return f"Popular activities in {city}:\n" + "\n".join(activities)
-    
-    except ResponseError as error:
-        return f"Error searching activities: {error}"
-    except Exception as e:
-        return f"Unexpected error searching activities: {str(e)}"
-
-def parse_flight_results(flight_response: str) -> list:
-    """
-    Parse flight search results into structured data for frontend.
-    """
-    try:
-        flights = []
-        lines = flight_response.split('\n')
-        
-        for line in lines:
-            if line.strip() and '. ' in line and ' - $' in line:
-                # Parse format: "1. Airline - $Price"
-                parts = line.split(' - $')
-                if len(parts) == 2:
-                    airline_part = parts[0].split('. ', 1)[1] if '. ' in parts[0] else parts[0]
-                    price_str = parts[1].strip()
-                    
-                    # Extract price
-                    price = float(price_str.replace(',', ''))
-                    
-                    flights.append({
-                        "from": "JFK",  # Default origin
-                        "to": "Destination",  # Will be set by caller
-                        "price": price,
-                        "airline": airline_part,
-                        "dates": "2024-08-01 to 2024-08-10"  # Default dates
-                    })
-        
-        return flights if flights else [{
-            "from": "JFK",
-            "to": "Destination",
-            "price": 500,
-            "airline": "DemoAir",
-            "dates": "2024-08-01 to 2024-08-10"
-        }]
-    except Exception as e:
-        print(f"Error parsing flight results: {e}")
-        return [{
-            "from": "JFK",
-            "to": "Destination", 
-            "price": 500,
-            "airline": "DemoAir",
-            "dates": "2024-08-01 to 2024-08-10"
-        }]
-
-def parse_hotel_results(hotel_response: str) -> list:
-    """
-    Parse hotel search results into structured data for frontend.
-    """
-    try:
-        hotels = []
-        lines = hotel_response.split('\n')
-        
-        for line in lines:
-            if line.strip() and '. ' in line and ' - ' in line:
-                # Parse format: "1. Hotel Name (Rating★) - Price Currency"
-                parts = line.split(' - ')
-                if len(parts) == 2:
-                    hotel_part = parts[0].split('. ', 1)[1] if '. ' in parts[0] else parts[0]
-                    price_part = parts[1].strip()
-                    
-                    # Extract hotel name and rating
-                    hotel_name = hotel_part.split(' (')[0] if ' (' in hotel_part else hotel_part
-                    
-                    # Extract price
-                    price_match = re.search(r'([0-9,]+\.?[0-9]*)', price_part)
-                    if price_match:
-                        price_per_night = float(price_match.group(1).replace(',', ''))
-                        nights = 7  # Default nights
-                        total = price_per_night * nights
-                        
-                        hotels.append({
-                            "name": hotel_name,
-                            "location": "Destination",  # Will be set by caller
-                            "price_per_night": price_per_night,
-                            "nights": nights,
-                            "total": total
-                        })
-        
-        return hotels if hotels else [{
-            "name": "Hotel Demo",
-            "location": "Destination",
-            "price_per_night": 150,
-            "nights": 7,
-            "total": 1050
-        }]
-    except Exception as e:
-        print(f"Error parsing hotel results: {e}")
-        return [{
-            "name": "Hotel Demo",
-            "location": "Destination",
-            "price_per_night": 150,
-            "nights": 7,
-            "total": 1050
-        }]
-
-def parse_activity_results(activity_response: str) -> list:
-    """
-    Parse activity search results into structured data for frontend.
-    """
-    try:
-        activities = []
-        lines = activity_response.split('\n')
-        
-        for line in lines:
-            if line.strip() and '. ' in line:
-                # Parse format: "1. Activity Name (Category)"
-                activity_part = line.split('. ', 1)[1] if '. ' in line else line
-                activity_name = activity_part.split(' (')[0] if ' (' in activity_part else activity_part
-                activities.append(activity_name)
-        
-        return activities if activities else [
-            "Eiffel Tower visit",
-            "Louvre Museum tour", 
-            "Seine River cruise"
-        ]
-    except Exception as e:
-        print(f"Error parsing activity results: {e}")
-        return [
-            "Eiffel Tower visit",
-            "Louvre Museum tour",
-            "Seine River cruise"
-        ]
+    return render_activity_results(search_activities_direct(city), city)
 
 TOOLS = [
     get_weather,
@@ -641,15 +409,37 @@ TOOLS = [
     retrieve_referrals_by_wallet_tool,
     search_hotels,
     search_activities
-] + WALLET_TOOLS 
+] + WALLET_TOOLS
 
 # Direct API functions for travel planner nodes (not LangChain tools)
-def search_flights_direct(origin: str, destination: str, departure_date: str) -> str:
+def _get_city_coordinates(city: str) -> Optional[Tuple[float, float]]:
+    """Resolve a city's (latitude, longitude) through the shared geocode cache."""
+    def fetch(keyword: str):
+        city_response = amadeus.reference_data.locations.get(
+            keyword=keyword,
+            subType="CITY"
+        )
+        if not city_response.data:
+            return None
+        geo_code = city_response.data[0]['geoCode']
+        return geo_code['latitude'], geo_code['longitude']
+    
+    return geocode_cache.get_or_fetch(city, fetch)
+def search_flights_direct(origin: str, destination: str, departure_date: str) -> SearchResults:
     """
     Direct function to search for flights (not a LangChain tool).
+    Identical searches are served from the shared offer cache.
     """
+    return offer_cache.get_or_fetch(
+        "flights",
+        (origin.upper(), destination.upper(), departure_date),
+        lambda: _fetch_flights(origin, destination, departure_date)
+    )
+
+def _fetch_flights(origin: str, destination: str, departure_date: str) -> SearchResults:
+    """Uncached flight search against the Amadeus SDK."""
     if not amadeus:
-        return "Amadeus API credentials not configured."
+        return SearchResults.not_configured()
     
     try:
         response = amadeus.shopping.flight_offers_search.get(
@@ -658,64 +448,35 @@ def search_flights_direct(origin: str, destination: str, departure_date: str) ->
             departureDate=departure_date,
             adults=1
         )
-        
-        if not response.data:
-            return f"No flights found from {origin} to {destination} on {departure_date}."
-        
-        flights = []
-        for i, flight in enumerate(response.data[:5]):  # Limit to 5 results
-            try:
-                # Handle different pricing structures
-                if 'pricing_options' in flight and flight['pricing_options']:
-                    price = flight['pricing_options'][0]['price']['total']
-                elif 'price' in flight:
-                    price = flight['price']['total']
-                else:
-                    price = "Price not available"
-                
-                # Handle different airline structures
-                if 'validatingAirlineCodes' in flight and flight['validatingAirlineCodes']:
-                    airline = flight['validatingAirlineCodes'][0]
-                elif 'airlines' in flight and flight['airlines']:
-                    airline = flight['airlines'][0]
-                else:
-                    airline = "Airline not specified"
-                
-                flights.append(f"{i+1}. {airline} - ${price}")
-            except (KeyError, IndexError) as e:
-                # If we can't parse this flight, skip it
-                continue
-        
-        if not flights:
-            return f"Found flights from {origin} to {destination} on {departure_date}, but couldn't parse pricing information."
-        
-        return f"Found {len(response.data)} flights from {origin} to {destination} on {departure_date}:\n" + "\n".join(flights)
+        return flight_results(response.data or [], origin, destination, departure_date)
     
     except ResponseError as error:
-        return f"Error searching flights: {error}"
+        return SearchResults(error=f"Error searching flights: {error}")
     except Exception as e:
-        return f"Unexpected error searching flights: {str(e)}"
+        return SearchResults(error=f"Unexpected error searching flights: {str(e)}")
 
-def search_hotels_direct(city: str, check_in_date: str, check_out_date: str, adults: int = 1) -> str:
+def search_hotels_direct(city: str, check_in_date: str, check_out_date: str, adults: int = 1) -> SearchResults:
     """
     Direct function to search for hotels (not a LangChain tool).
+    Identical searches are served from the shared offer cache.
     """
+    return offer_cache.get_or_fetch(
+        "hotels",
+        (normalize_city(city), check_in_date, check_out_date, adults),
+        lambda: _fetch_hotels(city, check_in_date, check_out_date, adults)
+    )
+
+def _fetch_hotels(city: str, check_in_date: str, check_out_date: str, adults: int = 1) -> SearchResults:
+    """Uncached hotel search against the Amadeus SDK."""
     if not amadeus:
-        return "Amadeus API credentials not configured."
+        return SearchResults.not_configured()
     
     try:
         # First get city coordinates for hotel search
-        city_response = amadeus.reference_data.locations.get(
-            keyword=city,
-            subType="CITY"
-        )
-        
-        if not city_response.data:
-            return f"No city found with name {city}."
-        
-        city_data = city_response.data[0]
-        latitude = city_data['geoCode']['latitude']
-        longitude = city_data['geoCode']['longitude']
+        coordinates = _get_city_coordinates(city)
+        if not coordinates:
+            return SearchResults(error=f"No city found with name {city}.")
+        latitude, longitude = coordinates
         
         # Search for hotels
         response = amadeus.shopping.hotel_offers_search.get(
@@ -727,58 +488,26 @@ def search_hotels_direct(city: str, check_in_date: str, check_out_date: str, adu
             radius=5,  # 5km radius
             radiusUnit="KM"
         )
-        
-        if not response.data:
-            return f"No hotels found in {city} for the specified dates."
-        
-        hotels = []
-        for i, hotel in enumerate(response.data[:5]):  # Limit to 5 results
-            try:
-                hotel_name = hotel['hotel']['name']
-                hotel_rating = hotel['hotel'].get('rating', 'N/A')
-                
-                # Get pricing from offers
-                if 'offers' in hotel and hotel['offers']:
-                    offer = hotel['offers'][0]
-                    price = offer['price']['total']
-                    currency = offer['price']['currency']
-                    hotels.append(f"{i+1}. {hotel_name} ({hotel_rating}★) - {price} {currency}")
-                else:
-                    hotels.append(f"{i+1}. {hotel_name} ({hotel_rating}★) - Price not available")
-                    
-            except (KeyError, IndexError) as e:
-                continue
-        
-        if not hotels:
-            return f"Found hotels in {city}, but couldn't parse pricing information."
-        
-        return f"Found {len(response.data)} hotels in {city}:\n" + "\n".join(hotels)
+        return hotel_results(response.data or [], check_in_date, check_out_date)
     
     except ResponseError as error:
-        return f"Error searching hotels: {error}"
+        return SearchResults(error=f"Error searching hotels: {error}")
     except Exception as e:
-        return f"Unexpected error searching hotels: {str(e)}"
+        return SearchResults(error=f"Unexpected error searching hotels: {str(e)}")
 
-def search_activities_direct(city: str) -> str:
+def search_activities_direct(city: str) -> SearchResults:
     """
     Direct function to search for activities (not a LangChain tool).
     """
     if not amadeus:
-        return "Amadeus API credentials not configured."
+        return SearchResults.not_configured()
     
     try:
         # First get city coordinates
-        city_response = amadeus.reference_data.locations.get(
-            keyword=city,
-            subType="CITY"
-        )
-        
-        if not city_response.data:
-            return f"No city found with name {city}."
-        
-        city_data = city_response.data[0]
-        latitude = city_data['geoCode']['latitude']
-        longitude = city_data['geoCode']['longitude']
+        coordinates = _get_city_coordinates(city)
+        if not coordinates:
+            return SearchResults(error=f"No city found with name {city}.")
+        latitude, longitude = coordinates
         
         # Search for points of interest
         response = amadeus.reference_data.locations.points_of_interest.get(
@@ -786,25 +515,116 @@ def search_activities_direct(city: str) -> str:
             longitude=longitude,
             radius=10  # 10km radius
         )
+        return activity_results(response.data or [])
+    
+    except ResponseError as error:
+        return SearchResults(error=f"Error searching activities: {error}")
+    except Exception as e:
+        return SearchResults(error=f"Unexpected error searching activities: {str(e)}")
+
+# Async API functions for FastAPI handlers (non-blocking, shared connection pool)
+async def _get_city_coordinates_async(city: str) -> Optional[Tuple[float, float]]:
+    """Async variant of _get_city_coordinates; concurrent lookups for one city share a request."""
+    async def fetch(keyword: str):
+        city_data = await amadeus_service.get_locations(keyword, sub_type="CITY")
+        if not city_data:
+            return None
+        geo_code = city_data[0]['geoCode']
+        return geo_code['latitude'], geo_code['longitude']
+    
+    return await geocode_cache.get_or_fetch_async(city, fetch)
+
+async def search_flights_async(origin: str, destination: str, departure_date: str) -> SearchResults:
+    """
+    Async function to search for flights without blocking the event loop.
+    Identical searches are served from the shared offer cache.
+    """
+    return await offer_cache.get_or_fetch_async(
+        "flights",
+        (origin.upper(), destination.upper(), departure_date),
+        lambda: _fetch_flights_async(origin, destination, departure_date)
+    )
+
+async def _fetch_flights_async(origin: str, destination: str, departure_date: str) -> SearchResults:
+    """Uncached flight search against the async Amadeus service."""
+    if not amadeus_service.enabled:
+        return SearchResults.not_configured()
+    
+    try:
+        flight_data = await amadeus_service.search_flight_offers(origin, destination, departure_date)
+        return flight_results(flight_data, origin, destination, departure_date)
+    
+    except AmadeusServiceError as error:
+        return SearchResults(error=f"Error searching flights: {error}")
+    except Exception as e:
+        return SearchResults(error=f"Unexpected error searching flights: {str(e)}")
+
+async def search_hotels_async(city: str, check_in_date: str, check_out_date: str, adults: int = 1) -> SearchResults:
+    """
+    Async function to search for hotels without blocking the event loop.
+    Identical searches are served from the shared offer cache.
+    """
+    return await offer_cache.get_or_fetch_async(
+        "hotels",
+        (normalize_city(city), check_in_date, check_out_date, adults),
+        lambda: _fetch_hotels_async(city, check_in_date, check_out_date, adults)
+    )
+
+async def _fetch_hotels_async(city: str, check_in_date: str, check_out_date: str, adults: int = 1) -> SearchResults:
+    """Uncached hotel search against the async Amadeus service."""
+    if not amadeus_service.enabled:
+        return SearchResults.not_configured()
+    
+    try:
+        # First get city coordinates for hotel search
+        coordinates = await _get_city_coordinates_async(city)
+        if not coordinates:
+            return SearchResults(error=f"No city found with name {city}.")
+        latitude, longitude = coordinates
         
-        if not response.data:
-            return f"No activities found in {city}."
-        
-        activities = []
-        for i, poi in enumerate(response.data[:10]):  # Limit to 10 results
-            try:
-                name = poi['name']
-                category = poi.get('category', 'Attraction')
-                activities.append(f"{i+1}. {name} ({category})")
-            except (KeyError, IndexError) as e:
-                continue
-        
-        if not activities:
-            return f"Found points of interest in {city}, but couldn't parse information."
+        hotel_data = await amadeus_service.search_hotel_offers(
+            latitude, longitude, check_in_date, check_out_date, adults=adults
+        )
+        return hotel_results(hotel_data, check_in_date, check_out_date)
+    
+    except AmadeusServiceError as error:
+        return SearchResults(error=f"Error searching hotels: {error}")
+    except Exception as e:
+        return SearchResults(error=f"Unexpected error searching hotels: {str(e)}")
+
+async def search_activities_async(city: str) -> SearchResults:
+    """
+    Async function to search for activities without blocking the event loop.
+    """
+    if not amadeus_service.enabled:
+        return SearchResults.not_configured()
+    
+    try:
+        # First get city coordinates
+        coordinates = await _get_city_coordinates_async(city)
+        if not coordinates:
+            return SearchResults(error=f"No city found with name {city}.")
+        latitude, longitude = coordinates
         
-        return f"Popular activities in {city}:\n" + "\n".join(activities)
+        poi_data = await amadeus_service.get_points_of_interest(latitude, longitude)
+        return activity_results(poi_data)
     
-    except ResponseError as error:
-        return f"Error searching activities: {error}"
+    except AmadeusServiceError as error:
+        return SearchResults(error=f"Error searching activities: {error}")
     except Exception as e:
-        return f"Unexpected error searching activities: {str(e)}" 
\ No newline at end of file
+        return SearchResults(error=f"Unexpected error searching activities: {str(e)}")
+
+# Native async tool implementations so tool.ainvoke() never blocks the event loop
+async def _search_flights_tool_async(origin: str, destination: str, departure_date: str) -> str:
+    results = await search_flights_async(origin, destination, departure_date)
+    return render_flight_results(results, origin, destination, departure_date)
+
+async def _search_hotels_tool_async(city: str, check_in_date: str, check_out_date: str, adults: int = 1) -> str:
+    return render_hotel_results(await search_hotels_async(city, check_in_date, check_out_date, adults), city)
+
+async def _search_activities_tool_async(city: str) -> str:
+    return render_activity_results(await search_activities_async(city), city)
+
+search_flights.coroutine = _search_flights_tool_async
+search_hotels.coroutine = _search_hotels_tool_async
+search_activities.coroutine = _search_activities_tool_async
@@ -0,0 +1,26 @@
+"""Add leaderboard indexes to reputation summaries
+
+Revision ID: 2f9b6c1d8e47
+Revises: d71e4b2a9c36
+Create Date: 2026-10-17 13:05:12.440183
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2f9b6c1d8e47'
+down_revision = 'd71e4b2a9c36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_reputation_summaries_score', 'reputation_summaries', ['reputation_score', 'wallet_address'], unique=False)
+    op.create_index('ix_reputation_summaries_level_score', 'reputation_summaries', ['reputation_level', 'reputation_score', 'wallet_address'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reputation_summaries_level_score', table_name='reputation_summaries')
+    op.drop_index('ix_reputation_summaries_score', table_name='reputation_summaries')
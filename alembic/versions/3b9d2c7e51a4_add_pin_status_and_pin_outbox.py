@@ -0,0 +1,51 @@
+"""Add plan pin status and IPFS pin outbox
+
+Revision ID: 3b9d2c7e51a4
+Revises: 64af1270e238
+Create Date: 2026-10-17 10:12:31.418207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '3b9d2c7e51a4'
+down_revision = '64af1270e238'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('plans', sa.Column('pin_status', sa.String(length=20), server_default='pending', nullable=False))
+    op.add_column('plans', sa.Column('ipfs_cid', sa.String(length=100), nullable=True))
+    op.create_check_constraint(
+        'valid_pin_status', 'plans',
+        "pin_status IN ('pending', 'pinned', 'failed', 'disabled')"
+    )
+
+    op.create_table('pin_outbox',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=30), nullable=False),
+    sa.Column('plan_id', sa.UUID(), nullable=True),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('status', sa.String(length=20), server_default='pending', nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('cid', sa.String(length=100), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.CheckConstraint("status IN ('pending', 'in_progress', 'done', 'failed')", name='valid_pin_job_status'),
+    sa.ForeignKeyConstraint(['plan_id'], ['plans.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_pin_outbox_claim', 'pin_outbox', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_pin_outbox_claim', table_name='pin_outbox')
+    op.drop_table('pin_outbox')
+    op.drop_constraint('valid_pin_status', 'plans', type_='check')
+    op.drop_column('plans', 'ipfs_cid')
+    op.drop_column('plans', 'pin_status')
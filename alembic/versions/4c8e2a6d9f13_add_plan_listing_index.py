@@ -0,0 +1,27 @@
+"""Add wallet plan listing index
+
+Revision ID: 4c8e2a6d9f13
+Revises: 9a4c3e7f1b52
+Create Date: 2026-10-17 16:42:08.517306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c8e2a6d9f13'
+down_revision = '9a4c3e7f1b52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_plans_wallet_created', 'plans',
+        ['user_wallet', sa.text('created_at DESC'), sa.text('id DESC')], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_plans_wallet_created', table_name='plans')
@@ -0,0 +1,31 @@
+"""Link reputation record pin jobs to their records
+
+Revision ID: 7d3b9e2f4a61
+Revises: 4c8e2a6d9f13
+Create Date: 2026-10-17 18:05:31.240917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d3b9e2f4a61'
+down_revision = '4c8e2a6d9f13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('reputation_records', sa.Column('ipfs_cid', sa.String(length=255), nullable=True))
+    op.add_column('pin_outbox', sa.Column('reputation_record_id', sa.BigInteger(), nullable=True))
+    op.create_foreign_key(
+        'pin_outbox_reputation_record_id_fkey', 'pin_outbox', 'reputation_records',
+        ['reputation_record_id'], ['id'], ondelete='CASCADE'
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('pin_outbox_reputation_record_id_fkey', 'pin_outbox', type_='foreignkey')
+    op.drop_column('pin_outbox', 'reputation_record_id')
+    op.drop_column('reputation_records', 'ipfs_cid')
@@ -0,0 +1,40 @@
+"""Add IPFS object index for batched, deduplicated pinning
+
+Revision ID: 8e4f61a0c2d7
+Revises: 3b9d2c7e51a4
+Create Date: 2026-10-17 11:03:52.770914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4f61a0c2d7'
+down_revision = '3b9d2c7e51a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('ipfs_objects',
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('kind', sa.String(length=30), nullable=False),
+    sa.Column('root_cid', sa.String(length=100), nullable=False),
+    sa.Column('path', sa.String(length=100), nullable=False),
+    sa.Column('size_bytes', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('content_hash')
+    )
+    op.create_index(op.f('ix_ipfs_objects_root_cid'), 'ipfs_objects', ['root_cid'], unique=False)
+
+    # Object paths (<directory cid>/<file>) are longer than a bare CID
+    op.alter_column('plans', 'ipfs_cid', existing_type=sa.String(length=100), type_=sa.String(length=255))
+    op.alter_column('pin_outbox', 'cid', existing_type=sa.String(length=100), type_=sa.String(length=255))
+
+
+def downgrade() -> None:
+    op.alter_column('pin_outbox', 'cid', existing_type=sa.String(length=255), type_=sa.String(length=100))
+    op.alter_column('plans', 'ipfs_cid', existing_type=sa.String(length=255), type_=sa.String(length=100))
+    op.drop_index(op.f('ix_ipfs_objects_root_cid'), table_name='ipfs_objects')
+    op.drop_table('ipfs_objects')
@@ -0,0 +1,40 @@
+"""Add reputation record log
+
+Revision ID: 9a4c3e7f1b52
+Revises: 2f9b6c1d8e47
+Create Date: 2026-10-17 13:42:27.615904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '9a4c3e7f1b52'
+down_revision = '2f9b6c1d8e47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('reputation_records',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('record_id', sa.String(length=64), nullable=False),
+    sa.Column('wallet_address', sa.String(length=42), nullable=False),
+    sa.Column('event_type', sa.String(length=30), nullable=False),
+    sa.Column('event_timestamp', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('record', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('record_hash', sa.String(length=64), nullable=False),
+    sa.Column('previous_hash', sa.String(length=64), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('record_id')
+    )
+    op.create_index('ix_reputation_records_wallet_id', 'reputation_records', ['wallet_address', 'id'], unique=False)
+    op.create_index('ix_reputation_records_wallet_time', 'reputation_records', ['wallet_address', 'event_timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reputation_records_wallet_time', table_name='reputation_records')
+    op.drop_index('ix_reputation_records_wallet_id', table_name='reputation_records')
+    op.drop_table('reputation_records')
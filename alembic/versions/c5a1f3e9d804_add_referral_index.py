@@ -0,0 +1,38 @@
+"""Add referral index
+
+Revision ID: c5a1f3e9d804
+Revises: 8e4f61a0c2d7
+Create Date: 2026-10-17 11:48:06.203557
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'c5a1f3e9d804'
+down_revision = '8e4f61a0c2d7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('referrals',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('cid', sa.String(length=255), nullable=False),
+    sa.Column('referrer_wallet', sa.String(length=42), nullable=False),
+    sa.Column('referee_wallet', sa.String(length=42), nullable=True),
+    sa.Column('payment_transaction_id', sa.String(length=100), nullable=True),
+    sa.Column('record', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('cid')
+    )
+    op.create_index(op.f('ix_referrals_referrer_wallet'), 'referrals', ['referrer_wallet'], unique=False)
+    op.create_index(op.f('ix_referrals_referee_wallet'), 'referrals', ['referee_wallet'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_referrals_referee_wallet'), table_name='referrals')
+    op.drop_index(op.f('ix_referrals_referrer_wallet'), table_name='referrals')
+    op.drop_table('referrals')
@@ -0,0 +1,50 @@
+"""Add materialized reputation summaries
+
+Revision ID: d71e4b2a9c36
+Revises: c5a1f3e9d804
+Create Date: 2026-10-17 12:31:44.918270
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'd71e4b2a9c36'
+down_revision = 'c5a1f3e9d804'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('reputation_summaries',
+    sa.Column('wallet_address', sa.String(length=42), nullable=False),
+    sa.Column('reputation_level', sa.String(length=20), server_default='new', nullable=False),
+    sa.Column('total_bookings', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('completed_bookings', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('cancelled_bookings', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('disputed_bookings', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('total_spent_usd', sa.Numeric(precision=14, scale=2), server_default='0', nullable=False),
+    sa.Column('total_spent_usdc', sa.Numeric(precision=20, scale=6), server_default='0', nullable=False),
+    sa.Column('total_refunds', sa.Numeric(precision=14, scale=2), server_default='0', nullable=False),
+    sa.Column('average_rating', sa.Numeric(precision=3, scale=2), nullable=True),
+    sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rating_total', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('completion_rate', sa.Numeric(precision=5, scale=4), server_default='0', nullable=False),
+    sa.Column('dispute_rate', sa.Numeric(precision=5, scale=4), server_default='0', nullable=False),
+    sa.Column('countries_visited', postgresql.JSONB(astext_type=sa.Text()), server_default='[]', nullable=False),
+    sa.Column('total_travel_days', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('total_referrals', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('successful_referrals', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('total_commission_earned', sa.Numeric(precision=20, scale=6), server_default='0', nullable=False),
+    sa.Column('total_bonus_earned', sa.Numeric(precision=20, scale=6), server_default='0', nullable=False),
+    sa.Column('reputation_score', sa.Numeric(precision=7, scale=2), server_default='0', nullable=False),
+    sa.Column('first_booking_date', sa.Date(), nullable=True),
+    sa.Column('last_booking_date', sa.Date(), nullable=True),
+    sa.Column('last_updated', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('wallet_address')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('reputation_summaries')
@@ -0,0 +1,246 @@
+"""
+Async Amadeus Service for flight, hotel and points-of-interest searches
+
+The official ``amadeus`` SDK is synchronous, so calling it from ``async def``
+FastAPI handlers blocks the event loop. This service talks to the same REST
+endpoints over a shared httpx connection pool (HTTP/2 when available), with
+per-call timeouts and a bound on concurrent upstream requests.
+"""
+import os
+import time
+import asyncio
+from typing import Dict, Any, Optional, List
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+AMADEUS_HOSTS = {
+    "test": "test.api.amadeus.com",
+    "production": "api.amadeus.com"
+}
+
+# Refresh the OAuth token this many seconds before it actually expires
+TOKEN_EXPIRY_BUFFER = 10
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class AmadeusServiceError(Exception):
+    """Raised when an Amadeus API call fails or times out"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class AmadeusAsyncService:
+    def __init__(
+        self,
+        client_id: Optional[str] = None,
+        client_secret: Optional[str] = None,
+        hostname: Optional[str] = None,
+        timeout: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        max_connections: Optional[int] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        """
+        Initialize async Amadeus service
+
+        Args:
+            client_id: Amadeus client ID (defaults to AMADEUS_CLIENT_ID env var)
+            client_secret: Amadeus client secret (defaults to AMADEUS_CLIENT_SECRET env var)
+            hostname: "test" or "production" (defaults to AMADEUS_HOSTNAME env var, then "test")
+            timeout: Per-call timeout in seconds (defaults to AMADEUS_TIMEOUT env var, then 10)
+            max_concurrency: Maximum in-flight upstream calls (defaults to AMADEUS_MAX_CONCURRENCY env var, then 8)
+            max_connections: Connection pool size (defaults to AMADEUS_MAX_CONNECTIONS env var, then 20)
+            transport: Optional httpx transport override (used by tests and benchmarks)
+        """
+        self.client_id = client_id or os.getenv("AMADEUS_CLIENT_ID")
+        self.client_secret = client_secret or os.getenv("AMADEUS_CLIENT_SECRET")
+        hostname = hostname or os.getenv("AMADEUS_HOSTNAME", "test")
+        self.base_url = f"https://{AMADEUS_HOSTS.get(hostname, AMADEUS_HOSTS['test'])}"
+        self.timeout = timeout or float(os.getenv("AMADEUS_TIMEOUT", "10"))
+        self.max_concurrency = max_concurrency or int(os.getenv("AMADEUS_MAX_CONCURRENCY", "8"))
+        self.max_connections = max_connections or int(os.getenv("AMADEUS_MAX_CONNECTIONS", "20"))
+        self.enabled = bool(self.client_id and self.client_secret)
+        self.transport = transport
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._token_lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._access_token: Optional[str] = None
+        self._token_expires_at = 0.0
+
+    def _ensure_client(self) -> httpx.AsyncClient:
+        """Create the pooled client lazily, once per event loop"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            # A client is bound to the loop it was created on; scripts that call
+            # asyncio.run() repeatedly get a fresh pool each time.
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=HTTP2_AVAILABLE,
+                transport=self.transport,
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._token_lock = asyncio.Lock()
+            self._loop = loop
+        return self._client
+
+    async def close(self):
+        """Close the shared connection pool"""
+        if self._client is not None:
+            try:
+                await self._client.aclose()
+            finally:
+                self._client = None
+                self._loop = None
+
+    async def _get_access_token(self) -> str:
+        """Return a valid OAuth2 access token, refreshing it if needed"""
+        if self._access_token and time.time() < self._token_expires_at:
+            return self._access_token
+
+        client = self._ensure_client()
+        async with self._token_lock:
+            # Another coroutine may have refreshed while we waited for the lock
+            if self._access_token and time.time() < self._token_expires_at:
+                return self._access_token
+
+            try:
+                response = await client.post(
+                    "/v1/security/oauth2/token",
+                    data={
+                        "grant_type": "client_credentials",
+                        "client_id": self.client_id,
+                        "client_secret": self.client_secret
+                    }
+                )
+            except httpx.TimeoutException as e:
+                raise AmadeusServiceError(f"Amadeus authentication timed out: {e}")
+            except httpx.HTTPError as e:
+                raise AmadeusServiceError(f"Amadeus authentication failed: {e}")
+
+            if response.status_code != 200:
+                raise AmadeusServiceError(
+                    f"Amadeus authentication failed: {response.text}",
+                    status_code=response.status_code
+                )
+
+            data = response.json()
+            self._access_token = data.get("access_token")
+            self._token_expires_at = time.time() + data.get("expires_in", 0) - TOKEN_EXPIRY_BUFFER
+            return self._access_token
+
+    async def _get(self, path: str, params: Dict[str, Any], timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Make an authenticated GET request and return the response ``data`` list"""
+        if not self.enabled:
+            raise AmadeusServiceError("Amadeus API credentials not configured.")
+
+        client = self._ensure_client()
+        async with self._semaphore:
+            token = await self._get_access_token()
+            timeout = timeout or self.timeout
+            try:
+                # httpx timeouts apply per connect/read phase; wait_for bounds the whole call
+                response = await asyncio.wait_for(
+                    client.get(path, params=params, headers={"Authorization": f"Bearer {token}"}),
+                    timeout=timeout
+                )
+            except (asyncio.TimeoutError, httpx.TimeoutException):
+                raise AmadeusServiceError(f"Amadeus request to {path} timed out after {timeout}s")
+            except httpx.HTTPError as e:
+                raise AmadeusServiceError(f"Amadeus request to {path} failed: {e}")
+
+        if response.status_code == 401:
+            # Token revoked or expired early; force a refresh on the next call
+            self._access_token = None
+        if response.status_code >= 400:
+            raise AmadeusServiceError(
+                f"[{response.status_code}] {response.text}",
+                status_code=response.status_code
+            )
+
+        return response.json().get("data", [])
+
+    async def search_flight_offers(
+        self,
+        origin: str,
+        destination: str,
+        departure_date: str,
+        adults: int = 1,
+        timeout: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Search flight offers between two IATA airport codes"""
+        return await self._get(
+            "/v2/shopping/flight-offers",
+            {
+                "originLocationCode": origin,
+                "destinationLocationCode": destination,
+                "departureDate": departure_date,
+                "adults": adults
+            },
+            timeout=timeout
+        )
+
+    async def get_locations(self, keyword: str, sub_type: str = "CITY", timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Look up airports or cities by keyword"""
+        return await self._get(
+            "/v1/reference-data/locations",
+            {"keyword": keyword, "subType": sub_type},
+            timeout=timeout
+        )
+
+    async def search_hotel_offers(
+        self,
+        latitude: float,
+        longitude: float,
+        check_in_date: str,
+        check_out_date: str,
+        adults: int = 1,
+        radius: int = 5,
+        timeout: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Search hotel offers around a coordinate"""
+        return await self._get(
+            "/v3/shopping/hotel-offers",
+            {
+                "latitude": latitude,
+                "longitude": longitude,
+                "checkInDate": check_in_date,
+                "checkOutDate": check_out_date,
+                "adults": adults,
+                "radius": radius,
+                "radiusUnit": "KM"
+            },
+            timeout=timeout
+        )
+
+    async def get_points_of_interest(
+        self,
+        latitude: float,
+        longitude: float,
+        radius: int = 10,
+        timeout: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Search points of interest around a coordinate"""
+        return await self._get(
+            "/v1/reference-data/locations/pois",
+            {"latitude": latitude, "longitude": longitude, "radius": radius},
+            timeout=timeout
+        )
+
+# Global instance
+amadeus_service = AmadeusAsyncService()
@@ -3,8 +3,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.middleware.httpsredirect import HTTPSRedirectMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
-from pydantic import BaseModel, Field
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, model_validator
 from typing import List, Optional, Dict, Any
 import uvicorn
 from wallet import get_wallet_balances_async
@@ -14,19 +15,27 @@ import os
 from tools.ipfs import retrieve_referrals_by_wallet
 from pinata_service import pinata_service
 import uuid
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 import json
 from sqlalchemy.orm import Session
-from database import get_db, init_db
-from db_service import PlanService
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db, get_async_db, init_db, close_async_db, start_replica_probes, stop_replica_probes, SessionLocal, AsyncSessionLocal
+from amadeus_service import amadeus_service
+from db_service import AsyncPlanService, ReputationSummaryService, ReputationRecordService
+from reputation_chain import verify_wallet_chain
+from leaderboard import leaderboard
+from pin_queue import enqueue_pin, pin_worker, PIN_KIND_TRAVEL_PLAN, PIN_KIND_REPUTATION_RECORD
+from plan_pipeline import initial_plan_state, run_plan_pipeline, stream_plan_pipeline
 from x402_middleware import X402Middleware, TravelBookingPaymentService, setup_x402_payments
+from facilitator_client import facilitator_client
 from reputation_models import (
     ReputationRecord, ReputationSummary, EventType, TripStatus,
     TripData, OutcomeData, VerificationData, ReferralData,
-    create_booking_record, create_completion_record, IPFSStorageUtils
+    UNSETTLED_TX_HASH, UNPINNED_IPFS_HASH
 )
 from transaction_log import log_transaction
 from reputation_models import ReputationLevel
+from reputation_scoring import LEVEL_DETAILS, scoring_policy
 from decimal import Decimal
 
 # --- x402 payment system initialization (TOP-LEVEL) ---
@@ -40,7 +49,7 @@ app = FastAPI(title="AI Agent Wallet API", version="1.0.0")
 
 # Register x402 middleware BEFORE app starts
 if x402_middleware:
-    app.add_middleware(BaseHTTPMiddleware, dispatch=x402_middleware)
+    app.add_middleware(x402_middleware.bind)
     print("✅ [BOOT] x402 middleware registered with FastAPI app")
 else:
     print("⚠️ [BOOT] x402 middleware not registered (payment system unavailable)")
@@ -52,8 +61,22 @@ async def startup_event():
     # Initialize database
     init_db()
     print("✅ Database initialized")
+    start_replica_probes()
+    if os.getenv("PIN_QUEUE_WORKER", "true").lower() == "true":
+        pin_worker.start()
+    # Cold or flushed Redis: reads use Postgres while the index rebuilds in the background
+    await run_in_threadpool(leaderboard.ensure_index)
     print("✅ Simplified architecture initialized (no LangGraph dependency)")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Release the pooled Amadeus and x402 facilitator HTTP connections
+    await amadeus_service.close()
+    await facilitator_client.close()
+    await pin_worker.stop()
+    stop_replica_probes()
+    await close_async_db()
+
 # Allow CORS for modern frontend frameworks
 app.add_middleware(
     CORSMiddleware,
@@ -79,6 +102,18 @@ class GeneratePlanRequest(BaseModel):
     budget: float = Field(..., gt=0, description="Budget in USD")
     user_wallet: Optional[str] = Field(None, description="User's wallet address")
     session_id: Optional[str] = Field(None, description="Session identifier")
+    departure_date: Optional[date] = Field(None, description="Departure / hotel check-in date (defaults to 30 days from today)")
+    return_date: Optional[date] = Field(None, description="Return / hotel check-out date (defaults to 7 nights after departure)")
+
+    @model_validator(mode="after")
+    def check_dates(self):
+        if self.departure_date and self.departure_date < date.today():
+            raise ValueError("departure_date is in the past")
+        if self.return_date and not self.departure_date:
+            raise ValueError("return_date needs a departure_date")
+        if self.return_date and self.return_date <= self.departure_date:
+            raise ValueError("return_date must be after departure_date")
+        return self
 
 class FlightInfo(BaseModel):
     from_location: str
@@ -135,10 +170,13 @@ class UserPlan(BaseModel):
     total_cost: float
     created_at: str
     status: str
+    pin_status: Optional[str] = None
+    ipfs_cid: Optional[str] = None
 
 class GetUserPlansResponse(BaseModel):
     status: str
     plans: List[UserPlan]
+    next_cursor: Optional[str] = None
     error: Optional[str] = None
 
 class AgentRequest(BaseModel):
@@ -188,6 +226,7 @@ class ReputationResponse(BaseModel):
     reputation_summary: Optional[ReputationSummary] = None
     recent_records: Optional[List[ReputationRecord]] = None
     total_records: int = 0
+    next_cursor: Optional[str] = None
     error: Optional[str] = None
 
 class ReputationEventResponse(BaseModel):
@@ -199,6 +238,7 @@ class ReputationEventResponse(BaseModel):
 
 class LeaderboardEntry(BaseModel):
     """Model for leaderboard entries"""
+    rank: int
     wallet_address: str
     reputation_score: Decimal
     reputation_level: ReputationLevel
@@ -212,6 +252,16 @@ class LeaderboardResponse(BaseModel):
     status: str
     leaderboard: List[LeaderboardEntry]
     total_participants: int
+    next_cursor: Optional[str] = None
+    error: Optional[str] = None
+
+class LeaderboardRankResponse(BaseModel):
+    """Response model for a single wallet's leaderboard position"""
+    status: str
+    wallet_address: str
+    rank: Optional[int] = None
+    level: Optional[ReputationLevel] = None
+    total_participants: int = 0
     error: Optional[str] = None
 
 # ============================================================================
@@ -312,95 +362,101 @@ def generate_mock_plan(destination: str, budget: float):
 # API Endpoints
 # ============================================================================
 
+def build_structured_plan(destination: str, plan: dict) -> TravelPlan:
+    """Convert an assembled plan dict into the API TravelPlan model"""
+    flights = [
+        FlightInfo(
+            from_location=f.get('from', 'Unknown'),
+            to_location=f.get('to', 'Unknown'),
+            airline=f.get('airline', 'Unknown'),
+            dates=f.get('dates', 'TBD'),
+            price=f.get('price', 0)
+        ) for f in plan.get('flights', [])
+    ]
+    
+    hotels = [
+        HotelInfo(
+            name=h.get('name', 'Unknown Hotel'),
+            location=h.get('location', 'Unknown'),
+            price_per_night=h.get('price_per_night', 0),
+            nights=h.get('nights', 0),
+            total=h.get('total', 0)
+        ) for h in plan.get('hotels', [])
+    ]
+    
+    total_cost = plan.get('total_cost', 0)
+    platform_fee = plan.get('platform_fee', 0)
+    
+    return TravelPlan(
+        destination=destination,
+        flights=flights,
+        hotels=hotels,
+        activities=plan.get('activities', []),
+        total_cost=total_cost,
+        platform_fee=platform_fee,
+        grand_total=total_cost + platform_fee,
+        plan_id="",  # Will be set after database save
+        created_at=""  # Will be set after database save
+    )
+
+async def save_generated_plan(request: GeneratePlanRequest, state: dict, db: AsyncSession) -> GeneratePlanResponse:
+    """Persist a finished pipeline state and build the API response"""
+    if state.get('error'):
+        return GeneratePlanResponse(status="error", error=state['error'])
+    
+    plan = state.get('plan', {})
+    structured_plan = build_structured_plan(request.destination, plan)
+    
+    # Save the plan and its IPFS pin job in one transaction; pinning happens in the background
+    db_plan = await AsyncPlanService.create_plan(
+        db=db,
+        user_wallet=request.user_wallet or "",
+        destination=request.destination,
+        budget=int(request.budget),
+        plan_data=plan,
+        status="generated",
+        commit=False
+    )
+    
+    # Update structured plan with database values
+    structured_plan.plan_id = str(db_plan.id)
+    structured_plan.created_at = db_plan.created_at.isoformat() if db_plan.created_at else ""
+    
+    plan_data_for_ipfs = {
+        "plan_id": str(db_plan.id),
+        "destination": request.destination,
+        "budget": request.budget,
+        "user_wallet": request.user_wallet or "",
+        "plan_data": plan,
+        "structured_plan": structured_plan.dict(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+    pin_job = await db.run_sync(
+        enqueue_pin, PIN_KIND_TRAVEL_PLAN, pinata_service.travel_plan_metadata(plan_data_for_ipfs), plan=db_plan
+    )
+    await db.commit()
+    
+    if pin_job is not None:
+        pin_worker.wake()
+        print(f"✅ Travel plan {db_plan.id} queued for IPFS pinning")
+    
+    return GeneratePlanResponse(
+        status="success",
+        plan=structured_plan,
+        formatted_plan=format_travel_plan(state)
+    )
+
 @app.post("/generate_plan", response_model=GeneratePlanResponse)
-async def generate_plan(request: GeneratePlanRequest, db: Session = Depends(get_db)):
+async def generate_plan(request: GeneratePlanRequest, db: AsyncSession = Depends(get_async_db)):
     """
-    Generate a travel plan using simplified architecture (no LangGraph).
+    Generate a travel plan by running the flight, hotel and activity searches concurrently.
     """
     try:
-        # Generate mock plan
-        plan = generate_mock_plan(request.destination, request.budget)
-        
-        # Convert to structured format
-        flights = [
-            FlightInfo(
-                from_location=f.get('from', 'Unknown'),
-                to_location=f.get('to', 'Unknown'),
-                airline=f.get('airline', 'Unknown'),
-                dates=f.get('dates', 'TBD'),
-                price=f.get('price', 0)
-            ) for f in plan.get('flights', [])
-        ]
-        
-        hotels = [
-            HotelInfo(
-                name=h.get('name', 'Unknown Hotel'),
-                location=h.get('location', 'Unknown'),
-                price_per_night=h.get('price_per_night', 0),
-                nights=h.get('nights', 0),
-                total=h.get('total', 0)
-            ) for h in plan.get('hotels', [])
-        ]
-        
-        activities = plan.get('activities', [])
-        total_cost = plan.get('total_cost', 0)
-        platform_fee = plan.get('platform_fee', 0)
-        grand_total = total_cost + platform_fee
-        
-        # Create structured plan
-        structured_plan = TravelPlan(
-            destination=request.destination,
-            flights=flights,
-            hotels=hotels,
-            activities=activities,
-            total_cost=total_cost,
-            platform_fee=platform_fee,
-            grand_total=grand_total,
-            plan_id="",  # Will be set after database save
-            created_at=""  # Will be set after database save
-        )
-        
-        # Save to database
-        db_plan = PlanService.create_plan(
-            db=db,
-            user_wallet=request.user_wallet or "",
-            destination=request.destination,
-            budget=int(request.budget),
-            plan_data=plan,
-            status="generated"
-        )
-        
-        # Update structured plan with database values
-        structured_plan.plan_id = str(db_plan.id)
-        structured_plan.created_at = db_plan.created_at.isoformat() if db_plan.created_at else ""
-        
-        # Store travel plan on IPFS
-        try:
-            plan_data_for_ipfs = {
-                "plan_id": str(db_plan.id),
-                "destination": request.destination,
-                "budget": request.budget,
-                "user_wallet": request.user_wallet or "",
-                "plan_data": plan,
-                "structured_plan": structured_plan.dict(),
-                "timestamp": datetime.utcnow().isoformat()
-            }
-            
-            ipfs_hash = pinata_service.store_travel_plan(plan_data_for_ipfs)
-            print(f"✅ Travel plan stored on IPFS: {ipfs_hash}")
-            
-        except Exception as ipfs_error:
-            print(f"⚠️ IPFS storage failed: {ipfs_error}")
-        
-        # Generate formatted plan
-        mock_state = {"plan": plan}
-        formatted_plan = format_travel_plan(mock_state)
-        
-        return GeneratePlanResponse(
-            status="success",
-            plan=structured_plan,
-            formatted_plan=formatted_plan
-        )
+        state = await run_plan_pipeline(initial_plan_state(
+            request.destination, request.budget, request.user_wallet, request.session_id,
+            request.departure_date, request.return_date
+        ))
+        return await save_generated_plan(request, state, db)
         
     except Exception as e:
         return GeneratePlanResponse(
@@ -408,45 +464,91 @@ async def generate_plan(request: GeneratePlanRequest, db: Session = Depends(get_
             error=f"Failed to generate plan: {str(e)}"
         )
 
+def format_stream_event(event: str, data: dict, sse: bool) -> str:
+    """Encode one streaming event as an SSE frame or an NDJSON line"""
+    if sse:
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps({"event": event, **data}) + "\n"
+
+@app.post("/generate_plan/stream")
+async def generate_plan_stream(request: GeneratePlanRequest, http_request: Request):
+    """
+    Streaming variant of /generate_plan.
+    
+    Emits a ``started`` event immediately, then ``flights``, ``hotels`` and
+    ``activities`` in the order their searches finish, then a ``plan`` event
+    whose data is the same body /generate_plan returns. Responds with
+    Server-Sent Events when the client accepts text/event-stream, NDJSON otherwise.
+    """
+    sse = "text/event-stream" in http_request.headers.get("accept", "")
+    
+    async def events():
+        yield format_stream_event("started", {"destination": request.destination}, sse)
+        try:
+            async for event, update in stream_plan_pipeline(initial_plan_state(
+                request.destination, request.budget, request.user_wallet, request.session_id,
+                request.departure_date, request.return_date
+            )):
+                if event != "plan":
+                    yield format_stream_event(event, {"data": update[event], "timing": update.get('node_timings', {})}, sse)
+                    continue
+                
+                # The request-scoped session from get_async_db is closed before a streaming body runs
+                async with AsyncSessionLocal() as db:
+                    response = await save_generated_plan(request, update, db)
+                yield format_stream_event("plan", {"data": response.dict(), "timings": update.get('node_timings', {})}, sse)
+        except Exception as e:
+            response = GeneratePlanResponse(status="error", error=f"Failed to generate plan: {str(e)}")
+            yield format_stream_event("plan", {"data": response.dict()}, sse)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/confirm_plan", response_model=ConfirmPlanResponse)
-async def confirm_plan(request: ConfirmPlanRequest, db: Session = Depends(get_db)):
+async def confirm_plan(request: ConfirmPlanRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Confirm a travel plan and process payment/booking.
     """
     try:
-        # Retrieve the plan from database
-        plan = PlanService.get_plan_by_id(db, request.plan_id)
+        # Confirm in one guarded UPDATE ... RETURNING: only a generated plan can be
+        # confirmed, so of several concurrent confirms exactly one gets the plan back
+        plan = await AsyncPlanService.update_plan_status(db, request.plan_id, "confirmed", commit=False)
         if not plan:
+            existing = await AsyncPlanService.get_plan_by_id(db, request.plan_id)
+            if existing is None:
+                return ConfirmPlanResponse(
+                    status="error",
+                    payment_status="failed",
+                    confirmation_message="Plan not found",
+                    error="Invalid plan ID"
+                )
             return ConfirmPlanResponse(
                 status="error",
                 payment_status="failed",
-                confirmation_message="Plan not found",
-                error="Invalid plan ID"
-            )
-        
-        # Update plan status to confirmed
-        updated_plan = PlanService.update_plan_status(db, request.plan_id, "confirmed")
-        if not updated_plan:
-            return ConfirmPlanResponse(
-                status="error",
-                payment_status="failed",
-                confirmation_message="Failed to update plan status",
-                error="Database update failed"
+                confirmation_message=f"Plan is already {existing.status}",
+                error="Plan cannot be confirmed"
             )
         
-        # Create reputation record for booking creation
+        # The status change, the booking's reputation record, its pin job and
+        # the summary update commit together
+        reputation_record = None
         try:
             # Extract plan data for reputation record
             plan_data = plan.plan_data or {}
+            start_date = date.today()  # Default start date
+            cost = Decimal(str(plan_data.get('grand_total', 0))).quantize(Decimal('0.01'))
             
             # Create TripData for reputation record
             trip_data = TripData(
                 destination=plan.destination,
-                cost_usd=Decimal(str(plan_data.get('grand_total', 0))),
-                cost_usdc=Decimal(str(plan_data.get('grand_total', 0))),  # 1:1 for demo
+                cost_usd=cost,
+                cost_usdc=cost,  # 1:1 for demo
                 duration_days=7,  # Default duration
-                start_date=date.today(),  # Default start date
-                end_date=date.today(),  # Will be updated with actual dates
+                start_date=start_date,
+                end_date=start_date + timedelta(days=7),
                 booking_id=f"BK{request.plan_id}",
                 plan_id=request.plan_id
             )
@@ -454,23 +556,22 @@ async def confirm_plan(request: ConfirmPlanRequest, db: Session = Depends(get_db
             # Get platform wallet from x402 service
             platform_wallet = x402_payment_service.wallet_address if x402_payment_service else "0x" + "0" * 40
             
-            # Create reputation record
-            reputation_record = await create_reputation_record(
+            reputation_record = build_reputation_record(
                 traveler_wallet=request.user_wallet,
                 platform_wallet=platform_wallet,
                 event_type=EventType.BOOKING_CREATED,
                 trip_data=trip_data,
                 referrer_wallet=request.referrer_wallet if hasattr(request, 'referrer_wallet') else None
             )
-            
-            if reputation_record:
-                # Update reputation summary
-                await update_reputation_summary(request.user_wallet, reputation_record)
-                print(f"✅ Reputation record created for booking: {reputation_record.record_id}")
-            
         except Exception as rep_error:
             print(f"⚠️ Reputation tracking failed: {rep_error}")
         
+        summary = await db.run_sync(stage_reputation_record, reputation_record) if reputation_record else None
+        await db.commit()
+        if summary is not None:
+            publish_reputation_update(summary)
+            print(f"✅ Reputation record created for booking: {reputation_record.record_id}")
+        
         # Simulate payment processing
         payment_status = "success"
         
@@ -512,27 +613,35 @@ You will receive confirmation emails for each booking component.
         )
 
 @app.get("/get_user_plans/{user_wallet}", response_model=GetUserPlansResponse)
-async def get_user_plans(user_wallet: str, db: Session = Depends(get_db)):
+async def get_user_plans(
+    user_wallet: str,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    Get all plans for a specific user wallet.
+    Get a user wallet's plans, newest first (pass next_cursor as cursor for older plans).
     """
     try:
-        plans = PlanService.get_user_plans(db, user_wallet)
+        page = await AsyncPlanService.list_user_plans(db, user_wallet, limit=max(1, min(limit, 100)), cursor=cursor)
         
-        user_plans = []
-        for plan in plans:
-            plan_data = plan.plan_data or {}
-            user_plans.append(UserPlan(
-                plan_id=str(plan.id),
+        user_plans = [
+            UserPlan(
+                plan_id=plan.plan_id,
                 destination=plan.destination,
-                total_cost=plan_data.get('grand_total', 0),
+                total_cost=plan.total_cost,
                 created_at=plan.created_at.isoformat() if plan.created_at else "",
-                status=plan.status
-            ))
+                status=plan.status,
+                pin_status=plan.pin_status,
+                ipfs_cid=plan.ipfs_cid
+            )
+            for plan in page.plans
+        ]
         
         return GetUserPlansResponse(
             status="success",
-            plans=user_plans
+            plans=user_plans,
+            next_cursor=page.next_cursor
         )
         
     except Exception as e:
@@ -624,7 +733,7 @@ async def health_check():
 @app.get("/referrals/{wallet_address}")
 async def get_referrals(wallet_address: str):
     try:
-        records = retrieve_referrals_by_wallet(wallet_address)
+        records = await run_in_threadpool(retrieve_referrals_by_wallet, wallet_address)
         return {"status": "success", "response": records}
     except Exception as e:
         import traceback
@@ -636,218 +745,89 @@ async def get_referrals(wallet_address: str):
 # Reputation System Functions
 # ============================================================================
 
+def build_reputation_record(
+    traveler_wallet: str,
+    platform_wallet: str,
+    event_type: EventType,
+    trip_data: TripData,
+    outcome_data: OutcomeData = None,
+    payment_tx_hash: str = None,
+    referrer_wallet: str = None
+) -> ReputationRecord:
+    """Build a reputation record for an event (hashes are placeholders until the payment settles and the record is pinned)"""
+    record = ReputationRecord(
+        traveler_wallet=traveler_wallet,
+        platform_wallet=platform_wallet,
+        event_type=event_type,
+        trip_data=trip_data,
+        outcome_data=outcome_data or OutcomeData(status=TripStatus.PENDING),
+        verification_data=VerificationData(
+            payment_tx_hash=payment_tx_hash or UNSETTLED_TX_HASH,
+            ipfs_hash=UNPINNED_IPFS_HASH
+        ),
+        referral_data=ReferralData(referrer_wallet=referrer_wallet)
+    )
+    record.record_id = record.generate_record_id()
+    return record
+
+def stage_reputation_record(db: Session, record: ReputationRecord) -> ReputationSummary:
+    """Add a record, its pin job and its summary update to the caller's transaction; the caller commits"""
+    entry = ReputationRecordService.append(db, record)
+    enqueue_pin(db, PIN_KIND_REPUTATION_RECORD, pinata_service.reputation_record_metadata(record), record_entry=entry)
+    return ReputationSummaryService.apply_record(db, record, commit=False)
+
+def publish_reputation_update(summary: ReputationSummary):
+    """Post-commit side effects of a new record: leaderboard index and pin worker"""
+    leaderboard.record([summary])
+    pin_worker.wake()
+
+def save_reputation_record(record: ReputationRecord) -> ReputationSummary:
+    """Store a standalone reputation record in its own transaction"""
+    db = SessionLocal()
+    try:
+        summary = stage_reputation_record(db, record)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    publish_reputation_update(summary)
+    return summary
+
 async def create_reputation_record(
     traveler_wallet: str,
     platform_wallet: str,
     event_type: EventType,
     trip_data: TripData,
+    outcome_data: OutcomeData = None,
     payment_tx_hash: str = None,
-    referrer_wallet: str = None,
-    previous_record_hash: str = None
+    referrer_wallet: str = None
 ) -> ReputationRecord:
-    """Create a new reputation record and store it on IPFS"""
+    """Create a new reputation record, store it with its summary update and queue it for IPFS pinning"""
     try:
-        # Create the reputation record using the correct model structure
-        record = create_booking_record(
+        record = build_reputation_record(
             traveler_wallet=traveler_wallet,
             platform_wallet=platform_wallet,
-            destination=trip_data.destination,
-            cost_usd=float(trip_data.cost_usd),
-            cost_usdc=float(trip_data.cost_usdc),
-            duration_days=trip_data.duration_days,
-            start_date=trip_data.start_date,
-            end_date=trip_data.end_date,
-            booking_id=trip_data.booking_id,
-            plan_id=trip_data.plan_id,
+            event_type=event_type,
+            trip_data=trip_data,
+            outcome_data=outcome_data,
             payment_tx_hash=payment_tx_hash,
             referrer_wallet=referrer_wallet
         )
+        summary = await run_in_threadpool(save_reputation_record, record)
         
-        # Store on IPFS using Pinata service
-        ipfs_hash = pinata_service.store_reputation_record(record)
-        record.verification_data.ipfs_hash = ipfs_hash
-        
-        print(f"✅ Reputation record created and stored on IPFS: {ipfs_hash}")
+        print(f"✅ Reputation record stored and queued for IPFS pinning: {record.record_id} (score {summary.reputation_score})")
         return record
         
     except Exception as e:
         print(f"❌ Failed to create reputation record: {e}")
         return None
 
-async def update_reputation_summary(wallet_address: str, new_record: ReputationRecord):
-    """Update or create reputation summary for a wallet"""
-    try:
-        # For now, just log that we're updating the reputation summary
-        # In a full implementation, this would:
-        # 1. Retrieve existing reputation summary from IPFS
-        # 2. Calculate new reputation score based on the record
-        # 3. Update summary statistics
-        # 4. Store updated summary back to IPFS
-        
-        print(f"✅ Updating reputation summary for {wallet_address}")
-        print(f"   Event: {new_record.event_type}")
-        print(f"   IPFS Hash: {new_record.verification_data.ipfs_hash}")
-        
-        # For demo purposes, we'll just return success
-        return True
-        
-    except Exception as e:
-        print(f"❌ Failed to update reputation summary: {e}")
-        return False
-
-def calculate_reputation_score(summary: ReputationSummary) -> Decimal:
-    """Calculate reputation score based on various factors"""
-    score = Decimal('10.00')  # Base score
-    
-    # Booking completion bonus
-    if summary.total_bookings > 0:
-        completion_bonus = (summary.completed_bookings / summary.total_bookings) * 50
-        score += Decimal(str(completion_bonus))
-    
-    # Spending bonus (1 point per $100 spent)
-    spending_bonus = summary.total_spent_usd / Decimal('100.00')
-    score += spending_bonus
-    
-    # Referral bonus
-    referral_bonus = summary.successful_referrals * 5
-    score += Decimal(str(referral_bonus))
-    
-    # Dispute penalty
-    if summary.total_bookings > 0:
-        dispute_penalty = (summary.disputed_bookings / summary.total_bookings) * 100
-        score -= Decimal(str(dispute_penalty))
-    
-    # Ensure minimum score
-    return max(score, Decimal('0.00'))
-
-def get_reputation_level(score: Decimal) -> ReputationLevel:
-    """Get reputation level based on score"""
-    score_int = int(score)
-    
-    if score_int >= 1000:
-        return ReputationLevel.DIAMOND
-    elif score_int >= 500:
-        return ReputationLevel.PLATINUM
-    elif score_int >= 200:
-        return ReputationLevel.GOLD
-    elif score_int >= 100:
-        return ReputationLevel.SILVER
-    elif score_int >= 50:
-        return ReputationLevel.BRONZE
-    else:
-        return ReputationLevel.NEW
-
-# ============================================================================
-# Demo Reputation Data Generator
-# ============================================================================
-
-def generate_demo_reputation_data(wallet_address: str) -> dict:
-    """Generate demo reputation data based on wallet address for hackathon demo"""
-    import hashlib
-    
-    # Use wallet hash to generate consistent but varied data
-    hash_obj = hashlib.md5(wallet_address.encode())
-    hash_int = int(hash_obj.hexdigest()[:8], 16) % 1000
-    
-    # Generate reputation level based on hash
-    levels = ["NEW", "BRONZE", "SILVER", "GOLD", "PLATINUM", "DIAMOND"]
-    level_index = hash_int % len(levels)
-    reputation_level = levels[level_index]
-    
-    # Generate score based on level
-    base_scores = [15, 45, 100, 200, 350, 500]
-    base_score = base_scores[level_index]
-    reputation_score = base_score + (hash_int % 50)
-    
-    # Generate other stats
-    total_bookings = max(1, level_index * 2 + (hash_int % 3))
-    completed_bookings = max(0, total_bookings - (hash_int % 2))
-    
-    countries = ["France", "Italy", "Spain", "Japan", "USA", "Germany", "Thailand", "Australia"]
-    countries_visited = countries[:(hash_int % 4) + 1]
-    
-    return {
-        "wallet_address": wallet_address,
-        "reputation_level": reputation_level,
-        "reputation_score": float(reputation_score),
-        "total_bookings": total_bookings,
-        "completed_bookings": completed_bookings,
-        "cancelled_bookings": max(0, total_bookings - completed_bookings),
-        "disputed_bookings": 0 if level_index > 2 else (hash_int % 2),
-        "total_spent_usd": float(total_bookings * 1500 + (hash_int % 500)),
-        "average_rating": min(5.0, 3.5 + (level_index * 0.3) + ((hash_int % 10) / 20)),
-        "completion_rate": float(completed_bookings / total_bookings if total_bookings > 0 else 0),
-        "dispute_rate": 0.0,
-        "countries_visited": countries_visited,
-        "total_travel_days": total_bookings * 7 + (hash_int % 14),
-        "total_referrals": max(0, level_index - 1 + (hash_int % 2)),
-        "successful_referrals": max(0, level_index - 2 + (hash_int % 2)),
-        "total_commission_earned": float((level_index * 25) + (hash_int % 50)),
-        "total_bonus_earned": float((level_index * 15) + (hash_int % 30)),
-        "first_booking_date": "2024-01-15T10:30:00Z",
-        "last_booking_date": "2024-12-01T14:20:00Z",
-        "last_updated": datetime.utcnow().isoformat()
-    }
-
-def generate_demo_leaderboard_data(limit: int = 10) -> list:
-    """Generate demo leaderboard data"""
-    demo_wallets = [
-        "0x1a2b3c4d5e6f7890abcdef1234567890abcdef12",
-        "0x2b3c4d5e6f7890ab1234567890abcdef12345678", 
-        "0x3c4d5e6f7890ab12567890abcdef1234567890ab",
-        "0x4d5e6f7890ab123467890abcdef1234567890abc",
-        "0x5e6f7890ab1234567890abcdef1234567890abcd",
-        "0x6f7890ab1234567890abcdef1234567890abcdef",
-        "0x7890ab1234567890abcdef1234567890abcdef12",
-        "0x890ab1234567890abcdef1234567890abcdef123",
-        "0x90ab1234567890abcdef1234567890abcdef1234",
-        "0xab1234567890abcdef1234567890abcdef123456"
-    ]
-    
-    leaderboard = []
-    for wallet in demo_wallets[:limit]:
-        data = generate_demo_reputation_data(wallet)
-        leaderboard.append({
-            "wallet_address": wallet,
-            "reputation_score": data["reputation_score"],
-            "reputation_level": data["reputation_level"],
-            "total_bookings": data["total_bookings"],
-            "completed_bookings": data["completed_bookings"],
-            "average_rating": data["average_rating"],
-            "countries_visited": len(data["countries_visited"])
-        })
-    
-    # Sort by reputation score descending
-    leaderboard.sort(key=lambda x: x["reputation_score"], reverse=True)
-    return leaderboard
-
 # ============================================================================
 # Reputation API Endpoints
 # ============================================================================
 
-@app.get("/api/reputation/{wallet_address}", response_model=ReputationResponse)
-async def get_wallet_reputation_api(wallet_address: str):
-    """Get reputation data for a specific wallet"""
-    try:
-        # Generate demo reputation data
-        demo_data = generate_demo_reputation_data(wallet_address)
-        
-        # Convert to proper response format
-        return {
-            "status": "success",
-            "wallet_address": wallet_address,
-            "reputation_summary": demo_data,
-            "recent_records": [],
-            "total_records": demo_data["total_bookings"]
-        }
-        
-    except Exception as e:
-        return {
-            "status": "error",
-            "wallet_address": wallet_address,
-            "error": f"Failed to get reputation data: {str(e)}"
-        }
-
 @app.post("/api/reputation/event", response_model=ReputationEventResponse)
 async def create_reputation_event_api(event_request: ReputationEventRequest):
     """Create a new reputation event"""
@@ -855,24 +835,22 @@ async def create_reputation_event_api(event_request: ReputationEventRequest):
         # Get platform wallet
         platform_wallet = x402_payment_service.wallet_address if x402_payment_service else "0x" + "0" * 40
         
-        # Create reputation record
+        # Create reputation record (also updates the wallet's summary)
         record = await create_reputation_record(
             traveler_wallet=event_request.wallet_address,
             platform_wallet=platform_wallet,
             event_type=event_request.event_type,
             trip_data=event_request.trip_data,
+            outcome_data=event_request.outcome_data,
             payment_tx_hash=event_request.payment_tx_hash,
             referrer_wallet=event_request.referrer_wallet
         )
         
         if record:
-            # Update reputation summary
-            await update_reputation_summary(event_request.wallet_address, record)
-            
+            # The IPFS hash is assigned when the pin queue uploads the record: see /api/reputation/record/{record_id}
             return ReputationEventResponse(
                 status="success",
-                record_id=record.record_id,
-                ipfs_hash=record.ipfs_hash
+                record_id=record.record_id
             )
         else:
             return ReputationEventResponse(
@@ -886,29 +864,39 @@ async def create_reputation_event_api(event_request: ReputationEventRequest):
             error=f"Failed to create reputation event: {str(e)}"
         )
 
+def read_reputation_records(db: Session, wallet_address: str, limit: int, before: Optional[int]):
+    """Summary, one page of records (newest first) and the chain length for a wallet"""
+    summary = ReputationSummaryService.get_summary(db, wallet_address)
+    entries = ReputationRecordService.get_records(db, wallet_address, limit=limit, before_id=before)
+    total = ReputationRecordService.count_records(db, wallet_address)
+    return summary, entries, total
+
 @app.get("/api/reputation/records/{wallet_address}", response_model=ReputationResponse)
-async def get_reputation_records_api(wallet_address: str, limit: int = 20):
-    """Get recent reputation records for a wallet"""
+async def get_reputation_records_api(
+    wallet_address: str,
+    limit: int = 20,
+    before: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """Get recent reputation records for a wallet (pass next_cursor as before for older records)"""
     try:
-        # Get reputation summary
-        summary = await IPFSStorageUtils.get_reputation_summary(wallet_address)
+        limit = max(1, min(limit, 100))
+        summary, entries, total = await run_in_threadpool(read_reputation_records, db, wallet_address, limit, before)
         
-        if not summary:
+        if not summary and not entries:
             return ReputationResponse(
                 status="error",
                 wallet_address=wallet_address,
                 error="No reputation data found"
             )
         
-        # Mock recent records for now
-        recent_records = []
-        
         return ReputationResponse(
             status="success",
             wallet_address=wallet_address,
             reputation_summary=summary,
-            recent_records=recent_records,
-            total_records=summary.total_bookings
+            recent_records=[ReputationRecordService.to_published_record(entry) for entry in entries],
+            total_records=total,
+            next_cursor=str(entries[-1].id) if len(entries) == limit else None
         )
         
     except Exception as e:
@@ -918,17 +906,60 @@ async def get_reputation_records_api(wallet_address: str, limit: int = 20):
             error=f"Failed to get reputation records: {str(e)}"
         )
 
+@app.get("/api/reputation/record/{record_id}", response_model=ReputationEventResponse)
+async def get_reputation_record_pin_api(record_id: str, db: Session = Depends(get_db)):
+    """IPFS hash of a reputation record; null until the pin queue has uploaded it"""
+    entry = await run_in_threadpool(ReputationRecordService.get_by_record_id, db, record_id)
+    if entry is None:
+        return ReputationEventResponse(status="error", record_id=record_id, error="Reputation record not found")
+    return ReputationEventResponse(status="success", record_id=record_id, ipfs_hash=entry.ipfs_cid)
+
+@app.get("/api/reputation/records/{wallet_address}/verify")
+async def verify_reputation_records_api(wallet_address: str, db: Session = Depends(get_db)):
+    """Verify a wallet's reputation record hash chain"""
+    try:
+        result = await run_in_threadpool(verify_wallet_chain, db, wallet_address)
+        return {"status": "success", **result.to_dict()}
+        
+    except Exception as e:
+        return {
+            "status": "error",
+            "wallet_address": wallet_address,
+            "error": f"Failed to verify reputation records: {str(e)}"
+        }
+
+def leaderboard_entry(rank: int, summary: ReputationSummary) -> LeaderboardEntry:
+    """Leaderboard row for a wallet summary"""
+    return LeaderboardEntry(
+        rank=rank,
+        wallet_address=summary.wallet_address,
+        reputation_score=summary.reputation_score,
+        reputation_level=summary.reputation_level,
+        total_bookings=summary.total_bookings,
+        completed_bookings=summary.completed_bookings,
+        average_rating=summary.average_rating,
+        countries_visited=len(summary.countries_visited)
+    )
+
 @app.get("/api/reputation/leaderboard", response_model=LeaderboardResponse)
-async def get_reputation_leaderboard_api(limit: int = 10):
-    """Get reputation leaderboard"""
+async def get_reputation_leaderboard_api(
+    limit: int = 10,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    level: Optional[ReputationLevel] = None,
+    db: Session = Depends(get_db)
+):
+    """Get reputation leaderboard (numbered pages via offset, or follow next_cursor)"""
     try:
-        # Generate demo leaderboard data
-        leaderboard_data = generate_demo_leaderboard_data(limit)
+        page = await run_in_threadpool(
+            leaderboard.page, db, max(1, min(limit, 100)), max(0, offset), cursor, level.value if level else None
+        )
         
         return {
             "status": "success",
-            "leaderboard": leaderboard_data,
-            "total_participants": len(leaderboard_data)
+            "leaderboard": [leaderboard_entry(rank, summary) for rank, summary in page.entries],
+            "total_participants": page.total,
+            "next_cursor": page.next_cursor
         }
         
     except Exception as e:
@@ -939,94 +970,46 @@ async def get_reputation_leaderboard_api(limit: int = 10):
             "error": f"Failed to get leaderboard: {str(e)}"
         }
 
+@app.get("/api/reputation/leaderboard/rank/{wallet_address}", response_model=LeaderboardRankResponse)
+async def get_leaderboard_rank_api(wallet_address: str, level: Optional[ReputationLevel] = None, db: Session = Depends(get_db)):
+    """Get a wallet's leaderboard rank, overall or within a level"""
+    try:
+        level_value = level.value if level else None
+        rank = await run_in_threadpool(leaderboard.rank, db, wallet_address, level_value)
+        total = await run_in_threadpool(leaderboard.total, db, level_value)
+        
+        return LeaderboardRankResponse(
+            status="success",
+            wallet_address=wallet_address,
+            rank=rank,
+            level=level,
+            total_participants=total
+        )
+        
+    except Exception as e:
+        return LeaderboardRankResponse(
+            status="error",
+            wallet_address=wallet_address,
+            error=f"Failed to get leaderboard rank: {str(e)}"
+        )
+
 @app.get("/api/reputation/levels")
 async def get_reputation_levels_api():
     """Get reputation levels information"""
     try:
         levels_info = {
+            "scoring_version": scoring_policy.version,
             "levels": [
                 {
-                    "level": "NEW",
-                    "name": "New Traveler",
-                    "min_score": 0,
-                    "max_score": 24,
-                    "benefits": [
-                        "Basic booking access",
-                        "Standard customer support"
-                    ]
-                },
-                {
-                    "level": "BRONZE",
-                    "name": "Bronze Traveler",
-                    "min_score": 25,
-                    "max_score": 99,
-                    "benefits": [
-                        "Priority booking",
-                        "Enhanced customer support",
-                        "5% referral bonus"
-                    ]
-                },
-                {
-                    "level": "SILVER",
-                    "name": "Silver Traveler",
-                    "min_score": 100,
-                    "max_score": 199,
-                    "benefits": [
-                        "VIP booking access",
-                        "24/7 customer support",
-                        "10% referral bonus",
-                        "Exclusive travel deals"
-                    ]
-                },
-                {
-                    "level": "GOLD",
-                    "name": "Gold Traveler",
-                    "min_score": 200,
-                    "max_score": 499,
-                    "benefits": [
-                        "Premium booking access",
-                        "Personal travel concierge",
-                        "15% referral bonus",
-                        "Exclusive travel deals",
-                        "Priority dispute resolution"
-                    ]
-                },
-                {
-                    "level": "PLATINUM",
-                    "name": "Platinum Traveler",
-                    "min_score": 500,
-                    "max_score": 999,
-                    "benefits": [
-                        "Luxury booking access",
-                        "Dedicated travel manager",
-                        "20% referral bonus",
-                        "Exclusive travel deals",
-                        "Priority dispute resolution",
-                        "Custom travel packages"
-                    ]
-                },
-                {
-                    "level": "DIAMOND",
-                    "name": "Diamond Traveler",
-                    "min_score": 1000,
-                    "max_score": 9999,
-                    "benefits": [
-                        "Ultimate booking access",
-                        "Personal travel assistant",
-                        "25% referral bonus",
-                        "Exclusive travel deals",
-                        "Priority dispute resolution",
-                        "Custom travel packages",
-                        "VIP airport services"
-                    ]
+                    "level": level.name,
+                    "name": LEVEL_DETAILS[level]["name"],
+                    "min_score": min_score,
+                    "max_score": max_score,
+                    "benefits": LEVEL_DETAILS[level]["benefits"]
                 }
+                for level, min_score, max_score in scoring_policy.level_ranges()
             ],
-            "scoring_factors": {
-                "booking_completion": "Points for completing bookings successfully",
-                "spending_amount": "Points based on total amount spent on travel",
-                "referral_bonus": "Points for successful referrals",
-                "dispute_penalty": "Points deducted for disputes"
-            }
+            "scoring_factors": scoring_policy.factors
         }
         
         return {
@@ -1040,6 +1023,31 @@ async def get_reputation_levels_api():
             "error": f"Failed to get levels info: {str(e)}"
         }
 
+# Declared after the fixed /api/reputation/* paths so it does not shadow them
+@app.get("/api/reputation/{wallet_address}", response_model=ReputationResponse)
+async def get_wallet_reputation_api(wallet_address: str, db: Session = Depends(get_db)):
+    """Get reputation data for a specific wallet"""
+    try:
+        summary = await run_in_threadpool(ReputationSummaryService.get_summary, db, wallet_address)
+        if summary is None:
+            # No records yet: an empty summary at the starting level
+            summary = ReputationSummary(wallet_address=wallet_address)
+        
+        return ReputationResponse(
+            status="success",
+            wallet_address=wallet_address,
+            reputation_summary=summary,
+            recent_records=[],
+            total_records=summary.total_bookings
+        )
+        
+    except Exception as e:
+        return {
+            "status": "error",
+            "wallet_address": wallet_address,
+            "error": f"Failed to get reputation data: {str(e)}"
+        }
+
 # ============================================================================
 # x402 Payment Endpoints
 # ============================================================================
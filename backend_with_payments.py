@@ -3,7 +3,6 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.middleware.httpsredirect import HTTPSRedirectMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 import uvicorn
@@ -16,10 +15,11 @@ from pinata_service import pinata_service
 import uuid
 from datetime import datetime, date
 import json
-from sqlalchemy.orm import Session
-from database import get_db, init_db
-from db_service import PlanService
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db, init_db, close_async_db
+from db_service import AsyncPlanService
 from x402_middleware import X402Middleware, TravelBookingPaymentService, setup_x402_payments
+from facilitator_client import facilitator_client
 from reputation_models import (
     ReputationRecord, ReputationSummary, EventType, TripStatus,
     TripData, OutcomeData, VerificationData, ReferralData,
@@ -27,6 +27,7 @@ from reputation_models import (
 )
 from transaction_log import log_transaction
 from reputation_models import ReputationLevel
+from reputation_scoring import LEVEL_DETAILS, scoring_policy
 from decimal import Decimal
 
 # --- x402 payment system initialization (TOP-LEVEL) ---
@@ -58,7 +59,7 @@ app = FastAPI(title="AI Agent Wallet API", version="1.0.0")
 
 # Register x402 middleware BEFORE app starts
 if x402_middleware:
-    app.add_middleware(BaseHTTPMiddleware, dispatch=x402_middleware)
+    app.add_middleware(x402_middleware.bind)
     print("✅ [BOOT] x402 middleware registered with FastAPI app")
 else:
     print("⚠️ [BOOT] x402 middleware not registered (payment system unavailable)")
@@ -72,6 +73,12 @@ async def startup_event():
     print("✅ Database initialized")
     print("✅ Simplified architecture initialized (no LangGraph dependency)")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Release the pooled x402 facilitator HTTP connections
+    await facilitator_client.close()
+    await close_async_db()
+
 # Allow CORS for modern frontend frameworks
 app.add_middleware(
     CORSMiddleware,
@@ -157,6 +164,7 @@ class UserPlan(BaseModel):
 class GetUserPlansResponse(BaseModel):
     status: str
     plans: List[UserPlan]
+    next_cursor: Optional[str] = None
     error: Optional[str] = None
 
 class AgentRequest(BaseModel):
@@ -331,7 +339,7 @@ def generate_mock_plan(destination: str, budget: float):
 # ============================================================================
 
 @app.post("/generate_plan", response_model=GeneratePlanResponse)
-async def generate_plan(request: GeneratePlanRequest, db: Session = Depends(get_db)):
+async def generate_plan(request: GeneratePlanRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Generate a travel plan using simplified architecture (no LangGraph).
     """
@@ -379,7 +387,7 @@ async def generate_plan(request: GeneratePlanRequest, db: Session = Depends(get_
         )
         
         # Save to database
-        db_plan = PlanService.create_plan(
+        db_plan = await AsyncPlanService.create_plan(
             db=db,
             user_wallet=request.user_wallet or "",
             destination=request.destination,
@@ -427,29 +435,28 @@ async def generate_plan(request: GeneratePlanRequest, db: Session = Depends(get_
         )
 
 @app.post("/confirm_plan", response_model=ConfirmPlanResponse)
-async def confirm_plan(request: ConfirmPlanRequest, db: Session = Depends(get_db)):
+async def confirm_plan(request: ConfirmPlanRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Confirm a travel plan and process payment/booking.
     """
     try:
-        # Retrieve the plan from database
-        plan = PlanService.get_plan_by_id(db, request.plan_id)
+        # Confirm in one guarded UPDATE ... RETURNING: only a generated plan can be
+        # confirmed, so of several concurrent confirms exactly one gets the plan back
+        plan = await AsyncPlanService.update_plan_status(db, request.plan_id, "confirmed")
         if not plan:
+            existing = await AsyncPlanService.get_plan_by_id(db, request.plan_id)
+            if existing is None:
+                return ConfirmPlanResponse(
+                    status="error",
+                    payment_status="failed",
+                    confirmation_message="Plan not found",
+                    error="Invalid plan ID"
+                )
             return ConfirmPlanResponse(
                 status="error",
                 payment_status="failed",
-                confirmation_message="Plan not found",
-                error="Invalid plan ID"
-            )
-        
-        # Update plan status to confirmed
-        updated_plan = PlanService.update_plan_status(db, request.plan_id, "confirmed")
-        if not updated_plan:
-            return ConfirmPlanResponse(
-                status="error",
-                payment_status="failed",
-                confirmation_message="Failed to update plan status",
-                error="Database update failed"
+                confirmation_message=f"Plan is already {existing.status}",
+                error="Plan cannot be confirmed"
             )
         
         # Create reputation record for booking creation
@@ -530,27 +537,33 @@ You will receive confirmation emails for each booking component.
         )
 
 @app.get("/get_user_plans/{user_wallet}", response_model=GetUserPlansResponse)
-async def get_user_plans(user_wallet: str, db: Session = Depends(get_db)):
+async def get_user_plans(
+    user_wallet: str,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    Get all plans for a specific user wallet.
+    Get a user wallet's plans, newest first (pass next_cursor as cursor for older plans).
     """
     try:
-        plans = PlanService.get_plans_by_wallet(db, user_wallet)
+        page = await AsyncPlanService.list_user_plans(db, user_wallet, limit=max(1, min(limit, 100)), cursor=cursor)
         
-        user_plans = []
-        for plan in plans:
-            plan_data = plan.plan_data or {}
-            user_plans.append(UserPlan(
-                plan_id=str(plan.id),
+        user_plans = [
+            UserPlan(
+                plan_id=plan.plan_id,
                 destination=plan.destination,
-                total_cost=plan_data.get('grand_total', 0),
+                total_cost=plan.total_cost,
                 created_at=plan.created_at.isoformat() if plan.created_at else "",
                 status=plan.status
-            ))
+            )
+            for plan in page.plans
+        ]
         
         return GetUserPlansResponse(
             status="success",
-            plans=user_plans
+            plans=user_plans,
+            next_cursor=page.next_cursor
         )
         
     except Exception as e:
@@ -729,14 +742,14 @@ async def update_reputation_summary(wallet_address: str, new_record: ReputationR
                 summary.total_bonus_earned += Decimal('10.00')  # Fixed bonus amount
             
             # Recalculate reputation score
-            summary.reputation_score = calculate_reputation_score(summary)
-            summary.reputation_level = get_reputation_level(summary.reputation_score)
+            summary.reputation_score = scoring_policy.score(summary)
+            summary.reputation_level = scoring_policy.level(summary.reputation_score)
             
         else:
             # Create new summary
             summary = ReputationSummary(
                 wallet_address=wallet_address,
-                reputation_score=Decimal('10.00'),  # Starting score
+                reputation_score=Decimal('0.00'),  # Scored below by the active policy
                 reputation_level=ReputationLevel.NEW,
                 total_bookings=1 if new_record.event_type == EventType.BOOKING_CREATED else 0,
                 completed_bookings=0,
@@ -762,6 +775,8 @@ async def update_reputation_summary(wallet_address: str, new_record: ReputationR
                 summary.total_spent_usd = new_record.trip_data.cost_usd
                 summary.first_booking_date = datetime.utcnow()
                 summary.last_booking_date = datetime.utcnow()
+            summary.reputation_score = scoring_policy.score(summary)
+            summary.reputation_level = scoring_policy.level(summary.reputation_score)
         
         # Store updated summary on IPFS
         await IPFSStorageUtils.store_reputation_summary(summary)
@@ -772,48 +787,6 @@ async def update_reputation_summary(wallet_address: str, new_record: ReputationR
         print(f"❌ Failed to update reputation summary: {e}")
         return None
 
-def calculate_reputation_score(summary: ReputationSummary) -> Decimal:
-    """Calculate reputation score based on various factors"""
-    score = Decimal('10.00')  # Base score
-    
-    # Booking completion bonus
-    if summary.total_bookings > 0:
-        completion_bonus = (summary.completed_bookings / summary.total_bookings) * 50
-        score += Decimal(str(completion_bonus))
-    
-    # Spending bonus (1 point per $100 spent)
-    spending_bonus = summary.total_spent_usd / Decimal('100.00')
-    score += spending_bonus
-    
-    # Referral bonus
-    referral_bonus = summary.successful_referrals * 5
-    score += Decimal(str(referral_bonus))
-    
-    # Dispute penalty
-    if summary.total_bookings > 0:
-        dispute_penalty = (summary.disputed_bookings / summary.total_bookings) * 100
-        score -= Decimal(str(dispute_penalty))
-    
-    # Ensure minimum score
-    return max(score, Decimal('0.00'))
-
-def get_reputation_level(score: Decimal) -> ReputationLevel:
-    """Get reputation level based on score"""
-    score_int = int(score)
-    
-    if score_int >= 1000:
-        return ReputationLevel.DIAMOND
-    elif score_int >= 500:
-        return ReputationLevel.PLATINUM
-    elif score_int >= 200:
-        return ReputationLevel.GOLD
-    elif score_int >= 100:
-        return ReputationLevel.SILVER
-    elif score_int >= 50:
-        return ReputationLevel.BRONZE
-    else:
-        return ReputationLevel.NEW
-
 # ============================================================================
 # Reputation API Endpoints
 # ============================================================================
@@ -992,89 +965,18 @@ async def get_reputation_levels_api():
     """Get reputation levels information"""
     try:
         levels_info = {
+            "scoring_version": scoring_policy.version,
             "levels": [
                 {
-                    "level": "NEW",
-                    "name": "New Traveler",
-                    "min_score": 0,
-                    "max_score": 24,
-                    "benefits": [
-                        "Basic booking access",
-                        "Standard customer support"
-                    ]
-                },
-                {
-                    "level": "BRONZE",
-                    "name": "Bronze Traveler",
-                    "min_score": 25,
-                    "max_score": 99,
-                    "benefits": [
-                        "Priority booking",
-                        "Enhanced customer support",
-                        "5% referral bonus"
-                    ]
-                },
-                {
-                    "level": "SILVER",
-                    "name": "Silver Traveler",
-                    "min_score": 100,
-                    "max_score": 199,
-                    "benefits": [
-                        "VIP booking access",
-                        "24/7 customer support",
-                        "10% referral bonus",
-                        "Exclusive travel deals"
-                    ]
-                },
-                {
-                    "level": "GOLD",
-                    "name": "Gold Traveler",
-                    "min_score": 200,
-                    "max_score": 499,
-                    "benefits": [
-                        "Premium booking access",
-                        "Personal travel concierge",
-                        "15% referral bonus",
-                        "Exclusive travel deals",
-                        "Priority dispute resolution"
-                    ]
-                },
-                {
-                    "level": "PLATINUM",
-                    "name": "Platinum Traveler",
-                    "min_score": 500,
-                    "max_score": 999,
-                    "benefits": [
-                        "Luxury booking access",
-                        "Dedicated travel manager",
-                        "20% referral bonus",
-                        "Exclusive travel deals",
-                        "Priority dispute resolution",
-                        "Custom travel packages"
-                    ]
-                },
-                {
-                    "level": "DIAMOND",
-                    "name": "Diamond Traveler",
-                    "min_score": 1000,
-                    "max_score": 9999,
-                    "benefits": [
-                        "Ultimate booking access",
-                        "Personal travel assistant",
-                        "25% referral bonus",
-                        "Exclusive travel deals",
-                        "Priority dispute resolution",
-                        "Custom travel packages",
-                        "VIP airport services"
-                    ]
+                    "level": level.name,
+                    "name": LEVEL_DETAILS[level]["name"],
+                    "min_score": min_score,
+                    "max_score": max_score,
+                    "benefits": LEVEL_DETAILS[level]["benefits"]
                 }
+                for level, min_score, max_score in scoring_policy.level_ranges()
             ],
-            "scoring_factors": {
-                "booking_completion": "Points for completing bookings successfully",
-                "spending_amount": "Points based on total amount spent on travel",
-                "referral_bonus": "Points for successful referrals",
-                "dispute_penalty": "Points deducted for disputes"
-            }
+            "scoring_factors": scoring_policy.factors
         }
         
         return {
@@ -0,0 +1,288 @@
+"""
+Bulk ingestion of plans and bookings
+
+Loads rows from any iterable of dicts (typically a JSONL export) in chunks,
+never holding more than one chunk in memory. Each record is filled in with
+the same defaults create_plan and create_booking apply, then written one of
+two ways:
+- copy (default): COPY the chunk into a temporary staging table, then one
+  INSERT ... SELECT ... ON CONFLICT DO NOTHING into the real table;
+- insert: multi-row INSERT ... VALUES ... ON CONFLICT DO NOTHING RETURNING
+  batches, for connections without psycopg2's copy_expert.
+Rows whose key (plans.id, bookings.booking_id) already exists are skipped,
+so an interrupted import can simply be run again. Each chunk is committed
+on its own.
+
+    python bulk_ingest.py {plans,bookings} FILE.jsonl [--chunk-size N] [--method copy|insert]
+
+FILE may be - for stdin. Import plans before the bookings that reference them.
+"""
+import io
+import sys
+import time
+import uuid
+import argparse
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence, TextIO, Tuple
+import orjson
+from sqlalchemy import Table, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from db_service import BOOKING_STATUS_TRANSITIONS, PAYMENT_STATUS_TRANSITIONS, PLAN_STATUS_TRANSITIONS
+from models import Booking, Plan
+
+PLAN_COLUMNS = (
+    "id", "user_wallet", "destination", "budget", "plan_data", "status",
+    "pin_status", "ipfs_cid", "created_at", "updated_at"
+)
+BOOKING_COLUMNS = (
+    "booking_id", "plan_id", "flight_id", "passenger_name", "passenger_email", "payment_method",
+    "status", "payment_amount", "payment_currency", "payment_status", "flight_details",
+    "created_at", "updated_at"
+)
+PIN_STATUSES = ("pending", "pinned", "failed", "disabled")
+MAX_BIND_PARAMETERS = 32767  # stay well inside Postgres' 65535 parameters per statement
+
+# COPY text format: backslash first, so the escapes added after it are not doubled
+COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+@dataclass(slots=True)
+class IngestStats:
+    rows: int = 0
+    inserted: int = 0
+    seconds: float = 0.0
+
+    @property
+    def skipped(self) -> int:
+        return self.rows - self.inserted
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+@dataclass(slots=True)
+class IngestTarget:
+    table: Table
+    columns: Tuple[str, ...]
+    key: str
+    normalize: Callable[[Dict[str, Any]], Dict[str, Any]]
+
+
+def chunked(records: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Lists of up to size items, pulled lazily from records"""
+    if size < 1:
+        raise ValueError("chunk size must be at least 1")
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _timestamp(value: Any, default: datetime) -> datetime:
+    if value is None:
+        return default
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+
+
+def _uuid(value: Any) -> Any:
+    if value is None or isinstance(value, uuid.UUID):
+        return value
+    return uuid.UUID(str(value))
+
+
+def _choice(record: Dict[str, Any], field: str, default: str, allowed) -> str:
+    value = record.get(field) or default
+    if value not in allowed:
+        raise ValueError(f"Unknown {field} {value!r}")
+    return value
+
+
+def plan_values(record: Dict[str, Any]) -> Dict[str, Any]:
+    """A plans row for record, with PlanService.create_plan's defaults"""
+    now = datetime.now(timezone.utc)
+    created_at = _timestamp(record.get("created_at"), now)
+    return {
+        "id": _uuid(record.get("id") or record.get("plan_id")) or uuid.uuid4(),
+        "user_wallet": record["user_wallet"],
+        "destination": record["destination"],
+        "budget": int(record["budget"]),
+        "plan_data": record.get("plan_data") or {},
+        "status": _choice(record, "status", "generated", PLAN_STATUS_TRANSITIONS),
+        "pin_status": _choice(record, "pin_status", "pending", PIN_STATUSES),
+        "ipfs_cid": record.get("ipfs_cid"),
+        "created_at": created_at,
+        "updated_at": _timestamp(record.get("updated_at"), created_at),
+    }
+
+
+def booking_values(record: Dict[str, Any]) -> Dict[str, Any]:
+    """A bookings row for record, with new_booking's defaults"""
+    now = datetime.utcnow()
+    created_at = _timestamp(record.get("created_at"), now)
+    flight_details = record.get("flight_details")
+    if isinstance(flight_details, (dict, list)):
+        flight_details = orjson.dumps(flight_details).decode()
+    payment_amount = record.get("payment_amount", 0.10)
+    return {
+        "booking_id": record.get("booking_id") or f"TRV-{uuid.uuid4().hex[:8].upper()}",
+        "plan_id": _uuid(record.get("plan_id")),
+        "flight_id": record.get("flight_id"),
+        "passenger_name": record.get("passenger_name"),
+        "passenger_email": record.get("passenger_email"),
+        "payment_method": record.get("payment_method") or "crypto",
+        "status": _choice(record, "status", "pending_payment", BOOKING_STATUS_TRANSITIONS),
+        "payment_amount": float(payment_amount) if payment_amount is not None else None,
+        "payment_currency": record.get("payment_currency") or "USDC",
+        "payment_status": _choice(record, "payment_status", "pending", PAYMENT_STATUS_TRANSITIONS),
+        "flight_details": flight_details,
+        "created_at": created_at,
+        "updated_at": _timestamp(record.get("updated_at"), created_at),
+    }
+
+
+TARGETS = {
+    "plans": IngestTarget(Plan.__table__, PLAN_COLUMNS, "id", plan_values),
+    "bookings": IngestTarget(Booking.__table__, BOOKING_COLUMNS, "booking_id", booking_values),
+}
+
+
+def copy_field(value: Any) -> str:
+    """One value in COPY's text format"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (dict, list)):
+        value = orjson.dumps(value).decode()
+    elif isinstance(value, datetime):
+        value = value.isoformat()
+    return str(value).translate(COPY_ESCAPES)
+
+
+def copy_buffer(rows: Sequence[Dict[str, Any]], columns: Sequence[str]) -> io.StringIO:
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(copy_field(row[column]) for column in columns))
+        buffer.write("\n")
+    buffer.seek(0)
+    return buffer
+
+
+def read_jsonl(source: TextIO) -> Iterator[Dict[str, Any]]:
+    """Records from a JSONL stream, skipping blank lines"""
+    name = getattr(source, "name", "<stream>")
+    for line_number, line in enumerate(source, 1):
+        if not line.strip():
+            continue
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            raise ValueError(f"{name}:{line_number}: invalid JSON ({e})") from e
+        if not isinstance(record, dict):
+            raise ValueError(f"{name}:{line_number}: expected a JSON object")
+        yield record
+
+
+class BulkIngest:
+    """Chunked COPY or multi-row INSERT of plans or bookings, skipping keys already present"""
+
+    def __init__(self, target: str, method: str = "copy", chunk_size: int = 50000):
+        if target not in TARGETS:
+            raise ValueError(f"Unknown target {target!r}; expected one of {', '.join(TARGETS)}")
+        if method not in ("copy", "insert"):
+            raise ValueError(f"Unknown method {method!r}; expected copy or insert")
+        self.target = TARGETS[target]
+        self.method = method
+        self.chunk_size = chunk_size
+        self.staging_table = f"{self.target.table.name}_ingest_staging"
+
+    def insert_statement(self, rows: Sequence[Dict[str, Any]]):
+        table = self.target.table
+        return (
+            insert(table)
+            .values(list(rows))
+            .on_conflict_do_nothing(index_elements=[self.target.key])
+            .returning(table.c[self.target.key])
+        )
+
+    def insert_chunk(self, db: Session, rows: Sequence[Dict[str, Any]]) -> int:
+        """Multi-row INSERT ... RETURNING batches sized to the bind-parameter limit; commits the chunk"""
+        batch_rows = max(1, MAX_BIND_PARAMETERS // len(self.target.columns))
+        inserted = 0
+        for batch in chunked(rows, batch_rows):
+            inserted += len(db.execute(self.insert_statement(batch)).all())
+        db.commit()
+        return inserted
+
+    def copy_chunk(self, db: Session, rows: Sequence[Dict[str, Any]]) -> int:
+        """COPY rows into the staging table and move them across in one INSERT; commits the chunk"""
+        table, columns = self.target.table.name, ", ".join(self.target.columns)
+        db.execute(text(
+            f"CREATE TEMPORARY TABLE IF NOT EXISTS {self.staging_table} ON COMMIT DELETE ROWS "
+            f"AS SELECT {columns} FROM {table} WITH NO DATA"
+        ))
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY {self.staging_table} ({columns}) FROM STDIN", copy_buffer(rows, self.target.columns))
+        finally:
+            cursor.close()
+        result = db.execute(text(
+            f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {self.staging_table} "
+            f"ON CONFLICT ({self.target.key}) DO NOTHING"
+        ))
+        db.commit()
+        return result.rowcount
+
+    def write(self, db: Session, rows: Sequence[Dict[str, Any]]) -> int:
+        return self.copy_chunk(db, rows) if self.method == "copy" else self.insert_chunk(db, rows)
+
+    def run(self, db: Session, records: Iterable[Dict[str, Any]]) -> IngestStats:
+        """Normalize and write records chunk by chunk"""
+        if self.method == "copy" and db.get_bind().dialect.driver != "psycopg2":
+            print("⚠️ COPY needs a psycopg2 connection, using batched INSERT instead")
+            self.method = "insert"
+        stats = IngestStats()
+        started = time.perf_counter()
+        for chunk in chunked(records, self.chunk_size):
+            rows = [self.target.normalize(record) for record in chunk]
+            stats.rows += len(rows)
+            stats.inserted += self.write(db, rows)
+        stats.seconds = time.perf_counter() - started
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import plans or bookings from JSONL")
+    parser.add_argument("target", choices=sorted(TARGETS), help="Table to load")
+    parser.add_argument("file", help="JSONL file, one record per line (- for stdin)")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Rows written and committed per round trip")
+    parser.add_argument("--method", choices=["copy", "insert"], default="copy", help="COPY via staging table, or INSERT ... VALUES batches")
+    args = parser.parse_args()
+
+    source = sys.stdin if args.file == "-" else open(args.file, encoding="utf-8")
+    db = SessionLocal()
+    try:
+        ingest = BulkIngest(args.target, method=args.method, chunk_size=args.chunk_size)
+        stats = ingest.run(db, read_jsonl(source))
+        print(f"✅ Imported {stats.inserted} of {stats.rows} {args.target} in {stats.seconds:.1f}s "
+              f"({stats.rows_per_second:,.0f} rows/s); {stats.skipped} already present")
+    except ValueError as e:
+        print(f"❌ Import stopped: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+        if source is not sys.stdin:
+            source.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,168 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_
-from models import Plan, Booking
-from typing import List, Optional, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, and_, func, text, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from models import Plan, Booking, WalletReputation, ReputationLogEntry
+from reputation_models import ReputationRecord, ReputationSummary
+from typing import List, Optional, Dict, Any, Tuple
+from dataclasses import dataclass
 import uuid
+import base64
 from datetime import datetime
 
+# Columns the plan listing reads; plan_data stays in the database except for its grand_total
+PLAN_LISTING_COLUMNS = (
+    Plan.id,
+    Plan.destination,
+    Plan.status,
+    Plan.created_at,
+    Plan.pin_status,
+    Plan.ipfs_cid,
+    Plan.plan_data["grand_total"].astext.label("grand_total")
+)
+
+def encode_plan_cursor(created_at: datetime, plan_id: uuid.UUID) -> str:
+    """Opaque cursor pointing just after the given plan"""
+    raw = f"{created_at.isoformat()}|{plan_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_plan_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """Inverse of encode_plan_cursor; raises ValueError for malformed cursors"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, plan_id = raw.split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(plan_id)
+    except Exception as e:
+        raise ValueError(f"Invalid plan cursor: {cursor}") from e
+
+@dataclass(slots=True)
+class PlanListing:
+    plan_id: str
+    destination: str
+    status: str
+    created_at: Optional[datetime]
+    pin_status: Optional[str]
+    ipfs_cid: Optional[str]
+    total_cost: float
+
+@dataclass(slots=True)
+class PlanPage:
+    plans: List[PlanListing]
+    next_cursor: Optional[str]
+
+def user_plans_page_query(user_wallet: str, limit: int, cursor: Optional[str] = None):
+    """
+    One page of a wallet's plans, newest first, projected to PLAN_LISTING_COLUMNS.
+
+    Keyset pagination on (created_at, id) over ix_plans_wallet_created, so
+    every page costs the same however deep it is. Fetches limit + 1 rows to
+    tell whether another page follows.
+    """
+    query = select(*PLAN_LISTING_COLUMNS).where(Plan.user_wallet == user_wallet)
+    if cursor:
+        query = query.where(tuple_(Plan.created_at, Plan.id) < tuple_(*decode_plan_cursor(cursor)))
+    return query.order_by(desc(Plan.created_at), desc(Plan.id)).limit(limit + 1)
+
+def plan_page(rows, limit: int) -> PlanPage:
+    """Build a PlanPage from the limit + 1 rows of user_plans_page_query"""
+    plans = [
+        PlanListing(
+            plan_id=str(row.id),
+            destination=row.destination,
+            status=row.status,
+            created_at=row.created_at,
+            pin_status=row.pin_status,
+            ipfs_cid=row.ipfs_cid,
+            total_cost=_to_float(row.grand_total)
+        )
+        for row in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_plan_cursor(last.created_at, last.id)
+    return PlanPage(plans, next_cursor)
+
+def _to_float(value: Optional[str]) -> float:
+    try:
+        return float(value) if value is not None else 0.0
+    except ValueError:
+        return 0.0
+
+# Status a row must be in to move to each status; guarded updates match no row otherwise
+PLAN_STATUS_TRANSITIONS = {
+    "generated": (),
+    "confirmed": ("generated",),
+    "cancelled": ("generated", "confirmed")
+}
+BOOKING_STATUS_TRANSITIONS = {
+    "pending_payment": (),
+    "confirmed": ("pending_payment",),
+    "cancelled": ("pending_payment", "confirmed")
+}
+PAYMENT_STATUS_TRANSITIONS = {
+    "pending": ("failed",),
+    "completed": ("pending",),
+    "failed": ("pending",)
+}
+
+def _allowed_from(transitions: Dict[str, Tuple[str, ...]], status: str) -> Tuple[str, ...]:
+    if status not in transitions:
+        raise ValueError(f"Unknown status: {status}")
+    return transitions[status]
+
+def plan_status_update(plan_id: uuid.UUID, status: str):
+    """UPDATE ... RETURNING for a plan status change, matching only a plan whose status may move to `status`"""
+    return (
+        update(Plan)
+        .where(Plan.id == plan_id, Plan.status.in_(_allowed_from(PLAN_STATUS_TRANSITIONS, status)))
+        .values(status=status)
+        .returning(Plan)
+        .execution_options(populate_existing=True)
+    )
+
+def plan_data_update(plan_id: uuid.UUID, plan_data: Dict[str, Any]):
+    """UPDATE ... RETURNING for a plan's data"""
+    return (
+        update(Plan)
+        .where(Plan.id == plan_id)
+        .values(plan_data=plan_data)
+        .returning(Plan)
+        .execution_options(populate_existing=True)
+    )
+
+def booking_status_update(booking_id: str, status: str, payment_status: str = None):
+    """UPDATE ... RETURNING for a booking status change (and optionally its payment status), guarded by BOOKING_STATUS_TRANSITIONS"""
+    values = {"status": status, "updated_at": datetime.utcnow()}
+    if payment_status:
+        values["payment_status"] = payment_status
+    return (
+        update(Booking)
+        .where(Booking.booking_id == booking_id, Booking.status.in_(_allowed_from(BOOKING_STATUS_TRANSITIONS, status)))
+        .values(**values)
+        .returning(Booking)
+        .execution_options(populate_existing=True)
+    )
+
+def booking_payment_status_update(booking_id: str, payment_status: str):
+    """UPDATE ... RETURNING for a payment status change, guarded by PAYMENT_STATUS_TRANSITIONS"""
+    return (
+        update(Booking)
+        .where(
+            Booking.booking_id == booking_id,
+            Booking.payment_status.in_(_allowed_from(PAYMENT_STATUS_TRANSITIONS, payment_status))
+        )
+        .values(payment_status=payment_status, updated_at=datetime.utcnow())
+        .returning(Booking)
+        .execution_options(populate_existing=True)
+    )
+
+def _plan_uuid(plan_id: str) -> Optional[uuid.UUID]:
+    try:
+        return uuid.UUID(plan_id)
+    except ValueError:
+        return None
+
 class PlanService:
     @staticmethod
     def create_plan(
@@ -13,9 +171,10 @@ class PlanService:
         destination: str, 
         budget: int, 
         plan_data: Dict[str, Any],
-        status: str = "generated"
+        status: str = "generated",
+        commit: bool = True
     ) -> Plan:
-        """Create a new travel plan"""
+        """Create a new travel plan (pass commit=False to add more rows to the same transaction)"""
         plan = Plan(
             user_wallet=user_wallet,
             destination=destination,
@@ -24,7 +183,10 @@ class PlanService:
             status=status
         )
         db.add(plan)
-        db.commit()
+        if commit:
+            db.commit()
+        else:
+            db.flush()
         db.refresh(plan)
         return plan
     
@@ -45,23 +207,40 @@ class PlanService:
         ).order_by(desc(Plan.created_at)).all()
     
     @staticmethod
-    def update_plan_status(db: Session, plan_id: str, status: str) -> Optional[Plan]:
-        """Update plan status"""
-        plan = PlanService.get_plan_by_id(db, plan_id)
-        if plan:
-            plan.status = status
+    def list_user_plans(db: Session, user_wallet: str, limit: int = 50, cursor: Optional[str] = None) -> PlanPage:
+        """One page of a wallet's plans (newest first); pass next_cursor as cursor for the next page"""
+        rows = db.execute(user_plans_page_query(user_wallet, limit, cursor)).all()
+        return plan_page(rows, limit)
+    
+    @staticmethod
+    def update_plan_status(db: Session, plan_id: str, status: str, commit: bool = True) -> Optional[Plan]:
+        """
+        Move a plan to `status` in one UPDATE ... RETURNING (pass commit=False to add more changes to the same transaction).
+        
+        Returns None when the plan does not exist or its current status may not
+        move to `status` (see PLAN_STATUS_TRANSITIONS), so of several concurrent
+        confirms exactly one gets the plan back. A committed plan is returned
+        detached, with its updated values loaded.
+        """
+        plan_uuid = _plan_uuid(plan_id)
+        if plan_uuid is None:
+            return None
+        plan = db.scalars(plan_status_update(plan_uuid, status)).first()
+        if plan is not None and commit:
+            db.expunge(plan)
             db.commit()
-            db.refresh(plan)
         return plan
     
     @staticmethod
     def update_plan_data(db: Session, plan_id: str, plan_data: Dict[str, Any]) -> Optional[Plan]:
-        """Update plan data"""
-        plan = PlanService.get_plan_by_id(db, plan_id)
-        if plan:
-            plan.plan_data = plan_data
-            db.commit()
-            db.refresh(plan)
+        """Replace plan data in one UPDATE ... RETURNING; returns the plan detached, or None if it does not exist"""
+        plan_uuid = _plan_uuid(plan_id)
+        if plan_uuid is None:
+            return None
+        plan = db.scalars(plan_data_update(plan_uuid, plan_data)).first()
+        if plan is not None:
+            db.expunge(plan)
+        db.commit()
         return plan
     
     @staticmethod
@@ -84,9 +263,241 @@ class PlanService:
         """Get recent plans"""
         return db.query(Plan).order_by(desc(Plan.created_at)).limit(limit).all()
 
+class AsyncPlanService:
+    """PlanService for AsyncSession: the same operations, awaited so queries do not block the event loop"""
+    
+    @staticmethod
+    async def create_plan(
+        db: AsyncSession, 
+        user_wallet: str, 
+        destination: str, 
+        budget: int, 
+        plan_data: Dict[str, Any],
+        status: str = "generated",
+        commit: bool = True
+    ) -> Plan:
+        """Create a new travel plan (pass commit=False to add more rows to the same transaction)"""
+        plan = Plan(
+            user_wallet=user_wallet,
+            destination=destination,
+            budget=budget,
+            plan_data=plan_data,
+            status=status
+        )
+        db.add(plan)
+        if commit:
+            await db.commit()
+        else:
+            await db.flush()
+        await db.refresh(plan)
+        return plan
+    
+    @staticmethod
+    async def get_plan_by_id(db: AsyncSession, plan_id: str) -> Optional[Plan]:
+        """Get plan by ID"""
+        try:
+            plan_uuid = uuid.UUID(plan_id)
+        except ValueError:
+            return None
+        return await db.get(Plan, plan_uuid)
+    
+    @staticmethod
+    async def get_user_plans(db: AsyncSession, user_wallet: str) -> List[Plan]:
+        """Get all plans for a user wallet"""
+        result = await db.scalars(
+            select(Plan).where(Plan.user_wallet == user_wallet).order_by(desc(Plan.created_at))
+        )
+        return list(result)
+    
+    @staticmethod
+    async def list_user_plans(db: AsyncSession, user_wallet: str, limit: int = 50, cursor: Optional[str] = None) -> PlanPage:
+        """One page of a wallet's plans (newest first); pass next_cursor as cursor for the next page"""
+        rows = (await db.execute(user_plans_page_query(user_wallet, limit, cursor))).all()
+        return plan_page(rows, limit)
+    
+    @staticmethod
+    async def update_plan_status(db: AsyncSession, plan_id: str, status: str, commit: bool = True) -> Optional[Plan]:
+        """Move a plan to `status` in one UPDATE ... RETURNING; None if missing or not allowed (see PlanService.update_plan_status)"""
+        plan_uuid = _plan_uuid(plan_id)
+        if plan_uuid is None:
+            return None
+        plan = (await db.scalars(plan_status_update(plan_uuid, status))).first()
+        if plan is not None and commit:
+            await db.commit()
+        return plan
+    
+    @staticmethod
+    async def update_plan_data(db: AsyncSession, plan_id: str, plan_data: Dict[str, Any]) -> Optional[Plan]:
+        """Replace plan data in one UPDATE ... RETURNING; None if the plan does not exist"""
+        plan_uuid = _plan_uuid(plan_id)
+        if plan_uuid is None:
+            return None
+        plan = (await db.scalars(plan_data_update(plan_uuid, plan_data))).first()
+        await db.commit()
+        return plan
+    
+    @staticmethod
+    async def delete_plan(db: AsyncSession, plan_id: str) -> bool:
+        """Delete a plan"""
+        plan = await AsyncPlanService.get_plan_by_id(db, plan_id)
+        if plan:
+            await db.delete(plan)
+            await db.commit()
+            return True
+        return False
+    
+    @staticmethod
+    async def get_plans_by_status(db: AsyncSession, status: str) -> List[Plan]:
+        """Get all plans by status"""
+        return list(await db.scalars(select(Plan).where(Plan.status == status)))
+    
+    @staticmethod
+    async def get_recent_plans(db: AsyncSession, limit: int = 10) -> List[Plan]:
+        """Get recent plans"""
+        return list(await db.scalars(select(Plan).order_by(desc(Plan.created_at)).limit(limit)))
+
+class ReputationSummaryService:
+    """Reads and incremental updates for the materialized reputation summaries"""
+    
+    @staticmethod
+    def to_summary(row: WalletReputation) -> ReputationSummary:
+        """Pydantic summary for a stored row"""
+        return ReputationSummary(**{
+            name: getattr(row, name) for name in ReputationSummary.model_fields
+        })
+    
+    @staticmethod
+    def get_summary(db: Session, wallet_address: str) -> Optional[ReputationSummary]:
+        """Get a wallet's summary (one primary-key lookup)"""
+        row = db.get(WalletReputation, wallet_address.lower())
+        return ReputationSummaryService.to_summary(row) if row else None
+    
+    @staticmethod
+    def apply_record(db: Session, record: ReputationRecord, commit: bool = True) -> ReputationSummary:
+        """Fold a new reputation record into its traveler's summary (pass commit=False to leave the commit to the caller)"""
+        wallet = record.traveler_wallet.lower()
+        db.execute(
+            insert(WalletReputation)
+            .values(wallet_address=wallet)
+            .on_conflict_do_nothing(index_elements=["wallet_address"])
+        )
+        # Row lock serializes concurrent records for the same wallet
+        row = (
+            db.query(WalletReputation)
+            .filter(WalletReputation.wallet_address == wallet)
+            .with_for_update()
+            .one()
+        )
+        summary = ReputationSummaryService.to_summary(row)
+        summary.apply_record(record)
+        for name, value in summary.model_dump(exclude={"wallet_address", "reputation_level"}).items():
+            setattr(row, name, value)
+        row.reputation_level = summary.reputation_level.value
+        if commit:
+            db.commit()
+        else:
+            db.flush()
+        return summary
+
+class ReputationRecordService:
+    """Append-only reputation record log, hash-chained per wallet"""
+    
+    @staticmethod
+    def to_record(entry: ReputationLogEntry) -> ReputationRecord:
+        """Pydantic record for a stored entry (validated on write, so rebuilt without re-validation)"""
+        return ReputationRecord.from_trusted(entry.record)
+    
+    @staticmethod
+    def to_published_record(entry: ReputationLogEntry) -> ReputationRecord:
+        """Record as served by the API: ipfs_hash is the pinned path once the pin queue has uploaded it"""
+        record = ReputationRecord.from_trusted(entry.record)
+        if entry.ipfs_cid:
+            record.verification_data.ipfs_hash = entry.ipfs_cid
+            record.invalidate_serialization()
+        return record
+    
+    @staticmethod
+    def get_by_record_id(db: Session, record_id: str) -> Optional[ReputationLogEntry]:
+        return db.query(ReputationLogEntry).filter(ReputationLogEntry.record_id == record_id).first()
+    
+    @staticmethod
+    def append(db: Session, record: ReputationRecord) -> ReputationLogEntry:
+        """
+        Add a record to the wallet's chain in the caller's transaction; the caller commits.
+        
+        The wallet's previous entry supplies previous_hash and the record's
+        previous_record_hash, under a transaction-scoped
+        advisory lock so concurrent appends for one wallet cannot fork the chain.
+        """
+        wallet = record.traveler_wallet.lower()
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:wallet))"), {"wallet": wallet})
+        previous = (
+            db.query(ReputationLogEntry)
+            .filter(ReputationLogEntry.wallet_address == wallet)
+            .order_by(desc(ReputationLogEntry.id))
+            .first()
+        )
+        entry = ReputationRecordService.new_entry(record, previous)
+        db.add(entry)
+        db.flush()
+        return entry
+    
+    @staticmethod
+    def new_entry(record: ReputationRecord, previous: Optional[ReputationLogEntry]) -> ReputationLogEntry:
+        """
+        Build the log entry that chains a record after the wallet's previous entry.
+        
+        The record's previous_record_hash is set to the previous entry's
+        record_hash, so the link is part of the hashed content: rewriting an
+        earlier record breaks every later record's hash, not just one column.
+        """
+        if previous is not None and record.verification_data.previous_record_hash != previous.record_hash:
+            record.verification_data.previous_record_hash = previous.record_hash
+            record.invalidate_serialization()
+        return ReputationLogEntry(
+            record_id=record.record_id,
+            wallet_address=record.traveler_wallet.lower(),
+            event_type=record.event_type.value,
+            event_timestamp=record.event_timestamp,
+            record=record.model_dump(mode="json"),
+            record_hash=record.calculate_hash(),
+            previous_hash=previous.record_hash if previous is not None else None
+        )
+    
+    @staticmethod
+    def get_records(
+        db: Session,
+        wallet_address: str,
+        limit: int = 20,
+        before_id: Optional[int] = None
+    ) -> List[ReputationLogEntry]:
+        """Newest entries first; pass the last returned id as before_id for the next page"""
+        query = db.query(ReputationLogEntry).filter(ReputationLogEntry.wallet_address == wallet_address.lower())
+        if before_id is not None:
+            query = query.filter(ReputationLogEntry.id < before_id)
+        return query.order_by(desc(ReputationLogEntry.id)).limit(limit).all()
+    
+    @staticmethod
+    def count_records(db: Session, wallet_address: str) -> int:
+        """Number of entries in a wallet's chain"""
+        return (
+            db.query(func.count(ReputationLogEntry.id))
+            .filter(ReputationLogEntry.wallet_address == wallet_address.lower())
+            .scalar()
+        )
+    
+    @staticmethod
+    def iter_chain(db: Session, wallet_address: str, batch_size: int = 1000):
+        """Stream a wallet's entries oldest first, batch_size rows in memory at a time"""
+        return (
+            db.query(ReputationLogEntry)
+            .filter(ReputationLogEntry.wallet_address == wallet_address.lower())
+            .order_by(ReputationLogEntry.id)
+            .execution_options(yield_per=batch_size)
+        )
+
 # Booking-related functions
-def create_booking(
-    db: Session,
+def new_booking(
     flight_id: str,
     passenger_name: str,
     passenger_email: str,
@@ -95,11 +506,9 @@ def create_booking(
     flight_details: str = None,
     plan_id: str = None
 ) -> Booking:
-    """Create a new booking record"""
-    booking_id = f"TRV-{uuid.uuid4().hex[:8].upper()}"
-    
-    booking = Booking(
-        booking_id=booking_id,
+    """Build an unsaved booking awaiting payment"""
+    return Booking(
+        booking_id=f"TRV-{uuid.uuid4().hex[:8].upper()}",
         plan_id=uuid.UUID(plan_id) if plan_id else None,
         flight_id=flight_id,
         passenger_name=passenger_name,
@@ -110,6 +519,27 @@ def create_booking(
         status="pending_payment",
         payment_status="pending"
     )
+
+def create_booking(
+    db: Session,
+    flight_id: str,
+    passenger_name: str,
+    passenger_email: str,
+    payment_method: str = "crypto",
+    payment_amount: float = 0.10,
+    flight_details: str = None,
+    plan_id: str = None
+) -> Booking:
+    """Create a new booking record"""
+    booking = new_booking(
+        flight_id=flight_id,
+        passenger_name=passenger_name,
+        passenger_email=passenger_email,
+        payment_method=payment_method,
+        payment_amount=payment_amount,
+        flight_details=flight_details,
+        plan_id=plan_id
+    )
     
     db.add(booking)
     db.commit()
@@ -138,15 +568,17 @@ def update_booking_status(
     status: str,
     payment_status: str = None
 ) -> Optional[Booking]:
-    """Update booking status and optionally payment status"""
-    booking = get_booking_by_id(db, booking_id)
-    if booking:
-        booking.status = status
-        if payment_status:
-            booking.payment_status = payment_status
-        booking.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(booking)
+    """
+    Update booking status and optionally payment status in one UPDATE ... RETURNING.
+    
+    Returns None when the booking does not exist or its status may not move
+    to `status` (see BOOKING_STATUS_TRANSITIONS); otherwise the booking,
+    detached, with its updated values loaded.
+    """
+    booking = db.scalars(booking_status_update(booking_id, status, payment_status)).first()
+    if booking is not None:
+        db.expunge(booking)
+    db.commit()
     return booking
 
 def update_booking_payment_status(
@@ -154,13 +586,11 @@ def update_booking_payment_status(
     booking_id: str,
     payment_status: str
 ) -> Optional[Booking]:
-    """Update only the payment status of a booking"""
-    booking = get_booking_by_id(db, booking_id)
-    if booking:
-        booking.payment_status = payment_status
-        booking.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(booking)
+    """Update only the payment status of a booking in one UPDATE ... RETURNING (guarded by PAYMENT_STATUS_TRANSITIONS)"""
+    booking = db.scalars(booking_payment_status_update(booking_id, payment_status)).first()
+    if booking is not None:
+        db.expunge(booking)
+    db.commit()
     return booking
 
 def delete_booking(db: Session, booking_id: str) -> bool:
@@ -183,4 +613,89 @@ def get_pending_payments(db: Session) -> List[Booking]:
 
 def get_confirmed_bookings(db: Session) -> List[Booking]:
     """Get all confirmed bookings"""
-    return db.query(Booking).filter(Booking.status == "confirmed").all() 
\ No newline at end of file
+    return db.query(Booking).filter(Booking.status == "confirmed").all() 
+
+# Async booking functions, for AsyncSession callers
+async def create_booking_async(
+    db: AsyncSession,
+    flight_id: str,
+    passenger_name: str,
+    passenger_email: str,
+    payment_method: str = "crypto",
+    payment_amount: float = 0.10,
+    flight_details: str = None,
+    plan_id: str = None
+) -> Booking:
+    """Create a new booking record"""
+    booking = new_booking(
+        flight_id=flight_id,
+        passenger_name=passenger_name,
+        passenger_email=passenger_email,
+        payment_method=payment_method,
+        payment_amount=payment_amount,
+        flight_details=flight_details,
+        plan_id=plan_id
+    )
+    db.add(booking)
+    await db.commit()
+    await db.refresh(booking)
+    return booking
+
+async def get_booking_by_id_async(db: AsyncSession, booking_id: str) -> Optional[Booking]:
+    """Get booking by booking ID (TRV-XXXXX format)"""
+    return await db.scalar(select(Booking).where(Booking.booking_id == booking_id).limit(1))
+
+async def get_booking_by_db_id_async(db: AsyncSession, booking_db_id: int) -> Optional[Booking]:
+    """Get booking by database ID"""
+    return await db.get(Booking, booking_db_id)
+
+async def get_bookings_by_plan_async(db: AsyncSession, plan_id: str) -> List[Booking]:
+    """Get all bookings for a specific plan"""
+    return list(await db.scalars(select(Booking).where(Booking.plan_id == uuid.UUID(plan_id))))
+
+async def get_bookings_by_user_async(db: AsyncSession, user_wallet: str) -> List[Booking]:
+    """Get all bookings for a user (via their plans)"""
+    return list(await db.scalars(select(Booking).join(Plan).where(Plan.user_wallet == user_wallet)))
+
+async def update_booking_status_async(
+    db: AsyncSession,
+    booking_id: str,
+    status: str,
+    payment_status: str = None
+) -> Optional[Booking]:
+    """Update booking status and optionally payment status in one UPDATE ... RETURNING; None if missing or not allowed"""
+    booking = (await db.scalars(booking_status_update(booking_id, status, payment_status))).first()
+    await db.commit()
+    return booking
+
+async def update_booking_payment_status_async(
+    db: AsyncSession,
+    booking_id: str,
+    payment_status: str
+) -> Optional[Booking]:
+    """Update only the payment status of a booking in one UPDATE ... RETURNING; None if missing or not allowed"""
+    booking = (await db.scalars(booking_payment_status_update(booking_id, payment_status))).first()
+    await db.commit()
+    return booking
+
+async def delete_booking_async(db: AsyncSession, booking_id: str) -> bool:
+    """Delete a booking by booking ID"""
+    booking = await get_booking_by_id_async(db, booking_id)
+    if booking:
+        await db.delete(booking)
+        await db.commit()
+        return True
+    return False
+
+async def get_pending_payments_async(db: AsyncSession) -> List[Booking]:
+    """Get all bookings with pending payments"""
+    return list(await db.scalars(select(Booking).where(
+        and_(
+            Booking.payment_status == "pending",
+            Booking.status == "pending_payment"
+        )
+    )))
+
+async def get_confirmed_bookings_async(db: AsyncSession) -> List[Booking]:
+    """Get all confirmed bookings"""
+    return list(await db.scalars(select(Booking).where(Booking.status == "confirmed")))
@@ -0,0 +1,226 @@
+"""
+Pooled async client for the x402 payment facilitator
+
+Every paid request is verified with the facilitator's /verify endpoint. This
+client keeps one httpx connection pool (HTTP/2 when available) open for the
+life of the app, so verifications reuse warm connections instead of paying a
+TCP and TLS handshake each time. A circuit breaker stops calling a failing
+facilitator for a cool-down period, so paid endpoints fail fast while it
+recovers.
+
+A local stand-in facilitator for tests and benchmarks lives in
+tools/facilitator_stub.py.
+"""
+import os
+import time
+import asyncio
+from typing import Any, Dict, Optional
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_FACILITATOR_URL = "https://facilitator.coinbase.com"
+
+
+class FacilitatorError(Exception):
+    """Raised when a verification call fails, times out or returns an error status"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class FacilitatorUnavailable(FacilitatorError):
+    """Raised without calling the facilitator while the circuit is open"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Closed: calls go through. After failure_threshold consecutive failures the
+    circuit opens and calls are refused for reset_timeout seconds. Then one
+    trial call is let through (half-open): success closes the circuit, failure
+    opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if self._clock() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_timeout - (self._clock() - self.opened_at))
+
+    def allow(self) -> bool:
+        """Whether a call may go out now (claims the single half-open trial)"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def release(self):
+        """Give back a half-open trial whose call ended without a verdict"""
+        self._trial_in_flight = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._trial_in_flight or self.failures >= self.failure_threshold:
+            self.opened_at = self._clock()
+        self._trial_in_flight = False
+
+
+class FacilitatorClient:
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        timeout: Optional[float] = None,
+        max_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        failure_threshold: Optional[int] = None,
+        reset_timeout: Optional[float] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        """
+        Initialize facilitator client
+
+        Args:
+            base_url: Facilitator service URL (defaults to X402_FACILITATOR_URL env var, then the Coinbase facilitator)
+            timeout: Per-call timeout in seconds (defaults to FACILITATOR_TIMEOUT env var, then 5)
+            max_connections: Connection pool size (defaults to FACILITATOR_MAX_CONNECTIONS env var, then 50)
+            keepalive_expiry: Seconds an idle connection stays open (defaults to FACILITATOR_KEEPALIVE_EXPIRY env var, then 60)
+            failure_threshold: Consecutive failures that open the circuit (defaults to FACILITATOR_FAILURE_THRESHOLD env var, then 5)
+            reset_timeout: Seconds the circuit stays open (defaults to FACILITATOR_RESET_TIMEOUT env var, then 30)
+            transport: Optional httpx transport override (used by tests and benchmarks)
+        """
+        self.base_url = (base_url or os.getenv("X402_FACILITATOR_URL", DEFAULT_FACILITATOR_URL)).rstrip("/")
+        self.timeout = timeout or float(os.getenv("FACILITATOR_TIMEOUT", "5"))
+        self.max_connections = max_connections or int(os.getenv("FACILITATOR_MAX_CONNECTIONS", "50"))
+        self.keepalive_expiry = keepalive_expiry or float(os.getenv("FACILITATOR_KEEPALIVE_EXPIRY", "60"))
+        self.transport = transport
+        self.breaker = CircuitBreaker(
+            failure_threshold or int(os.getenv("FACILITATOR_FAILURE_THRESHOLD", "5")),
+            reset_timeout or float(os.getenv("FACILITATOR_RESET_TIMEOUT", "30"))
+        )
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_client(self) -> httpx.AsyncClient:
+        """Create the pooled client lazily, once per event loop"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            # A client is bound to the loop it was created on; scripts that call
+            # asyncio.run() repeatedly get a fresh pool each time.
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=HTTP2_AVAILABLE,
+                transport=self.transport,
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=self.keepalive_expiry
+                )
+            )
+            self._loop = loop
+        return self._client
+
+    async def close(self):
+        """Close the shared connection pool"""
+        if self._client is not None:
+            try:
+                await self._client.aclose()
+            finally:
+                self._client = None
+                self._loop = None
+
+    async def verify(self, payment: Dict[str, Any], expected_amount: str, recipient: str, network: str = "base-mainnet") -> Dict[str, Any]:
+        """
+        Ask the facilitator to verify a payment; returns its JSON verdict.
+
+        Timeouts, connection errors and 5xx responses count against the circuit
+        breaker. A 4xx or a {"valid": false} verdict means the facilitator is
+        healthy, so neither does.
+        """
+        if not self.breaker.allow():
+            raise FacilitatorUnavailable(
+                "Payment facilitator unavailable (circuit open)",
+                retry_after=self.breaker.retry_after()
+            )
+
+        client = self._ensure_client()
+        try:
+            # httpx timeouts apply per connect/read phase; wait_for bounds the whole call
+            response = await asyncio.wait_for(
+                client.post(
+                    "/verify",
+                    json={
+                        "payment": payment,
+                        "expectedAmount": expected_amount,
+                        "expectedRecipient": recipient,
+                        "network": network
+                    }
+                ),
+                timeout=self.timeout
+            )
+        except (asyncio.TimeoutError, httpx.TimeoutException):
+            self.breaker.record_failure()
+            raise FacilitatorError(f"Facilitator verification timed out after {self.timeout}s")
+        except httpx.HTTPError as e:
+            self.breaker.record_failure()
+            raise FacilitatorError(f"Facilitator verification failed: {e}")
+        except BaseException:
+            # Cancelled mid-call: release a half-open trial without judging the facilitator
+            self.breaker.release()
+            raise
+
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        if response.status_code != 200:
+            raise FacilitatorError(
+                f"Facilitator verification failed: [{response.status_code}] {response.text}",
+                status_code=response.status_code
+            )
+        return response.json()
+
+# Global instance
+facilitator_client = FacilitatorClient()
@@ -0,0 +1,241 @@
+"""
+Process-wide city geocode cache shared by hotel and activity searches
+
+Hotel and points-of-interest searches both need a city's coordinates before
+their real query. Coordinates practically never change, so lookups are cached
+by normalized city name with TTL and LRU eviction, optionally snapshotted to
+disk so warm restarts skip the lookup entirely. New entries are written out
+at most once per save interval and at interpreter exit, not on every set;
+each write merges with the file already on disk, so workers sharing one
+snapshot path do not drop each other's entries.
+"""
+import os
+import json
+import time
+import atexit
+import asyncio
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from dotenv import load_dotenv
+
+try:
+    import fcntl
+except ImportError:  # no flock (Windows): concurrent merges are best-effort
+    fcntl = None
+
+load_dotenv()
+
+Coordinates = Tuple[float, float]
+
+
+def normalize_city(city: str) -> str:
+    """Normalize a city name into a cache key ("  New  York " -> "new york")"""
+    return " ".join(city.split()).casefold()
+
+
+class GeocodeCache:
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        snapshot_path: Optional[str] = None,
+        save_interval: Optional[float] = None
+    ):
+        """
+        Initialize geocode cache
+
+        Args:
+            ttl_seconds: Entry lifetime (defaults to GEOCODE_CACHE_TTL env var, then 7 days)
+            max_entries: LRU capacity (defaults to GEOCODE_CACHE_MAX_ENTRIES env var, then 1024)
+            snapshot_path: Optional JSON snapshot file (defaults to GEOCODE_CACHE_PATH env var)
+            save_interval: Seconds new entries wait before the snapshot is rewritten (defaults to GEOCODE_CACHE_SAVE_INTERVAL env var, then 30)
+        """
+        self.ttl_seconds = ttl_seconds or float(os.getenv("GEOCODE_CACHE_TTL", str(7 * 24 * 3600)))
+        self.max_entries = max_entries or int(os.getenv("GEOCODE_CACHE_MAX_ENTRIES", "1024"))
+        self.snapshot_path = snapshot_path if snapshot_path is not None else os.getenv("GEOCODE_CACHE_PATH")
+        self.save_interval = save_interval if save_interval is not None else float(os.getenv("GEOCODE_CACHE_SAVE_INTERVAL", "30"))
+
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+        # key -> (latitude, longitude, expires_at)
+        self._entries: "OrderedDict[str, Tuple[float, float, float]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.snapshot_path:
+            self.load_snapshot()
+            atexit.register(self.flush)
+
+    def get(self, city: str) -> Optional[Coordinates]:
+        """Return cached coordinates for a city, or None on a miss"""
+        key = normalize_city(city)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[2] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def set(self, city: str, latitude: float, longitude: float):
+        """Store coordinates for a city, evicting the least recently used entry if full"""
+        key = normalize_city(city)
+        with self._lock:
+            self._entries[key] = (latitude, longitude, time.time() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            if self.snapshot_path:
+                self._dirty = True
+                if self._save_timer is None:
+                    self._save_timer = threading.Timer(self.save_interval, self.flush)
+                    self._save_timer.daemon = True
+                    self._save_timer.start()
+
+    def get_or_fetch(self, city: str, fetch: Callable[[str], Optional[Coordinates]]) -> Optional[Coordinates]:
+        """Return cached coordinates, calling ``fetch`` on a miss. Misses that resolve to None are not cached."""
+        coordinates = self.get(city)
+        if coordinates is not None:
+            return coordinates
+
+        coordinates = fetch(city)
+        if coordinates is not None:
+            self.set(city, *coordinates)
+        return coordinates
+
+    async def get_or_fetch_async(
+        self,
+        city: str,
+        fetch: Callable[[str], Awaitable[Optional[Coordinates]]]
+    ) -> Optional[Coordinates]:
+        """Async variant of get_or_fetch; concurrent misses for the same city share one fetch"""
+        coordinates = self.get(city)
+        if coordinates is not None:
+            return coordinates
+
+        # One shared lookup task per city, awaited through shield by every
+        # caller, so a caller that times out does not cancel the others
+        key = normalize_city(city)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_and_set(city, fetch))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._fetch_done(key, done))
+        return await asyncio.shield(task)
+
+    async def _fetch_and_set(
+        self,
+        city: str,
+        fetch: Callable[[str], Awaitable[Optional[Coordinates]]]
+    ) -> Optional[Coordinates]:
+        coordinates = await fetch(city)
+        if coordinates is not None:
+            self.set(city, *coordinates)
+        return coordinates
+
+    def _fetch_done(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark retrieved so an exception nobody else awaited is not logged
+            task.exception()
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters"""
+        with self._lock:
+            size = len(self._entries)
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": size,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+    def clear(self):
+        """Drop all entries and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def flush(self):
+        """Write the snapshot now if entries were added since the last write"""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            dirty, self._dirty = self._dirty, False
+        if dirty:
+            self.save_snapshot()
+
+    def _read_snapshot(self) -> Dict[str, list]:
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return {}
+        try:
+            with open(self.snapshot_path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Failed to read geocode cache snapshot: {e}")
+            return {}
+
+    def save_snapshot(self):
+        """Atomically write unexpired entries, merged with the snapshot already on disk, to the snapshot file"""
+        if not self.snapshot_path:
+            return
+        try:
+            # Serialize read-merge-write across workers sharing the snapshot
+            with open(f"{self.snapshot_path}.lock", "a") as lock:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                self._write_snapshot()
+        except OSError as e:
+            print(f"⚠️ Failed to write geocode cache snapshot: {e}")
+
+    def _write_snapshot(self):
+        now = time.time()
+        entries = {key: entry for key, entry in self._read_snapshot().items() if entry[2] > now}
+        with self._lock:
+            entries.update(
+                (key, [lat, lon, expires_at])
+                for key, (lat, lon, expires_at) in self._entries.items()
+                if expires_at > now
+            )
+        if len(entries) > self.max_entries:
+            entries = dict(sorted(entries.items(), key=lambda item: item[1][2])[-self.max_entries:])
+        # A private temp file per write, so concurrent writers never share one
+        directory, name = os.path.split(os.path.abspath(self.snapshot_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f"{name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def load_snapshot(self):
+        """Load unexpired entries from the snapshot file, if it exists"""
+        entries = self._read_snapshot()
+        now = time.time()
+        with self._lock:
+            for key, (lat, lon, expires_at) in entries.items():
+                if expires_at > now:
+                    self._entries[key] = (lat, lon, expires_at)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+# Global instance
+geocode_cache = GeocodeCache()
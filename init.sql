@@ -7,13 +7,110 @@ CREATE TABLE IF NOT EXISTS plans (
     plan_data JSONB NOT NULL,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     status VARCHAR(20) DEFAULT 'generated' CHECK (status IN ('generated', 'confirmed', 'cancelled')),
-    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    pin_status VARCHAR(20) NOT NULL DEFAULT 'pending' CHECK (pin_status IN ('pending', 'pinned', 'failed', 'disabled')),
+    ipfs_cid VARCHAR(255)
 );
 
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_plans_user_wallet ON plans(user_wallet);
 CREATE INDEX IF NOT EXISTS idx_plans_created_at ON plans(created_at);
 CREATE INDEX IF NOT EXISTS idx_plans_status ON plans(status);
+CREATE INDEX IF NOT EXISTS ix_plans_wallet_created ON plans(user_wallet, created_at DESC, id DESC);
+
+-- Outbox of documents waiting to be pinned to IPFS (drained by pin_queue.py workers)
+CREATE TABLE IF NOT EXISTS pin_outbox (
+    id SERIAL PRIMARY KEY,
+    kind VARCHAR(30) NOT NULL,
+    plan_id UUID REFERENCES plans(id) ON DELETE CASCADE,
+    payload JSONB NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'in_progress', 'done', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_error TEXT,
+    cid VARCHAR(255),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_pin_outbox_claim ON pin_outbox(status, next_attempt_at);
+
+-- Index of pinned objects by canonical-JSON content hash (objects live at <root_cid>/<path>)
+CREATE TABLE IF NOT EXISTS ipfs_objects (
+    content_hash VARCHAR(64) PRIMARY KEY,
+    kind VARCHAR(30) NOT NULL,
+    root_cid VARCHAR(100) NOT NULL,
+    path VARCHAR(100) NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_ipfs_objects_root_cid ON ipfs_objects(root_cid);
+
+-- Referral records pinned to IPFS, indexed by (lowercased) wallet
+CREATE TABLE IF NOT EXISTS referrals (
+    id SERIAL PRIMARY KEY,
+    cid VARCHAR(255) NOT NULL UNIQUE,
+    referrer_wallet VARCHAR(42) NOT NULL,
+    referee_wallet VARCHAR(42),
+    payment_transaction_id VARCHAR(100),
+    record JSONB NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_referrals_referrer_wallet ON referrals(referrer_wallet);
+CREATE INDEX IF NOT EXISTS ix_referrals_referee_wallet ON referrals(referee_wallet);
+
+-- Materialized reputation summary per (lowercased) wallet, updated as records arrive
+CREATE TABLE IF NOT EXISTS reputation_summaries (
+    wallet_address VARCHAR(42) PRIMARY KEY,
+    reputation_level VARCHAR(20) NOT NULL DEFAULT 'new',
+    total_bookings INTEGER NOT NULL DEFAULT 0,
+    completed_bookings INTEGER NOT NULL DEFAULT 0,
+    cancelled_bookings INTEGER NOT NULL DEFAULT 0,
+    disputed_bookings INTEGER NOT NULL DEFAULT 0,
+    total_spent_usd NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    total_spent_usdc NUMERIC(20, 6) NOT NULL DEFAULT 0,
+    total_refunds NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    average_rating NUMERIC(3, 2),
+    rating_count INTEGER NOT NULL DEFAULT 0,
+    rating_total INTEGER NOT NULL DEFAULT 0,
+    completion_rate NUMERIC(5, 4) NOT NULL DEFAULT 0,
+    dispute_rate NUMERIC(5, 4) NOT NULL DEFAULT 0,
+    countries_visited JSONB NOT NULL DEFAULT '[]',
+    total_travel_days INTEGER NOT NULL DEFAULT 0,
+    total_referrals INTEGER NOT NULL DEFAULT 0,
+    successful_referrals INTEGER NOT NULL DEFAULT 0,
+    total_commission_earned NUMERIC(20, 6) NOT NULL DEFAULT 0,
+    total_bonus_earned NUMERIC(20, 6) NOT NULL DEFAULT 0,
+    reputation_score NUMERIC(7, 2) NOT NULL DEFAULT 0,
+    first_booking_date DATE,
+    last_booking_date DATE,
+    last_updated TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_reputation_summaries_score ON reputation_summaries(reputation_score, wallet_address);
+CREATE INDEX IF NOT EXISTS ix_reputation_summaries_level_score ON reputation_summaries(reputation_level, reputation_score, wallet_address);
+
+-- Append-only reputation records, hash-chained per (lowercased) wallet; see reputation_chain.py
+CREATE TABLE IF NOT EXISTS reputation_records (
+    id BIGSERIAL PRIMARY KEY,
+    record_id VARCHAR(64) NOT NULL UNIQUE,
+    wallet_address VARCHAR(42) NOT NULL,
+    event_type VARCHAR(30) NOT NULL,
+    event_timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
+    record JSONB NOT NULL,
+    record_hash VARCHAR(64) NOT NULL,
+    previous_hash VARCHAR(64),
+    ipfs_cid VARCHAR(255),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_reputation_records_wallet_id ON reputation_records(wallet_address, id);
+CREATE INDEX IF NOT EXISTS ix_reputation_records_wallet_time ON reputation_records(wallet_address, event_timestamp);
+
+-- Reputation record pin jobs write their CID back to the record (pin_outbox is created above reputation_records)
+ALTER TABLE pin_outbox ADD COLUMN IF NOT EXISTS reputation_record_id BIGINT REFERENCES reputation_records(id) ON DELETE CASCADE;
 
 -- Create a function to update the updated_at timestamp
 CREATE OR REPLACE FUNCTION update_updated_at_column()
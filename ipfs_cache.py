@@ -0,0 +1,292 @@
+"""
+Content-addressed read cache for IPFS gateway fetches
+
+IPFS content never changes for a given CID, so fetched bytes are cached with
+no TTL or invalidation: a byte-bounded in-memory LRU in front of an optional
+on-disk tier. The disk tier is an append-only pack file read through a single
+memory map, with a small append-only index of CID -> (offset, length). Misses
+go to the configured gateways over one keep-alive session, either in order
+(fallback) or all at once, taking whichever answers first (race mode).
+
+Because nothing is ever invalidated, a gateway response is checked before it
+is cached or returned, and one that fails the check counts as that gateway
+failing. Objects pinned by pin_queue.py are named <root>/<sha256>.json after
+the SHA-256 of their bytes, so those are verified exactly; get_json also
+requires the content to parse as JSON.
+"""
+import os
+import re
+import json
+import mmap
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+try:
+    import fcntl
+except ImportError:  # no flock (Windows): appends are only serialized within this process
+    fcntl = None
+
+load_dotenv()
+
+DEFAULT_GATEWAYS = "https://gateway.pinata.cloud/ipfs/,https://ipfs.io/ipfs/"
+
+# <root>/<sha256 of the bytes>.json, as written by pin_queue.py
+CONTENT_ADDRESSED_PATH = re.compile(r"/([0-9a-f]{64})\.json$")
+
+
+def normalize_cid(ipfs_hash: str) -> str:
+    """Strip ipfs:// and /ipfs/ prefixes; keeps any path inside a directory CID"""
+    ipfs_hash = ipfs_hash.strip()
+    for prefix in ("ipfs://", "/ipfs/"):
+        if ipfs_hash.startswith(prefix):
+            ipfs_hash = ipfs_hash[len(prefix):]
+    return ipfs_hash.strip("/")
+
+
+def verify_content(cid: str, content: bytes):
+    """Raise ValueError if content does not match the SHA-256 its path names (no-op for other paths)"""
+    match = CONTENT_ADDRESSED_PATH.search(cid)
+    if match and hashlib.sha256(content).hexdigest() != match.group(1):
+        raise ValueError("content does not match its SHA-256 path")
+
+
+def require_json(content: bytes):
+    json.loads(content)
+
+
+class PackFile:
+    """Append-only on-disk blob store read through one memory map"""
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.pack_path = os.path.join(directory, "objects.pack")
+        self.index_path = os.path.join(directory, "objects.idx")
+        self._lock = threading.Lock()
+        self._index: Dict[str, Tuple[int, int]] = {}
+        self._index_read_pos = 0
+        self._map: Optional[mmap.mmap] = None
+        self._mapped_size = 0
+        # Make sure both files exist so readers never race their creation
+        open(self.pack_path, "ab").close()
+        open(self.index_path, "ab").close()
+        self._load_index()
+
+    def _load_index(self):
+        """Read index lines appended since the last call (including by other processes)"""
+        with open(self.index_path, "rb") as f:
+            f.seek(self._index_read_pos)
+            data = f.read()
+        # Only consume complete lines; a partial trailing line is picked up next time
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                cid, offset, length = line.decode().split("\t")
+                self._index[cid] = (int(offset), int(length))
+            except ValueError:
+                continue
+        self._index_read_pos += end
+
+    def _view(self, offset: int, length: int) -> bytes:
+        if self._map is None or offset + length > self._mapped_size:
+            size = os.path.getsize(self.pack_path)
+            if self._map is not None:
+                self._map.close()
+            with open(self.pack_path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped_size = size
+        return self._map[offset:offset + length]
+
+    def get(self, cid: str) -> Optional[bytes]:
+        with self._lock:
+            location = self._index.get(cid)
+            if location is None:
+                self._load_index()
+                location = self._index.get(cid)
+                if location is None:
+                    return None
+            return self._view(*location)
+
+    def put(self, cid: str, content: bytes):
+        with self._lock:
+            if cid in self._index:
+                return
+            with open(self.pack_path, "ab") as pack, open(self.index_path, "ab") as index:
+                # Serialize appends across processes sharing the directory
+                if fcntl is not None:
+                    fcntl.flock(pack.fileno(), fcntl.LOCK_EX)
+                try:
+                    offset = pack.seek(0, os.SEEK_END)
+                    pack.write(content)
+                    pack.flush()
+                    # Data first, then the index line, so a crash never indexes missing bytes
+                    index.write(f"{cid}\t{offset}\t{len(content)}\n".encode())
+                    index.flush()
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(pack.fileno(), fcntl.LOCK_UN)
+            self._index[cid] = (offset, len(content))
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+
+
+class IpfsContentCache:
+    def __init__(
+        self,
+        gateways: Optional[List[str]] = None,
+        race: Optional[bool] = None,
+        memory_max_bytes: Optional[int] = None,
+        disk_path: Optional[str] = None,
+        timeout: Optional[float] = None
+    ):
+        """
+        Initialize IPFS content cache
+
+        Args:
+            gateways: Gateway base URLs ending in /ipfs/ (defaults to IPFS_GATEWAYS env var, comma-separated)
+            race: Query all gateways at once and use the first answer (defaults to IPFS_GATEWAY_RACE env var, then False)
+            memory_max_bytes: In-memory tier size (defaults to IPFS_CACHE_MEMORY_BYTES env var, then 32 MiB)
+            disk_path: Directory for the on-disk tier (defaults to IPFS_CACHE_DIR env var; disabled if unset,
+                       pass "" to disable explicitly)
+            timeout: Per-gateway request timeout in seconds (defaults to IPFS_GATEWAY_TIMEOUT env var, then 10)
+        """
+        gateways = gateways or os.getenv("IPFS_GATEWAYS", DEFAULT_GATEWAYS).split(",")
+        self.gateways = [g.strip().rstrip("/") + "/" for g in gateways if g.strip()]
+        self.race = race if race is not None else os.getenv("IPFS_GATEWAY_RACE", "false").lower() == "true"
+        self.memory_max_bytes = memory_max_bytes or int(os.getenv("IPFS_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+        self.timeout = timeout or float(os.getenv("IPFS_GATEWAY_TIMEOUT", "10"))
+
+        disk_path = disk_path if disk_path is not None else os.getenv("IPFS_CACHE_DIR")
+        self.disk: Optional[PackFile] = PackFile(disk_path) if disk_path else None
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.gateways) or 1, pool_maxsize=16)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._race_executor = ThreadPoolExecutor(max_workers=max(len(self.gateways), 1) * 4, thread_name_prefix="ipfs-gateway")
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _remember(self, cid: str, content: bytes):
+        if len(content) > self.memory_max_bytes:
+            return
+        with self._lock:
+            if cid in self._memory:
+                return
+            self._memory[cid] = content
+            self._memory_bytes += len(content)
+            while self._memory_bytes > self.memory_max_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def _fetch_from(self, gateway: str, cid: str, check: Optional[Callable[[bytes], None]] = None) -> bytes:
+        response = self.session.get(f"{gateway}{cid}", timeout=self.timeout)
+        response.raise_for_status()
+        content = response.content
+        verify_content(cid, content)
+        if check is not None:
+            check(content)
+        return content
+
+    def _fetch(self, cid: str, check: Optional[Callable[[bytes], None]] = None) -> Optional[bytes]:
+        errors = []
+        if self.race and len(self.gateways) > 1:
+            futures = {self._race_executor.submit(self._fetch_from, gateway, cid, check): gateway for gateway in self.gateways}
+            for future in as_completed(futures):
+                try:
+                    return future.result()
+                except Exception as e:
+                    errors.append(f"{futures[future]}: {e}")
+        else:
+            for gateway in self.gateways:
+                try:
+                    return self._fetch_from(gateway, cid, check)
+                except Exception as e:
+                    errors.append(f"{gateway}: {e}")
+        print(f"❌ Failed to retrieve {cid} from IPFS gateways: {'; '.join(errors)}")
+        return None
+
+    def get(self, ipfs_hash: str, check: Optional[Callable[[bytes], None]] = None) -> Optional[bytes]:
+        """
+        Return the content for a CID (or CID path), or None if no gateway could serve it.
+
+        Fetched content must pass verify_content and ``check`` (which raises
+        ValueError to reject it) before it is cached.
+        """
+        cid = normalize_cid(ipfs_hash)
+        with self._lock:
+            content = self._memory.get(cid)
+            if content is not None:
+                self._memory.move_to_end(cid)
+                self.memory_hits += 1
+                return content
+
+        if self.disk is not None:
+            content = self.disk.get(cid)
+            if content is not None:
+                self.disk_hits += 1
+                self._remember(cid, content)
+                return content
+
+        self.misses += 1
+        content = self._fetch(cid, check)
+        if content is not None:
+            if self.disk is not None:
+                try:
+                    self.disk.put(cid, content)
+                except OSError as e:
+                    print(f"⚠️ Failed to write IPFS cache entry: {e}")
+            self._remember(cid, content)
+        return content
+
+    def get_json(self, ipfs_hash: str) -> Optional[Any]:
+        """Return parsed JSON content for a CID, or None if unavailable or not JSON"""
+        content = self.get(ipfs_hash, check=require_json)
+        if content is None:
+            return None
+        try:
+            return json.loads(content)
+        except ValueError as e:
+            print(f"❌ IPFS content for {ipfs_hash} is not JSON: {e}")
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_entries": len(self.disk) if self.disk is not None else 0,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "race": self.race
+        }
+
+    def close(self):
+        """Close the gateway session and disk map"""
+        self.session.close()
+        self._race_executor.shutdown(wait=False)
+        if self.disk is not None:
+            self.disk.close()
+
+# Global instance
+ipfs_cache = IpfsContentCache()
@@ -0,0 +1,434 @@
+"""
+Reputation leaderboard
+
+Wallets are ranked by reputation_score (ties broken by wallet address, both
+descending) straight from the materialized reputation_summaries table, whose
+(score, wallet) btree indexes serve pages, keyset cursors and rank counts
+without sorting. When REDIS_URL is set, a sorted set per ranking (all wallets
+and each level) plus a hash of serialized entries is kept current as
+summaries change, so pages and ranks are O(log n) Redis reads that never
+touch Postgres. Rank lookups and participant counts are cached briefly in
+process either way.
+
+Redis is only read once a rebuild has completed (it sets a ready marker).
+Until then, or after Redis is flushed, reads fall back to Postgres and a
+background rebuild starts; the API also starts one at startup if needed.
+A rebuild loads into separate build keys and RENAMEs them over the live
+ones in one transaction, so readers never see a partial index; updates
+recorded while it runs go to both. Rebuild by hand with:
+
+    python leaderboard.py rebuild
+"""
+import os
+import time
+import base64
+import argparse
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Iterable, List, Optional, Tuple
+from dotenv import load_dotenv
+from sqlalchemy import desc, func, tuple_
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from db_service import ReputationSummaryService
+from models import WalletReputation
+from reputation_models import ReputationLevel, ReputationSummary
+
+load_dotenv()
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+def encode_cursor(score: Decimal, wallet_address: str, rank: int) -> str:
+    """Opaque cursor pointing just after the given entry"""
+    raw = f"{score}|{wallet_address}|{rank}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Decimal, str, int]:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        score, wallet_address, rank = raw.split("|")
+        return Decimal(score), wallet_address, int(rank)
+    except Exception as e:
+        raise ValueError(f"Invalid leaderboard cursor: {cursor}") from e
+
+
+@dataclass(slots=True)
+class LeaderboardPage:
+    entries: List[Tuple[int, ReputationSummary]]  # (1-based rank, summary)
+    next_cursor: Optional[str]
+    total: int
+
+
+class PostgresLeaderboardStore:
+    """Ranking queries over the reputation_summaries score indexes"""
+
+    @staticmethod
+    def _ranked(db: Session, level: Optional[str]):
+        query = db.query(WalletReputation)
+        if level:
+            query = query.filter(WalletReputation.reputation_level == level)
+        return query
+
+    @staticmethod
+    def _key():
+        return tuple_(WalletReputation.reputation_score, WalletReputation.wallet_address)
+
+    def page(self, db: Session, limit: int, offset: int, after: Optional[Tuple[Decimal, str]], level: Optional[str]) -> List[ReputationSummary]:
+        query = self._ranked(db, level)
+        if after is not None:
+            query = query.filter(self._key() < tuple_(*after))
+        rows = (
+            query.order_by(desc(WalletReputation.reputation_score), desc(WalletReputation.wallet_address))
+            .offset(offset)
+            .limit(limit)
+            .all()
+        )
+        return [ReputationSummaryService.to_summary(row) for row in rows]
+
+    def rank(self, db: Session, wallet_address: str, level: Optional[str]) -> Optional[int]:
+        row = db.get(WalletReputation, wallet_address)
+        if row is None or (level and row.reputation_level != level):
+            return None
+        ahead = (
+            self._ranked(db, level)
+            .filter(self._key() > tuple_(row.reputation_score, row.wallet_address))
+            .with_entities(func.count())
+            .scalar()
+        )
+        return ahead + 1
+
+    def count(self, db: Session, level: Optional[str]) -> int:
+        return self._ranked(db, level).with_entities(func.count()).scalar()
+
+
+class RedisLeaderboardStore:
+    """Sorted sets per ranking plus a hash of serialized summaries"""
+
+    def __init__(self, url: str, prefix: str = "leaderboard:"):
+        self.prefix = prefix
+        self.build_prefix = f"{prefix}build:"
+        self._client = redis.Redis.from_url(url)
+
+    def _ranking(self, level: Optional[str], prefix: Optional[str] = None) -> str:
+        prefix = prefix or self.prefix
+        return f"{prefix}level:{level}" if level else f"{prefix}all"
+
+    def _entries_key(self, prefix: Optional[str] = None) -> str:
+        return f"{prefix or self.prefix}entries"
+
+    @property
+    def _entries(self) -> str:
+        return self._entries_key()
+
+    @property
+    def _ready(self) -> str:
+        return f"{self.prefix}ready"
+
+    @property
+    def _building(self) -> str:
+        return f"{self.prefix}building"
+
+    def _keys(self, prefix: str) -> List[str]:
+        return [self._ranking(None, prefix), self._entries_key(prefix)] + [self._ranking(level.value, prefix) for level in ReputationLevel]
+
+    def _write(self, summaries: Iterable[ReputationSummary], prefixes: List[str]):
+        pipe = self._client.pipeline(transaction=True)
+        for summary in summaries:
+            wallet = summary.wallet_address.lower()
+            score = float(summary.reputation_score)
+            entry = summary.model_dump_json()
+            for prefix in prefixes:
+                for level in ReputationLevel:
+                    if level != summary.reputation_level:
+                        pipe.zrem(self._ranking(level.value, prefix), wallet)
+                pipe.zadd(self._ranking(None, prefix), {wallet: score})
+                pipe.zadd(self._ranking(summary.reputation_level.value, prefix), {wallet: score})
+                pipe.hset(self._entries_key(prefix), wallet, entry)
+        pipe.execute()
+
+    def update(self, summaries: Iterable[ReputationSummary]):
+        """Apply summaries to the live index, and to the build keys while a rebuild runs"""
+        prefixes = [self.prefix]
+        if self._client.exists(self._building):
+            prefixes.append(self.build_prefix)
+        self._write(summaries, prefixes)
+
+    def ready(self) -> bool:
+        """True once a rebuild has completed and Redis has not been flushed since"""
+        return bool(self._client.exists(self._ready))
+
+    def begin_rebuild(self, lease_seconds: int) -> bool:
+        """Take the rebuild lease and empty the build keys; False if another rebuild holds it"""
+        if not self._client.set(self._building, "1", nx=True, ex=lease_seconds):
+            return False
+        self._client.delete(*self._keys(self.build_prefix))
+        return True
+
+    def load(self, summaries: Iterable[ReputationSummary]):
+        self._write(summaries, [self.build_prefix])
+
+    def finish_rebuild(self):
+        """Swap the build keys in for the live ones atomically and mark the index ready"""
+        pipe = self._client.pipeline(transaction=True)
+        for build, live in zip(self._keys(self.build_prefix), self._keys(self.prefix)):
+            if self._client.exists(build):
+                pipe.rename(build, live)
+            else:  # nobody at this level
+                pipe.delete(live)
+        pipe.set(self._ready, "1")
+        pipe.delete(self._building)
+        pipe.execute()
+
+    def abort_rebuild(self):
+        self._client.delete(*self._keys(self.build_prefix), self._building)
+
+    def start_after(self, after: Tuple[Decimal, str, int], level: Optional[str]) -> int:
+        """0-based start index just past a cursor entry"""
+        score, wallet, rank = after
+        current = self._client.zscore(self._ranking(level), wallet)
+        if current is not None and Decimal(str(current)) == score:
+            return self._client.zrevrank(self._ranking(level), wallet) + 1
+        # The cursor entry moved since the page was read: fall back to its old position
+        return rank
+
+    def page(self, limit: int, start: int, level: Optional[str]) -> List[ReputationSummary]:
+        wallets = self._client.zrevrange(self._ranking(level), start, start + limit - 1)
+        if not wallets:
+            return []
+        raw_entries = self._client.hmget(self._entries, wallets)
+        return [ReputationSummary.model_validate_json(raw) for raw in raw_entries if raw is not None]
+
+    def rank(self, wallet_address: str, level: Optional[str]) -> Optional[int]:
+        rank = self._client.zrevrank(self._ranking(level), wallet_address)
+        return rank + 1 if rank is not None else None
+
+    def count(self, level: Optional[str]) -> int:
+        return self._client.zcard(self._ranking(level))
+
+
+class Leaderboard:
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        cache_ttl: Optional[float] = None,
+        cache_size: Optional[int] = None,
+        rebuild_lease: Optional[int] = None,
+        session_factory=SessionLocal
+    ):
+        """
+        Initialize leaderboard
+
+        Args:
+            redis_url: Redis URL for the sorted-set index (defaults to REDIS_URL env var; Postgres only if unset)
+            cache_ttl: Seconds a rank or participant count is reused (defaults to LEADERBOARD_CACHE_TTL env var, then 30)
+            cache_size: Maximum cached rank lookups (defaults to LEADERBOARD_CACHE_SIZE env var, then 10000)
+            rebuild_lease: Seconds a rebuild holds its lock before another may start (defaults to LEADERBOARD_REBUILD_LEASE env var, then 3600)
+            session_factory: Sessions for background rebuilds
+        """
+        self.postgres = PostgresLeaderboardStore()
+        self.cache_ttl = cache_ttl if cache_ttl is not None else float(os.getenv("LEADERBOARD_CACHE_TTL", "30"))
+        self.cache_size = cache_size or int(os.getenv("LEADERBOARD_CACHE_SIZE", "10000"))
+        self.rebuild_lease = rebuild_lease or int(os.getenv("LEADERBOARD_REBUILD_LEASE", "3600"))
+        self.session_factory = session_factory
+
+        redis_url = redis_url if redis_url is not None else os.getenv("REDIS_URL")
+        self.redis: Optional[RedisLeaderboardStore] = None
+        if redis_url:
+            if REDIS_AVAILABLE:
+                self.redis = RedisLeaderboardStore(redis_url)
+            else:
+                print("⚠️  Warning: REDIS_URL is set but the redis package is not installed. Using Postgres leaderboard only.")
+
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[tuple, Tuple[float, Optional[int]]]" = OrderedDict()
+        self._ready_until = 0.0
+        self._next_rebuild_at = 0.0
+        self._rebuild_thread: Optional[threading.Thread] = None
+
+    def _cached(self, key: tuple, compute) -> Optional[int]:
+        now = time.monotonic()
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None and hit[0] > now:
+                self._cache.move_to_end(key)
+                return hit[1]
+        value = compute()
+        with self._lock:
+            self._cache[key] = (now + self.cache_ttl, value)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return value
+
+    def _redis_ready(self, force: bool = False) -> bool:
+        """Whether reads may use Redis (checked at most every cache_ttl); starts a rebuild if not"""
+        if self.redis is None:
+            return False
+        if not force and time.monotonic() < self._ready_until:
+            return True
+        try:
+            ready = self.redis.ready()
+        except Exception as e:
+            print(f"⚠️ Leaderboard Redis read failed: {e}")
+            return False
+        now = time.monotonic()
+        if ready:
+            self._ready_until = now + self.cache_ttl
+        elif force or now >= self._next_rebuild_at:
+            self._next_rebuild_at = now + self.cache_ttl
+            self.rebuild_in_background()
+        return ready
+
+    def ensure_index(self):
+        """Start a background rebuild if the Redis index is missing (call at startup)"""
+        self._redis_ready(force=True)
+
+    def rebuild_in_background(self):
+        """Rebuild the Redis index in a daemon thread unless one is already running here"""
+        with self._lock:
+            if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+                return
+            self._rebuild_thread = threading.Thread(target=self._rebuild_with_session, name="leaderboard-rebuild", daemon=True)
+            self._rebuild_thread.start()
+
+    def _rebuild_with_session(self):
+        db = self.session_factory()
+        try:
+            indexed = self.rebuild(db)
+            print(f"✅ Leaderboard index rebuilt: {indexed} wallets")
+        except Exception as e:
+            print(f"⚠️ Leaderboard rebuild skipped: {e}")
+        finally:
+            db.close()
+
+    def record(self, summaries: Iterable[ReputationSummary]):
+        """Reflect updated summaries in the index (call after they are committed)"""
+        summaries = list(summaries)
+        with self._lock:
+            for summary in summaries:
+                wallet = summary.wallet_address.lower()
+                for level in [None] + [level.value for level in ReputationLevel]:
+                    self._cache.pop(("rank", wallet, level), None)
+        if self.redis is not None:
+            try:
+                self.redis.update(summaries)
+            except Exception as e:
+                print(f"⚠️ Leaderboard Redis update failed (run `python leaderboard.py rebuild` to repair): {e}")
+
+    def total(self, db: Session, level: Optional[str] = None) -> int:
+        """Number of ranked wallets (cached for cache_ttl)"""
+        def compute():
+            if self._redis_ready():
+                try:
+                    return self.redis.count(level)
+                except Exception as e:
+                    print(f"⚠️ Leaderboard Redis read failed: {e}")
+            return self.postgres.count(db, level)
+        return self._cached(("total", None, level), compute)
+
+    def rank(self, db: Session, wallet_address: str, level: Optional[str] = None) -> Optional[int]:
+        """1-based rank of a wallet overall or within a level, None if unranked (cached for cache_ttl)"""
+        wallet = wallet_address.lower()
+
+        def compute():
+            if self._redis_ready():
+                try:
+                    return self.redis.rank(wallet, level)
+                except Exception as e:
+                    print(f"⚠️ Leaderboard Redis read failed: {e}")
+            return self.postgres.rank(db, wallet, level)
+        return self._cached(("rank", wallet, level), compute)
+
+    def page(
+        self,
+        db: Session,
+        limit: int = 10,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        level: Optional[str] = None
+    ) -> LeaderboardPage:
+        """
+        Read one page of the leaderboard.
+
+        Pass ``offset`` for numbered pages, or the previous page's
+        ``next_cursor`` to continue from where it ended (stable under
+        concurrent updates and cheap at any depth).
+        """
+        after = decode_cursor(cursor) if cursor else None
+
+        summaries = None
+        if self._redis_ready():
+            try:
+                start_rank = (self.redis.start_after(after, level) if after else 0) + offset
+                summaries = self.redis.page(limit, start_rank, level)
+            except Exception as e:
+                print(f"⚠️ Leaderboard Redis read failed: {e}")
+        if summaries is None:
+            start_rank = (after[2] if after else 0) + offset
+            summaries = self.postgres.page(db, limit, offset, after[:2] if after else None, level)
+
+        entries = [(start_rank + i + 1, summary) for i, summary in enumerate(summaries)]
+        next_cursor = None
+        if len(summaries) == limit:
+            rank, last = entries[-1]
+            next_cursor = encode_cursor(last.reputation_score, last.wallet_address.lower(), rank)
+        return LeaderboardPage(entries, next_cursor, self.total(db, level))
+
+    def rebuild(self, db: Session, batch_size: int = 5000) -> int:
+        """Reload the Redis index from Postgres into build keys and swap them in; returns the number of wallets indexed"""
+        if self.redis is None:
+            raise RuntimeError("REDIS_URL is not set; the Postgres leaderboard needs no rebuild")
+        # Take the lease before reading Postgres: updates committed after this are also written to the build keys
+        if not self.redis.begin_rebuild(self.rebuild_lease):
+            raise RuntimeError("Another leaderboard rebuild is running")
+        indexed = 0
+        batch = []
+        try:
+            for row in db.query(WalletReputation).yield_per(batch_size):
+                batch.append(ReputationSummaryService.to_summary(row))
+                if len(batch) >= batch_size:
+                    self.redis.load(batch)
+                    indexed += len(batch)
+                    batch = []
+            if batch:
+                self.redis.load(batch)
+                indexed += len(batch)
+            self.redis.finish_rebuild()
+        except Exception:
+            self.redis.abort_rebuild()
+            raise
+        with self._lock:
+            self._cache.clear()
+        self._ready_until = 0.0
+        return indexed
+
+# Global instance
+leaderboard = Leaderboard()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reputation leaderboard maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("rebuild", help="Reload the Redis leaderboard index from reputation_summaries")
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        db = SessionLocal()
+        try:
+            indexed = leaderboard.rebuild(db)
+        finally:
+            db.close()
+        print(f"✅ Leaderboard rebuilt: {indexed} wallets indexed")
+
+
+if __name__ == "__main__":
+    main()
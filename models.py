@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, Text, CheckConstraint, ForeignKey, Float
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, Date, Numeric, Text, CheckConstraint, ForeignKey, Float, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
@@ -24,12 +24,21 @@ class Plan(Base):
         default='generated',
         index=True
     )
+    # IPFS pinning happens in the background (see pin_queue.py)
+    pin_status = Column(String(20), nullable=False, default='pending', server_default='pending')
+    ipfs_cid = Column(String(255), nullable=True)  # <directory cid>/<file>, see IpfsObject
     
     __table_args__ = (
         CheckConstraint(
             status.in_(['generated', 'confirmed', 'cancelled']),
             name='valid_status'
         ),
+        CheckConstraint(
+            pin_status.in_(['pending', 'pinned', 'failed', 'disabled']),
+            name='valid_pin_status'
+        ),
+        # Serves a wallet's plan listing newest first and its (created_at, id) keyset cursor
+        Index('ix_plans_wallet_created', 'user_wallet', created_at.desc(), id.desc()),
     )
     
     # Relationship to bookings
@@ -45,7 +54,9 @@ class Plan(Base):
             'plan_data': self.plan_data,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'status': self.status
+            'status': self.status,
+            'pin_status': self.pin_status,
+            'ipfs_cid': self.ipfs_cid
         }
 
 class Booking(Base):
@@ -86,4 +97,125 @@ class Booking(Base):
             'flight_details': self.flight_details,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        } 
\ No newline at end of file
+        }
+
+class PinJob(Base):
+    """Outbox row for a document waiting to be pinned to IPFS"""
+    __tablename__ = "pin_outbox"
+    
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(30), nullable=False)  # travel_plan, reputation_record
+    plan_id = Column(UUID(as_uuid=True), ForeignKey("plans.id", ondelete="CASCADE"), nullable=True)
+    reputation_record_id = Column(BigInteger, ForeignKey("reputation_records.id", ondelete="CASCADE"), nullable=True)
+    payload = Column(JSONB, nullable=False)
+    status = Column(String(20), nullable=False, default='pending', server_default='pending')
+    attempts = Column(Integer, nullable=False, default=0, server_default='0')
+    # Earliest time the job may be (re)claimed; doubles as the lease while in_progress
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_error = Column(Text, nullable=True)
+    cid = Column(String(255), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        CheckConstraint(
+            status.in_(['pending', 'in_progress', 'done', 'failed']),
+            name='valid_pin_job_status'
+        ),
+        Index('ix_pin_outbox_claim', 'status', 'next_attempt_at'),
+    )
+
+class IpfsObject(Base):
+    """Local index of pinned JSON objects, keyed by canonical-JSON content hash"""
+    __tablename__ = "ipfs_objects"
+    
+    content_hash = Column(String(64), primary_key=True)  # sha256 hex of canonical JSON
+    kind = Column(String(30), nullable=False)
+    root_cid = Column(String(100), nullable=False, index=True)  # CID of the batch directory
+    path = Column(String(100), nullable=False)  # file name inside the directory
+    size_bytes = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    @property
+    def ipfs_path(self) -> str:
+        return f"{self.root_cid}/{self.path}"
+
+class Referral(Base):
+    """Index of referral records pinned to IPFS, looked up by wallet"""
+    __tablename__ = "referrals"
+    
+    id = Column(Integer, primary_key=True)
+    cid = Column(String(255), nullable=False, unique=True)
+    referrer_wallet = Column(String(42), nullable=False, index=True)  # lowercased
+    referee_wallet = Column(String(42), nullable=True, index=True)  # lowercased
+    payment_transaction_id = Column(String(100), nullable=True)
+    record = Column(JSONB, nullable=False)  # the record as pinned, so lookups need no gateway fetch
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def to_dict(self):
+        """Referral record in the shape returned by /referrals"""
+        return {"ipfs_hash": self.cid, **self.record}
+
+class WalletReputation(Base):
+    """Materialized reputation_models.ReputationSummary per wallet, updated as records arrive"""
+    __tablename__ = "reputation_summaries"
+    
+    wallet_address = Column(String(42), primary_key=True)  # lowercased
+    reputation_level = Column(String(20), nullable=False, default='new', server_default='new')
+    
+    total_bookings = Column(Integer, nullable=False, default=0, server_default='0')
+    completed_bookings = Column(Integer, nullable=False, default=0, server_default='0')
+    cancelled_bookings = Column(Integer, nullable=False, default=0, server_default='0')
+    disputed_bookings = Column(Integer, nullable=False, default=0, server_default='0')
+    
+    total_spent_usd = Column(Numeric(14, 2), nullable=False, default=0, server_default='0')
+    total_spent_usdc = Column(Numeric(20, 6), nullable=False, default=0, server_default='0')
+    total_refunds = Column(Numeric(14, 2), nullable=False, default=0, server_default='0')
+    
+    average_rating = Column(Numeric(3, 2), nullable=True)
+    rating_count = Column(Integer, nullable=False, default=0, server_default='0')
+    rating_total = Column(Integer, nullable=False, default=0, server_default='0')
+    completion_rate = Column(Numeric(5, 4), nullable=False, default=0, server_default='0')
+    dispute_rate = Column(Numeric(5, 4), nullable=False, default=0, server_default='0')
+    
+    countries_visited = Column(JSONB, nullable=False, default=list, server_default='[]')
+    total_travel_days = Column(Integer, nullable=False, default=0, server_default='0')
+    
+    total_referrals = Column(Integer, nullable=False, default=0, server_default='0')
+    successful_referrals = Column(Integer, nullable=False, default=0, server_default='0')
+    total_commission_earned = Column(Numeric(20, 6), nullable=False, default=0, server_default='0')
+    total_bonus_earned = Column(Numeric(20, 6), nullable=False, default=0, server_default='0')
+    
+    reputation_score = Column(Numeric(7, 2), nullable=False, default=0, server_default='0')
+    
+    first_booking_date = Column(Date, nullable=True)
+    last_booking_date = Column(Date, nullable=True)
+    last_updated = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        # Leaderboard order is (score, wallet) descending; see leaderboard.py
+        Index('ix_reputation_summaries_score', 'reputation_score', 'wallet_address'),
+        Index('ix_reputation_summaries_level_score', 'reputation_level', 'reputation_score', 'wallet_address'),
+    )
+
+class ReputationLogEntry(Base):
+    """Append-only local copy of a ReputationRecord, hash-chained per wallet in insertion order"""
+    __tablename__ = "reputation_records"
+    
+    id = Column(BigInteger, primary_key=True)
+    record_id = Column(String(64), nullable=False, unique=True)
+    wallet_address = Column(String(42), nullable=False)  # traveler wallet, lowercased
+    event_type = Column(String(30), nullable=False)
+    event_timestamp = Column(DateTime(timezone=True), nullable=False)
+    record = Column(JSONB, nullable=False)  # ReputationRecord.model_dump(mode="json")
+    record_hash = Column(String(64), nullable=False)  # ReputationRecord.calculate_hash()
+    previous_hash = Column(String(64), nullable=True)  # record_hash of the wallet's previous entry
+    # <directory cid>/<file> once pinned (pin_queue.py); also copied to record["verification_data"]["ipfs_cid"],
+    # outside the hashed fields, so record_hash is unaffected
+    ipfs_cid = Column(String(255), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index('ix_reputation_records_wallet_id', 'wallet_address', 'id'),
+        Index('ix_reputation_records_wallet_time', 'wallet_address', 'event_timestamp'),
+    )
@@ -4,6 +4,7 @@ from langchain_core.messages import SystemMessage, HumanMessage, FunctionMessage
 from langchain_openai import ChatOpenAI
 from state import AgentState
 from tools.ipfs import upload_to_ipfs
+from tools.referral_index import index_referral
 import time
 
 TOOLS = BASE_TOOLS + WALLET_TOOLS
@@ -107,6 +108,11 @@ def execute_next_task(state: AgentState) -> AgentState:
                 ipfs_hash = upload_to_ipfs(referral_record)
                 print(f"[executor.py] Posted referral record to IPFS: {ipfs_hash}")
                 state["referral_ipfs_hash"] = ipfs_hash
+                try:
+                    index_referral(ipfs_hash, referral_record)
+                except Exception as e:
+                    # The record is on IPFS; `python -m tools.referral_index backfill` can index it later
+                    print(f"[executor.py] Error indexing referral record {ipfs_hash}: {e}")
             except Exception as e:
                 print(f"[executor.py] Error posting referral record to IPFS: {e}")
                 import traceback
@@ -1,191 +1,331 @@
+import os
+import time
+import asyncio
+import contextvars
+from datetime import date, timedelta
+from typing import Tuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from state import TravelAgentState
-from agent_tools import search_flights_direct, search_hotels_direct, search_activities_direct, parse_flight_results, parse_hotel_results, parse_activity_results
+from agent_tools import (
+    SDK_DEADLINE,
+    search_flights_direct, search_hotels_direct, search_activities_direct,
+    search_flights_async, search_hotels_async, search_activities_async
+)
 
-# --- Node Functions for Autonomous Travel Planner ---
+# Per-branch deadlines for the concurrent search nodes; a branch that runs over
+# falls back to demo data instead of holding up the whole plan.
+FLIGHT_SEARCH_TIMEOUT = float(os.getenv("FLIGHT_SEARCH_TIMEOUT", "8"))
+HOTEL_SEARCH_TIMEOUT = float(os.getenv("HOTEL_SEARCH_TIMEOUT", "8"))
+ACTIVITY_SEARCH_TIMEOUT = float(os.getenv("ACTIVITY_SEARCH_TIMEOUT", "8"))
 
-def search_flights_node(state: TravelAgentState) -> TravelAgentState:
-    """Search for flights to the destination within the budget."""
+# Plans without requested dates search a stay starting this many days from
+# today and lasting this many nights
+DEFAULT_TRIP_LEAD_DAYS = 30
+DEFAULT_TRIP_NIGHTS = 7
+
+_search_executor = ThreadPoolExecutor(max_workers=12, thread_name_prefix="travel-search")
+
+def _call_with_timeout(func, timeout, *args):
+    """
+    Run a blocking search with a deadline; raises TimeoutError when it runs over.
+
+    A running thread cannot be cancelled, so the deadline is also handed to the
+    search through SDK_DEADLINE: its SDK requests time out at the same moment,
+    and the executor thread is free again shortly after the caller gives up.
+    """
+    context = contextvars.copy_context()
+    context.run(SDK_DEADLINE.set, time.monotonic() + timeout)
+    future = _search_executor.submit(context.run, func, *args)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        future.cancel()
+        raise TimeoutError(f"{func.__name__} timed out after {timeout}s")
+
+async def _await_with_timeout(coro, timeout, name):
+    """Await an async search with a deadline; the search is cancelled when it runs over"""
     try:
-        # Get destination from state
-        destination = state.get('destination', 'Paris')
-        departure_date = state.get('departure_date', '2024-08-01')
+        return await asyncio.wait_for(coro, timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"{name} timed out after {timeout}s")
+
+def _node_timing(node: str, started: float, source: str, error: str = None) -> dict:
+    """Timing entry merged into state['node_timings']"""
+    timing = {"seconds": round(time.perf_counter() - started, 3), "source": source}
+    if error:
+        timing["error"] = error
+    return {node: timing}
+
+# --- Search result handling shared by the graph nodes and their async variants ---
+
+def trip_dates(state: TravelAgentState) -> Tuple[str, str]:
+    """(departure, return) ISO dates for a plan: the requested ones, else a stay starting in the future"""
+    departure_date = state.get('departure_date') or (date.today() + timedelta(days=DEFAULT_TRIP_LEAD_DAYS)).isoformat()
+    return_date = state.get('return_date') or (
+        date.fromisoformat(departure_date) + timedelta(days=DEFAULT_TRIP_NIGHTS)
+    ).isoformat()
+    return departure_date, return_date
+
+def _flight_search_args(state: TravelAgentState) -> tuple:
+    """(destination, departure_date, destination airport) for a flight search"""
+    destination = state.get('destination', 'Paris')
+    departure_date, _ = trip_dates(state)
+    
+    # Convert destination to airport code (simplified)
+    airport_codes = {
+        'paris': 'CDG',
+        'london': 'LHR', 
+        'new york': 'JFK',
+        'tokyo': 'NRT',
+        'rome': 'FCO'
+    }
+    return destination, departure_date, airport_codes.get(destination.lower(), 'CDG')
+
+def _flights_update(state: TravelAgentState, started: float, flight_results) -> TravelAgentState:
+    destination = state.get('destination', 'Paris')
+    departure_date, return_date = trip_dates(state)
+    
+    # Check if API credentials are not configured
+    if not flight_results.configured:
+        print("⚠️  Amadeus API credentials not configured. Using demo data.")
+        # Use realistic demo data based on destination
+        demo_airlines = {
+            'paris': ['Air France', 'Delta Airlines', 'United Airlines'],
+            'london': ['British Airways', 'American Airlines', 'Virgin Atlantic'],
+            'new york': ['American Airlines', 'Delta Airlines', 'United Airlines'],
+            'tokyo': ['Japan Airlines', 'ANA', 'United Airlines'],
+            'rome': ['Alitalia', 'American Airlines', 'Delta Airlines']
+        }
+        airlines = demo_airlines.get(destination.lower(), ['DemoAir'])
         
-        # Convert destination to airport code (simplified)
-        airport_codes = {
-            'paris': 'CDG',
-            'london': 'LHR', 
-            'new york': 'JFK',
-            'tokyo': 'NRT',
-            'rome': 'FCO'
+        flights = [{
+            "from": "JFK",
+            "to": destination,
+            "price": 450 + (hash(destination) % 200),  # Varied pricing
+            "airline": airlines[0],
+            "dates": f"{departure_date} to {return_date}"
+        }]
+        source = "demo"
+    else:
+        if not flight_results.ok:
+            raise ValueError(flight_results.error or "No flights found")
+        
+        # Airports and dates as Amadeus returned them
+        flights = [offer.to_plan_dict() for offer in flight_results.items]
+        source = "amadeus"
+    
+    return {'flights': flights, 'node_timings': _node_timing('search_flights', started, source)}
+
+def _flights_fallback(state: TravelAgentState, started: float, error: Exception) -> TravelAgentState:
+    print(f"Error in search_flights_node: {error}")
+    departure_date, return_date = trip_dates(state)
+    # Fallback to demo data
+    flights = [{
+        "from": "JFK",
+        "to": state.get('destination', 'Paris'),
+        "price": 500,
+        "airline": "DemoAir",
+        "dates": f"{departure_date} to {return_date}"
+    }]
+    return {'flights': flights, 'node_timings': _node_timing('search_flights', started, "fallback", str(error))}
+
+def _hotel_search_args(state: TravelAgentState) -> tuple:
+    """(destination, check-in date, check-out date) for a hotel search"""
+    check_in_date, check_out_date = trip_dates(state)
+    return state.get('destination', 'Paris'), check_in_date, check_out_date
+
+def _stay_nights(state: TravelAgentState) -> int:
+    """Nights between the trip's check-in and check-out dates (at least 1)"""
+    check_in_date, check_out_date = trip_dates(state)
+    return max((date.fromisoformat(check_out_date) - date.fromisoformat(check_in_date)).days, 1)
+
+def _hotels_update(state: TravelAgentState, started: float, hotel_results) -> TravelAgentState:
+    destination = state.get('destination', 'Paris')
+    
+    # Check if API credentials are not configured
+    if not hotel_results.configured:
+        print("⚠️  Amadeus API credentials not configured. Using demo data.")
+        # Use realistic demo data based on destination
+        demo_hotels = {
+            'paris': ['Hotel Ritz Paris', 'Le Meurice', 'Four Seasons Hotel George V'],
+            'london': ['The Ritz London', 'Claridge\'s', 'The Savoy'],
+            'new york': ['The Plaza Hotel', 'Waldorf Astoria', 'The St. Regis'],
+            'tokyo': ['The Peninsula Tokyo', 'Park Hyatt Tokyo', 'Aman Tokyo'],
+            'rome': ['Hotel de Russie', 'The Hassler Roma', 'Hotel Eden']
         }
-        dest_airport = airport_codes.get(destination.lower(), 'CDG')
+        hotels_list = demo_hotels.get(destination.lower(), ['Hotel Demo'])
+        price_per_night = 120 + (hash(destination) % 80)  # Varied pricing
+        nights = _stay_nights(state)
         
-        # Use real Amadeus API with direct function
-        flight_response = search_flights_direct("JFK", dest_airport, departure_date)
+        hotels = [{
+            "name": hotels_list[0],
+            "location": destination,
+            "price_per_night": price_per_night,
+            "nights": nights,
+            "total": price_per_night * nights
+        }]
+        source = "demo"
+    else:
+        if not hotel_results.ok:
+            raise ValueError(hotel_results.error or "No hotels found")
         
-        # Check if API credentials are not configured
-        if "Amadeus API credentials not configured" in flight_response:
-            print("⚠️  Amadeus API credentials not configured. Using demo data.")
-            # Use realistic demo data based on destination
-            demo_airlines = {
-                'paris': ['Air France', 'Delta Airlines', 'United Airlines'],
-                'london': ['British Airways', 'American Airlines', 'Virgin Atlantic'],
-                'new york': ['American Airlines', 'Delta Airlines', 'United Airlines'],
-                'tokyo': ['Japan Airlines', 'ANA', 'United Airlines'],
-                'rome': ['Alitalia', 'American Airlines', 'Delta Airlines']
-            }
-            airlines = demo_airlines.get(destination.lower(), ['DemoAir'])
-            
-            flights = [{
-                "from": "JFK",
-                "to": destination,
-                "price": 450 + (hash(destination) % 200),  # Varied pricing
-                "airline": airlines[0],
-                "dates": f"{departure_date} to 2024-08-10"
-            }]
-        else:
-            # Parse the real API response
-            flights = parse_flight_results(flight_response)
-            
-            # Update destination and dates in flight data
-            for flight in flights:
-                flight['to'] = destination
-                flight['dates'] = f"{departure_date} to 2024-08-10"
+        hotels = [offer.to_plan_dict(destination) for offer in hotel_results.items]
+        source = "amadeus"
+    
+    return {'hotels': hotels, 'node_timings': _node_timing('search_hotels', started, source)}
+
+def _hotels_fallback(state: TravelAgentState, started: float, error: Exception) -> TravelAgentState:
+    print(f"Error in search_hotels_node: {error}")
+    nights = _stay_nights(state)
+    # Fallback to demo data
+    hotels = [{
+        "name": "Hotel Demo",
+        "location": state.get('destination', 'Paris'),
+        "price_per_night": 150,
+        "nights": nights,
+        "total": 150 * nights
+    }]
+    return {'hotels': hotels, 'node_timings': _node_timing('search_hotels', started, "fallback", str(error))}
+
+def _activities_update(state: TravelAgentState, started: float, activity_results) -> TravelAgentState:
+    destination = state.get('destination', 'Paris')
+    
+    # Check if API credentials are not configured
+    if not activity_results.configured:
+        print("⚠️  Amadeus API credentials not configured. Using demo data.")
+        # Use realistic demo data based on destination
+        demo_activities = {
+            'paris': [
+                "Eiffel Tower visit",
+                "Louvre Museum tour", 
+                "Seine River cruise",
+                "Notre-Dame Cathedral",
+                "Champs-Élysées walk"
+            ],
+            'london': [
+                "Big Ben and Westminster",
+                "Buckingham Palace tour",
+                "Tower of London visit",
+                "British Museum exploration",
+                "London Eye ride"
+            ],
+            'new york': [
+                "Statue of Liberty visit",
+                "Times Square exploration",
+                "Central Park walk",
+                "Empire State Building",
+                "Broadway show"
+            ],
+            'tokyo': [
+                "Tokyo Tower visit",
+                "Senso-ji Temple",
+                "Shibuya Crossing",
+                "Tokyo Skytree",
+                "Tsukiji Fish Market"
+            ],
+            'rome': [
+                "Colosseum tour",
+                "Vatican City visit",
+                "Trevi Fountain",
+                "Roman Forum",
+                "Pantheon exploration"
+            ]
+        }
+        activities = demo_activities.get(destination.lower(), [
+            "Eiffel Tower visit",
+            "Louvre Museum tour", 
+            "Seine River cruise"
+        ])
+        source = "demo"
+    else:
+        if not activity_results.ok:
+            raise ValueError(activity_results.error or "No activities found")
         
-        return {**state, 'flights': flights}
+        activities = [activity.name for activity in activity_results.items]
+        source = "amadeus"
+    
+    return {'activities': activities, 'node_timings': _node_timing('get_activities', started, source)}
+
+def _activities_fallback(state: TravelAgentState, started: float, error: Exception) -> TravelAgentState:
+    print(f"Error in get_activities_node: {error}")
+    # Fallback to demo data
+    activities = [
+        "Eiffel Tower visit",
+        "Louvre Museum tour",
+        "Seine River cruise"
+    ]
+    return {'activities': activities, 'node_timings': _node_timing('get_activities', started, "fallback", str(error))}
+
+# --- Node Functions for Autonomous Travel Planner ---
+
+def search_flights_node(state: TravelAgentState) -> TravelAgentState:
+    """Search for flights to the destination within the budget."""
+    started = time.perf_counter()
+    try:
+        _, departure_date, dest_airport = _flight_search_args(state)
+        # Use real Amadeus API with direct function
+        flight_results = _call_with_timeout(search_flights_direct, FLIGHT_SEARCH_TIMEOUT, "JFK", dest_airport, departure_date)
+        return _flights_update(state, started, flight_results)
     except Exception as e:
-        print(f"Error in search_flights_node: {e}")
-        # Fallback to demo data
-        flights = [{
-            "from": "JFK",
-            "to": state.get('destination', 'Paris'),
-            "price": 500,
-            "airline": "DemoAir",
-            "dates": "2024-08-01 to 2024-08-10"
-        }]
-        return {**state, 'flights': flights}
+        return _flights_fallback(state, started, e)
 
 def search_hotels_node(state: TravelAgentState) -> TravelAgentState:
     """Search for hotels in the destination within the budget."""
+    started = time.perf_counter()
     try:
-        # Get destination and dates from state
-        destination = state.get('destination', 'Paris')
-        check_in_date = state.get('departure_date', '2024-08-01')
-        check_out_date = '2024-08-08'  # 7 nights later
-        
         # Use real Amadeus API with direct function
-        hotel_response = search_hotels_direct(destination, check_in_date, check_out_date)
-        
-        # Check if API credentials are not configured
-        if "Amadeus API credentials not configured" in hotel_response:
-            print("⚠️  Amadeus API credentials not configured. Using demo data.")
-            # Use realistic demo data based on destination
-            demo_hotels = {
-                'paris': ['Hotel Ritz Paris', 'Le Meurice', 'Four Seasons Hotel George V'],
-                'london': ['The Ritz London', 'Claridge\'s', 'The Savoy'],
-                'new york': ['The Plaza Hotel', 'Waldorf Astoria', 'The St. Regis'],
-                'tokyo': ['The Peninsula Tokyo', 'Park Hyatt Tokyo', 'Aman Tokyo'],
-                'rome': ['Hotel de Russie', 'The Hassler Roma', 'Hotel Eden']
-            }
-            hotels_list = demo_hotels.get(destination.lower(), ['Hotel Demo'])
-            
-            hotels = [{
-                "name": hotels_list[0],
-                "location": destination,
-                "price_per_night": 120 + (hash(destination) % 80),  # Varied pricing
-                "nights": 7,
-                "total": (120 + (hash(destination) % 80)) * 7
-            }]
-        else:
-            # Parse the real API response
-            hotels = parse_hotel_results(hotel_response)
-            
-            # Update location in hotel data
-            for hotel in hotels:
-                hotel['location'] = destination
-        
-        return {**state, 'hotels': hotels}
+        hotel_results = _call_with_timeout(search_hotels_direct, HOTEL_SEARCH_TIMEOUT, *_hotel_search_args(state))
+        return _hotels_update(state, started, hotel_results)
     except Exception as e:
-        print(f"Error in search_hotels_node: {e}")
-        # Fallback to demo data
-        hotels = [{
-            "name": "Hotel Demo",
-            "location": state.get('destination', 'Paris'),
-            "price_per_night": 150,
-            "nights": 7,
-            "total": 1050
-        }]
-        return {**state, 'hotels': hotels}
+        return _hotels_fallback(state, started, e)
 
 def get_activities_node(state: TravelAgentState) -> TravelAgentState:
     """Get recommended activities for the destination."""
+    started = time.perf_counter()
     try:
-        # Get destination from state
-        destination = state.get('destination', 'Paris')
-        
         # Use real Amadeus API with direct function
-        activity_response = search_activities_direct(destination)
-        
-        # Check if API credentials are not configured
-        if "Amadeus API credentials not configured" in activity_response:
-            print("⚠️  Amadeus API credentials not configured. Using demo data.")
-            # Use realistic demo data based on destination
-            demo_activities = {
-                'paris': [
-                    "Eiffel Tower visit",
-                    "Louvre Museum tour", 
-                    "Seine River cruise",
-                    "Notre-Dame Cathedral",
-                    "Champs-Élysées walk"
-                ],
-                'london': [
-                    "Big Ben and Westminster",
-                    "Buckingham Palace tour",
-                    "Tower of London visit",
-                    "British Museum exploration",
-                    "London Eye ride"
-                ],
-                'new york': [
-                    "Statue of Liberty visit",
-                    "Times Square exploration",
-                    "Central Park walk",
-                    "Empire State Building",
-                    "Broadway show"
-                ],
-                'tokyo': [
-                    "Tokyo Tower visit",
-                    "Senso-ji Temple",
-                    "Shibuya Crossing",
-                    "Tokyo Skytree",
-                    "Tsukiji Fish Market"
-                ],
-                'rome': [
-                    "Colosseum tour",
-                    "Vatican City visit",
-                    "Trevi Fountain",
-                    "Roman Forum",
-                    "Pantheon exploration"
-                ]
-            }
-            activities = demo_activities.get(destination.lower(), [
-                "Eiffel Tower visit",
-                "Louvre Museum tour", 
-                "Seine River cruise"
-            ])
-        else:
-            # Parse the real API response
-            activities = parse_activity_results(activity_response)
-        
-        return {**state, 'activities': activities}
+        activity_results = _call_with_timeout(search_activities_direct, ACTIVITY_SEARCH_TIMEOUT, state.get('destination', 'Paris'))
+        return _activities_update(state, started, activity_results)
     except Exception as e:
-        print(f"Error in get_activities_node: {e}")
-        # Fallback to demo data
-        activities = [
-            "Eiffel Tower visit",
-            "Louvre Museum tour",
-            "Seine River cruise"
-        ]
-        return {**state, 'activities': activities}
+        return _activities_fallback(state, started, e)
+
+# Async variants for the API: the same results and fallbacks, but the searches
+# go through the async Amadeus service (shared HTTP/2 pool, coalesced geocode
+# lookups, offer cache) and a branch that runs over is cancelled, not abandoned.
+
+async def search_flights_node_async(state: TravelAgentState) -> TravelAgentState:
+    """Async search_flights_node for the event loop."""
+    started = time.perf_counter()
+    try:
+        _, departure_date, dest_airport = _flight_search_args(state)
+        flight_results = await _await_with_timeout(
+            search_flights_async("JFK", dest_airport, departure_date), FLIGHT_SEARCH_TIMEOUT, "search_flights_async"
+        )
+        return _flights_update(state, started, flight_results)
+    except Exception as e:
+        return _flights_fallback(state, started, e)
+
+async def search_hotels_node_async(state: TravelAgentState) -> TravelAgentState:
+    """Async search_hotels_node for the event loop."""
+    started = time.perf_counter()
+    try:
+        hotel_results = await _await_with_timeout(
+            search_hotels_async(*_hotel_search_args(state)), HOTEL_SEARCH_TIMEOUT, "search_hotels_async"
+        )
+        return _hotels_update(state, started, hotel_results)
+    except Exception as e:
+        return _hotels_fallback(state, started, e)
+
+async def get_activities_node_async(state: TravelAgentState) -> TravelAgentState:
+    """Async get_activities_node for the event loop."""
+    started = time.perf_counter()
+    try:
+        activity_results = await _await_with_timeout(
+            search_activities_async(state.get('destination', 'Paris')), ACTIVITY_SEARCH_TIMEOUT, "search_activities_async"
+        )
+        return _activities_update(state, started, activity_results)
+    except Exception as e:
+        return _activities_fallback(state, started, e)
 
 def assemble_plan_node(state: TravelAgentState) -> TravelAgentState:
     """Combine flights, hotels, and activities into a plan. Estimate total cost and platform fee."""
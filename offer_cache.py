@@ -0,0 +1,370 @@
+"""
+Offer cache for flight and hotel searches
+
+Identical searches within a short window return the same offers, so results
+are cached per search kind with a fresh TTL plus a stale-while-revalidate
+window: stale entries are served immediately while one background refresh
+runs. Concurrent misses for the same search are coalesced into a single
+upstream call. Storage is tiered: an in-process LRU, backed by Redis when
+REDIS_URL is set so all workers share results.
+"""
+import os
+import json
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, Sequence, Tuple
+from dotenv import load_dotenv
+from search_results import SearchResults
+
+load_dotenv()
+
+try:
+    import redis
+    import redis.asyncio as redis_asyncio
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+# kind -> (fresh seconds, extra seconds a stale entry may be served while refreshing)
+DEFAULT_TTLS: Dict[str, Tuple[float, float]] = {
+    "flights": (300, 900),
+    "hotels": (900, 2700),
+}
+
+
+@dataclass(slots=True)
+class CacheEntry:
+    value: SearchResults
+    fresh_until: float
+    stale_until: float
+
+
+class MemoryOfferStore:
+    """In-process LRU tier"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.stale_until <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisOfferStore:
+    """Shared Redis tier; entries are JSON and expire when their stale window ends"""
+
+    def __init__(self, url: str, prefix: str = "offer-cache:"):
+        self.url = url
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._async_client = None
+        self._loop = None
+
+    def _async(self):
+        """Create the asyncio client lazily, once per event loop"""
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._loop is not loop:
+            self._async_client = redis_asyncio.Redis.from_url(self.url)
+            self._loop = loop
+        return self._async_client
+
+    @staticmethod
+    def _encode(entry: CacheEntry) -> str:
+        return json.dumps({
+            "value": entry.value.to_dict(),
+            "fresh_until": entry.fresh_until,
+            "stale_until": entry.stale_until
+        })
+
+    @staticmethod
+    def _decode(raw: Optional[bytes]) -> Optional[CacheEntry]:
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        return CacheEntry(SearchResults.from_dict(data["value"]), data["fresh_until"], data["stale_until"])
+
+    @staticmethod
+    def _expiry(entry: CacheEntry) -> int:
+        return max(int(entry.stale_until - time.time()), 1)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        return self._decode(self._client.get(self.prefix + key))
+
+    def set(self, key: str, entry: CacheEntry):
+        self._client.set(self.prefix + key, self._encode(entry), ex=self._expiry(entry))
+
+    async def aget(self, key: str) -> Optional[CacheEntry]:
+        return self._decode(await self._async().get(self.prefix + key))
+
+    async def aset(self, key: str, entry: CacheEntry):
+        await self._async().set(self.prefix + key, self._encode(entry), ex=self._expiry(entry))
+
+
+class _PendingFetch:
+    """A sync fetch that other threads can wait on"""
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Optional[SearchResults] = None
+        self.error: Optional[BaseException] = None
+
+
+class OfferCache:
+    def __init__(
+        self,
+        ttls: Optional[Dict[str, Tuple[float, float]]] = None,
+        max_entries: Optional[int] = None,
+        redis_url: Optional[str] = None
+    ):
+        """
+        Initialize offer cache
+
+        Args:
+            ttls: Per-kind (fresh, stale) seconds; kinds not given here default to the
+                  OFFER_CACHE_<KIND>_TTL / OFFER_CACHE_<KIND>_STALE_TTL env vars, then DEFAULT_TTLS
+            max_entries: In-memory LRU capacity (defaults to OFFER_CACHE_MAX_ENTRIES env var, then 2048)
+            redis_url: Redis URL for the shared tier (defaults to REDIS_URL env var; disabled if unset)
+        """
+        self.ttls = {
+            kind: (
+                float(os.getenv(f"OFFER_CACHE_{kind.upper()}_TTL", fresh)),
+                float(os.getenv(f"OFFER_CACHE_{kind.upper()}_STALE_TTL", stale))
+            )
+            for kind, (fresh, stale) in DEFAULT_TTLS.items()
+        }
+        self.ttls.update((kind, (float(fresh), float(stale))) for kind, (fresh, stale) in (ttls or {}).items())
+        self.memory = MemoryOfferStore(max_entries or int(os.getenv("OFFER_CACHE_MAX_ENTRIES", "2048")))
+
+        redis_url = redis_url if redis_url is not None else os.getenv("REDIS_URL")
+        self.redis: Optional[RedisOfferStore] = None
+        if redis_url:
+            if REDIS_AVAILABLE:
+                self.redis = RedisOfferStore(redis_url)
+            else:
+                print("⚠️  Warning: REDIS_URL is set but the redis package is not installed. Using in-memory offer cache only.")
+
+        self._lock = threading.Lock()
+        self._pending: Dict[str, _PendingFetch] = {}
+        self._pending_async: Dict[str, asyncio.Task] = {}
+        self._refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="offer-cache-refresh")
+        self._background_tasks = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.upstream_calls = 0
+
+    @staticmethod
+    def make_key(kind: str, key_parts: Sequence) -> str:
+        return f"{kind}:" + "|".join(str(part) for part in key_parts)
+
+    def _new_entry(self, kind: str, value: SearchResults) -> CacheEntry:
+        fresh, stale = self.ttls[kind]
+        now = time.time()
+        return CacheEntry(value, now + fresh, now + fresh + stale)
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    # --- Sync path (planner graph nodes, LangChain tool invoke) ---
+
+    def _lookup(self, key: str) -> Optional[CacheEntry]:
+        entry = self.memory.get(key)
+        if entry is None and self.redis is not None:
+            try:
+                entry = self.redis.get(key)
+            except Exception as e:
+                print(f"⚠️ Offer cache Redis read failed: {e}")
+            if entry is not None:
+                self.memory.set(key, entry)
+        return entry
+
+    def _store(self, kind: str, key: str, value: SearchResults):
+        if value.error is not None:
+            return  # never cache failures
+        entry = self._new_entry(kind, value)
+        self.memory.set(key, entry)
+        if self.redis is not None:
+            try:
+                self.redis.set(key, entry)
+            except Exception as e:
+                print(f"⚠️ Offer cache Redis write failed: {e}")
+
+    def _fetch_coalesced(self, kind: str, key: str, fetch: Callable[[], SearchResults]) -> SearchResults:
+        with self._lock:
+            pending = self._pending.get(key)
+            leader = pending is None
+            if leader:
+                pending = self._pending[key] = _PendingFetch()
+
+        if not leader:
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.result
+
+        try:
+            self._count("upstream_calls")
+            pending.result = fetch()
+            self._store(kind, key, pending.result)
+            return pending.result
+        except BaseException as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+            pending.event.set()
+
+    def _refresh(self, kind: str, key: str, fetch: Callable[[], SearchResults]):
+        try:
+            self._fetch_coalesced(kind, key, fetch)
+        except Exception as e:
+            print(f"⚠️ Offer cache background refresh failed for {key}: {e}")
+
+    def get_or_fetch(self, kind: str, key_parts: Sequence, fetch: Callable[[], SearchResults]) -> SearchResults:
+        """Return cached results for a search, calling ``fetch`` on a miss"""
+        key = self.make_key(kind, key_parts)
+        entry = self._lookup(key)
+        now = time.time()
+
+        if entry is not None and now < entry.fresh_until:
+            self._count("hits")
+            return entry.value
+        if entry is not None and now < entry.stale_until:
+            self._count("stale_hits")
+            if key not in self._pending:
+                self._refresh_executor.submit(self._refresh, kind, key, fetch)
+            return entry.value
+
+        self._count("misses")
+        return self._fetch_coalesced(kind, key, fetch)
+
+    # --- Async path (FastAPI handlers) ---
+
+    async def _lookup_async(self, key: str) -> Optional[CacheEntry]:
+        entry = self.memory.get(key)
+        if entry is None and self.redis is not None:
+            try:
+                entry = await self.redis.aget(key)
+            except Exception as e:
+                print(f"⚠️ Offer cache Redis read failed: {e}")
+            if entry is not None:
+                self.memory.set(key, entry)
+        return entry
+
+    async def _store_async(self, kind: str, key: str, value: SearchResults):
+        if value.error is not None:
+            return  # never cache failures
+        entry = self._new_entry(kind, value)
+        self.memory.set(key, entry)
+        if self.redis is not None:
+            try:
+                await self.redis.aset(key, entry)
+            except Exception as e:
+                print(f"⚠️ Offer cache Redis write failed: {e}")
+
+    async def _fetch_and_store_async(self, kind: str, key: str, fetch: Callable[[], Awaitable[SearchResults]]) -> SearchResults:
+        self._count("upstream_calls")
+        result = await fetch()
+        await self._store_async(kind, key, result)
+        return result
+
+    def _fetch_done(self, key: str, task: asyncio.Task):
+        if self._pending_async.get(key) is task:
+            del self._pending_async[key]
+        if not task.cancelled():
+            # Mark retrieved so an exception nobody else awaited is not logged
+            task.exception()
+
+    async def _fetch_coalesced_async(self, kind: str, key: str, fetch: Callable[[], Awaitable[SearchResults]]) -> SearchResults:
+        # The upstream call runs as its own task and every caller (the first
+        # included) awaits it through shield, so a caller that times out or is
+        # cancelled only stops waiting; the others still get the result.
+        task = self._pending_async.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_and_store_async(kind, key, fetch))
+            self._pending_async[key] = task
+            task.add_done_callback(lambda done: self._fetch_done(key, done))
+        return await asyncio.shield(task)
+
+    async def _refresh_async(self, kind: str, key: str, fetch: Callable[[], Awaitable[SearchResults]]):
+        try:
+            await self._fetch_coalesced_async(kind, key, fetch)
+        except Exception as e:
+            print(f"⚠️ Offer cache background refresh failed for {key}: {e}")
+
+    async def get_or_fetch_async(
+        self,
+        kind: str,
+        key_parts: Sequence,
+        fetch: Callable[[], Awaitable[SearchResults]]
+    ) -> SearchResults:
+        """Async variant of get_or_fetch"""
+        key = self.make_key(kind, key_parts)
+        entry = await self._lookup_async(key)
+        now = time.time()
+
+        if entry is not None and now < entry.fresh_until:
+            self._count("hits")
+            return entry.value
+        if entry is not None and now < entry.stale_until:
+            self._count("stale_hits")
+            if key not in self._pending_async:
+                task = asyncio.get_running_loop().create_task(self._refresh_async(kind, key, fetch))
+                self._background_tasks.add(task)
+                task.add_done_callback(self._background_tasks.discard)
+            return entry.value
+
+        self._count("misses")
+        return await self._fetch_coalesced_async(kind, key, fetch)
+
+    def stats(self) -> Dict[str, float]:
+        """Return cache counters"""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "upstream_calls": self.upstream_calls,
+            "size": len(self.memory),
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+            "redis_enabled": self.redis is not None
+        }
+
+    def clear(self):
+        """Drop in-memory entries and reset counters"""
+        self.memory.clear()
+        with self._lock:
+            self.hits = self.stale_hits = self.misses = self.upstream_calls = 0
+
+# Global instance
+offer_cache = OfferCache()
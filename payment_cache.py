@@ -0,0 +1,263 @@
+"""
+Verified-payment cache for the x402 middleware
+
+Each X-PAYMENT authorizes one request, so a transaction hash is claimed
+before it goes to the facilitator. Claiming is an atomic check-and-set, so a
+hash that is already pending, used or known-invalid is rejected straight
+away, without a facilitator round trip.
+
+A hash's state is one of:
+- pending: claimed, verification in flight (short TTL, so a crashed worker
+  cannot block it for long);
+- used: verified and consumed, kept until the expiresAt / validBefore in the
+  facilitator's verdict, but never less than default_ttl or more than
+  max_ttl (the client's own X-PAYMENT fields are not trusted for this);
+- invalid: the facilitator rejected it (negative cache, short TTL).
+
+If verification fails for transport reasons the claim is released, so the
+client can retry.
+
+Storage is an in-process LRU bounded by entry count. When REDIS_URL is set,
+claims go through Redis SET NX, so every uvicorn worker sees the same
+states; the in-process tier then remembers final states to spare Redis
+round trips for repeated replays.
+"""
+import os
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+try:
+    import redis.asyncio as redis_asyncio
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+PAYMENT_PENDING = "pending"
+PAYMENT_USED = "used"
+PAYMENT_INVALID = "invalid"
+
+
+def payment_expiry(verdict: Dict[str, Any], default_ttl: float, max_ttl: float, now: Optional[float] = None) -> float:
+    """
+    Epoch seconds until which a used payment is remembered.
+
+    Taken from the facilitator verdict's expiresAt / validBefore, clamped to
+    [now + default_ttl, now + max_ttl]; now + default_ttl when absent or unparseable.
+    """
+    now = time.time() if now is None else now
+    floor, ceiling = now + default_ttl, now + max(max_ttl, default_ttl)
+    value = verdict.get("expiresAt", verdict.get("validBefore"))
+    expires_at = floor
+    try:
+        if isinstance(value, (int, float)) or (isinstance(value, str) and value.isdigit()):
+            expires_at = float(value)
+        elif isinstance(value, str):
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            expires_at = parsed.timestamp()
+    except (ValueError, OverflowError):
+        pass
+    return min(max(expires_at, floor), ceiling)
+
+
+class MemoryPaymentStore:
+    """In-process tier: LRU of (state, expires_at) per transaction hash"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live(self, key: str, now: float) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= now:
+            del self._entries[key]
+            return None
+        return entry[0]
+
+    def _put(self, key: str, state: str, expires_at: float):
+        self._entries[key] = (state, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._live(key, time.time())
+
+    def claim(self, key: str, ttl: float) -> Optional[str]:
+        """Mark key pending unless it has a live state; returns that state, or None if claimed"""
+        with self._lock:
+            now = time.time()
+            state = self._live(key, now)
+            if state is not None:
+                return state
+            self._put(key, PAYMENT_PENDING, now + ttl)
+            return None
+
+    def set(self, key: str, state: str, expires_at: float):
+        with self._lock:
+            self._put(key, state, expires_at)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisPaymentStore:
+    """Shared tier: one string key per transaction hash, expiring with its state"""
+
+    def __init__(self, url: str, prefix: str = "x402-payment:"):
+        self.url = url
+        self.prefix = prefix
+        self._client = None
+        self._loop = None
+
+    def _async(self):
+        """Create the asyncio client lazily, once per event loop"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = redis_asyncio.Redis.from_url(self.url)
+            self._loop = loop
+        return self._client
+
+    @staticmethod
+    def _ttl_ms(expires_at: float) -> int:
+        return max(int((expires_at - time.time()) * 1000), 1)
+
+    async def claim(self, key: str, ttl: float) -> Optional[str]:
+        """SET NX: atomic across workers; returns the existing state, or None if claimed"""
+        client = self._async()
+        if await client.set(self.prefix + key, PAYMENT_PENDING, nx=True, px=max(int(ttl * 1000), 1)):
+            return None
+        state = await client.get(self.prefix + key)
+        # Expired between SET NX and GET: treat as in flight rather than claim twice
+        return state.decode() if state is not None else PAYMENT_PENDING
+
+    async def set(self, key: str, state: str, expires_at: float):
+        await self._async().set(self.prefix + key, state, px=self._ttl_ms(expires_at))
+
+    async def delete(self, key: str):
+        await self._async().delete(self.prefix + key)
+
+
+class PaymentCache:
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        default_ttl: Optional[float] = None,
+        negative_ttl: Optional[float] = None,
+        pending_ttl: Optional[float] = None,
+        max_ttl: Optional[float] = None,
+        redis_url: Optional[str] = None
+    ):
+        """
+        Initialize verified-payment cache
+
+        Args:
+            max_entries: In-process entries kept (defaults to PAYMENT_CACHE_MAX_ENTRIES env var, then 100000)
+            default_ttl: Minimum seconds a used payment is remembered, and the TTL when the verdict has no expiresAt (defaults to PAYMENT_CACHE_TTL env var, then 300)
+            negative_ttl: Seconds a rejected payment is remembered (defaults to PAYMENT_CACHE_NEGATIVE_TTL env var, then 60)
+            pending_ttl: Seconds a claim lasts while verification is in flight (defaults to PAYMENT_CACHE_PENDING_TTL env var, then 30)
+            max_ttl: Maximum seconds a used payment is remembered (defaults to PAYMENT_CACHE_MAX_TTL env var, then 86400)
+            redis_url: Redis URL for the shared tier (defaults to REDIS_URL env var; disabled if unset)
+        """
+        self.max_entries = max_entries or int(os.getenv("PAYMENT_CACHE_MAX_ENTRIES", "100000"))
+        self.default_ttl = default_ttl or float(os.getenv("PAYMENT_CACHE_TTL", "300"))
+        self.negative_ttl = negative_ttl or float(os.getenv("PAYMENT_CACHE_NEGATIVE_TTL", "60"))
+        self.pending_ttl = pending_ttl or float(os.getenv("PAYMENT_CACHE_PENDING_TTL", "30"))
+        self.max_ttl = max_ttl or float(os.getenv("PAYMENT_CACHE_MAX_TTL", "86400"))
+        self.memory = MemoryPaymentStore(self.max_entries)
+
+        redis_url = redis_url if redis_url is not None else os.getenv("REDIS_URL")
+        self.redis: Optional[RedisPaymentStore] = None
+        if redis_url:
+            if REDIS_AVAILABLE:
+                self.redis = RedisPaymentStore(redis_url)
+            else:
+                print("⚠️  Warning: REDIS_URL is set but the redis package is not installed. Using in-memory payment cache only.")
+
+        self.claims = 0
+        self.rejections = 0
+
+    async def claim(self, tx_hash: str) -> Optional[str]:
+        """
+        Claim a transaction hash for verification.
+
+        Returns None when the caller now owns the hash and should verify it;
+        otherwise the state (pending, used or invalid) that makes this a replay.
+        """
+        state = self.memory.get(tx_hash)
+        if state in (PAYMENT_USED, PAYMENT_INVALID):
+            self.rejections += 1
+            return state
+
+        if self.redis is not None:
+            try:
+                state = await self.redis.claim(tx_hash, self.pending_ttl)
+            except Exception as e:
+                print(f"⚠️ Payment cache Redis claim failed, using in-process claim: {e}")
+            else:
+                if state is None:
+                    self.memory.set(tx_hash, PAYMENT_PENDING, time.time() + self.pending_ttl)
+                    self.claims += 1
+                else:
+                    self.rejections += 1
+                return state
+
+        state = self.memory.claim(tx_hash, self.pending_ttl)
+        if state is None:
+            self.claims += 1
+        else:
+            self.rejections += 1
+        return state
+
+    async def _settle(self, tx_hash: str, state: str, expires_at: float):
+        self.memory.set(tx_hash, state, expires_at)
+        if self.redis is not None:
+            try:
+                await self.redis.set(tx_hash, state, expires_at)
+            except Exception as e:
+                print(f"⚠️ Payment cache Redis write failed: {e}")
+
+    async def mark_used(self, tx_hash: str, verdict: Dict[str, Any]):
+        """Record a verified payment as consumed until the verdict's expiry (clamped to default_ttl..max_ttl)"""
+        await self._settle(tx_hash, PAYMENT_USED, payment_expiry(verdict, self.default_ttl, self.max_ttl))
+
+    async def mark_invalid(self, tx_hash: str):
+        """Remember a rejected payment for negative_ttl seconds"""
+        await self._settle(tx_hash, PAYMENT_INVALID, time.time() + self.negative_ttl)
+
+    async def release(self, tx_hash: str):
+        """Drop a claim whose verification did not reach a verdict, so the client may retry"""
+        self.memory.delete(tx_hash)
+        if self.redis is not None:
+            try:
+                await self.redis.delete(tx_hash)
+            except Exception as e:
+                print(f"⚠️ Payment cache Redis delete failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self.memory),
+            "max_entries": self.max_entries,
+            "claims": self.claims,
+            "rejections": self.rejections,
+            "redis_enabled": self.redis is not None
+        }
+
+# Global instance
+payment_cache = PaymentCache()
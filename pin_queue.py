@@ -0,0 +1,373 @@
+"""
+Background IPFS pin queue backed by a Postgres outbox table
+
+Request handlers add a ``pin_outbox`` row in the same transaction as the data
+it describes and return as soon as that commit lands. Async workers claim
+due jobs with ``FOR UPDATE SKIP LOCKED`` (so several API processes can run
+workers side by side) and pin each claimed batch as a single Pinata directory
+upload. Payloads are keyed by their canonical-JSON content hash: anything
+already in the ``ipfs_objects`` index is resolved locally without touching
+Pinata. The object path (``<directory cid>/<hash>.json``) is written back to
+the job and to its plan or reputation record. Failures are retried with
+exponential backoff.
+"""
+import os
+import random
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from sqlalchemy import Text, cast, func, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models import Plan, PinJob, IpfsObject, ReputationLogEntry
+from pinata_service import pinata_service, PinataError, canonical_json, content_hash
+
+load_dotenv()
+
+PIN_KIND_TRAVEL_PLAN = "travel_plan"
+PIN_KIND_REPUTATION_RECORD = "reputation_record"
+
+
+def backoff_delay(attempts: int, base: float, maximum: float, jitter: float = 0.1) -> float:
+    """Seconds to wait before retry number ``attempts`` (1-based), doubling each time up to ``maximum``"""
+    delay = min(base * 2 ** (attempts - 1), maximum)
+    return delay + random.uniform(0, delay * jitter)
+
+
+def enqueue_pin(
+    db: Session,
+    kind: str,
+    payload: Dict[str, Any],
+    plan: Optional[Plan] = None,
+    record_entry: Optional[ReputationLogEntry] = None
+) -> Optional[PinJob]:
+    """
+    Add a pin job to the caller's transaction; the caller commits.
+
+    The pinned path is written back to ``plan`` or ``record_entry`` (which
+    must be flushed, so it has an id). Returns None (and marks the plan
+    ``disabled``) when Pinata is not configured.
+    """
+    if not pinata_service.enabled:
+        if plan is not None:
+            plan.pin_status = 'disabled'
+        return None
+
+    job = PinJob(
+        kind=kind,
+        payload=payload,
+        plan_id=plan.id if plan is not None else None,
+        reputation_record_id=record_entry.id if record_entry is not None else None
+    )
+    db.add(job)
+    return job
+
+
+def enqueue_pin_job(kind: str, payload: Dict[str, Any]) -> Optional[int]:
+    """Enqueue and commit a standalone pin job in its own session; returns the job id"""
+    db = SessionLocal()
+    try:
+        job = enqueue_pin(db, kind, payload)
+        if job is None:
+            return None
+        db.commit()
+        pin_worker.wake()
+        return job.id
+    finally:
+        db.close()
+
+
+def lookup_pinned(db: Session, content_hashes) -> Dict[str, str]:
+    """Return content hash -> IPFS object path for hashes already in the local index"""
+    if not content_hashes:
+        return {}
+    rows = db.query(IpfsObject).filter(IpfsObject.content_hash.in_(list(content_hashes))).all()
+    return {row.content_hash: row.ipfs_path for row in rows}
+
+
+def record_cid_update(entry_id: int, path: str):
+    """UPDATE storing a pinned path on a reputation record: its ipfs_cid column and verification_data.ipfs_cid"""
+    return (
+        update(ReputationLogEntry)
+        .where(ReputationLogEntry.id == entry_id)
+        .values(
+            ipfs_cid=path,
+            record=func.jsonb_set(
+                ReputationLogEntry.record, cast('{verification_data,ipfs_cid}', ARRAY(Text)), func.to_jsonb(cast(path, Text))
+            )
+        )
+    )
+
+
+@dataclass(slots=True)
+class ClaimedJob:
+    id: int
+    kind: str
+    plan_id: Any
+    payload: Dict[str, Any]
+    attempts: int
+    content_hash: str = ""
+    reputation_record_id: Optional[int] = None
+
+
+class PinQueueWorker:
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        batch_window: Optional[float] = None,
+        poll_interval: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        backoff_base: Optional[float] = None,
+        backoff_max: Optional[float] = None,
+        lease_seconds: Optional[float] = None,
+        session_factory=SessionLocal,
+        pinata=pinata_service
+    ):
+        """
+        Initialize pin queue worker
+
+        Args:
+            batch_size: Jobs claimed and pinned per directory upload (defaults to PIN_QUEUE_BATCH_SIZE env var, then 50)
+            batch_window: Seconds to let jobs accumulate after a wake-up before claiming
+                          (defaults to PIN_QUEUE_BATCH_WINDOW env var, then 1)
+            poll_interval: Seconds between polls when idle (defaults to PIN_QUEUE_POLL_INTERVAL env var, then 2)
+            max_attempts: Attempts before a job is marked failed (defaults to PIN_QUEUE_MAX_ATTEMPTS env var, then 8)
+            backoff_base: First retry delay in seconds (defaults to PIN_QUEUE_BACKOFF_BASE env var, then 5)
+            backoff_max: Retry delay cap in seconds (defaults to PIN_QUEUE_BACKOFF_MAX env var, then 900)
+            lease_seconds: How long a claimed job stays hidden from other workers before it
+                           is considered abandoned (defaults to PIN_QUEUE_LEASE env var, then 300)
+        """
+        self.batch_size = batch_size or int(os.getenv("PIN_QUEUE_BATCH_SIZE", "50"))
+        self.batch_window = batch_window if batch_window is not None else float(os.getenv("PIN_QUEUE_BATCH_WINDOW", "1"))
+        self.poll_interval = poll_interval or float(os.getenv("PIN_QUEUE_POLL_INTERVAL", "2"))
+        self.max_attempts = max_attempts or int(os.getenv("PIN_QUEUE_MAX_ATTEMPTS", "8"))
+        self.backoff_base = backoff_base or float(os.getenv("PIN_QUEUE_BACKOFF_BASE", "5"))
+        self.backoff_max = backoff_max or float(os.getenv("PIN_QUEUE_BACKOFF_MAX", "900"))
+        self.lease_seconds = lease_seconds or float(os.getenv("PIN_QUEUE_LEASE", "300"))
+        self.session_factory = session_factory
+        self.pinata = pinata
+
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping = False
+        self.uploads = 0
+        self.dedup_hits = 0
+
+    # --- Database steps (run in worker threads) ---
+
+    def _claim_batch(self) -> List[ClaimedJob]:
+        """Claim up to ``batch_size`` due jobs, leasing them to this worker"""
+        db = self.session_factory()
+        try:
+            jobs = (
+                db.query(PinJob)
+                .filter(
+                    PinJob.status.in_(['pending', 'in_progress']),
+                    PinJob.next_attempt_at <= func.now()
+                )
+                .order_by(PinJob.next_attempt_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            claimed = []
+            for job in jobs:
+                job.status = 'in_progress'
+                job.attempts += 1
+                job.next_attempt_at = func.now() + timedelta(seconds=self.lease_seconds)
+                claimed.append(ClaimedJob(
+                    job.id, job.kind, job.plan_id, job.payload, job.attempts,
+                    reputation_record_id=job.reputation_record_id
+                ))
+            db.commit()
+            return claimed
+        finally:
+            db.close()
+
+    def _lookup_pinned(self, content_hashes) -> Dict[str, str]:
+        db = self.session_factory()
+        try:
+            return lookup_pinned(db, content_hashes)
+        finally:
+            db.close()
+
+    def _record_pinned(self, root_cid: str, objects: Dict[str, ClaimedJob], sizes: Dict[str, int]):
+        """Add newly pinned objects to the local index"""
+        db = self.session_factory()
+        try:
+            db.execute(
+                insert(IpfsObject)
+                .values([
+                    {
+                        "content_hash": digest,
+                        "kind": job.kind,
+                        "root_cid": root_cid,
+                        "path": f"{digest}.json",
+                        "size_bytes": sizes[digest]
+                    }
+                    for digest, job in objects.items()
+                ])
+                .on_conflict_do_nothing(index_elements=["content_hash"])
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _complete(self, results: List[Tuple[ClaimedJob, str]]):
+        """Mark ``(job, object path)`` pairs done and write the path back to their plans and reputation records"""
+        db = self.session_factory()
+        try:
+            for job, path in results:
+                db.query(PinJob).filter(PinJob.id == job.id).update(
+                    {PinJob.status: 'done', PinJob.cid: path, PinJob.last_error: None},
+                    synchronize_session=False
+                )
+                if job.plan_id is not None:
+                    db.query(Plan).filter(Plan.id == job.plan_id).update(
+                        {Plan.pin_status: 'pinned', Plan.ipfs_cid: path},
+                        synchronize_session=False
+                    )
+                if job.reputation_record_id is not None:
+                    db.execute(record_cid_update(job.reputation_record_id, path))
+            db.commit()
+        finally:
+            db.close()
+
+    def _fail(self, jobs: List[ClaimedJob], error: str, retryable: bool):
+        db = self.session_factory()
+        try:
+            for job in jobs:
+                retry = retryable and job.attempts < self.max_attempts
+                delay = backoff_delay(job.attempts, self.backoff_base, self.backoff_max)
+                db.query(PinJob).filter(PinJob.id == job.id).update(
+                    {
+                        PinJob.status: 'pending' if retry else 'failed',
+                        PinJob.last_error: error[:2000],
+                        PinJob.next_attempt_at: func.now() + timedelta(seconds=delay)
+                    },
+                    synchronize_session=False
+                )
+                if not retry and job.plan_id is not None:
+                    db.query(Plan).filter(Plan.id == job.plan_id).update(
+                        {Plan.pin_status: 'failed'},
+                        synchronize_session=False
+                    )
+                if retry:
+                    print(f"⚠️ Pin job {job.id} ({job.kind}) failed, retry {job.attempts}/{self.max_attempts} in {delay:.0f}s: {error}")
+                else:
+                    print(f"❌ Pin job {job.id} ({job.kind}) failed permanently: {error}")
+            db.commit()
+        finally:
+            db.close()
+
+    # --- Async worker ---
+
+    async def _process_batch(self, jobs: List[ClaimedJob]):
+        """Resolve already-pinned payloads locally and upload the rest as one directory"""
+        for job in jobs:
+            job.content_hash = content_hash(job.payload)
+        paths = await asyncio.to_thread(self._lookup_pinned, {job.content_hash for job in jobs})
+
+        # One file per distinct payload not yet in the index
+        new_objects: Dict[str, ClaimedJob] = {}
+        for job in jobs:
+            if job.content_hash not in paths:
+                new_objects.setdefault(job.content_hash, job)
+        self.dedup_hits += len(jobs) - len(new_objects)
+
+        uploaded = 0
+        if new_objects:
+            files = {f"{digest}.json": canonical_json(job.payload) for digest, job in new_objects.items()}
+            try:
+                self.uploads += 1
+                root_cid = await self.pinata.pin_directory_async(
+                    files, directory=f"pin-batch-{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}"
+                )
+            except Exception as e:
+                retryable = e.retryable if isinstance(e, PinataError) else True
+                await asyncio.to_thread(
+                    self._fail, [job for job in jobs if job.content_hash not in paths], str(e), retryable
+                )
+            else:
+                sizes = {digest: len(files[f"{digest}.json"]) for digest in new_objects}
+                await asyncio.to_thread(self._record_pinned, root_cid, new_objects, sizes)
+                paths.update({digest: f"{root_cid}/{digest}.json" for digest in new_objects})
+                uploaded = len(new_objects)
+
+        done = [(job, paths[job.content_hash]) for job in jobs if job.content_hash in paths]
+        if done:
+            await asyncio.to_thread(self._complete, done)
+            print(f"✅ Pinned {len(done)} job(s) to IPFS ({uploaded} new object(s), {len(done) - uploaded} deduplicated)")
+
+    async def run_once(self) -> int:
+        """Claim and process one batch of due jobs; returns how many were claimed"""
+        jobs = await asyncio.to_thread(self._claim_batch)
+        if jobs:
+            await self._process_batch(jobs)
+        return len(jobs)
+
+    async def _run(self):
+        while not self._stopping:
+            self._wakeup.clear()
+            try:
+                processed = await self.run_once()
+            except Exception as e:
+                print(f"⚠️ Pin queue poll failed: {e}")
+                processed = 0
+
+            if processed < self.batch_size and not self._stopping:
+                # Queue drained: sleep until the next poll or an enqueue wakes us,
+                # then give concurrent requests a moment to fill the next batch
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                    await asyncio.sleep(self.batch_window)
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self):
+        """Start the worker on the running event loop"""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = self._loop.create_task(self._run())
+        print(f"✅ Pin queue worker started (batch size {self.batch_size})")
+
+    def wake(self):
+        """Wake the worker after an enqueue; safe to call from any thread"""
+        if self._loop is None or self._wakeup is None or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def stop(self):
+        """Stop the worker; jobs claimed but unfinished are retried once their lease expires"""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        try:
+            await self._task
+        finally:
+            self._task = None
+            await self.pinata.aclose()
+
+# Global instance
+pin_worker = PinQueueWorker()
+
+
+async def main():
+    """Run a standalone pin worker (for deployments that keep it out of the API processes)"""
+    pin_worker.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await pin_worker.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
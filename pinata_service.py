@@ -3,14 +3,44 @@ Pinata IPFS Service for storing travel bookings, plans, and reputation records
 """
 import os
 import json
+import asyncio
+import hashlib
 from typing import Dict, Any, Optional, List
 from datetime import datetime
+import httpx
 import requests
 from dotenv import load_dotenv
+from ipfs_cache import ipfs_cache
 from reputation_models import ReputationRecord, ReputationSummary, IPFSStorageUtils
 
 load_dotenv()
 
+class PinataError(Exception):
+    """Raised when an async pin request fails"""
+    
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+    
+    @property
+    def retryable(self) -> bool:
+        """Timeouts, network errors, rate limits and 5xx are worth retrying; other 4xx are not"""
+        return self.status_code is None or self.status_code == 429 or self.status_code >= 500
+
+def canonical_json(obj: Any) -> bytes:
+    """Serialize to canonical JSON (sorted keys, no whitespace) so equal content gives equal bytes"""
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+def content_hash(obj: Any) -> str:
+    """SHA-256 of an object's canonical JSON; used to skip payloads that are already pinned"""
+    return hashlib.sha256(canonical_json(obj)).hexdigest()
+
+# Per-request fields left out of pinned travel plans so equal plan content gives equal documents
+VOLATILE_PLAN_FIELDS = ("plan_id", "timestamp", "created_at")
+
+def _without_volatile(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in data.items() if key not in VOLATILE_PLAN_FIELDS}
+
 class PinataIPFSService:
     def __init__(self, api_key: Optional[str] = None, secret_key: Optional[str] = None):
         """
@@ -23,6 +53,9 @@ class PinataIPFSService:
         self.api_key = api_key or os.getenv("PINATA_API_KEY")
         self.secret_key = secret_key or os.getenv("PINATA_SECRET_KEY")
         self.base_url = "https://api.pinata.cloud"
+        self.timeout = float(os.getenv("PINATA_TIMEOUT", "30"))
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
         
         if not self.api_key or not self.secret_key:
             print("⚠️  Warning: Pinata credentials not found. IPFS storage will be disabled.")
@@ -35,12 +68,7 @@ class PinataIPFSService:
         if not self.enabled:
             return {"error": "Pinata service not enabled"}
         
-        headers = {
-            "pinata_api_key": self.api_key,
-            "pinata_secret_api_key": self.secret_key,
-            "Content-Type": "application/json"
-        }
-        
+        headers = self._headers()
         url = f"{self.base_url}{endpoint}"
         
         try:
@@ -55,6 +83,134 @@ class PinataIPFSService:
             print(f"❌ Pinata API error: {e}")
             return {"error": str(e)}
     
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "pinata_api_key": self.api_key,
+            "pinata_secret_api_key": self.secret_key,
+            "Content-Type": "application/json"
+        }
+    
+    def _ensure_async_client(self) -> httpx.AsyncClient:
+        """Create the async client lazily, once per event loop"""
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._loop is not loop:
+            self._async_client = httpx.AsyncClient(base_url=self.base_url, timeout=httpx.Timeout(self.timeout))
+            self._loop = loop
+        return self._async_client
+    
+    async def pin_json_async(self, metadata: Dict[str, Any]) -> str:
+        """
+        Pin a JSON document without blocking the event loop
+        
+        Args:
+            metadata: Document to pin (as built by the *_metadata helpers)
+            
+        Returns:
+            IPFS hash (CID) of the pinned document
+        
+        Raises:
+            PinataError: If the service is disabled or the request fails
+        """
+        if not self.enabled:
+            raise PinataError("Pinata service not enabled", status_code=400)
+        
+        client = self._ensure_async_client()
+        try:
+            response = await client.post("/pinning/pinJSONToIPFS", headers=self._headers(), json=metadata)
+        except httpx.HTTPError as e:
+            raise PinataError(f"Pinata request failed: {e}")
+        
+        if response.status_code >= 400:
+            raise PinataError(f"[{response.status_code}] {response.text}", status_code=response.status_code)
+        
+        return response.json()["IpfsHash"]
+    
+    async def pin_directory_async(self, files: Dict[str, bytes], directory: str) -> str:
+        """
+        Pin many small files as one IPFS directory in a single request
+        
+        Args:
+            files: Filename -> file content
+            directory: Directory name (also used as the pin name)
+            
+        Returns:
+            CID of the directory; each file is addressable as ``<cid>/<filename>``
+        
+        Raises:
+            PinataError: If the service is disabled or the request fails
+        """
+        if not self.enabled:
+            raise PinataError("Pinata service not enabled", status_code=400)
+        
+        client = self._ensure_async_client()
+        headers = {k: v for k, v in self._headers().items() if k != "Content-Type"}
+        multipart = [
+            ("file", (f"{directory}/{filename}", content, "application/json"))
+            for filename, content in files.items()
+        ]
+        try:
+            response = await client.post(
+                "/pinning/pinFileToIPFS",
+                headers=headers,
+                files=multipart,
+                data={
+                    "pinataMetadata": json.dumps({"name": directory}),
+                    "pinataOptions": json.dumps({"cidVersion": 1})
+                }
+            )
+        except httpx.HTTPError as e:
+            raise PinataError(f"Pinata request failed: {e}")
+        
+        if response.status_code >= 400:
+            raise PinataError(f"[{response.status_code}] {response.text}", status_code=response.status_code)
+        
+        return response.json()["IpfsHash"]
+    
+    async def aclose(self):
+        """Close the async client"""
+        if self._async_client is not None:
+            try:
+                await self._async_client.aclose()
+            finally:
+                self._async_client = None
+                self._loop = None
+    
+    def travel_plan_metadata(self, plan_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build the IPFS document for a travel plan.
+
+        The plan id and timestamps (VOLATILE_PLAN_FIELDS, also inside
+        structured_plan) are left out, so the document depends only on the
+        plan's content and the same plan for the same wallet dedupes to one
+        pinned object. The plans row records which CID a plan was pinned as.
+        """
+        data = _without_volatile(plan_data)
+        if isinstance(data.get("structured_plan"), dict):
+            data["structured_plan"] = _without_volatile(data["structured_plan"])
+        return {
+            "name": f"travel-plan-{content_hash(data)[:16]}",
+            "description": "Travel plan stored on IPFS",
+            "type": "travel-plan",
+            "data": data
+        }
+    
+    def reputation_record_metadata(self, record: ReputationRecord) -> Dict[str, Any]:
+        """Build the IPFS document for a reputation record"""
+        # Generate IPFS path and filename
+        year = record.event_timestamp.year
+        month = record.event_timestamp.month
+        ipfs_path = IPFSStorageUtils.generate_ipfs_path(record.traveler_wallet, year, month)
+        filename = IPFSStorageUtils.generate_record_filename(record)
+        
+        return {
+            "name": filename,
+            "description": f"Reputation record for {record.traveler_wallet} - {record.event_type}",
+            "type": "reputation-record",
+            "timestamp": record.event_timestamp.isoformat(),
+            "ipfs_path": ipfs_path,
+            "data": json.loads(record.to_ipfs_json())
+        }
+    
     def store_booking_data(self, booking_data: Dict[str, Any]) -> str:
         """
         Store booking confirmation on IPFS via Pinata
@@ -100,14 +256,7 @@ class PinataIPFSService:
         if not self.enabled:
             return "ipfs://disabled"
         
-        # Add metadata
-        metadata = {
-            "name": f"travel-plan-{datetime.now().isoformat()}",
-            "description": "Travel plan stored on IPFS",
-            "type": "travel-plan",
-            "timestamp": datetime.now().isoformat(),
-            "data": plan_data
-        }
+        metadata = self.travel_plan_metadata(plan_data)
         
         result = self._make_request("/pinning/pinJSONToIPFS", method="POST", data=metadata)
         
@@ -164,24 +313,7 @@ class PinataIPFSService:
         if not self.enabled:
             return "ipfs://disabled"
         
-        # Convert record to JSON
-        record_json = record.to_ipfs_json()
-        
-        # Generate IPFS path and filename
-        year = record.event_timestamp.year
-        month = record.event_timestamp.month
-        ipfs_path = IPFSStorageUtils.generate_ipfs_path(record.traveler_wallet, year, month)
-        filename = IPFSStorageUtils.generate_record_filename(record)
-        
-        # Add metadata
-        metadata = {
-            "name": filename,
-            "description": f"Reputation record for {record.traveler_wallet} - {record.event_type}",
-            "type": "reputation-record",
-            "timestamp": record.event_timestamp.isoformat(),
-            "ipfs_path": ipfs_path,
-            "data": json.loads(record_json)
-        }
+        metadata = self.reputation_record_metadata(record)
         
         result = self._make_request("/pinning/pinJSONToIPFS", method="POST", data=metadata)
         
@@ -206,18 +338,12 @@ class PinataIPFSService:
         if not self.enabled:
             return None
         
-        # Remove ipfs:// prefix if present
-        if ipfs_hash.startswith("ipfs://"):
-            ipfs_hash = ipfs_hash[7:]
+        # Content is immutable per CID, so reads go through the shared cache
+        data = ipfs_cache.get_json(ipfs_hash)
+        if data is None:
+            return None
         
         try:
-            # Use Pinata's public gateway
-            url = f"https://gateway.pinata.cloud/ipfs/{ipfs_hash}"
-            response = requests.get(url)
-            response.raise_for_status()
-            
-            data = response.json()
-            
             # Extract the actual record data from metadata
             if "data" in data:
                 record_data = data["data"]
@@ -227,9 +353,6 @@ class PinataIPFSService:
             # Create ReputationRecord from JSON
             return ReputationRecord(**record_data)
             
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Failed to retrieve reputation record: {e}")
-            return None
         except Exception as e:
             print(f"❌ Failed to parse reputation record: {e}")
             return None
@@ -311,7 +434,7 @@ class PinataIPFSService:
     
     def get_ipfs_data(self, ipfs_hash: str) -> Optional[Dict]:
         """
-        Retrieve data from IPFS via Pinata gateway
+        Retrieve data from IPFS via the cached gateway reader
         
         Args:
             ipfs_hash: IPFS hash to retrieve
@@ -322,19 +445,7 @@ class PinataIPFSService:
         if not self.enabled:
             return None
         
-        # Remove ipfs:// prefix if present
-        if ipfs_hash.startswith("ipfs://"):
-            ipfs_hash = ipfs_hash[7:]
-        
-        try:
-            # Use Pinata's public gateway
-            url = f"https://gateway.pinata.cloud/ipfs/{ipfs_hash}"
-            response = requests.get(url)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Failed to retrieve IPFS data: {e}")
-            return None
+        return ipfs_cache.get_json(ipfs_hash)
 
 # Global instance
 pinata_service = PinataIPFSService() 
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""
+Plan generation pipeline for the API
+
+Runs the planning half of the travel graph (flight, hotel and activity
+searches, then assemble_plan and the budget check) with the same results,
+deadlines and demo fallbacks as ``travel_graph``. The graph itself continues
+on into payment and booking, and LangGraph only reports progress once a whole
+step has finished, so the API drives the nodes directly: the async variants
+of the three search nodes run concurrently on the event loop (async Amadeus
+service, shared geocode and offer caches) and each result is yielded the
+moment its branch completes.
+"""
+import asyncio
+from datetime import date
+from typing import AsyncIterator, Optional, Tuple
+from state import TravelAgentState, merge_node_timings
+from nodes.travel_planner import (
+    search_flights_node_async,
+    search_hotels_node_async,
+    get_activities_node_async,
+    assemble_plan_node,
+    budget_branch_node,
+    trip_dates,
+)
+
+# (event name, node name, node function); the event name is also the state key the node fills
+SEARCH_STEPS = [
+    ("flights", "search_flights", search_flights_node_async),
+    ("hotels", "search_hotels", search_hotels_node_async),
+    ("activities", "get_activities", get_activities_node_async),
+]
+
+
+def initial_plan_state(
+    destination: str,
+    budget: float,
+    user_wallet: Optional[str] = None,
+    session_id: Optional[str] = None,
+    departure_date: Optional[date] = None,
+    return_date: Optional[date] = None
+) -> TravelAgentState:
+    """Build the starting state for a plan request; missing dates default to a stay starting in the future"""
+    departure, returning = trip_dates({
+        "departure_date": departure_date.isoformat() if departure_date else None,
+        "return_date": return_date.isoformat() if return_date else None
+    })
+    return {
+        "destination": destination,
+        "budget": budget,
+        "departure_date": departure,
+        "return_date": returning,
+        "user_wallet": user_wallet or "",
+        "session_id": session_id or "",
+        "node_timings": {}
+    }
+
+
+async def stream_plan_pipeline(state: TravelAgentState) -> AsyncIterator[Tuple[str, TravelAgentState]]:
+    """
+    Run the planning pipeline, yielding ``(event, update)`` pairs as work completes.
+
+    Yields one ``("flights" | "hotels" | "activities", partial update)`` per search
+    branch in completion order, then ``("plan", final state)``. The final state
+    carries ``error`` if the plan is over budget.
+    """
+    state = dict(state)
+    pending = {
+        asyncio.create_task(node(dict(state))): event
+        for event, _, node in SEARCH_STEPS
+    }
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                event = pending.pop(task)
+                update = task.result()
+                state[event] = update[event]
+                state["node_timings"] = merge_node_timings(state.get("node_timings"), update.get("node_timings"))
+                yield event, update
+    finally:
+        # Client went away mid-stream; stop the searches still in flight
+        for task in pending:
+            task.cancel()
+
+    state = assemble_plan_node(state)
+    state = budget_branch_node(state)
+    yield "plan", state
+
+
+async def run_plan_pipeline(state: TravelAgentState) -> TravelAgentState:
+    """Run the planning pipeline to completion and return the final state"""
+    final_state = state
+    async for event, update in stream_plan_pipeline(state):
+        if event == "plan":
+            final_state = update
+    return final_state
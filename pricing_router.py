@@ -0,0 +1,146 @@
+"""
+Compiled route pricing for the x402 middleware
+
+The pricing table is compiled once into:
+- an exact path dict of per-method prices;
+- one regex over every priced path, longest first, so a single match finds
+  the longest priced prefix (/api/flights/book prices /api/flights/book/123
+  too);
+- a path-segment trie, used when the longest prefix is priced only for other
+  methods;
+- one compiled regex that pre-screens legacy substring patterns (keys that
+  do not start with "/").
+
+A request's price is then a dict lookup plus at most one regex match, and
+the cost no longer grows with the number of priced routes. Free routes miss
+the dict and fail the regex, so /health and friends pay next to nothing.
+
+Pricing keys are "/path" (any method) or "METHOD /path". Values are either
+an amount string, or a dict with "amount" plus any route metadata (for
+example "description"), which is returned with the price.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+
+ANY_METHOD = "*"
+HTTP_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+
+@dataclass(slots=True, frozen=True)
+class RoutePrice:
+    amount: str
+    pattern: str
+    method: str = ANY_METHOD
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+class _TrieNode:
+    __slots__ = ("children", "prices")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.prices: Dict[str, RoutePrice] = {}
+
+
+def _normalize(path: str) -> str:
+    return path.rstrip("/") or "/"
+
+
+def _parse_key(key: str) -> Tuple[str, str]:
+    """'POST /api/x' -> ('POST', '/api/x'); '/api/x' -> ('*', '/api/x')"""
+    method, _, rest = key.strip().partition(" ")
+    if rest and method.upper() in HTTP_METHODS:
+        return method.upper(), rest.strip()
+    if rest:
+        raise ValueError(f"Invalid pricing key {key!r}: expected '/path' or 'METHOD /path'")
+    return ANY_METHOD, key.strip()
+
+
+class PricingRouter:
+    def __init__(self, pricing: Mapping[str, Union[str, Mapping[str, Any]]]):
+        """
+        Compile a pricing table
+
+        Args:
+            pricing: Dict mapping "/path" or "METHOD /path" (legacy: any substring) to an
+                     amount string or {"amount": ..., **metadata}
+        """
+        self._exact: Dict[str, Dict[str, RoutePrice]] = {}
+        self._root = _TrieNode()
+        self._legacy: List[Tuple[str, RoutePrice]] = []
+        self._prefix_screen: Optional[re.Pattern] = None
+        self._legacy_screen: Optional[re.Pattern] = None
+
+        for key, value in pricing.items():
+            method, pattern = _parse_key(key)
+            if isinstance(value, Mapping):
+                metadata = {k: v for k, v in value.items() if k != "amount"}
+                amount = value.get("amount")
+            else:
+                metadata, amount = {}, value
+            if not amount:
+                raise ValueError(f"Pricing for {key!r} has no amount")
+            price = RoutePrice(amount=str(amount), pattern=pattern, method=method, metadata=metadata)
+
+            if not pattern.startswith("/"):
+                # Legacy substring pattern, matched anywhere in the path
+                self._legacy.append((pattern, price))
+                continue
+            path = _normalize(pattern)
+            self._exact.setdefault(path, {})[method] = price
+            node = self._root
+            for segment in path.strip("/").split("/"):
+                if segment:
+                    node = node.children.setdefault(segment, _TrieNode())
+            node.prices[method] = price
+
+        if self._exact:
+            # Longest paths first, so the first alternative that matches is the longest priced prefix
+            prefixes = sorted((path for path in self._exact if path != "/"), key=len, reverse=True)
+            if "/" in self._exact:
+                prefixes.append("")
+            self._prefix_screen = re.compile("(" + "|".join(re.escape(path) for path in prefixes) + ")(?:/|$)")
+        if self._legacy:
+            self._legacy_screen = re.compile("|".join(re.escape(pattern) for pattern, _ in self._legacy))
+
+    def match(self, method: str, path: str) -> Optional[RoutePrice]:
+        """Price for a request, or None if the route is free"""
+        if len(path) > 1 and path[-1] == "/":
+            path = _normalize(path)
+        if not method.isupper():
+            method = method.upper()
+        prices = self._exact.get(path)
+        if prices is not None:
+            price = prices.get(method) or prices.get(ANY_METHOD)
+            if price is not None:
+                return price
+
+        # One regex match finds the longest priced prefix; free routes stop here
+        screen = self._prefix_screen.match(path) if self._prefix_screen is not None else None
+        if screen is not None:
+            prices = self._exact[screen.group(1) or "/"]
+            price = prices.get(method) or prices.get(ANY_METHOD)
+            if price is not None:
+                return price
+            # Longest prefix is priced for other methods only: walk the trie for a shorter one
+            best = None
+            node = self._root
+            for segment in path.split("/")[1:]:
+                node = node.children.get(segment)
+                if node is None:
+                    break
+                if node.prices:
+                    best = node.prices.get(method) or node.prices.get(ANY_METHOD) or best
+            if best is not None:
+                return best
+
+        if self._legacy_screen is not None and self._legacy_screen.search(path):
+            for pattern, price in self._legacy:
+                if pattern in path and price.method in (method, ANY_METHOD):
+                    return price
+        return None
+
+    def routes(self) -> List[RoutePrice]:
+        """Every priced route: path routes, then legacy substring patterns"""
+        return [price for prices in self._exact.values() for price in prices.values()] + [price for _, price in self._legacy]
@@ -0,0 +1,126 @@
+"""
+Streaming verification of per-wallet reputation record chains
+
+Each reputation_records entry stores the hash of its record and the hash of
+the wallet's previous entry. The verifier walks a wallet's chain oldest
+first, holding only the previous entry, and checks for every entry that:
+
+- the stored record still hashes to record_hash (ReputationRecord.calculate_hash)
+- previous_hash matches the previous entry's record_hash
+- the record's own previous_record_hash (inside the hashed content) is the
+  previous entry's record_hash
+- event timestamps strictly increase (as ReputationValidator.validate_record_chain)
+
+Run it from the command line with:
+
+    python reputation_chain.py verify WALLET [WALLET ...]
+"""
+import argparse
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from db_service import ReputationRecordService
+from models import ReputationLogEntry
+from reputation_models import ReputationRecord
+
+MAX_REPORTED_ERRORS = 20
+
+
+@dataclass(slots=True)
+class ChainVerification:
+    wallet_address: str
+    records: int = 0
+    invalid: int = 0
+    errors: List[str] = field(default_factory=list)  # first MAX_REPORTED_ERRORS problems
+    head_hash: Optional[str] = None
+
+    @property
+    def valid(self) -> bool:
+        return self.invalid == 0
+
+    def to_dict(self):
+        return {
+            "wallet_address": self.wallet_address,
+            "valid": self.valid,
+            "records": self.records,
+            "invalid": self.invalid,
+            "errors": self.errors,
+            "head_hash": self.head_hash
+        }
+
+
+def verify_entries(wallet_address: str, entries: Iterable[ReputationLogEntry]) -> ChainVerification:
+    """Verify a wallet's entries in chain order, in constant memory"""
+    result = ChainVerification(wallet_address=wallet_address)
+    previous_entry: Optional[ReputationLogEntry] = None
+    previous_record: Optional[ReputationRecord] = None
+
+    for entry in entries:
+        result.records += 1
+        problems = []
+        try:
+            record = ReputationRecordService.to_record(entry)
+        except Exception as e:
+            record = None
+            problems.append(f"record does not parse: {e}")
+
+        if record is not None and record.calculate_hash() != entry.record_hash:
+            problems.append("record hash mismatch (record altered)")
+
+        expected_previous = previous_entry.record_hash if previous_entry is not None else None
+        if entry.previous_hash != expected_previous:
+            problems.append("previous_hash does not match the previous entry (entry inserted, removed or reordered)")
+
+        if record is not None and previous_record is not None:
+            if record.event_timestamp <= previous_record.event_timestamp:
+                problems.append("event timestamp is not after the previous record")
+
+        if record is not None and previous_entry is not None:
+            if record.verification_data.previous_record_hash != previous_entry.record_hash:
+                problems.append("previous_record_hash does not link to the previous record")
+
+        if problems:
+            result.invalid += 1
+            for problem in problems:
+                if len(result.errors) < MAX_REPORTED_ERRORS:
+                    result.errors.append(f"entry {entry.id} ({entry.record_id}): {problem}")
+
+        previous_entry = entry
+        previous_record = record
+
+    result.head_hash = previous_entry.record_hash if previous_entry is not None else None
+    return result
+
+
+def verify_wallet_chain(db: Session, wallet_address: str, batch_size: int = 1000) -> ChainVerification:
+    """Stream a wallet's chain from the database and verify it"""
+    entries = ReputationRecordService.iter_chain(db, wallet_address, batch_size=batch_size)
+    return verify_entries(wallet_address.lower(), entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reputation record chain maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    verify_parser = subparsers.add_parser("verify", help="Verify wallets' reputation record chains")
+    verify_parser.add_argument("wallets", nargs="+", help="Wallet addresses")
+    verify_parser.add_argument("--batch-size", type=int, default=1000, help="Rows fetched per round trip")
+    args = parser.parse_args()
+
+    if args.command == "verify":
+        db = SessionLocal()
+        try:
+            for wallet in args.wallets:
+                result = verify_wallet_chain(db, wallet, batch_size=args.batch_size)
+                if result.valid:
+                    print(f"✅ {result.wallet_address}: {result.records} records, chain intact")
+                else:
+                    print(f"❌ {result.wallet_address}: {result.invalid}/{result.records} records invalid")
+                    for error in result.errors:
+                        print(f"   {error}")
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,12 +9,38 @@ from datetime import datetime, date
 from decimal import Decimal
 from enum import Enum
 from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, Field, validator, model_validator
+from pydantic import BaseModel, Field, PrivateAttr, validator, model_validator
 import re
 import hashlib
-import json
 import uuid
-from pydantic.json import pydantic_encoder
+import orjson
+
+
+# Validation patterns, compiled once
+WALLET_ADDRESS_PATTERN = re.compile(r'^0x[a-fA-F0-9]{40}$')
+TX_HASH_PATTERN = re.compile(r'^0x[a-fA-F0-9]{64}$')
+IPFS_HASH_PATTERN = re.compile(r'^Qm[a-zA-Z0-9]{44}$')
+RECORD_ID_PATTERN = re.compile(r'^[a-zA-Z0-9_-]{20,50}$')
+
+# Placeholders for records written before the payment settles or the record is pinned
+# (the pin queue assigns the real CID after the record is stored)
+UNSETTLED_TX_HASH = "0x" + "0" * 64
+UNPINNED_IPFS_HASH = "Qm" + "1" * 44
+
+
+def _json_default(value: Any) -> Any:
+    """orjson fallback for types it does not serialize natively (matches pydantic_encoder)"""
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _to_decimal(value: Any) -> Optional[Decimal]:
+    return Decimal(str(value)) if value is not None else None
+
+
+def _to_datetime(value: Any) -> datetime:
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
 
 
 class EventType(str, Enum):
@@ -110,21 +136,21 @@ class VerificationData(BaseModel):
     """Blockchain and IPFS verification data"""
     payment_tx_hash: str = Field(..., description="x402 payment transaction hash")
     ipfs_hash: str = Field(..., description="IPFS hash of this reputation record")
-    previous_record_hash: Optional[str] = Field(None, description="IPFS hash of previous record in chain")
+    previous_record_hash: Optional[str] = Field(None, description="Content hash (calculate_hash) of the previous record in chain")
     block_number: Optional[int] = Field(None, ge=0, description="Block number of payment transaction")
     verification_timestamp: datetime = Field(default_factory=datetime.utcnow, description="When verification occurred")
     
     @validator('payment_tx_hash')
     def validate_tx_hash(cls, v):
         """Validate transaction hash format"""
-        if not re.match(r'^0x[a-fA-F0-9]{64}$', v):
+        if not TX_HASH_PATTERN.match(v):
             raise ValueError("Transaction hash must be 0x followed by 64 hex characters")
         return v
     
     @validator('ipfs_hash')
     def validate_ipfs_hash(cls, v):
         """Validate IPFS hash format"""
-        if not re.match(r'^Qm[a-zA-Z0-9]{44}$', v):
+        if not IPFS_HASH_PATTERN.match(v):
             raise ValueError("IPFS hash must be Qm followed by 44 base58 characters")
         return v
 
@@ -142,7 +168,7 @@ class ReferralData(BaseModel):
     def validate_referrer_wallet(cls, v):
         """Validate wallet address format"""
         if v is not None:
-            if not re.match(r'^0x[a-fA-F0-9]{40}$', v):
+            if not WALLET_ADDRESS_PATTERN.match(v):
                 raise ValueError("Wallet address must be 0x followed by 40 hex characters")
         return v
 
@@ -170,17 +196,19 @@ class ReputationRecord(BaseModel):
     metadata: Dict[str, Any] = Field(default_factory=dict, description="Additional metadata")
     version: str = Field("1.0.0", description="Record version")
     
+    _canonical_json: Optional[bytes] = PrivateAttr(None)
+    
     @validator('traveler_wallet', 'platform_wallet')
     def validate_wallet_addresses(cls, v):
         """Validate wallet address format"""
-        if not re.match(r'^0x[a-fA-F0-9]{40}$', v):
+        if not WALLET_ADDRESS_PATTERN.match(v):
             raise ValueError("Wallet address must be 0x followed by 40 hex characters")
         return v
     
     @validator('record_id')
     def validate_record_id(cls, v):
         """Validate record ID format"""
-        if not re.match(r'^[a-zA-Z0-9_-]{20,50}$', v):
+        if not RECORD_ID_PATTERN.match(v):
             raise ValueError("Record ID must be 20-50 alphanumeric characters, hyphens, or underscores")
         return v
     
@@ -189,14 +217,92 @@ class ReputationRecord(BaseModel):
         content = f"{self.traveler_wallet}_{self.event_type}_{self.event_timestamp.isoformat()}"
         return hashlib.sha256(content.encode()).hexdigest()[:32]
     
+    def __setattr__(self, name: str, value: Any):
+        super().__setattr__(name, value)
+        if not name.startswith('_'):
+            self.invalidate_serialization()
+    
+    def invalidate_serialization(self):
+        """Drop the cached serialization (call after mutating a nested model, e.g. verification_data)"""
+        self._canonical_json = None
+    
+    def canonical_json(self) -> bytes:
+        """
+        Canonical JSON bytes (sorted keys, 2-space indent), computed once per record.
+        
+        Assigning a field clears the cache; mutating a nested model in place
+        after serializing requires invalidate_serialization().
+        """
+        if self._canonical_json is None:
+            self._canonical_json = orjson.dumps(
+                self.model_dump(exclude_none=True),
+                default=_json_default,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS
+            )
+        return self._canonical_json
+    
     def to_ipfs_json(self) -> str:
         """Convert record to JSON for IPFS storage"""
-        return json.dumps(self.model_dump(exclude_none=True), indent=2, default=pydantic_encoder)
+        return self.canonical_json().decode()
     
     def calculate_hash(self) -> str:
         """Calculate hash of record content"""
-        content = self.to_ipfs_json()
-        return hashlib.sha256(content.encode()).hexdigest()
+        return hashlib.sha256(self.canonical_json()).hexdigest()
+    
+    @classmethod
+    def from_trusted(cls, data: Dict[str, Any]) -> "ReputationRecord":
+        """
+        Rebuild a record from data that was validated when it was written
+        (``model_dump(mode="json")`` as stored in reputation_records),
+        skipping field validators. Never use for untrusted input.
+        """
+        trip = data["trip_data"]
+        outcome = data["outcome_data"]
+        verification = data["verification_data"]
+        referral = data["referral_data"]
+        return cls.model_construct(
+            record_id=data["record_id"],
+            traveler_wallet=data["traveler_wallet"],
+            platform_wallet=data["platform_wallet"],
+            event_type=EventType(data["event_type"]),
+            event_timestamp=_to_datetime(data["event_timestamp"]),
+            trip_data=TripData.model_construct(
+                destination=trip["destination"],
+                cost_usd=Decimal(str(trip["cost_usd"])),
+                cost_usdc=Decimal(str(trip["cost_usdc"])),
+                duration_days=trip["duration_days"],
+                start_date=date.fromisoformat(trip["start_date"]),
+                end_date=date.fromisoformat(trip["end_date"]),
+                booking_id=trip["booking_id"],
+                plan_id=trip["plan_id"]
+            ),
+            outcome_data=OutcomeData.model_construct(
+                status=TripStatus(outcome["status"]),
+                rating=outcome.get("rating"),
+                feedback=outcome.get("feedback"),
+                refund_amount=_to_decimal(outcome.get("refund_amount")),
+                dispute_status=DisputeStatus(outcome["dispute_status"]) if outcome.get("dispute_status") else None,
+                dispute_reason=outcome.get("dispute_reason"),
+                completion_verified=outcome.get("completion_verified", False)
+            ),
+            verification_data=VerificationData.model_construct(
+                payment_tx_hash=verification["payment_tx_hash"],
+                ipfs_hash=verification["ipfs_hash"],
+                previous_record_hash=verification.get("previous_record_hash"),
+                block_number=verification.get("block_number"),
+                verification_timestamp=_to_datetime(verification["verification_timestamp"])
+            ),
+            referral_data=ReferralData.model_construct(
+                referrer_wallet=referral.get("referrer_wallet"),
+                commission_rate=_to_decimal(referral.get("commission_rate")),
+                commission_amount=_to_decimal(referral.get("commission_amount")),
+                bonus_amount=_to_decimal(referral.get("bonus_amount")),
+                referral_code=referral.get("referral_code"),
+                referral_tier=referral.get("referral_tier")
+            ),
+            metadata=data.get("metadata", {}),
+            version=data.get("version", "1.0.0")
+        )
 
 
 class ReputationSummary(BaseModel):
@@ -218,6 +324,8 @@ class ReputationSummary(BaseModel):
     
     # Quality metrics
     average_rating: Optional[Decimal] = Field(None, ge=1, le=5, decimal_places=2, description="Average trip rating")
+    rating_count: int = Field(0, ge=0, description="Number of ratings in the average")
+    rating_total: int = Field(0, ge=0, description="Sum of all ratings (keeps the running average exact)")
     completion_rate: Decimal = Field(Decimal('0'), ge=0, le=1, decimal_places=4, description="Booking completion rate")
     dispute_rate: Decimal = Field(Decimal('0'), ge=0, le=1, decimal_places=4, description="Dispute rate")
     
@@ -242,61 +350,75 @@ class ReputationSummary(BaseModel):
     @validator('wallet_address')
     def validate_wallet_address(cls, v):
         """Validate wallet address format"""
-        if not re.match(r'^0x[a-fA-F0-9]{40}$', v):
+        if not WALLET_ADDRESS_PATTERN.match(v):
             raise ValueError("Wallet address must be 0x followed by 40 hex characters")
         return v
     
     def calculate_reputation_score(self) -> Decimal:
-        """Calculate reputation score based on various factors"""
-        score = Decimal('0')
-        
-        # Base score from completed bookings
-        score += self.completed_bookings * 10
-        
-        # Bonus for high completion rate
-        if self.completion_rate > Decimal('0.95'):
-            score += 50
-        elif self.completion_rate > Decimal('0.90'):
-            score += 30
-        elif self.completion_rate > Decimal('0.80'):
-            score += 10
+        """Calculate reputation score with the active scoring policy (reputation_scoring.py)"""
+        from reputation_scoring import scoring_policy
+        return scoring_policy.score(self)
+    
+    def apply_record(self, record: ReputationRecord):
+        """
+        Fold one new reputation record into the summary.
         
-        # Bonus for high average rating
-        if self.average_rating:
-            if self.average_rating >= Decimal('4.5'):
-                score += 100
-            elif self.average_rating >= Decimal('4.0'):
-                score += 50
-            elif self.average_rating >= Decimal('3.5'):
-                score += 20
+        Counters, totals and the rating sum are updated in place, then the
+        derived rates, score and level are recomputed from them, so the cost
+        does not depend on how many records the wallet already has.
+        """
+        event = record.event_type
+        trip = record.trip_data
+        outcome = record.outcome_data
+        referral = record.referral_data
+        event_date = record.event_timestamp.date()
         
-        # Penalty for disputes
-        score -= self.disputed_bookings * 20
+        if event == EventType.BOOKING_CREATED:
+            self.total_bookings += 1
+            self.total_spent_usd += trip.cost_usd
+            self.total_spent_usdc += trip.cost_usdc
+            if self.first_booking_date is None or event_date < self.first_booking_date:
+                self.first_booking_date = event_date
+            if self.last_booking_date is None or event_date > self.last_booking_date:
+                self.last_booking_date = event_date
+        elif event == EventType.TRIP_COMPLETED:
+            self.completed_bookings += 1
+            self.total_travel_days += trip.duration_days
+            country = trip.destination.split(",")[-1].strip()
+            if country and country not in self.countries_visited:
+                self.countries_visited.append(country)
+        elif event == EventType.TRIP_CANCELLED:
+            self.cancelled_bookings += 1
+        elif event == EventType.DISPUTE_RAISED:
+            self.disputed_bookings += 1
+        elif event == EventType.REFUND_ISSUED and outcome.refund_amount:
+            self.total_refunds += outcome.refund_amount
+        elif event == EventType.REFERRAL_MADE:
+            self.total_referrals += 1
+        elif event == EventType.REFERRAL_BONUS_PAID:
+            self.successful_referrals += 1
+            self.total_commission_earned += referral.commission_amount or Decimal('0')
+            self.total_bonus_earned += referral.bonus_amount or Decimal('0')
         
-        # Bonus for referral activity
-        score += self.successful_referrals * 5
+        # Ratings arrive on completion and review records
+        if outcome.rating is not None and event in (EventType.TRIP_COMPLETED, EventType.TRIP_REVIEWED):
+            self.rating_count += 1
+            self.rating_total += outcome.rating
         
-        # Bonus for travel diversity
-        score += len(self.countries_visited) * 5
+        if self.rating_count:
+            self.average_rating = (Decimal(self.rating_total) / self.rating_count).quantize(Decimal('0.01'))
+        if self.total_bookings:
+            self.completion_rate = min(Decimal('1'), Decimal(self.completed_bookings) / self.total_bookings).quantize(Decimal('0.0001'))
+            self.dispute_rate = min(Decimal('1'), Decimal(self.disputed_bookings) / self.total_bookings).quantize(Decimal('0.0001'))
         
-        return max(Decimal('0'), min(Decimal('1000'), score))
+        self.reputation_score = self.calculate_reputation_score()
+        self.update_reputation_level()
+        self.last_updated = datetime.utcnow()
     
     def update_reputation_level(self):
-        """Update reputation level based on score"""
-        score = self.reputation_score
-        
-        if score >= 500:
-            self.reputation_level = ReputationLevel.DIAMOND
-        elif score >= 300:
-            self.reputation_level = ReputationLevel.PLATINUM
-        elif score >= 150:
-            self.reputation_level = ReputationLevel.GOLD
-        elif score >= 75:
-            self.reputation_level = ReputationLevel.SILVER
-        elif score >= 25:
-            self.reputation_level = ReputationLevel.BRONZE
-        else:
-            self.reputation_level = ReputationLevel.NEW
+        """Update reputation level from the score, with the active scoring policy's thresholds"""
+        from reputation_scoring import scoring_policy
+        self.reputation_level = scoring_policy.level(self.reputation_score)
 
 
 class IPFSStorageUtils:
@@ -341,7 +463,7 @@ class ReputationValidator:
     @staticmethod
     def validate_wallet_address(address: str) -> bool:
         """Validate wallet address format"""
-        return bool(re.match(r'^0x[a-fA-F0-9]{40}$', address))
+        return bool(WALLET_ADDRESS_PATTERN.match(address))
     
     @staticmethod
     def validate_rating(rating: int) -> bool:
@@ -374,7 +496,7 @@ class ReputationValidator:
                 return False
             
             # Check chain links
-            if current.verification_data.previous_record_hash != previous.verification_data.ipfs_hash:
+            if current.verification_data.previous_record_hash != previous.calculate_hash():
                 return False
         
         return True
@@ -413,6 +535,7 @@ def create_booking_record(
 def update_record_with_ipfs_hash(record: ReputationRecord, ipfs_hash: str) -> ReputationRecord:
     """Update record with IPFS hash after upload"""
     record.verification_data.ipfs_hash = ipfs_hash
+    record.invalidate_serialization()
     return record
 
 
@@ -442,7 +565,7 @@ def create_completion_record(
         verification_data=VerificationData(
             payment_tx_hash=original_record.verification_data.payment_tx_hash,
             ipfs_hash=ipfs_hash,
-            previous_record_hash=original_record.verification_data.ipfs_hash
+            previous_record_hash=original_record.calculate_hash()
         ),
         referral_data=original_record.referral_data
     )
@@ -0,0 +1,153 @@
+"""
+Bulk recompute of reputation scores and levels
+
+Rescores every reputation_summaries row after the scoring rules change,
+without building a ReputationSummary per wallet. Wallets are read in
+primary-key order in chunks, projecting only the columns the active scoring
+policy's batch path needs (reputation_scoring.py). Each chunk is scored as
+NumPy int64 vectors in hundredths of a point, so the results equal the
+policy's Decimal scalar path, which the API and apply_record use. Only
+wallets whose score or level changed are written back: COPY into a
+temporary staging table, then one UPDATE ... FROM per chunk.
+
+    python reputation_recompute.py [--chunk-size N] [--dry-run] [--version V]
+
+If REDIS_URL is set, the leaderboard index is rebuilt afterwards.
+"""
+import io
+import time
+import argparse
+from dataclasses import dataclass
+from typing import Optional, Sequence
+import numpy as np
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from leaderboard import leaderboard
+from models import WalletReputation
+from reputation_scoring import LEVELS, ScoringPolicy, get_policy, scoring_policy
+
+LEVEL_INDEX = {level.value: i for i, level in enumerate(LEVELS)}
+
+
+@dataclass(slots=True)
+class RecomputeStats:
+    wallets: int = 0
+    changed: int = 0
+    seconds: float = 0.0
+
+    @property
+    def wallets_per_second(self) -> float:
+        return self.wallets / self.seconds if self.seconds else 0.0
+
+
+def format_cents(cents: int) -> str:
+    return f"{cents // 100}.{cents % 100:02d}"
+
+
+class ReputationRecompute:
+    """Chunked read, vectorized score, bulk write-back of changed wallets"""
+
+    STAGING_TABLE = "reputation_score_staging"
+
+    def __init__(self, policy: ScoringPolicy = scoring_policy):
+        self.policy = policy
+
+    def _input_column(self, name: str):
+        column = getattr(WalletReputation, name)
+        # List columns are scored by length; count them in Postgres instead of shipping the lists
+        return func.jsonb_array_length(column) if isinstance(column.type, JSONB) else column
+
+    def fetch(self, db: Session, after: Optional[str], limit: int) -> Sequence[tuple]:
+        """Next chunk of (wallet, score, level, *policy.batch_inputs) rows in wallet order"""
+        query = select(
+            WalletReputation.wallet_address,
+            WalletReputation.reputation_score,
+            WalletReputation.reputation_level,
+            *[self._input_column(name) for name in self.policy.batch_inputs]
+        ).order_by(WalletReputation.wallet_address).limit(limit)
+        if after is not None:
+            query = query.where(WalletReputation.wallet_address > after)
+        return db.execute(query).all()
+
+    def write(self, db: Session, wallets: Sequence[str], cents: np.ndarray, levels: np.ndarray) -> int:
+        """COPY changed scores into the staging table and apply them in one UPDATE; commits the chunk"""
+        db.execute(text(
+            f"CREATE TEMPORARY TABLE IF NOT EXISTS {self.STAGING_TABLE} "
+            "(wallet_address VARCHAR(42) PRIMARY KEY, reputation_score NUMERIC(7, 2), reputation_level VARCHAR(20)) "
+            "ON COMMIT DELETE ROWS"
+        ))
+        buffer = io.StringIO()
+        for wallet, value, level in zip(wallets, cents.tolist(), levels.tolist()):
+            buffer.write(f"{wallet}\t{format_cents(value)}\t{LEVELS[level].value}\n")
+        buffer.seek(0)
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY {self.STAGING_TABLE} FROM STDIN", buffer)
+        finally:
+            cursor.close()
+        result = db.execute(text(
+            f"UPDATE reputation_summaries AS s "
+            f"SET reputation_score = t.reputation_score, reputation_level = t.reputation_level, last_updated = now() "
+            f"FROM {self.STAGING_TABLE} AS t WHERE s.wallet_address = t.wallet_address"
+        ))
+        db.commit()
+        return result.rowcount
+
+    def run(self, db: Session, chunk_size: int = 50000, dry_run: bool = False) -> RecomputeStats:
+        """Rescore every wallet; with dry_run, count changes without writing"""
+        stats = RecomputeStats()
+        started = time.perf_counter()
+        after = None
+        while True:
+            rows = self.fetch(db, after, chunk_size)
+            if not rows:
+                break
+            after = rows[-1][0]
+            stats.wallets += len(rows)
+
+            fields = list(zip(*rows))
+            columns = {
+                name: np.fromiter((value or 0 for value in fields[i + 3]), dtype=np.int64, count=len(rows))
+                for i, name in enumerate(self.policy.batch_inputs)
+            }
+            cents = self.policy.score_batch(columns)
+            levels = self.policy.level_batch(cents)
+
+            current_cents = np.fromiter((int(value * 100) for value in fields[1]), dtype=np.int64, count=len(rows))
+            current_levels = np.fromiter((LEVEL_INDEX.get(value, -1) for value in fields[2]), dtype=np.int64, count=len(rows))
+            changed = np.flatnonzero((cents != current_cents) | (levels != current_levels))
+            if not len(changed):
+                continue
+
+            stats.changed += len(changed)
+            if not dry_run:
+                self.write(db, [fields[0][i] for i in changed], cents[changed], levels[changed])
+        stats.seconds = time.perf_counter() - started
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute every wallet's reputation score and level")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Wallets read and written per round trip")
+    parser.add_argument("--dry-run", action="store_true", help="Count changed wallets without writing")
+    parser.add_argument("--version", help="Scoring policy version (defaults to REPUTATION_SCORING_VERSION)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        policy = get_policy(args.version)
+        stats = ReputationRecompute(policy).run(db, chunk_size=args.chunk_size, dry_run=args.dry_run)
+        action = "would change" if args.dry_run else "changed"
+        print(f"✅ Rescored {stats.wallets} wallets with scoring {policy.version} in {stats.seconds:.1f}s "
+              f"({stats.wallets_per_second:,.0f} wallets/s); {stats.changed} {action}")
+        if stats.changed and not args.dry_run and leaderboard.redis is not None:
+            indexed = leaderboard.rebuild(db)
+            print(f"✅ Leaderboard rebuilt: {indexed} wallets indexed")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
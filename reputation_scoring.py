@@ -0,0 +1,249 @@
+"""
+Versioned reputation scoring policies
+
+A scoring policy decides a wallet's reputation score and level, and it is
+the only place that does. Each policy has two paths that give identical
+results:
+- a scalar path that scores one ReputationSummary with Decimal arithmetic
+  (ReputationSummary.apply_record and the API);
+- a batch path that scores summary columns as NumPy int64 vectors in
+  hundredths of a point (reputation_recompute.py).
+
+Levels come from each policy's minimum scores by bisect, and
+/api/reputation/levels is generated from the same thresholds.
+
+Policies are registered by version. REPUTATION_SCORING_VERSION selects the
+active one.
+"""
+import os
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from dotenv import load_dotenv
+from reputation_models import ReputationLevel, ReputationSummary
+
+load_dotenv()
+
+LEVELS: List[ReputationLevel] = list(ReputationLevel)
+DEFAULT_SCORING_VERSION = "v1"
+
+
+def divide_half_even(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Integer numerator / denominator rounded half-to-even (Decimal.quantize's default); 0 where denominator is 0"""
+    safe = np.where(denominator > 0, denominator, 1)
+    quotient, remainder = np.divmod(numerator, safe)
+    twice = remainder * 2
+    round_up = (twice > safe) | ((twice == safe) & (quotient % 2 == 1))
+    return np.where(denominator > 0, quotient + round_up, 0)
+
+
+class ScoringPolicy(ABC):
+    """
+    Base class for a scoring policy.
+
+    Subclasses set version, level_minimums (the minimum score of each level
+    above NEW, ascending), max_score, batch_inputs and factors, and implement
+    score and score_batch; a policy missing either cannot be instantiated, so
+    it fails at registration.
+    """
+    version: str = ""
+    level_minimums: Tuple[int, ...] = ()
+    max_score: int = 1000
+    batch_inputs: Tuple[str, ...] = ()  # reputation_summaries columns; list columns arrive as lengths
+    factors: Dict[str, str] = {}
+
+    def __init__(self):
+        if len(self.level_minimums) != len(LEVELS) - 1 or list(self.level_minimums) != sorted(self.level_minimums):
+            raise ValueError(f"Scoring policy {self.version} needs {len(LEVELS) - 1} ascending level minimums")
+        self._thresholds = tuple(Decimal(minimum) for minimum in self.level_minimums)
+        self._threshold_cents = np.array([minimum * 100 for minimum in self.level_minimums], dtype=np.int64)
+
+    @abstractmethod
+    def score(self, summary: ReputationSummary) -> Decimal:
+        """Score one summary"""
+
+    @abstractmethod
+    def score_batch(self, columns: Dict[str, np.ndarray]) -> np.ndarray:
+        """Score int64 columns named by batch_inputs; returns hundredths of a point"""
+
+    def level(self, score: Decimal) -> ReputationLevel:
+        """Level for a score"""
+        return LEVELS[bisect_right(self._thresholds, score)]
+
+    def level_batch(self, cents: np.ndarray) -> np.ndarray:
+        """Index into LEVELS for each score in hundredths of a point"""
+        return np.searchsorted(self._threshold_cents, cents, side="right")
+
+    def level_ranges(self) -> List[Tuple[ReputationLevel, int, int]]:
+        """(level, min_score, max_score) for each level, for display"""
+        minimums = (0,) + self.level_minimums
+        maximums = tuple(minimum - 1 for minimum in self.level_minimums) + (self.max_score,)
+        return list(zip(LEVELS, minimums, maximums))
+
+
+SCORING_POLICIES: Dict[str, ScoringPolicy] = {}
+
+
+def register_policy(policy_class):
+    """Class decorator: register one instance of the policy under its version"""
+    if policy_class.version in SCORING_POLICIES:
+        raise ValueError(f"Scoring policy {policy_class.version} is already registered")
+    SCORING_POLICIES[policy_class.version] = policy_class()
+    return policy_class
+
+
+def get_policy(version: Optional[str] = None) -> ScoringPolicy:
+    """Registered policy for a version (defaults to REPUTATION_SCORING_VERSION, then v1)"""
+    version = version or os.getenv("REPUTATION_SCORING_VERSION", DEFAULT_SCORING_VERSION)
+    try:
+        return SCORING_POLICIES[version]
+    except KeyError:
+        raise ValueError(f"Unknown reputation scoring version: {version}") from None
+
+
+@register_policy
+class ScoringPolicyV1(ScoringPolicy):
+    """Completed trips, completion rate, rating, disputes, referrals and countries visited"""
+    version = "v1"
+    level_minimums = (25, 75, 150, 300, 500)
+    max_score = 1000
+    batch_inputs = (
+        "total_bookings",
+        "completed_bookings",
+        "disputed_bookings",
+        "successful_referrals",
+        "rating_count",
+        "rating_total",
+        "countries_visited"
+    )
+    factors = {
+        "completed_bookings": "10 points per completed trip",
+        "completion_rate": "50 / 30 / 10 points above 95% / 90% / 80% completion",
+        "average_rating": "100 / 50 / 20 points for an average rating of 4.5 / 4.0 / 3.5 or more",
+        "dispute_penalty": "20 points deducted per dispute",
+        "referral_bonus": "5 points per successful referral",
+        "travel_diversity": "5 points per country visited"
+    }
+
+    def score(self, summary: ReputationSummary) -> Decimal:
+        score = Decimal('0')
+
+        # Base score from completed bookings
+        score += summary.completed_bookings * 10
+
+        # Bonus for high completion rate
+        if summary.completion_rate > Decimal('0.95'):
+            score += 50
+        elif summary.completion_rate > Decimal('0.90'):
+            score += 30
+        elif summary.completion_rate > Decimal('0.80'):
+            score += 10
+
+        # Bonus for high average rating
+        if summary.average_rating:
+            if summary.average_rating >= Decimal('4.5'):
+                score += 100
+            elif summary.average_rating >= Decimal('4.0'):
+                score += 50
+            elif summary.average_rating >= Decimal('3.5'):
+                score += 20
+
+        # Penalty for disputes
+        score -= summary.disputed_bookings * 20
+
+        # Bonus for referral activity
+        score += summary.successful_referrals * 5
+
+        # Bonus for travel diversity
+        score += len(summary.countries_visited) * 5
+
+        return max(Decimal('0'), min(Decimal(self.max_score), score))
+
+    def score_batch(self, columns: Dict[str, np.ndarray]) -> np.ndarray:
+        total = columns["total_bookings"]
+        completed = columns["completed_bookings"]
+        rating_count = columns["rating_count"]
+
+        # completion_rate as apply_record stores it: capped at 1, quantized to 0.0001
+        completion = np.minimum(divide_half_even(completed * 10000, total), 10000)
+        # average_rating quantized to 0.01; None (no bonus) without ratings
+        rating = divide_half_even(columns["rating_total"] * 100, rating_count)
+
+        score = completed * 10
+        score = score + np.select([completion > 9500, completion > 9000, completion > 8000], [50, 30, 10], 0)
+        score = score + np.where(
+            rating_count > 0,
+            np.select([rating >= 450, rating >= 400, rating >= 350], [100, 50, 20], 0),
+            0
+        )
+        score = score - columns["disputed_bookings"] * 20
+        score = score + columns["successful_referrals"] * 5
+        score = score + columns["countries_visited"] * 5
+        return np.clip(score * 100, 0, self.max_score * 100)
+
+
+# Display names and benefits per level; score ranges come from the active scoring policy
+LEVEL_DETAILS = {
+    ReputationLevel.NEW: {
+        "name": "New Traveler",
+        "benefits": [
+            "Basic booking access",
+            "Standard customer support"
+        ]
+    },
+    ReputationLevel.BRONZE: {
+        "name": "Bronze Traveler",
+        "benefits": [
+            "Priority booking",
+            "Enhanced customer support",
+            "5% referral bonus"
+        ]
+    },
+    ReputationLevel.SILVER: {
+        "name": "Silver Traveler",
+        "benefits": [
+            "VIP booking access",
+            "24/7 customer support",
+            "10% referral bonus",
+            "Exclusive travel deals"
+        ]
+    },
+    ReputationLevel.GOLD: {
+        "name": "Gold Traveler",
+        "benefits": [
+            "Premium booking access",
+            "Personal travel concierge",
+            "15% referral bonus",
+            "Exclusive travel deals",
+            "Priority dispute resolution"
+        ]
+    },
+    ReputationLevel.PLATINUM: {
+        "name": "Platinum Traveler",
+        "benefits": [
+            "Luxury booking access",
+            "Dedicated travel manager",
+            "20% referral bonus",
+            "Exclusive travel deals",
+            "Priority dispute resolution",
+            "Custom travel packages"
+        ]
+    },
+    ReputationLevel.DIAMOND: {
+        "name": "Diamond Traveler",
+        "benefits": [
+            "Ultimate booking access",
+            "Personal travel assistant",
+            "25% referral bonus",
+            "Exclusive travel deals",
+            "Priority dispute resolution",
+            "Custom travel packages",
+            "VIP airport services"
+        ]
+    }
+}
+
+# Global instance
+scoring_policy = get_policy()
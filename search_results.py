@@ -0,0 +1,277 @@
+"""
+Structured Amadeus search results
+
+Search functions return these compact records built straight from the
+Amadeus payload. Text is rendered only at the edge (the LangChain tools),
+so planner code never has to parse rendered strings back into data.
+"""
+from dataclasses import asdict, dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+
+def _to_float(value: Any) -> Optional[float]:
+    """Convert an Amadeus amount string to float, or None if missing/invalid"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(slots=True, frozen=True)
+class FlightOffer:
+    """A single flight offer"""
+    airline: str
+    origin: str
+    destination: str
+    departure_date: str
+    price: Optional[float]
+    currency: str = "USD"
+    offer_id: Optional[str] = None
+    departure_at: Optional[str] = None
+    arrival_at: Optional[str] = None
+    stops: int = 0
+
+    @classmethod
+    def from_amadeus(cls, offer: Dict[str, Any], origin: str, destination: str, departure_date: str) -> Optional["FlightOffer"]:
+        """Build from an Amadeus flight-offer payload; returns None if it can't be parsed"""
+        try:
+            # Handle different pricing structures
+            if offer.get('pricing_options'):
+                price_data = offer['pricing_options'][0]['price']
+            else:
+                price_data = offer.get('price', {})
+
+            # Handle different airline structures
+            if offer.get('validatingAirlineCodes'):
+                airline = offer['validatingAirlineCodes'][0]
+            elif offer.get('airlines'):
+                airline = offer['airlines'][0]
+            else:
+                airline = "Airline not specified"
+
+            segments = offer['itineraries'][0]['segments'] if offer.get('itineraries') else []
+            if segments:
+                origin = segments[0]['departure'].get('iataCode', origin)
+                destination = segments[-1]['arrival'].get('iataCode', destination)
+
+            return cls(
+                airline=airline,
+                origin=origin,
+                destination=destination,
+                departure_date=departure_date,
+                price=_to_float(price_data.get('grandTotal', price_data.get('total'))),
+                currency=price_data.get('currency', "USD"),
+                offer_id=offer.get('id'),
+                departure_at=segments[0]['departure'].get('at') if segments else None,
+                arrival_at=segments[-1]['arrival'].get('at') if segments else None,
+                stops=max(len(segments) - 1, 0)
+            )
+        except (KeyError, IndexError, TypeError, AttributeError):
+            return None
+
+    def to_plan_dict(self) -> Dict[str, Any]:
+        """Flight entry in the shape used by travel plans"""
+        return {
+            "from": self.origin,
+            "to": self.destination,
+            "price": self.price or 0,
+            "airline": self.airline,
+            "dates": (self.departure_at or self.departure_date)[:10]
+        }
+
+
+@dataclass(slots=True, frozen=True)
+class HotelOffer:
+    """A single hotel offer for a stay"""
+    name: str
+    check_in_date: str
+    check_out_date: str
+    total: Optional[float]
+    currency: str = "USD"
+    rating: Optional[str] = None
+    hotel_id: Optional[str] = None
+    offer_id: Optional[str] = None
+
+    @classmethod
+    def from_amadeus(cls, hotel: Dict[str, Any], check_in_date: str, check_out_date: str) -> Optional["HotelOffer"]:
+        """Build from an Amadeus hotel-offers payload; returns None if it can't be parsed"""
+        try:
+            offer = hotel['offers'][0] if hotel.get('offers') else {}
+            price_data = offer.get('price', {})
+            return cls(
+                name=hotel['hotel']['name'],
+                check_in_date=offer.get('checkInDate', check_in_date),
+                check_out_date=offer.get('checkOutDate', check_out_date),
+                total=_to_float(price_data.get('total')),
+                currency=price_data.get('currency', "USD"),
+                rating=hotel['hotel'].get('rating'),
+                hotel_id=hotel['hotel'].get('hotelId'),
+                offer_id=offer.get('id')
+            )
+        except (KeyError, IndexError, TypeError, AttributeError):
+            return None
+
+    @property
+    def nights(self) -> int:
+        """Number of nights in the stay (at least 1)"""
+        try:
+            delta = date.fromisoformat(self.check_out_date) - date.fromisoformat(self.check_in_date)
+            return max(delta.days, 1)
+        except ValueError:
+            return 1
+
+    @property
+    def price_per_night(self) -> Optional[float]:
+        if self.total is None:
+            return None
+        return round(self.total / self.nights, 2)
+
+    def to_plan_dict(self, location: str) -> Dict[str, Any]:
+        """Hotel entry in the shape used by travel plans"""
+        return {
+            "name": self.name,
+            "location": location,
+            "price_per_night": self.price_per_night or 0,
+            "nights": self.nights,
+            "total": self.total or 0
+        }
+
+
+@dataclass(slots=True, frozen=True)
+class Activity:
+    """A point of interest"""
+    name: str
+    category: str = "Attraction"
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+    @classmethod
+    def from_amadeus(cls, poi: Dict[str, Any]) -> Optional["Activity"]:
+        """Build from an Amadeus points-of-interest payload; returns None if it can't be parsed"""
+        try:
+            geo_code = poi.get('geoCode') or {}
+            return cls(
+                name=poi['name'],
+                category=poi.get('category', "Attraction"),
+                latitude=geo_code.get('latitude'),
+                longitude=geo_code.get('longitude')
+            )
+        except (KeyError, TypeError, AttributeError):
+            return None
+
+
+@dataclass(slots=True)
+class SearchResults:
+    """
+    Outcome of one search.
+
+    ``items`` holds the parsed records (capped for display), ``total`` the
+    number of results Amadeus returned, and ``error`` a user-facing message
+    when the search could not be completed.
+    """
+    items: List[Any] = field(default_factory=list)
+    total: int = 0
+    error: Optional[str] = None
+    configured: bool = True
+
+    @classmethod
+    def not_configured(cls) -> "SearchResults":
+        return cls(error="Amadeus API credentials not configured.", configured=False)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and bool(self.items)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-safe representation (used by shared cache tiers)"""
+        return {
+            "items": [{"type": type(item).__name__, **asdict(item)} for item in self.items],
+            "total": self.total,
+            "error": self.error,
+            "configured": self.configured
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SearchResults":
+        items = []
+        for item in data.get("items", []):
+            fields = dict(item)
+            items.append(RESULT_ITEM_TYPES[fields.pop("type")](**fields))
+        return cls(
+            items=items,
+            total=data.get("total", 0),
+            error=data.get("error"),
+            configured=data.get("configured", True)
+        )
+
+
+RESULT_ITEM_TYPES = {
+    "FlightOffer": FlightOffer,
+    "HotelOffer": HotelOffer,
+    "Activity": Activity
+}
+
+
+def flight_results(flight_data: List[Dict[str, Any]], origin: str, destination: str, departure_date: str, limit: int = 5) -> SearchResults:
+    """Parse raw flight offers into SearchResults"""
+    flights = [FlightOffer.from_amadeus(offer, origin, destination, departure_date) for offer in flight_data[:limit]]
+    return SearchResults(items=[f for f in flights if f is not None], total=len(flight_data))
+
+
+def hotel_results(hotel_data: List[Dict[str, Any]], check_in_date: str, check_out_date: str, limit: int = 5) -> SearchResults:
+    """Parse raw hotel offers into SearchResults"""
+    hotels = [HotelOffer.from_amadeus(hotel, check_in_date, check_out_date) for hotel in hotel_data[:limit]]
+    return SearchResults(items=[h for h in hotels if h is not None], total=len(hotel_data))
+
+
+def activity_results(poi_data: List[Dict[str, Any]], limit: int = 10) -> SearchResults:
+    """Parse raw points of interest into SearchResults"""
+    activities = [Activity.from_amadeus(poi) for poi in poi_data[:limit]]
+    return SearchResults(items=[a for a in activities if a is not None], total=len(poi_data))
+
+
+def render_flight_results(results: SearchResults, origin: str, destination: str, departure_date: str) -> str:
+    """Render flight results as text for LLM tools"""
+    if results.error:
+        return results.error
+    if not results.total:
+        return f"No flights found from {origin} to {destination} on {departure_date}."
+    if not results.items:
+        return f"Found flights from {origin} to {destination} on {departure_date}, but couldn't parse pricing information."
+
+    lines = [
+        f"{i}. {flight.airline} - ${flight.price:.2f}" if flight.price is not None
+        else f"{i}. {flight.airline} - $Price not available"
+        for i, flight in enumerate(results.items, 1)
+    ]
+    return f"Found {results.total} flights from {origin} to {destination} on {departure_date}:\n" + "\n".join(lines)
+
+
+def render_hotel_results(results: SearchResults, city: str) -> str:
+    """Render hotel results as text for LLM tools"""
+    if results.error:
+        return results.error
+    if not results.total:
+        return f"No hotels found in {city} for the specified dates."
+    if not results.items:
+        return f"Found hotels in {city}, but couldn't parse pricing information."
+
+    lines = []
+    for i, hotel in enumerate(results.items, 1):
+        price = f"{hotel.total:.2f} {hotel.currency}" if hotel.total is not None else "Price not available"
+        lines.append(f"{i}. {hotel.name} ({hotel.rating or 'N/A'}★) - {price}")
+    return f"Found {results.total} hotels in {city}:\n" + "\n".join(lines)
+
+
+def render_activity_results(results: SearchResults, city: str) -> str:
+    """Render activity results as text for LLM tools"""
+    if results.error:
+        return results.error
+    if not results.total:
+        return f"No activities found in {city}."
+    if not results.items:
+        return f"Found points of interest in {city}, but couldn't parse information."
+
+    lines = [f"{i}. {activity.name} ({activity.category})" for i, activity in enumerate(results.items, 1)]
+    return f"Popular activities in {city}:\n" + "\n".join(lines)
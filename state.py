@@ -1,6 +1,9 @@
 # Shared agent state class
-from typing import TypedDict, Optional, List, Any
-from langgraph.checkpoint.memory import MemorySaver
+from typing import TypedDict, Optional, List, Any, Dict, Annotated
+
+def merge_node_timings(left: Optional[Dict[str, dict]], right: Optional[Dict[str, dict]]) -> Dict[str, dict]:
+    """Reducer so concurrent graph branches can each add their own timing entry"""
+    return {**(left or {}), **(right or {})}
 
 class AgentState(TypedDict, total=False):
     input: str
@@ -19,6 +22,8 @@ class TravelAgentState(TypedDict, total=False):
     """
     destination: str
     budget: float
+    departure_date: str  # ISO dates of the trip
+    return_date: str
     flights: Optional[List[dict]]
     hotels: Optional[List[dict]]
     activities: Optional[List[str]]
@@ -29,4 +34,6 @@ class TravelAgentState(TypedDict, total=False):
     booking_status: Optional[dict]
     user_wallet: str
     error: str
-    session_id: str
\ No newline at end of file
+    session_id: str
+    # node name -> {"seconds": float, "source": "amadeus" | "demo" | "fallback", "error"?: str}
+    node_timings: Annotated[Dict[str, dict], merge_node_timings]
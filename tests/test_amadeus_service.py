@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test script for the async Amadeus service (runs offline against a mock transport)
+"""
+
+import asyncio
+import time
+import httpx
+from amadeus_service import AmadeusAsyncService, AmadeusServiceError
+
+UPSTREAM_DELAY = 0.2
+
+def make_transport(calls):
+    """Mock Amadeus API that sleeps on every data endpoint"""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if request.url.path == "/v1/security/oauth2/token":
+            return httpx.Response(200, json={"access_token": "token", "expires_in": 1799})
+        await asyncio.sleep(UPSTREAM_DELAY)
+        if request.url.path == "/v1/reference-data/locations":
+            return httpx.Response(200, json={"data": [{"geoCode": {"latitude": 48.85, "longitude": 2.35}}]})
+        if request.url.path == "/v2/shopping/flight-offers":
+            return httpx.Response(200, json={"data": [{"price": {"total": "512.30"}, "validatingAirlineCodes": ["AF"]}]})
+        return httpx.Response(200, json={"data": []})
+    return httpx.MockTransport(handler)
+
+def test_token_is_fetched_once():
+    """Concurrent calls share one OAuth token"""
+    print("🔑 Testing token reuse")
+    calls = []
+    service = AmadeusAsyncService("id", "secret", transport=make_transport(calls))
+
+    async def run():
+        await asyncio.gather(*[service.get_locations("Paris") for _ in range(5)])
+        await service.close()
+
+    asyncio.run(run())
+    assert calls.count("/v1/security/oauth2/token") == 1
+    print("   ✅ Token fetched once for 5 concurrent calls")
+
+def test_searches_run_concurrently():
+    """Flight, city and POI lookups overlap instead of running back to back"""
+    print("⚡ Testing concurrent searches")
+    calls = []
+    service = AmadeusAsyncService("id", "secret", transport=make_transport(calls))
+
+    async def run():
+        start = time.perf_counter()
+        flights, cities, pois = await asyncio.gather(
+            service.search_flight_offers("JFK", "CDG", "2025-08-01"),
+            service.get_locations("Paris"),
+            service.get_points_of_interest(48.85, 2.35)
+        )
+        elapsed = time.perf_counter() - start
+        await service.close()
+        return flights, cities, elapsed
+
+    flights, cities, elapsed = asyncio.run(run())
+    assert flights[0]["validatingAirlineCodes"] == ["AF"]
+    assert cities[0]["geoCode"]["latitude"] == 48.85
+    assert elapsed < UPSTREAM_DELAY * 2
+    print(f"   ✅ 3 searches completed in {elapsed:.2f}s")
+
+def test_timeout_raises_service_error():
+    """A slow upstream surfaces as AmadeusServiceError"""
+    print("⏱️ Testing per-call timeout")
+    service = AmadeusAsyncService("id", "secret", timeout=0.05, transport=make_transport([]))
+
+    async def run():
+        try:
+            await service.get_locations("Paris")
+        finally:
+            await service.close()
+
+    try:
+        asyncio.run(run())
+        assert False, "Expected a timeout"
+    except AmadeusServiceError as e:
+        assert "timed out" in str(e)
+    print("   ✅ Timeout reported as AmadeusServiceError")
+
+if __name__ == "__main__":
+    print("🧪 Testing Async Amadeus Service\n")
+    test_token_is_fetched_once()
+    test_searches_run_concurrently()
+    test_timeout_raises_service_error()
+    print("\n✅ Testing complete!")
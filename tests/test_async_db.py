@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test script for the async database session path (runs offline against a recording session)
+"""
+
+import uuid
+import asyncio
+from sqlalchemy.dialects import postgresql
+from database import async_database_url
+from db_service import AsyncPlanService, create_booking_async, get_pending_payments_async, update_booking_status_async
+from models import Booking, Plan
+
+class Rows(list):
+    def first(self):
+        return self[0] if self else None
+
+class RecordingSession:
+    """The AsyncSession subset used by the async services; records statements and returns canned rows"""
+
+    def __init__(self, rows=None):
+        self.rows = rows or []
+        self.statements = []
+        self.added = []
+        self.commits = 0
+        self.flushes = 0
+        self.refreshed = []
+
+    def sql(self, index=-1):
+        return str(self.statements[index].compile(dialect=postgresql.dialect()))
+
+    async def scalars(self, statement):
+        self.statements.append(statement)
+        return Rows(self.rows)
+
+    async def scalar(self, statement):
+        self.statements.append(statement)
+        return self.rows[0] if self.rows else None
+
+    async def get(self, model, key):
+        self.statements.append((model, key))
+        return self.rows[0] if self.rows else None
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    async def commit(self):
+        self.commits += 1
+
+    async def flush(self):
+        self.flushes += 1
+
+    async def refresh(self, obj):
+        self.refreshed.append(obj)
+
+def test_async_database_url():
+    """The async engine reaches the same database through asyncpg"""
+    print("🔗 Testing async URL")
+    assert async_database_url("postgresql://u:p@db:5432/app") == "postgresql+asyncpg://u:p@db:5432/app"
+    assert async_database_url("postgresql+psycopg2://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+    assert async_database_url("postgres://u@db/app") == "postgresql+asyncpg://u@db/app"
+    assert async_database_url("postgresql+asyncpg://u@db/app") == "postgresql+asyncpg://u@db/app"
+    print("   ✅ Driver swapped, rest of the URL kept")
+
+def test_plan_queries():
+    """AsyncPlanService issues the same queries as PlanService"""
+    print("📋 Testing async plan queries")
+    plan = Plan(id=uuid.uuid4(), user_wallet="0xabc", destination="Lisbon", budget=1000, plan_data={}, status="generated")
+    db = RecordingSession([plan])
+
+    async def run():
+        plans = await AsyncPlanService.get_user_plans(db, "0xabc")
+        found = await AsyncPlanService.get_plan_by_id(db, str(plan.id))
+        missing = await AsyncPlanService.get_plan_by_id(db, "not-a-uuid")
+        return plans, found, missing
+
+    plans, found, missing = asyncio.run(run())
+    assert plans == [plan] and found is plan and missing is None
+    sql = db.sql(0)
+    assert "WHERE plans.user_wallet = %(user_wallet_1)s" in sql and "ORDER BY plans.created_at DESC" in sql
+    assert db.statements[1] == (Plan, plan.id) and len(db.statements) == 2
+    print("   ✅ Wallet listing, primary-key lookup, bad ids skipped")
+
+def test_plan_writes_follow_commit_flag():
+    """commit=False leaves the transaction to the caller, as in PlanService"""
+    print("✍️ Testing async plan writes")
+    plan = Plan(id=uuid.uuid4(), user_wallet="0xabc", destination="Lisbon", budget=1000, plan_data={}, status="confirmed")
+    db = RecordingSession([plan])
+
+    async def run():
+        created = await AsyncPlanService.create_plan(db, "0xabc", "Porto", 800, {"grand_total": 800}, commit=False)
+        confirmed = await AsyncPlanService.update_plan_status(db, str(plan.id), "confirmed", commit=False)
+        return created, confirmed
+
+    created, confirmed = asyncio.run(run())
+    assert db.added == [created] and created.destination == "Porto"
+    assert confirmed is plan and db.sql().startswith("UPDATE plans SET")
+    assert db.flushes == 1 and db.commits == 0
+    print("   ✅ Nothing committed")
+
+def test_booking_functions():
+    """Async booking functions create, look up and update bookings"""
+    print("🎫 Testing async booking functions")
+    db = RecordingSession()
+
+    async def run():
+        booking = await create_booking_async(db, "FL1", "Ada", "ada@example.com", plan_id=str(uuid.uuid4()))
+        db.rows = [booking]
+        updated = await update_booking_status_async(db, booking.booking_id, "confirmed", payment_status="completed")
+        pending = await get_pending_payments_async(db)
+        return booking, updated, pending
+
+    booking, updated, pending = asyncio.run(run())
+    assert isinstance(booking, Booking) and booking.booking_id.startswith("TRV-")
+    assert updated is booking and pending == [booking]
+    assert db.sql(0).startswith("UPDATE bookings SET status=%(status)s, payment_status=%(payment_status)s")
+    assert "bookings.payment_status = %(payment_status_1)s AND bookings.status = %(status_1)s" in db.sql(1)
+    assert db.commits == 2
+    print("   ✅ Created, updated and listed")
+
+if __name__ == "__main__":
+    print("🧪 Testing Async Database Path\n")
+    test_async_database_url()
+    test_plan_queries()
+    test_plan_writes_follow_commit_flag()
+    test_booking_functions()
+    print("\n✅ Testing complete!")
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test script for bulk plan and booking ingestion (runs offline; writes go to in-memory rows)
+"""
+
+import io
+import uuid
+import orjson
+from types import SimpleNamespace
+from sqlalchemy.dialects import postgresql
+from bulk_ingest import (
+    BOOKING_COLUMNS, BulkIngest, booking_values, chunked, copy_buffer, copy_field, plan_values, read_jsonl
+)
+
+def booking_record(n):
+    return {"booking_id": f"TRV-{n:08d}", "flight_id": f"FL{n}", "passenger_name": f"Passenger {n}",
+            "passenger_email": f"p{n}@example.com", "status": "confirmed", "payment_status": "completed",
+            "created_at": "2024-08-01T10:00:00"}
+
+class MemoryIngest(BulkIngest):
+    """Same chunking and skip-existing contract as the SQL, over a dict of rows"""
+
+    def __init__(self, target, chunk_size, existing=()):
+        super().__init__(target, method="insert", chunk_size=chunk_size)
+        self.rows = {key: None for key in existing}
+        self.chunks = []
+
+    def write(self, db, rows):
+        self.chunks.append(len(rows))
+        fresh = [row for row in rows if row[self.target.key] not in self.rows]
+        self.rows.update((row[self.target.key], row) for row in fresh)
+        return len(fresh)
+
+def test_chunking_is_lazy():
+    """Chunks are pulled from the iterable one at a time"""
+    print("🧱 Testing chunking")
+    pulled = []
+
+    def records():
+        for n in range(7):
+            pulled.append(n)
+            yield n
+
+    chunks = chunked(records(), 3)
+    assert next(chunks) == [0, 1, 2] and pulled == [0, 1, 2]
+    assert list(chunks) == [[3, 4, 5], [6]]
+    try:
+        next(chunked([1], 0))
+        assert False, "chunk size 0 accepted"
+    except ValueError:
+        pass
+    print("   ✅ 7 records in chunks of 3, read on demand")
+
+def test_copy_format():
+    """Values are escaped for COPY's text format"""
+    print("📋 Testing COPY formatting")
+    assert copy_field(None) == "\\N"
+    assert copy_field("a\tb\nc\\d\re") == "a\\tb\\nc\\\\d\\re"
+    assert copy_field({"note": "line\nbreak"}) == '{"note":"line\\\\nbreak"}'
+    assert copy_field(True) == "t" and copy_field(1.5) == "1.5"
+
+    row = booking_values(booking_record(1))
+    line = copy_buffer([row], BOOKING_COLUMNS).read()
+    fields = line.rstrip("\n").split("\t")
+    assert len(fields) == len(BOOKING_COLUMNS) and line.count("\n") == 1
+    assert fields[0] == "TRV-00000001" and fields[1] == "\\N" and fields[-2] == "2024-08-01T10:00:00"
+    print("   ✅ NULLs, separators, backslashes and JSON escaped")
+
+def test_defaults_and_validation():
+    """Missing fields get create_plan and new_booking defaults; unknown statuses are refused"""
+    print("🧾 Testing record defaults")
+    booking = booking_values({"flight_id": "FL1", "plan_id": str(uuid.UUID(int=1)), "flight_details": {"price": 500}})
+    assert booking["booking_id"].startswith("TRV-") and len(booking["booking_id"]) == 12
+    assert booking["status"] == "pending_payment" and booking["payment_status"] == "pending"
+    assert booking["payment_method"] == "crypto" and booking["payment_currency"] == "USDC"
+    assert booking["plan_id"] == uuid.UUID(int=1) and booking["flight_details"] == '{"price":500}'
+    assert booking["updated_at"] == booking["created_at"]
+
+    plan = plan_values({"user_wallet": "0xabc", "destination": "Paris", "budget": "2000",
+                        "plan_data": {"grand_total": 1785.0}, "created_at": "2024-08-01T10:00:00Z"})
+    assert isinstance(plan["id"], uuid.UUID) and plan["budget"] == 2000
+    assert plan["status"] == "generated" and plan["pin_status"] == "pending"
+    assert plan["created_at"].utcoffset().total_seconds() == 0
+    for bad in ({"status": "booked"}, {"payment_status": "refunded"}):
+        try:
+            booking_values({"flight_id": "FL1", **bad})
+            assert False, f"accepted {bad}"
+        except ValueError:
+            pass
+    print("   ✅ Defaults filled, timestamps parsed, bad statuses rejected")
+
+def test_insert_statement():
+    """The insert path is one multi-row INSERT that skips existing keys and returns the new ones"""
+    print("⚡ Testing INSERT batches")
+    ingest = BulkIngest("bookings", method="insert")
+    rows = [booking_values(booking_record(n)) for n in range(3)]
+    sql = str(ingest.insert_statement(rows).compile(dialect=postgresql.dialect()))
+    assert sql.startswith("INSERT INTO bookings (booking_id, plan_id,")
+    assert sql.endswith("ON CONFLICT (booking_id) DO NOTHING RETURNING bookings.booking_id")
+    assert sql.count("%(booking_id_m") == 3
+
+    executed = []
+
+    class ReturningSession:
+        def execute(self, statement):
+            count = len(statement.compile(dialect=postgresql.dialect()).params) // len(BOOKING_COLUMNS)
+            executed.append(count)
+            return SimpleNamespace(all=lambda: [None] * count)
+
+        def commit(self):
+            executed.append("commit")
+
+    many = [booking_values(booking_record(n)) for n in range(5000)]
+    assert ingest.insert_chunk(ReturningSession(), many) == 5000
+    assert executed == [2520, 2480, "commit"]
+    print("   ✅ ON CONFLICT DO NOTHING RETURNING, batches under the parameter limit")
+
+def test_run_from_jsonl():
+    """A JSONL stream is read, normalized and written in chunks; rows already present are skipped"""
+    print("📥 Testing JSONL import")
+    lines = [orjson.dumps(booking_record(n)).decode() for n in range(10)]
+    source = io.StringIO("\n".join(lines[:5]) + "\n\n" + "\n".join(lines[5:]) + "\n")
+    ingest = MemoryIngest("bookings", chunk_size=4, existing=["TRV-00000002", "TRV-00000007"])
+    stats = ingest.run(None, read_jsonl(source))
+    assert ingest.chunks == [4, 4, 2]
+    assert stats.rows == 10 and stats.inserted == 8 and stats.skipped == 2
+    assert ingest.rows["TRV-00000009"]["status"] == "confirmed"
+
+    try:
+        list(read_jsonl(io.StringIO(lines[0] + "\n{not json\n")))
+        assert False, "bad line accepted"
+    except ValueError as e:
+        assert ":2:" in str(e)
+    print("   ✅ 10 records in 3 chunks, 2 duplicates skipped, bad lines reported by number")
+
+if __name__ == "__main__":
+    print("🧪 Testing Bulk Ingestion\n")
+    test_chunking_is_lazy()
+    test_copy_format()
+    test_defaults_and_validation()
+    test_insert_statement()
+    test_run_from_jsonl()
+    print("\n✅ Testing complete!")
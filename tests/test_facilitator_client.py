@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test script for the pooled x402 facilitator client (runs offline against the local stand-in facilitator)
+"""
+
+import time
+import asyncio
+import httpx
+from facilitator_client import CircuitBreaker, FacilitatorClient, FacilitatorError, FacilitatorUnavailable
+from tools.facilitator_stub import RECIPIENT, create_app, sample_payment, serve_in_thread
+from payment_cache import PaymentCache
+from x402_middleware import X402Middleware
+
+def stub_client(app, **kwargs):
+    return FacilitatorClient(base_url="http://facilitator.test", transport=httpx.ASGITransport(app=app), **kwargs)
+
+def test_verdicts():
+    """Valid, underpaid and misdirected payments get the facilitator's verdict"""
+    print("🧾 Testing verification verdicts")
+    client = stub_client(create_app())
+
+    async def run():
+        try:
+            paid = await client.verify(sample_payment(1, "0.10"), "0.10", RECIPIENT)
+            short = await client.verify(sample_payment(2, "0.01"), "0.10", RECIPIENT)
+            elsewhere = await client.verify(sample_payment(3, "0.10"), "0.10", "0x" + "0" * 40)
+            return paid, short, elsewhere
+        finally:
+            await client.close()
+
+    paid, short, elsewhere = asyncio.run(run())
+    assert paid["valid"] and not short["valid"] and not elsewhere["valid"]
+    assert client.breaker.state == CircuitBreaker.CLOSED
+    print("   ✅ Verdicts returned; invalid payments do not trip the breaker")
+
+def test_circuit_opens_and_recovers():
+    """Repeated 5xx open the circuit; calls fail fast until one half-open trial succeeds"""
+    print("🔌 Testing circuit breaker")
+    app = create_app(failure_rate=1.0)
+    client = stub_client(app, failure_threshold=3, reset_timeout=0.2)
+
+    async def run():
+        for _ in range(3):
+            try:
+                await client.verify(sample_payment(1), "0.01", RECIPIENT)
+                assert False, "503 accepted"
+            except FacilitatorUnavailable:
+                assert False, "circuit opened early"
+            except FacilitatorError as e:
+                assert e.status_code == 503
+        assert client.breaker.state == CircuitBreaker.OPEN
+
+        served = app.state.requests
+        try:
+            await client.verify(sample_payment(1), "0.01", RECIPIENT)
+            assert False, "call went through an open circuit"
+        except FacilitatorUnavailable as e:
+            assert 0 < e.retry_after <= 0.2
+        assert app.state.requests == served
+
+        await asyncio.sleep(0.25)
+        app.state.failure_rate = 0.0
+        assert (await client.verify(sample_payment(1), "0.01", RECIPIENT))["valid"]
+        assert client.breaker.state == CircuitBreaker.CLOSED
+        await client.close()
+
+    asyncio.run(run())
+    print("   ✅ Opened after 3 failures, refused without a call, closed after a good trial")
+
+def test_half_open_allows_one_trial():
+    """Only one call probes a half-open circuit; a failed trial reopens it"""
+    print("🚦 Testing half-open trial")
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] = 10.0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow() and not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and breaker.retry_after() == 10
+    print("   ✅ Single trial, reopened on failure")
+
+def test_middleware_reuses_connections():
+    """Verifications through the middleware share warm connections to the facilitator"""
+    print("♻️ Testing connection reuse")
+    app = create_app()
+    server, base_url = serve_in_thread(app)
+    facilitator = FacilitatorClient(base_url=base_url)
+    middleware = X402Middleware(RECIPIENT, {"/api/flights/search": "0.01"}, facilitator=facilitator, payment_cache=PaymentCache(redis_url=""))
+
+    async def run():
+        try:
+            results = []
+            for n in range(20):
+                results.append(await middleware._verify_payment(f'{{"transactionHash": "0x{n:064x}", "amount": "0.01", "to": "{RECIPIENT}"}}', "0.01"))
+            return results
+        finally:
+            await facilitator.close()
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        server.should_exit = True
+    assert all(results)
+    assert app.state.requests == 20
+    assert len(app.state.connections) == 1
+    print("   ✅ 20 verifications over 1 connection")
+
+def test_open_circuit_returns_503():
+    """While the circuit is open, paid requests get 503 with Retry-After instead of 402"""
+    print("⏳ Testing fail-fast response")
+    facilitator = stub_client(create_app(failure_rate=1.0), failure_threshold=1, reset_timeout=30)
+    async def endpoint(scope, receive, send):
+        raise AssertionError("unpaid request reached the endpoint")
+
+    middleware = X402Middleware(RECIPIENT, {"/api/flights/search": "0.01"}, facilitator=facilitator, payment_cache=PaymentCache(redis_url=""), app=endpoint)
+
+    def payment_header(n):
+        return {"X-PAYMENT": f'{{"transactionHash": "0x{n:064x}", "amount": "0.01", "to": "{RECIPIENT}"}}'}
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=middleware), base_url="http://api.test") as client:
+            first = await client.get("/api/flights/search", headers=payment_header(1))
+            started = time.perf_counter()
+            second = await client.get("/api/flights/search", headers=payment_header(2))
+            elapsed = time.perf_counter() - started
+        await facilitator.close()
+        return first, second, elapsed
+
+    first, second, elapsed = asyncio.run(run())
+    assert first.status_code == 402
+    assert second.status_code == 503 and int(second.headers["Retry-After"]) == 30
+    assert elapsed < 0.05
+    print(f"   ✅ 503 after the circuit opened ({elapsed * 1000:.1f} ms)")
+
+if __name__ == "__main__":
+    print("🧪 Testing x402 Facilitator Client\n")
+    test_verdicts()
+    test_circuit_opens_and_recovers()
+    test_half_open_allows_one_trial()
+    test_middleware_reuses_connections()
+    test_open_circuit_returns_503()
+    print("\n✅ Testing complete!")
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared city geocode cache
+"""
+
+import asyncio
+import os
+import tempfile
+from geocode_cache import GeocodeCache, normalize_city
+
+PARIS = (48.85, 2.35)
+
+def test_normalized_keys_share_entries():
+    """Different spellings of one city hit the same entry"""
+    print("🗺️ Testing key normalization")
+    cache = GeocodeCache(snapshot_path="")
+    cache.set("Paris", *PARIS)
+    assert normalize_city("  NEW   york ") == "new york"
+    assert cache.get(" paris ") == PARIS
+    assert cache.stats()["hits"] == 1
+    print("   ✅ ' paris ' hit the 'Paris' entry")
+
+def test_ttl_and_lru_eviction():
+    """Expired entries miss and the least recently used entry is evicted"""
+    print("♻️ Testing TTL and LRU eviction")
+    cache = GeocodeCache(max_entries=2, snapshot_path="")
+    cache.set("Paris", *PARIS)
+    cache.set("London", 51.5, -0.12)
+    cache.get("Paris")  # London is now least recently used
+    cache.set("Rome", 41.9, 12.5)
+    assert cache.get("London") is None
+    assert cache.get("Paris") == PARIS
+    assert cache.stats()["evictions"] == 1
+
+    expiring = GeocodeCache(ttl_seconds=0.0001, snapshot_path="")
+    expiring.set("Paris", *PARIS)
+    asyncio.run(asyncio.sleep(0.01))
+    assert expiring.get("Paris") is None
+    print("   ✅ LRU eviction and TTL expiry work")
+
+def test_snapshot_survives_restart():
+    """A new cache instance warm-starts from the snapshot file"""
+    print("💾 Testing on-disk snapshot")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "geocode.json")
+        cache = GeocodeCache(snapshot_path=path, save_interval=60)
+        cache.set("Paris", *PARIS)
+        assert not os.path.exists(path), "snapshot written on every set"
+        cache.flush()
+        restarted = GeocodeCache(snapshot_path=path)
+        assert restarted.get("paris") == PARIS
+    print("   ✅ Snapshot restored on restart")
+
+def test_snapshot_writes_are_debounced_and_merged():
+    """Sets within one save interval cause one write; workers sharing a path keep each other's entries"""
+    print("🗂️ Testing debounced snapshot writes")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "geocode.json")
+        writes = []
+
+        class CountingCache(GeocodeCache):
+            def save_snapshot(self):
+                writes.append(self.snapshot_path)
+                super().save_snapshot()
+
+        first = CountingCache(snapshot_path=path, save_interval=0.1)
+        second = CountingCache(snapshot_path=path, save_interval=0.1)
+        for n in range(50):
+            first.set(f"City {n}", n, n)
+        second.set("Paris", *PARIS)
+        asyncio.run(asyncio.sleep(0.4))
+        assert len(writes) == 2
+        first.flush()
+        assert len(writes) == 2, "flush without new entries rewrote the snapshot"
+
+        restarted = GeocodeCache(snapshot_path=path)
+        assert restarted.get("Paris") == PARIS and restarted.get("City 7") == (7, 7)
+        assert not [name for name in os.listdir(tmp) if name.endswith(".tmp")]
+    print("   ✅ 51 sets, 2 writes, both workers' entries kept, no temp files left")
+
+def test_concurrent_misses_share_one_fetch():
+    """Hotel and activity lookups for the same city make one upstream call"""
+    print("🔀 Testing request coalescing")
+    cache = GeocodeCache(snapshot_path="")
+    calls = []
+
+    async def fetch(city):
+        calls.append(city)
+        await asyncio.sleep(0.05)
+        return PARIS
+
+    async def run():
+        return await asyncio.gather(*[cache.get_or_fetch_async("Paris", fetch) for _ in range(10)])
+
+    results = asyncio.run(run())
+    assert results == [PARIS] * 10
+    assert len(calls) == 1
+    print("   ✅ 10 concurrent lookups made 1 upstream call")
+
+def test_timed_out_lookup_does_not_cancel_others():
+    """A hotel branch hitting its deadline does not cancel the activity lookup sharing its fetch"""
+    print("⏱️ Testing timeout with coalesced lookups")
+    cache = GeocodeCache(snapshot_path="")
+    calls = []
+
+    async def fetch(city):
+        calls.append(city)
+        await asyncio.sleep(0.3)
+        return PARIS
+
+    async def run():
+        impatient = asyncio.wait_for(cache.get_or_fetch_async("Paris", fetch), 0.1)
+        patient = cache.get_or_fetch_async("paris", fetch)
+        return await asyncio.gather(impatient, patient, return_exceptions=True)
+
+    timed_out, result = asyncio.run(run())
+    assert isinstance(timed_out, asyncio.TimeoutError)
+    assert result == PARIS and cache.get("Paris") == PARIS
+    assert len(calls) == 1
+    print("   ✅ First lookup timed out, second got the shared coordinates")
+
+if __name__ == "__main__":
+    print("🧪 Testing Geocode Cache\n")
+    test_normalized_keys_share_entries()
+    test_ttl_and_lru_eviction()
+    test_snapshot_survives_restart()
+    test_snapshot_writes_are_debounced_and_merged()
+    test_concurrent_misses_share_one_fetch()
+    test_timed_out_lookup_does_not_cancel_others()
+    print("\n✅ Testing complete!")
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Test script for the IPFS read cache (runs offline against local stand-in gateways)
+"""
+
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import ipfs_cache
+from ipfs_cache import DEFAULT_GATEWAYS, IpfsContentCache, normalize_cid
+
+RECORD = {"data": {"wallet_address": "0xabc", "points": 42}}
+
+def start_gateway(delay=0.0, status=200, body=None):
+    """Serve RECORD (or a fixed body) for any /ipfs/<cid> path; returns (base_url, request log, server)"""
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            time.sleep(delay)
+            content = body if body is not None else json.dumps({**RECORD, "path": self.path}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/ipfs/", hits, server
+
+def test_normalize_cid():
+    """ipfs:// and /ipfs/ prefixes map to the same cache key"""
+    print("🔑 Testing CID normalization")
+    assert normalize_cid("ipfs://QmA") == normalize_cid("/ipfs/QmA") == normalize_cid("QmA") == "QmA"
+    assert normalize_cid("ipfs://bafyRoot/abc.json") == "bafyRoot/abc.json"
+    print("   ✅ Prefixes stripped, directory paths kept")
+
+def test_repeated_reads_hit_memory():
+    """Only the first read of a CID reaches the gateway"""
+    print("🧠 Testing in-memory tier")
+    url, hits, server = start_gateway()
+    cache = IpfsContentCache(gateways=[url], disk_path="")
+    try:
+        for _ in range(5):
+            assert cache.get_json("ipfs://QmRecord")["data"]["points"] == 42
+        assert len(hits) == 1
+        assert cache.stats()["memory_hits"] == 4
+    finally:
+        cache.close()
+        server.shutdown()
+    print("   ✅ 5 reads, 1 gateway request")
+
+def test_memory_tier_is_bounded():
+    """Least recently used entries are evicted past the byte budget"""
+    print("📏 Testing memory bound")
+    url, hits, server = start_gateway()
+    cache = IpfsContentCache(gateways=[url], disk_path="", memory_max_bytes=150)
+    try:
+        for cid in ["QmA", "QmB", "QmC", "QmD"]:
+            cache.get(cid)
+        stats = cache.stats()
+        assert stats["memory_bytes"] <= 150
+        assert stats["memory_entries"] < 4
+        cache.get("QmD")
+        assert len(hits) == 4
+        cache.get("QmA")
+        assert len(hits) == 5
+    finally:
+        cache.close()
+        server.shutdown()
+    print(f"   ✅ {stats['memory_entries']} entries in {stats['memory_bytes']} bytes")
+
+def test_disk_tier_survives_restart():
+    """A new cache over the same directory serves earlier reads without the network"""
+    print("💾 Testing on-disk tier")
+    url, hits, server = start_gateway()
+    with tempfile.TemporaryDirectory() as directory:
+        first = IpfsContentCache(gateways=[url], disk_path=directory)
+        expected = [first.get(cid) for cid in ["QmA", "QmB", "bafyRoot/c.json"]]
+        first.close()
+
+        second = IpfsContentCache(gateways=[url], disk_path=directory)
+        try:
+            assert [second.get(cid) for cid in ["QmA", "QmB", "bafyRoot/c.json"]] == expected
+            assert second.stats()["disk_hits"] == 3
+        finally:
+            second.close()
+    server.shutdown()
+    assert len(hits) == 3
+    print("   ✅ 3 objects served from the pack file after restart")
+
+def test_disk_tier_without_flock():
+    """Platforms without fcntl (Windows) still get the on-disk tier, locked only in-process"""
+    print("🪟 Testing on-disk tier without fcntl")
+    url, hits, server = start_gateway()
+    saved, ipfs_cache.fcntl = ipfs_cache.fcntl, None
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            first = IpfsContentCache(gateways=[url], disk_path=directory)
+            expected = first.get("QmA")
+            first.close()
+            second = IpfsContentCache(gateways=[url], disk_path=directory)
+            try:
+                assert second.get("QmA") == expected and second.stats()["disk_hits"] == 1
+            finally:
+                second.close()
+    finally:
+        ipfs_cache.fcntl = saved
+        server.shutdown()
+    assert len(hits) == 1
+    print("   ✅ Pack file written and read back without flock")
+
+def test_race_returns_fastest_gateway():
+    """Race mode answers with the first gateway to respond; failed gateways are skipped"""
+    print("🏁 Testing gateway race")
+    slow_url, _, slow = start_gateway(delay=1.0)
+    broken_url, _, broken = start_gateway(status=500)
+    fast_url, fast_hits, fast = start_gateway(delay=0.05)
+    cache = IpfsContentCache(gateways=[slow_url, broken_url, fast_url], race=True, disk_path="")
+    try:
+        started = time.perf_counter()
+        data = cache.get_json("QmRace")
+        elapsed = time.perf_counter() - started
+        assert data["path"] == "/ipfs/QmRace"
+        assert fast_hits == ["/ipfs/QmRace"]
+        assert elapsed < 0.9
+    finally:
+        cache.close()
+        for server in (slow, broken, fast):
+            server.shutdown()
+    print(f"   ✅ Answered in {elapsed:.2f}s")
+
+def test_fallback_and_failure():
+    """Without race mode gateways are tried in order; total failure returns None"""
+    print("↪️ Testing gateway fallback")
+    broken_url, broken_hits, broken = start_gateway(status=503)
+    good_url, good_hits, good = start_gateway()
+    cache = IpfsContentCache(gateways=[broken_url, good_url], disk_path="")
+    failing = IpfsContentCache(gateways=[broken_url], disk_path="")
+    try:
+        assert cache.get_json("QmFallback") is not None
+        assert len(broken_hits) == 1 and len(good_hits) == 1
+        assert failing.get("QmMissing") is None
+        assert failing.stats()["memory_entries"] == 0
+    finally:
+        cache.close()
+        failing.close()
+        broken.shutdown()
+        good.shutdown()
+    print("   ✅ Fell back to the second gateway; failures are not cached")
+
+def test_unverified_content_is_not_cached():
+    """Content that fails verification counts as a gateway failure and never reaches the cache"""
+    print("🛡️ Testing content verification")
+    good_body = json.dumps(RECORD).encode()
+    path = f"bafyRoot/{hashlib.sha256(good_body).hexdigest()}.json"
+    tampered_url, tampered_hits, tampered = start_gateway(body=b'{"data": {"points": 9999}}')
+    html_url, _, html = start_gateway(body=b"<html>rate limited</html>")
+    good_url, good_hits, good = start_gateway(delay=0.2, body=good_body)
+    with tempfile.TemporaryDirectory() as directory:
+        cache = IpfsContentCache(gateways=[tampered_url, html_url, good_url], race=True, disk_path=directory)
+        only_bad = IpfsContentCache(gateways=[tampered_url], disk_path=directory)
+        try:
+            assert cache.get_json(path) == RECORD
+            assert len(tampered_hits) == 1 and len(good_hits) == 1
+            assert only_bad.get(f"bafyRoot/{'0' * 64}.json") is None
+            assert only_bad.stats()["memory_entries"] == 0
+            plain = IpfsContentCache(gateways=[html_url, good_url], disk_path="")
+            assert plain.get_json("QmPlain") == RECORD and plain.get_json("QmPlain") == RECORD
+            assert plain.stats()["memory_hits"] == 1
+            plain.close()
+        finally:
+            cache.close()
+            only_bad.close()
+            for server in (tampered, html, good):
+                server.shutdown()
+    assert "cloudflare-ipfs.com" not in DEFAULT_GATEWAYS
+    print("   ✅ Hash mismatches and non-JSON answers skipped; the verified copy won")
+
+if __name__ == "__main__":
+    print("🧪 Testing IPFS Read Cache\n")
+    test_normalize_cid()
+    test_repeated_reads_hit_memory()
+    test_memory_tier_is_bounded()
+    test_disk_tier_survives_restart()
+    test_disk_tier_without_flock()
+    test_race_returns_fastest_gateway()
+    test_fallback_and_failure()
+    test_unverified_content_is_not_cached()
+    print("\n✅ Testing complete!")
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Test script for the reputation leaderboard (runs offline; the Postgres store is replaced by an in-memory ranking)
+"""
+
+from decimal import Decimal
+from types import SimpleNamespace
+from sqlalchemy.dialects import postgresql
+from leaderboard import Leaderboard, PostgresLeaderboardStore, RedisLeaderboardStore, encode_cursor, decode_cursor
+from reputation_models import ReputationLevel, ReputationSummary
+
+def wallet(n):
+    return f"0x{n:040x}"
+
+def summary(n, score, level=ReputationLevel.NEW):
+    return ReputationSummary(wallet_address=wallet(n), reputation_score=Decimal(score), reputation_level=level)
+
+class MemoryStore(PostgresLeaderboardStore):
+    """Same ordering and keyset semantics as the SQL queries, over a list"""
+
+    def __init__(self, summaries):
+        self.summaries = list(summaries)
+        self.rank_queries = 0
+
+    def _ordered(self, level):
+        ranked = [s for s in self.summaries if not level or s.reputation_level.value == level]
+        return sorted(ranked, key=lambda s: (s.reputation_score, s.wallet_address), reverse=True)
+
+    def page(self, db, limit, offset, after, level):
+        ranked = self._ordered(level)
+        if after is not None:
+            ranked = [s for s in ranked if (s.reputation_score, s.wallet_address) < after]
+        return ranked[offset:offset + limit]
+
+    def rank(self, db, wallet_address, level):
+        self.rank_queries += 1
+        for position, s in enumerate(self._ordered(level), start=1):
+            if s.wallet_address == wallet_address:
+                return position
+        return None
+
+    def count(self, db, level):
+        return len(self._ordered(level))
+
+def make_leaderboard(summaries):
+    board = Leaderboard(redis_url="", cache_ttl=60)
+    board.postgres = MemoryStore(summaries)
+    return board
+
+def test_cursor_round_trip():
+    """Cursors carry score, wallet and rank; garbage is rejected"""
+    print("🔖 Testing leaderboard cursors")
+    cursor = encode_cursor(Decimal("190.50"), wallet(7), 42)
+    assert decode_cursor(cursor) == (Decimal("190.50"), wallet(7), 42)
+    try:
+        decode_cursor("not-a-cursor")
+        assert False, "malformed cursor accepted"
+    except ValueError:
+        pass
+    print("   ✅ Cursor round trip")
+
+def test_cursor_pages_cover_everyone_once():
+    """Following next_cursor walks the whole ranking in order, with ties broken by wallet"""
+    print("📄 Testing cursor pagination")
+    summaries = [summary(n, 100 - (n // 3)) for n in range(25)]
+    board = make_leaderboard(summaries)
+
+    seen, cursor = [], None
+    while True:
+        page = board.page(None, limit=10, cursor=cursor)
+        seen.extend(page.entries)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert [rank for rank, _ in seen] == list(range(1, 26))
+    assert len({s.wallet_address for _, s in seen}) == 25
+    ordered = [(s.reputation_score, s.wallet_address) for _, s in seen]
+    assert ordered == sorted(ordered, reverse=True)
+    assert page.total == 25
+    offset_page = board.page(None, limit=10, offset=10)
+    assert offset_page.entries[0] == seen[10]
+    print("   ✅ 25 wallets over 3 pages, offset pages agree")
+
+def test_level_filter_and_rank():
+    """Ranks are per ranking; a wallet outside the level has no level rank"""
+    print("🏅 Testing level filter and rank lookups")
+    summaries = [
+        summary(1, 500, ReputationLevel.DIAMOND),
+        summary(2, 300, ReputationLevel.PLATINUM),
+        summary(3, 320, ReputationLevel.PLATINUM),
+        summary(4, 10)
+    ]
+    board = make_leaderboard(summaries)
+    page = board.page(None, limit=10, level="platinum")
+    assert [s.wallet_address for _, s in page.entries] == [wallet(3), wallet(2)]
+    assert page.total == 2
+    assert board.rank(None, wallet(2)) == 3
+    assert board.rank(None, wallet(2), "platinum") == 2
+    assert board.rank(None, wallet(4), "platinum") is None
+    print("   ✅ Level pages and ranks correct")
+
+def test_rank_lookups_are_cached_until_the_wallet_changes():
+    """Repeated rank lookups reuse the cached value; recording the wallet invalidates it"""
+    print("⚡ Testing cached rank lookups")
+    summaries = [summary(n, n) for n in range(1, 11)]
+    board = make_leaderboard(summaries)
+    store = board.postgres
+
+    for _ in range(5):
+        assert board.rank(None, wallet(1)) == 10
+    assert store.rank_queries == 1
+
+    store.summaries[0] = summary(1, 99)
+    board.record([store.summaries[0]])
+    assert board.rank(None, wallet(1)) == 1
+    assert store.rank_queries == 2
+    print("   ✅ 1 query for 5 lookups, refreshed after an update")
+
+def test_keyset_sql_uses_row_comparison():
+    """The Postgres page query filters and orders on the indexed (score, wallet) pair"""
+    print("🗄️ Testing keyset SQL")
+    from sqlalchemy.orm import Session
+    store = PostgresLeaderboardStore()
+    query = store._ranked(Session(), "gold").filter(store._key() < (Decimal("10"), wallet(1)))
+    sql = str(query.statement.compile(dialect=postgresql.dialect()))
+    assert "(reputation_summaries.reputation_score, reputation_summaries.wallet_address) <" in sql
+    assert "reputation_summaries.reputation_level =" in sql
+    print("   ✅ Row comparison on the index columns")
+
+class FakeRedis:
+    """The sorted-set, hash and key subset of redis.Redis the leaderboard uses, over dicts"""
+
+    def __init__(self):
+        self.data = {}
+
+    def exists(self, *keys):
+        return sum(key in self.data for key in keys)
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def rename(self, source, target):
+        self.data[target] = self.data.pop(source)
+
+    def zadd(self, key, mapping):
+        self.data.setdefault(key, {}).update(mapping)
+
+    def zrem(self, key, member):
+        self.data.get(key, {}).pop(member, None)
+        if key in self.data and not self.data[key]:
+            del self.data[key]
+
+    def hset(self, key, field, value):
+        self.data.setdefault(key, {})[field] = value
+
+    def hmget(self, key, fields):
+        return [self.data.get(key, {}).get(field.decode() if isinstance(field, bytes) else field) for field in fields]
+
+    def _desc(self, key):
+        return sorted(self.data.get(key, {}), key=lambda member: (self.data[key][member], member), reverse=True)
+
+    def zrevrange(self, key, start, stop):
+        return self._desc(key)[start:stop + 1]
+
+    def zrevrank(self, key, member):
+        ordered = self._desc(key)
+        return ordered.index(member) if member in ordered else None
+
+    def zscore(self, key, member):
+        return self.data.get(key, {}).get(member)
+
+    def zcard(self, key):
+        return len(self.data.get(key, {}))
+
+    def pipeline(self, transaction=True):
+        redis, calls = self, []
+
+        class Pipeline:
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: calls.append((name, args, kwargs))
+
+            def execute(self):
+                return [getattr(redis, name)(*args, **kwargs) for name, args, kwargs in calls]
+
+        return Pipeline()
+
+class SummarySession:
+    """Enough of a Session for rebuild(): query(...).yield_per(n) over summaries"""
+
+    def __init__(self, summaries):
+        self.summaries = summaries
+
+    def query(self, model):
+        rows = [SimpleNamespace(**s.model_dump()) for s in self.summaries]
+        return SimpleNamespace(yield_per=lambda n: iter(rows))
+
+    def close(self):
+        pass
+
+def make_redis_leaderboard(summaries):
+    board = make_leaderboard(summaries)
+    board.redis = RedisLeaderboardStore("redis://localhost:6379")
+    board.redis._client = FakeRedis()
+    board.session_factory = lambda: SummarySession(board.postgres.summaries)
+    return board
+
+def test_cold_redis_falls_back_and_rebuilds():
+    """Until a rebuild completes, reads come from Postgres; a background rebuild then makes Redis live"""
+    print("🧊 Testing cold Redis")
+    summaries = [summary(n, 10 * n) for n in range(1, 6)]
+    board = make_redis_leaderboard(summaries)
+    board.record([summary(9, 1000)])  # recorded after deploy, before any rebuild
+
+    assert board.total(None) == 5 and board.rank(None, wallet(5)) == 1
+    board._rebuild_thread.join(5)
+    assert board.redis.ready()
+
+    board.postgres.summaries.append(summary(6, 1))  # Postgres only: visible again once reads use Redis
+    board._cache.clear()
+    page = board.page(None, limit=10)
+    assert page.total == 5 and [s.wallet_address for _, s in page.entries][0] == wallet(5)
+    assert not any(key.startswith(board.redis.build_prefix) for key in board.redis._client.data)
+    print("   ✅ Postgres served the cold reads, rebuilt index replaced the partial one")
+
+def test_rebuild_swaps_without_partial_reads():
+    """Live keys stay intact during a rebuild; updates made meanwhile survive the swap"""
+    print("🔁 Testing atomic rebuild")
+    board = make_redis_leaderboard([summary(n, n) for n in range(1, 4)])
+    board.rebuild(SummarySession(board.postgres.summaries))
+    store = board.redis
+
+    assert store.begin_rebuild(60) and not store.begin_rebuild(60)
+    assert store._client.zcard(store._ranking(None)) == 3, "live index untouched while building"
+    store.load([summary(n, n) for n in range(1, 4)])
+    store.update([summary(4, 99)])  # committed mid-rebuild, after the Postgres read
+    assert store._client.zcard(store._ranking(None)) == 4
+    store.finish_rebuild()
+    assert store.rank(wallet(4), None) == 1 and store.count(None) == 4
+    assert not store._client.exists(store._building)
+    print("   ✅ Swap kept the mid-rebuild update; lease released")
+
+def test_flushed_redis_falls_back():
+    """A flushed Redis loses its ready marker, so reads return to Postgres"""
+    print("🚿 Testing flushed Redis")
+    board = make_redis_leaderboard([summary(n, n) for n in range(1, 4)])
+    board.rebuild(SummarySession(board.postgres.summaries))
+    board.redis._client.data.clear()
+    board._ready_until = 0.0
+    board._cache.clear()
+    assert board.total(None) == 3
+    board._rebuild_thread.join(5)
+    print("   ✅ Postgres answered while the index rebuilt")
+
+if __name__ == "__main__":
+    print("🧪 Testing Reputation Leaderboard\n")
+    test_cursor_round_trip()
+    test_cursor_pages_cover_everyone_once()
+    test_level_filter_and_rank()
+    test_rank_lookups_are_cached_until_the_wallet_changes()
+    test_keyset_sql_uses_row_comparison()
+    test_cold_redis_falls_back_and_rebuilds()
+    test_rebuild_swaps_without_partial_reads()
+    test_flushed_redis_falls_back()
+    print("\n✅ Testing complete!")
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Test script for the flight/hotel offer cache
+"""
+
+import os
+import asyncio
+import threading
+import time
+from offer_cache import DEFAULT_TTLS, OfferCache, CacheEntry, RedisOfferStore
+from search_results import SearchResults, FlightOffer
+
+def make_results(price=512.30):
+    return SearchResults(items=[FlightOffer("AF", "JFK", "CDG", "2025-08-01", price)], total=1)
+
+def test_concurrent_async_searches_coalesce():
+    """50 identical concurrent searches produce one upstream call"""
+    print("🔀 Testing async request coalescing")
+    cache = OfferCache(redis_url="")
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return make_results()
+
+    async def run():
+        key = ("JFK", "CDG", "2025-08-01")
+        return await asyncio.gather(*[cache.get_or_fetch_async("flights", key, fetch) for _ in range(50)])
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(r.items[0].price == 512.30 for r in results)
+    print(f"   ✅ 50 searches, {len(calls)} upstream call")
+
+def test_timed_out_caller_does_not_cancel_others():
+    """A coalesced caller that hits its deadline leaves the shared search running for the rest"""
+    print("⏱️ Testing timeout with coalesced callers")
+    cache = OfferCache(redis_url="")
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.3)
+        return make_results()
+
+    async def run():
+        key = ("JFK", "CDG", "2025-08-01")
+        impatient = asyncio.wait_for(cache.get_or_fetch_async("flights", key, fetch), 0.1)
+        patient = cache.get_or_fetch_async("flights", key, fetch)
+        return await asyncio.gather(impatient, patient, return_exceptions=True)
+
+    timed_out, result = asyncio.run(run())
+    assert isinstance(timed_out, asyncio.TimeoutError)
+    assert isinstance(result, SearchResults) and result.items[0].price == 512.30
+    assert len(calls) == 1 and cache.stats()["size"] == 1
+    print("   ✅ First caller timed out, second got the shared result")
+
+def test_concurrent_sync_searches_coalesce():
+    """Threads searching the same hotel stay share one fetch"""
+    print("🧵 Testing threaded request coalescing")
+    cache = OfferCache(redis_url="")
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.05)
+        return make_results()
+
+    threads = [
+        threading.Thread(target=cache.get_or_fetch, args=("hotels", ("paris", "2025-08-01", "2025-08-08", 1), fetch))
+        for _ in range(20)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert cache.get_or_fetch("hotels", ("paris", "2025-08-01", "2025-08-08", 1), fetch).total == 1
+    assert len(calls) == 1
+    print("   ✅ 20 threads, 1 upstream call")
+
+def test_stale_while_revalidate():
+    """Stale entries are served immediately and refreshed in the background"""
+    print("♻️ Testing stale-while-revalidate")
+    cache = OfferCache(ttls={"flights": (0.01, 60)}, redis_url="")
+    prices = iter([100.0, 200.0])
+
+    def fetch():
+        return make_results(next(prices))
+
+    key = ("JFK", "CDG", "2025-08-01")
+    assert cache.get_or_fetch("flights", key, fetch).items[0].price == 100.0
+    time.sleep(0.02)
+    assert cache.get_or_fetch("flights", key, fetch).items[0].price == 100.0  # stale served
+    cache._refresh_executor.shutdown(wait=True)
+    assert cache.get_or_fetch("flights", key, fetch).items[0].price == 200.0
+    assert cache.stats()["stale_hits"] == 1
+    print("   ✅ Stale result served, then refreshed")
+
+def test_errors_are_not_cached():
+    """Failed searches always go back upstream"""
+    print("🚫 Testing error results bypass the cache")
+    cache = OfferCache(redis_url="")
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return SearchResults(error="Error searching flights: [500]")
+
+    for _ in range(3):
+        cache.get_or_fetch("flights", ("JFK", "CDG", "2025-08-01"), fetch)
+    assert len(calls) == 3
+    print("   ✅ Errors were not cached")
+
+def test_redis_entry_round_trip():
+    """Entries survive the JSON encoding used by the Redis tier"""
+    print("📦 Testing Redis entry encoding")
+    entry = CacheEntry(make_results(), time.time() + 10, time.time() + 20)
+    decoded = RedisOfferStore._decode(RedisOfferStore._encode(entry).encode())
+    assert decoded.value.items[0] == entry.value.items[0]
+    assert decoded.stale_until == entry.stale_until
+    print("   ✅ Entry decoded to equal records")
+
+def test_explicit_ttls_beat_env_vars():
+    """OFFER_CACHE_<KIND>_TTL only applies to kinds the caller did not configure"""
+    print("⏲️ Testing TTL precedence")
+    saved = {name: os.environ.get(name) for name in ("OFFER_CACHE_FLIGHTS_TTL", "OFFER_CACHE_HOTELS_TTL")}
+    os.environ["OFFER_CACHE_FLIGHTS_TTL"] = "900"
+    os.environ["OFFER_CACHE_HOTELS_TTL"] = "900"
+    try:
+        cache = OfferCache(ttls={"flights": (0.01, 60)}, redis_url="")
+        assert cache.ttls["flights"] == (0.01, 60)
+        assert cache.ttls["hotels"] == (900, DEFAULT_TTLS["hotels"][1])
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    print("   ✅ Explicit flights TTL kept, env var applied to hotels")
+
+if __name__ == "__main__":
+    print("🧪 Testing Offer Cache\n")
+    test_concurrent_async_searches_coalesce()
+    test_timed_out_caller_does_not_cancel_others()
+    test_concurrent_sync_searches_coalesce()
+    test_stale_while_revalidate()
+    test_errors_are_not_cached()
+    test_redis_entry_round_trip()
+    test_explicit_ttls_beat_env_vars()
+    print("\n✅ Testing complete!")
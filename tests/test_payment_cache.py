@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Test script for the x402 verified-payment cache (runs offline against the local stand-in facilitator)
+"""
+
+import json
+import time
+import asyncio
+import httpx
+from facilitator_client import FacilitatorClient
+from payment_cache import (
+    PAYMENT_INVALID, PAYMENT_PENDING, PAYMENT_USED, PaymentCache, RedisPaymentStore, payment_expiry
+)
+from tools.facilitator_stub import RECIPIENT, create_app
+from x402_middleware import X402Middleware
+
+def payment(n, amount="0.01", **extra):
+    return {"transactionHash": f"0x{n:064x}", "amount": amount, "to": RECIPIENT, **extra}
+
+def make_middleware(app, cache=None):
+    facilitator = FacilitatorClient(base_url="http://facilitator.test", transport=httpx.ASGITransport(app=app))
+    cache = cache or PaymentCache(redis_url="")
+    return X402Middleware(RECIPIENT, {"/api/flights/book": "0.10"}, facilitator=facilitator, payment_cache=cache)
+
+async def verify(middleware, data, amount="0.01"):
+    return await middleware._verify_payment(json.dumps(data), amount)
+
+def test_replay_is_rejected_without_facilitator():
+    """A payment unlocks one request; the replay never reaches the facilitator"""
+    print("🔁 Testing replay rejection")
+    app = create_app()
+    middleware = make_middleware(app)
+
+    async def run():
+        return [await verify(middleware, payment(1)) for _ in range(3)]
+
+    assert asyncio.run(run()) == [True, False, False]
+    assert app.state.requests == 1
+    assert middleware.payment_cache.stats()["rejections"] == 2
+    print("   ✅ 1 facilitator call, 2 replays rejected")
+
+def test_concurrent_replays_claim_once():
+    """Concurrent requests with the same payment: exactly one is verified"""
+    print("🏁 Testing atomic claim")
+    app = create_app(latency=0.05)
+    middleware = make_middleware(app)
+
+    async def run():
+        return await asyncio.gather(*[verify(middleware, payment(2)) for _ in range(20)])
+
+    results = asyncio.run(run())
+    assert results.count(True) == 1
+    assert app.state.requests == 1
+    print("   ✅ 20 concurrent uses, 1 accepted, 1 facilitator call")
+
+def test_negative_cache_expires():
+    """Rejected payments are remembered for negative_ttl, then re-verified"""
+    print("🚫 Testing negative caching")
+    app = create_app()
+    middleware = make_middleware(app, PaymentCache(negative_ttl=0.1, redis_url=""))
+
+    async def run():
+        first = await verify(middleware, payment(3, "0.001"))
+        second = await verify(middleware, payment(3, "0.001"))
+        calls = app.state.requests
+        await asyncio.sleep(0.15)
+        third = await verify(middleware, payment(3, "0.001"))
+        return first, second, calls, third
+
+    first, second, calls, third = asyncio.run(run())
+    assert (first, second, third) == (False, False, False)
+    assert calls == 1 and app.state.requests == 2
+    print("   ✅ Underpayment cached, re-checked after the negative TTL")
+
+def test_failed_verification_releases_claim():
+    """Without a verdict (facilitator error) the client can retry the same payment"""
+    print("🔓 Testing claim release")
+    app = create_app(failure_rate=1.0)
+    middleware = make_middleware(app)
+
+    async def run():
+        failed = await verify(middleware, payment(4))
+        app.state.failure_rate = 0.0
+        retried = await verify(middleware, payment(4))
+        return failed, retried
+
+    assert asyncio.run(run()) == (False, True)
+    print("   ✅ Retry after a 503 succeeded")
+
+def test_used_ttl_is_clamped():
+    """Used entries live until the verdict's expiresAt, clamped to [default_ttl, max_ttl]"""
+    print("⏳ Testing used TTL")
+    now = 1_700_000_000.0
+    assert payment_expiry({"expiresAt": "2023-11-14T22:23:20Z"}, 300, 3600, now) == now + 600
+    assert payment_expiry({"validBefore": str(int(now) + 60)}, 300, 3600, now) == now + 300
+    assert payment_expiry({"expiresAt": 0}, 300, 3600, now) == now + 300
+    assert payment_expiry({"expiresAt": now + 10 ** 9}, 300, 3600, now) == now + 3600
+    assert payment_expiry({}, 300, 3600, now) == now + 300
+    assert payment_expiry({"expiresAt": "soon"}, 300, 3600, now) == now + 300
+
+    cache = PaymentCache(default_ttl=0.1, redis_url="")
+
+    async def run():
+        assert await cache.claim("tx") is None
+        await cache.mark_used("tx", {"valid": True, "expiresAt": 0})
+        assert await cache.claim("tx") == PAYMENT_USED, "past expiresAt must not reopen the hash"
+        await asyncio.sleep(0.15)
+        return await cache.claim("tx")
+
+    assert asyncio.run(run()) is None
+    print("   ✅ Past expiry raised to default_ttl, far expiry capped at max_ttl")
+
+def test_memory_is_bounded():
+    """The in-process tier keeps at most max_entries hashes"""
+    print("📏 Testing size bound")
+    cache = PaymentCache(max_entries=100, redis_url="")
+
+    async def run():
+        for n in range(250):
+            await cache.claim(f"tx{n}")
+            await cache.mark_used(f"tx{n}", {})
+
+    asyncio.run(run())
+    assert len(cache.memory) == 100
+    assert cache.memory.get("tx249") == PAYMENT_USED and cache.memory.get("tx0") is None
+    print("   ✅ 250 payments, 100 kept")
+
+class FakeRedis:
+    """The SET NX / PX, GET and DELETE subset of redis.asyncio.Redis, over a dict"""
+
+    def __init__(self):
+        self.values = {}
+
+    async def set(self, key, value, nx=False, px=None):
+        expired = key in self.values and self.values[key][1] <= time.time()
+        if nx and key in self.values and not expired:
+            return None
+        self.values[key] = (value.encode(), time.time() + px / 1000)
+        return True
+
+    async def get(self, key):
+        value = self.values.get(key)
+        return value[0] if value and value[1] > time.time() else None
+
+    async def delete(self, key):
+        self.values.pop(key, None)
+
+class SharedRedisStore(RedisPaymentStore):
+    def __init__(self, fake):
+        super().__init__("redis://fake")
+        self.fake = fake
+
+    def _async(self):
+        return self.fake
+
+def test_workers_share_claims_through_redis():
+    """A payment used on one worker is rejected on another"""
+    print("🌐 Testing cross-worker claims")
+    fake = FakeRedis()
+    workers = []
+    for _ in range(2):
+        cache = PaymentCache(redis_url="")
+        cache.redis = SharedRedisStore(fake)
+        workers.append(cache)
+
+    async def run():
+        assert await workers[0].claim("tx") is None
+        assert await workers[1].claim("tx") == PAYMENT_PENDING
+        await workers[0].mark_used("tx", {})
+        assert await workers[1].claim("tx") == PAYMENT_USED
+        await workers[1].mark_invalid("other")
+        assert await workers[0].claim("other") == PAYMENT_INVALID
+
+    asyncio.run(run())
+    print("   ✅ Claims and verdicts visible to every worker")
+
+if __name__ == "__main__":
+    print("🧪 Testing Verified-Payment Cache\n")
+    test_replay_is_rejected_without_facilitator()
+    test_concurrent_replays_claim_once()
+    test_negative_cache_expires()
+    test_failed_verification_releases_claim()
+    test_used_ttl_is_clamped()
+    test_memory_is_bounded()
+    test_workers_share_claims_through_redis()
+    print("\n✅ Testing complete!")
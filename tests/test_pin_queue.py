@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Test script for the background IPFS pin queue (runs offline; database steps are recorded in memory)
+"""
+
+import asyncio
+from datetime import date, datetime
+from decimal import Decimal
+import httpx
+from sqlalchemy.dialects import postgresql
+from db_service import ReputationRecordService
+from pin_queue import PinQueueWorker, ClaimedJob, backoff_delay, record_cid_update
+from pinata_service import PinataIPFSService, PinataError, canonical_json, content_hash
+from reputation_models import (
+    UNPINNED_IPFS_HASH, EventType, OutcomeData, ReferralData, ReputationRecord, TripData, TripStatus, VerificationData
+)
+
+def make_pinata(handler):
+    service = PinataIPFSService(api_key="key", secret_key="secret")
+    service._ensure_async_client = lambda: httpx.AsyncClient(
+        base_url=service.base_url, transport=httpx.MockTransport(handler)
+    )
+    return service
+
+class RecordingWorker(PinQueueWorker):
+    """Worker whose database steps are recorded instead of written"""
+
+    def __init__(self, jobs, index=None, **kwargs):
+        super().__init__(**kwargs)
+        self.jobs = list(jobs)
+        self.index = dict(index or {})
+        self.completed = []
+        self.failed = []
+
+    def _claim_batch(self):
+        batch, self.jobs = self.jobs[:self.batch_size], self.jobs[self.batch_size:]
+        return batch
+
+    def _lookup_pinned(self, content_hashes):
+        return {digest: self.index[digest] for digest in content_hashes if digest in self.index}
+
+    def _record_pinned(self, root_cid, objects, sizes):
+        for digest in objects:
+            self.index[digest] = f"{root_cid}/{digest}.json"
+
+    def _complete(self, results):
+        self.completed.extend((job.id, path) for job, path in results)
+        self.record_cids = {job.reputation_record_id: path for job, path in results if job.reputation_record_id}
+
+    def _fail(self, jobs, error, retryable):
+        self.failed.extend((job.id, retryable and job.attempts < self.max_attempts) for job in jobs)
+
+def test_canonical_hash_ignores_key_order():
+    """Equal content hashes the same regardless of key order or whitespace"""
+    print("#️⃣ Testing canonical content hash")
+    a = {"b": 1, "a": {"y": [1, 2], "x": "é"}}
+    b = {"a": {"x": "é", "y": [1, 2]}, "b": 1}
+    assert canonical_json(a) == canonical_json(b)
+    assert content_hash(a) == content_hash(b)
+    assert content_hash(a) != content_hash({**a, "b": 2})
+    print("   ✅ Key order does not change the hash")
+
+def test_identical_plans_share_a_document():
+    """Two saves of the same plan differ only in id and timestamps, which are not pinned"""
+    print("🗺️ Testing travel plan dedupe")
+    service = PinataIPFSService(api_key="", secret_key="")
+
+    def saved_plan(plan_id, at):
+        return {
+            "plan_id": plan_id, "destination": "Paris", "budget": 2000.0, "user_wallet": "0xabc",
+            "plan_data": {"total_cost": 1785.0},
+            "structured_plan": {"plan_id": plan_id, "created_at": at, "destination": "Paris", "total_cost": 1785.0},
+            "timestamp": at
+        }
+
+    first = service.travel_plan_metadata(saved_plan("p-1", "2026-01-01T10:00:00"))
+    second = service.travel_plan_metadata(saved_plan("p-2", "2026-01-02T11:30:00"))
+    assert content_hash(first) == content_hash(second)
+    assert "plan_id" not in first["data"]["structured_plan"]
+    changed = saved_plan("p-3", "2026-01-03T09:00:00")
+    changed["plan_data"]["total_cost"] = 1800.0
+    assert content_hash(service.travel_plan_metadata(changed)) != content_hash(first)
+    print("   ✅ Same plan content, one document; changed content, a new one")
+
+def test_backoff_doubles_and_caps():
+    """Retry delays grow exponentially up to the cap"""
+    print("⏳ Testing retry backoff")
+    delays = [backoff_delay(n, 5, 60, jitter=0) for n in range(1, 6)]
+    assert delays == [5, 10, 20, 40, 60]
+    assert 5 <= backoff_delay(1, 5, 60) <= 5.5
+    print(f"   ✅ Delays: {delays}")
+
+def test_pin_json_async_reports_status():
+    """Pinata errors carry the status code so the worker knows whether to retry"""
+    print("📌 Testing async pin requests")
+
+    async def handler(request):
+        body = request.read()
+        if b"rate-limited" in body:
+            return httpx.Response(429, text="slow down")
+        if b"bad" in body:
+            return httpx.Response(400, text="invalid json")
+        return httpx.Response(200, json={"IpfsHash": "QmTestHash"})
+
+    service = make_pinata(handler)
+
+    async def run():
+        cid = await service.pin_json_async({"name": "ok"})
+        errors = []
+        for name in ["rate-limited", "bad"]:
+            try:
+                await service.pin_json_async({"name": name})
+            except PinataError as e:
+                errors.append(e)
+        return cid, errors
+
+    cid, errors = asyncio.run(run())
+    assert cid == "QmTestHash"
+    assert [e.status_code for e in errors] == [429, 400]
+    assert errors[0].retryable and not errors[1].retryable
+    print("   ✅ 429 retryable, 400 permanent")
+
+def test_worker_batches_and_dedupes():
+    """A claimed batch becomes one directory upload; known and repeated payloads are not re-uploaded"""
+    print("📦 Testing batched, deduplicated uploads")
+    requests = []
+
+    async def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"IpfsHash": "bafyBatchRoot"})
+
+    already_pinned = {"name": "pinned-earlier"}
+    jobs = [ClaimedJob(i, "travel_plan", None, {"name": f"plan-{i}"}, 1) for i in range(20)]
+    jobs.append(ClaimedJob(20, "travel_plan", None, {"name": "plan-0"}, 1))
+    jobs.append(ClaimedJob(21, "reputation_record", None, already_pinned, 1, reputation_record_id=7))
+    worker = RecordingWorker(
+        jobs,
+        index={content_hash(already_pinned): "bafyOldRoot/old.json"},
+        batch_size=50,
+        pinata=make_pinata(handler)
+    )
+
+    claimed = asyncio.run(worker.run_once())
+    assert claimed == 22
+    assert len(requests) == 1
+    assert requests[0].url.path == "/pinning/pinFileToIPFS"
+    assert requests[0].content.count(b'name="file"') == 20
+    completed = dict(worker.completed)
+    assert completed[0] == completed[20] == f"bafyBatchRoot/{content_hash({'name': 'plan-0'})}.json"
+    assert completed[21] == "bafyOldRoot/old.json" and worker.record_cids == {7: "bafyOldRoot/old.json"}
+    assert worker.dedup_hits == 2
+    print(f"   ✅ 22 jobs pinned with {len(requests)} request (20 files, 2 deduplicated)")
+
+def test_failed_upload_schedules_retries():
+    """A failed upload retries its jobs while index hits still complete"""
+    print("🔁 Testing failed batch upload")
+
+    async def handler(request):
+        return httpx.Response(503, text="unavailable")
+
+    already_pinned = {"name": "pinned-earlier"}
+    jobs = [
+        ClaimedJob(1, "travel_plan", None, {"name": "new"}, 1),
+        ClaimedJob(2, "travel_plan", None, {"name": "exhausted"}, 8),
+        ClaimedJob(3, "travel_plan", None, already_pinned, 1)
+    ]
+    worker = RecordingWorker(
+        jobs,
+        index={content_hash(already_pinned): "bafyOldRoot/old.json"},
+        max_attempts=8,
+        pinata=make_pinata(handler)
+    )
+
+    asyncio.run(worker.run_once())
+    assert sorted(worker.failed) == [(1, True), (2, False)]
+    assert worker.completed == [(3, "bafyOldRoot/old.json")]
+    print("   ✅ 1 retry scheduled, 1 exhausted, 1 resolved from the index")
+
+def test_record_cid_write_back():
+    """A pinned reputation record gets its path in ipfs_cid and its JSONB, and its hash still verifies"""
+    print("🔖 Testing record CID write-back")
+    sql = str(record_cid_update(7, "bafyRoot/abc.json").compile(dialect=postgresql.dialect()))
+    assert sql.startswith("UPDATE reputation_records SET record=jsonb_set(reputation_records.record, CAST(")
+    assert "ipfs_cid=%(ipfs_cid)s" in sql and "WHERE reputation_records.id = %(id_1)s" in sql
+
+    record = ReputationRecord(
+        record_id="record" + "0" * 20,
+        traveler_wallet="0x" + "cd" * 20,
+        platform_wallet="0x" + "0" * 40,
+        event_type=EventType.BOOKING_CREATED,
+        event_timestamp=datetime(2024, 1, 1),
+        trip_data=TripData(
+            destination="Lisbon, Portugal", cost_usd=Decimal("1234.50"), cost_usdc=Decimal("1234.500000"),
+            duration_days=4, start_date=date(2024, 3, 1), end_date=date(2024, 3, 5), booking_id="BK1", plan_id="PLAN1"
+        ),
+        outcome_data=OutcomeData(status=TripStatus.PENDING),
+        verification_data=VerificationData(payment_tx_hash="0x" + "2" * 64, ipfs_hash=UNPINNED_IPFS_HASH),
+        referral_data=ReferralData()
+    )
+    entry = ReputationRecordService.new_entry(record, None)
+    entry.ipfs_cid = "bafyRoot/abc.json"
+    entry.record = {**entry.record, "verification_data": {**entry.record["verification_data"], "ipfs_cid": entry.ipfs_cid}}
+    assert ReputationRecordService.to_record(entry).calculate_hash() == entry.record_hash
+    assert ReputationRecordService.to_published_record(entry).verification_data.ipfs_hash == "bafyRoot/abc.json"
+    print("   ✅ Path stored, record hash unchanged, API serves the pinned path")
+
+if __name__ == "__main__":
+    print("🧪 Testing Pin Queue\n")
+    test_backoff_doubles_and_caps()
+    test_canonical_hash_ignores_key_order()
+    test_identical_plans_share_a_document()
+    test_pin_json_async_reports_status()
+    test_worker_batches_and_dedupes()
+    test_failed_upload_schedules_retries()
+    test_record_cid_write_back()
+    print("\n✅ Testing complete!")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test script for keyset-paginated, column-projected plan listings (runs offline)
+"""
+
+import uuid
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from sqlalchemy.dialects import postgresql
+from db_service import (
+    AsyncPlanService, decode_plan_cursor, encode_plan_cursor, plan_page, user_plans_page_query
+)
+
+WALLET = "0x" + "ab" * 20
+NOW = datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)
+
+def listing_rows(count):
+    """Projected rows as the listing query returns them, newest first"""
+    return [
+        SimpleNamespace(
+            id=uuid.UUID(int=count - n), destination=f"City {n}", status="generated",
+            created_at=NOW - timedelta(minutes=n), pin_status="pending", ipfs_cid=None,
+            grand_total=str(1000 + n)
+        )
+        for n in range(count)
+    ]
+
+def test_cursor_round_trip():
+    """Cursors carry (created_at, id) and reject garbage"""
+    print("🔖 Testing plan cursors")
+    plan_id = uuid.uuid4()
+    assert decode_plan_cursor(encode_plan_cursor(NOW, plan_id)) == (NOW, plan_id)
+    for bad in ("", "not-a-cursor", encode_plan_cursor(NOW, plan_id)[:-4]):
+        try:
+            decode_plan_cursor(bad)
+            assert False, f"accepted {bad!r}"
+        except ValueError:
+            pass
+    print("   ✅ Round trip and malformed cursors")
+
+def test_query_is_projected_and_keyset():
+    """Only listing columns are read, grand_total comes from a JSONB path, and pages seek by (created_at, id)"""
+    print("🔎 Testing listing query")
+    first = str(user_plans_page_query(WALLET, 20).compile(dialect=postgresql.dialect()))
+    assert "plans.plan_data ->> %(plan_data_1)s AS grand_total" in first
+    assert first.count("plans.plan_data") == 1 and "plans.budget" not in first
+    assert "ORDER BY plans.created_at DESC, plans.id DESC" in first
+    assert "OFFSET" not in first
+
+    query = user_plans_page_query(WALLET, 20, encode_plan_cursor(NOW, uuid.uuid4()))
+    compiled = query.compile(dialect=postgresql.dialect())
+    assert "(plans.created_at, plans.id) < (" in str(compiled)
+    assert compiled.params["param_3"] == 21
+    print("   ✅ Projection, JSONB path and keyset predicate")
+
+def test_page_building():
+    """limit + 1 rows mean another page follows; its cursor points at the last row shown"""
+    print("📄 Testing page building")
+    rows = listing_rows(4)
+    page = plan_page(rows, 3)
+    assert [plan.destination for plan in page.plans] == ["City 0", "City 1", "City 2"]
+    assert page.plans[0].total_cost == 1000.0
+    assert decode_plan_cursor(page.next_cursor) == (rows[2].created_at, rows[2].id)
+
+    last = plan_page(rows[:2], 3)
+    assert last.next_cursor is None and len(last.plans) == 2
+
+    odd = listing_rows(1)
+    odd[0].grand_total = None
+    assert plan_page(odd, 3).plans[0].total_cost == 0.0
+    print("   ✅ Next cursor only when more rows exist")
+
+def test_async_listing_walks_pages():
+    """AsyncPlanService.list_user_plans pages through a wallet with the returned cursors"""
+    print("🚶 Testing paging")
+    rows = listing_rows(7)
+
+    class ListingSession:
+        async def execute(self, statement):
+            params = statement.compile(dialect=postgresql.dialect()).params
+            values = [params[key] for key in sorted(params) if key.startswith("param_")]
+            remaining = rows
+            if len(values) == 3:  # (created_at, id) cursor, then the limit
+                remaining = [row for row in rows if (row.created_at, row.id) < (values[0], values[1])]
+            return SimpleNamespace(all=lambda: remaining[:values[-1]])
+
+    async def run():
+        seen, cursor = [], None
+        while True:
+            page = await AsyncPlanService.list_user_plans(ListingSession(), WALLET, limit=3, cursor=cursor)
+            seen.extend(plan.destination for plan in page.plans)
+            if page.next_cursor is None:
+                return seen
+            cursor = page.next_cursor
+
+    assert asyncio.run(run()) == [f"City {n}" for n in range(7)]
+    print("   ✅ 7 plans in pages of 3, none skipped or repeated")
+
+if __name__ == "__main__":
+    print("🧪 Testing Plan Listing\n")
+    test_cursor_round_trip()
+    test_query_is_projected_and_keyset()
+    test_page_building()
+    test_async_listing_walks_pages()
+    print("\n✅ Testing complete!")
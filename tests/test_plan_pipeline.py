@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Test script for the streaming plan generation pipeline (runs offline with fake searches)
+"""
+
+import asyncio
+import time
+from datetime import date, timedelta
+import nodes.travel_planner as travel_planner
+from search_results import FlightOffer, HotelOffer, SearchResults
+from plan_pipeline import initial_plan_state, run_plan_pipeline, stream_plan_pipeline
+
+def delayed_search(delay, cancelled=None):
+    async def search(*args):
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            if cancelled is not None:
+                cancelled.append(args)
+            raise
+        return SearchResults.not_configured()
+    return search
+
+def blocking_search(*args):
+    raise AssertionError("the API pipeline must not use the blocking searches")
+
+def with_searches(flights, hotels, activities, coro_factory, **overrides):
+    """Run ``coro_factory()`` with the async Amadeus searches replaced (and the blocking ones forbidden)"""
+    replacements = {
+        "search_flights_async": flights,
+        "search_hotels_async": hotels,
+        "search_activities_async": activities,
+        "search_flights_direct": blocking_search,
+        "search_hotels_direct": blocking_search,
+        "search_activities_direct": blocking_search,
+        **overrides
+    }
+    originals = {name: getattr(travel_planner, name) for name in replacements}
+    for name, value in replacements.items():
+        setattr(travel_planner, name, value)
+    try:
+        return asyncio.run(coro_factory())
+    finally:
+        for name, value in originals.items():
+            setattr(travel_planner, name, value)
+
+def test_events_stream_in_completion_order():
+    """Fast branches are emitted before the slowest one finishes"""
+    print("📡 Testing streamed event order")
+
+    async def collect():
+        start = time.perf_counter()
+        events = []
+        async for event, update in stream_plan_pipeline(initial_plan_state("Paris", 5000)):
+            events.append((event, time.perf_counter() - start, update))
+        return events
+
+    events = with_searches(delayed_search(0.4), delayed_search(0.05), delayed_search(0.2), collect)
+    names = [name for name, _, _ in events]
+    assert names == ["hotels", "activities", "flights", "plan"]
+    assert events[0][1] < 0.3
+    final_state = events[-1][2]
+    assert final_state["plan"]["flights"] and final_state["plan"]["hotels"] and final_state["plan"]["activities"]
+    assert set(final_state["node_timings"]) == {"search_flights", "search_hotels", "get_activities"}
+    print(f"   ✅ First result after {events[0][1]:.2f}s, plan after {events[-1][1]:.2f}s")
+
+def test_over_budget_sets_error():
+    """The budget check runs after assembly"""
+    print("💰 Testing budget check")
+    state = with_searches(
+        delayed_search(0), delayed_search(0), delayed_search(0),
+        lambda: run_plan_pipeline(initial_plan_state("Paris", 100))
+    )
+    assert "exceeds budget" in state["error"]
+    assert state["plan"]["total_cost"] > 100
+    print("   ✅ Over-budget plan reported")
+
+def test_branch_timeout_cancels_search():
+    """A branch past its deadline falls back to demo data and its search is cancelled"""
+    print("⏱️ Testing branch deadline")
+    cancelled = []
+
+    async def collect():
+        start = time.perf_counter()
+        state = await run_plan_pipeline(initial_plan_state("Paris", 5000))
+        return state, time.perf_counter() - start
+
+    state, elapsed = with_searches(
+        delayed_search(5, cancelled), delayed_search(0), delayed_search(0), collect,
+        FLIGHT_SEARCH_TIMEOUT=0.1
+    )
+    timing = state["node_timings"]["search_flights"]
+    assert timing["source"] == "fallback" and "timed out" in timing["error"]
+    assert state["flights"][0]["airline"] == "DemoAir"
+    assert cancelled == [("JFK", "CDG", state["departure_date"])]
+    assert elapsed < 1
+    print(f"   ✅ Flight search cancelled, plan ready after {elapsed:.2f}s")
+
+def test_requested_dates_reach_the_searches():
+    """Requested dates are searched as given; without them the stay starts in the future"""
+    print("📅 Testing trip dates")
+    searched = []
+
+    def recording(name):
+        async def search(*args):
+            searched.append((name, *args))
+            return SearchResults.not_configured()
+        return search
+
+    departure, returning = date.today() + timedelta(days=60), date.today() + timedelta(days=64)
+    with_searches(
+        recording("flights"), recording("hotels"), recording("activities"),
+        lambda: run_plan_pipeline(initial_plan_state("Paris", 5000, departure_date=departure, return_date=returning))
+    )
+    assert ("flights", "JFK", "CDG", departure.isoformat()) in searched
+    assert ("hotels", "Paris", departure.isoformat(), returning.isoformat()) in searched
+
+    state = initial_plan_state("Paris", 5000)
+    assert date.fromisoformat(state["departure_date"]) > date.today()
+    assert date.fromisoformat(state["return_date"]) > date.fromisoformat(state["departure_date"])
+    print(f"   ✅ {departure} to {returning} searched; default stay starts {state['departure_date']}")
+
+def test_offers_keep_their_own_data():
+    """Plan entries carry the airports and dates Amadeus returned; demo stays match the requested nights"""
+    print("🧾 Testing plan entries")
+    departure, returning = date.today() + timedelta(days=40), date.today() + timedelta(days=43)
+    offer = FlightOffer("AF", "EWR", "ORY", departure.isoformat(), 512.30, departure_at=f"{departure + timedelta(days=1)}T01:10:00")
+    stay = HotelOffer("Hotel Lutetia", departure.isoformat(), returning.isoformat(), 900.0)
+
+    async def flights(*args):
+        return SearchResults(items=[offer], total=1)
+
+    async def hotels(*args):
+        return SearchResults(items=[stay], total=1)
+
+    state = with_searches(
+        flights, hotels, delayed_search(0),
+        lambda: run_plan_pipeline(initial_plan_state("Paris", 5000, departure_date=departure, return_date=returning))
+    )
+    flight, hotel = state["flights"][0], state["hotels"][0]
+    assert (flight["from"], flight["to"], flight["dates"]) == ("EWR", "ORY", (departure + timedelta(days=1)).isoformat())
+    assert (hotel["nights"], hotel["price_per_night"]) == (3, 300.0)
+
+    demo = with_searches(
+        delayed_search(0), delayed_search(0), delayed_search(0),
+        lambda: run_plan_pipeline(initial_plan_state("Paris", 5000, departure_date=departure, return_date=returning))
+    )
+    assert demo["hotels"][0]["nights"] == 3
+    assert demo["flights"][0]["dates"] == f"{departure} to {returning}"
+    print("   ✅ Offer airports, departure day and 3-night stay kept")
+
+if __name__ == "__main__":
+    print("🧪 Testing Plan Pipeline\n")
+    test_events_stream_in_completion_order()
+    test_over_budget_sets_error()
+    test_branch_timeout_cancels_search()
+    test_requested_dates_reach_the_searches()
+    test_offers_keep_their_own_data()
+    print("\n✅ Testing complete!")
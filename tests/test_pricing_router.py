@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test script for compiled x402 route pricing
+"""
+
+import time
+import asyncio
+import httpx
+from pricing_router import PricingRouter
+from payment_cache import PaymentCache
+from x402_middleware import X402Middleware
+
+PRICING = {
+    "/api/flights/search": "0.01",
+    "/api/flights/book": "0.10",
+    "/api/hotels/search": "0.01",
+    "/api/hotels/book": "0.10",
+    "/api/activities/search": "0.005",
+    "/api/activities/book": "0.05"
+}
+
+def test_exact_and_prefix_matches():
+    """Exact paths and their sub-paths are priced; the longest priced prefix wins"""
+    print("🧭 Testing exact and prefix matches")
+    router = PricingRouter({**PRICING, "/api/flights": "0.001"})
+    assert router.match("GET", "/api/flights/search").amount == "0.01"
+    assert router.match("GET", "/api/flights/search/").amount == "0.01"
+    assert router.match("POST", "/api/flights/book/123").amount == "0.10"
+    assert router.match("GET", "/api/flights/status").amount == "0.001"
+    assert router.match("GET", "/api/flightsearch") is None
+    print("   ✅ Exact, trailing-slash, sub-path and longest-prefix lookups")
+
+def test_free_routes():
+    """Unpriced routes return None"""
+    print("🆓 Testing free routes")
+    router = PricingRouter(PRICING)
+    for path in ("/", "/health", "/api/reputation/levels", "/api/flights", "/docs"):
+        assert router.match("GET", path) is None
+    print("   ✅ Free routes unpriced")
+
+def test_method_aware_pricing():
+    """'METHOD /path' keys price one method and take precedence over any-method keys"""
+    print("🔀 Testing method-aware pricing")
+    router = PricingRouter({"/api/plans": "0.01", "POST /api/plans": "0.25", "DELETE /api/plans/archive": "0.02"})
+    assert router.match("GET", "/api/plans").amount == "0.01"
+    assert router.match("post", "/api/plans").amount == "0.25"
+    assert router.match("POST", "/api/plans/42").amount == "0.25"
+    assert router.match("DELETE", "/api/plans/archive").amount == "0.02"
+    assert router.match("GET", "/api/plans/archive").amount == "0.01"
+    print("   ✅ Per-method prices with any-method fallback")
+
+def test_metadata_and_validation():
+    """Dict values carry route metadata; malformed entries are rejected at compile time"""
+    print("🏷️ Testing route metadata")
+    router = PricingRouter({"/api/flights/book": {"amount": "0.10", "description": "Flight booking"}})
+    price = router.match("POST", "/api/flights/book")
+    assert price.amount == "0.10" and price.metadata == {"description": "Flight booking"}
+    for bad in ({"FETCH /api/x": "0.01"}, {"/api/x": {"description": "no amount"}}):
+        try:
+            PricingRouter(bad)
+            assert False, f"accepted {bad}"
+        except ValueError:
+            pass
+    print("   ✅ Metadata returned with the price, bad keys rejected")
+
+def test_legacy_substring_patterns():
+    """Keys without a leading slash keep the previous match-anywhere behaviour"""
+    print("🧩 Testing legacy substring patterns")
+    router = PricingRouter({"search": "0.01", "/api/flights/book": "0.10"})
+    assert router.match("GET", "/api/hotels/search").amount == "0.01"
+    assert router.match("GET", "/api/flights/book").amount == "0.10"
+    assert router.match("GET", "/api/hotels/book") is None
+    print("   ✅ Substring keys still match")
+
+def test_middleware_402_includes_metadata():
+    """The middleware prices with one lookup and passes free routes straight through"""
+    print("💳 Testing middleware lookup")
+
+    async def endpoint(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"passed"})
+
+    middleware = X402Middleware(
+        "0x" + "ab" * 20,
+        {"POST /api/flights/book": {"amount": "0.10", "description": "Flight booking"}},
+        payment_cache=PaymentCache(redis_url=""),
+        app=endpoint
+    )
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=middleware), base_url="http://api.test") as client:
+            return await client.get("/api/flights/book"), await client.post("/api/flights/book")
+
+    free, paid = asyncio.run(run())
+    assert free.text == "passed"
+    requirement = paid.json()["paymentRequirements"][0]
+    assert paid.status_code == 402 and requirement["amount"] == "0.10"
+    assert requirement["description"] == "Flight booking"
+    print("   ✅ GET passed through, POST got 402 with its description")
+
+def test_lookup_speed():
+    """Compiled lookups agree with the previous substring scan and do not slow down as routes grow"""
+    print("⏱️ Testing lookup speed")
+    paths = ["/health", "/api/reputation/0xabc", "/api/flights/search", "/api/activities/book/7"]
+    rounds = 20000
+
+    def scan(pricing, path):
+        for pattern, amount in pricing.items():
+            if pattern in path:
+                return amount
+        return None
+
+    def per_lookup(lookup, paths):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for path in paths:
+                lookup(path)
+        return (time.perf_counter() - started) / (rounds * len(paths))
+
+    router = PricingRouter(PRICING)
+    for path in paths:
+        new = router.match("GET", path)
+        assert scan(PRICING, path) == (new.amount if new else None)
+
+    large = {**PRICING, **{f"/api/partners/p{i}/op{j}": "0.01" for i in range(20) for j in range(10)}}
+    large_router = PricingRouter(large)
+    for table, compiled in ((PRICING, router), (large, large_router)):
+        compiled_cost = per_lookup(lambda path: compiled.match("GET", path), paths)
+        scan_cost = per_lookup(lambda path: scan(table, path), paths)
+        print(f"   ✅ {len(table)} routes: {compiled_cost * 1e6:.2f} µs/lookup compiled vs {scan_cost * 1e6:.2f} µs substring scan")
+
+if __name__ == "__main__":
+    print("🧪 Testing Pricing Router\n")
+    test_exact_and_prefix_matches()
+    test_free_routes()
+    test_method_aware_pricing()
+    test_metadata_and_validation()
+    test_legacy_substring_patterns()
+    test_middleware_402_includes_metadata()
+    test_lookup_speed()
+    print("\n✅ Testing complete!")
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Test script for referral index rows (runs offline)
+"""
+
+from tools.referral_index import normalize_wallet, referral_row
+
+REFERRER = "0xAbCdEf1234567890aBcDeF1234567890AbCdEf12"
+REFEREE = "0xE132d512FC35Bf91aD0C1098031CE09A9BA95241"
+
+def test_rows_use_lowercase_wallets():
+    """Wallets are indexed lowercased so lookups are case-insensitive"""
+    print("🔎 Testing referral index rows")
+    record = {
+        "referrer_wallet": REFERRER,
+        "referee_wallet": REFEREE,
+        "payment_transaction_id": 12345,
+        "timestamp": 1718000000
+    }
+    row = referral_row("QmReferral", record)
+    assert row["referrer_wallet"] == REFERRER.lower()
+    assert row["referee_wallet"] == REFEREE.lower()
+    assert row["payment_transaction_id"] == "12345"
+    assert row["record"] is record
+    assert normalize_wallet(f"  {REFERRER} ") == REFERRER.lower()
+    print("   ✅ Row built with normalized wallets")
+
+def test_records_without_referrer_are_skipped():
+    """Only records with a referrer are indexed"""
+    print("🚫 Testing records without a referrer")
+    assert referral_row("QmNoReferrer", {"referee_wallet": REFEREE}) is None
+    assert referral_row("QmBlank", {"referrer_wallet": ""}) is None
+    row = referral_row("QmNoReferee", {"referrer_wallet": REFERRER})
+    assert row["referee_wallet"] is None
+    print("   ✅ Records without a referrer skipped")
+
+if __name__ == "__main__":
+    print("🧪 Testing Referral Index\n")
+    test_rows_use_lowercase_wallets()
+    test_records_without_referrer_are_skipped()
+    print("\n✅ Testing complete!")
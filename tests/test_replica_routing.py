@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test script for read-replica session routing (runs offline; primary and replica are separate SQLite files)
+"""
+
+import os
+import time
+import tempfile
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from database import ReplicaSet, RoutingSession, use_primary
+from db_service import create_booking, get_booking_by_id, get_pending_payments
+from models import Booking
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class MeasuredReplicas(ReplicaSet):
+    """Lag comes from a dict instead of pg_last_xact_replay_timestamp(); None means unreachable"""
+
+    def __init__(self, engines, lags, **kwargs):
+        super().__init__(engines, clock=FakeClock(), **kwargs)
+        self.lags = lags
+        self.checks = 0
+
+    def measure_lag(self, engine):
+        self.checks += 1
+        lag = self.lags[engine]
+        if lag is None:
+            raise ConnectionError("replica down")
+        return lag
+
+def sqlite_engine(name):
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), name)}")
+    Booking.__table__.create(engine)
+    return engine
+
+def routed_sessions(replica_lag=0.0):
+    """Session factory over a primary and one replica; the replica starts with a booking the primary lacks"""
+    primary, replica = sqlite_engine("primary.db"), sqlite_engine("replica.db")
+    create_booking(sessionmaker(bind=replica)(), "FL-REPLICA", "Ada", "ada@example.com")
+    replicas = MeasuredReplicas([replica], {replica: replica_lag}, max_lag=5, check_interval=10)
+    replicas.check()
+    return sessionmaker(class_=RoutingSession, bind=primary, replicas=replicas), replicas, primary, replica
+
+def flights(db):
+    return [booking.flight_id for booking in get_pending_payments(db)]
+
+def test_reads_go_to_replica():
+    """Plain SELECTs from service functions are served by the replica"""
+    print("📖 Testing replica reads")
+    Session, _, _, replica = routed_sessions()
+    db = Session()
+    assert flights(db) == ["FL-REPLICA"]
+    assert db.get_bind(clause=select(Booking)) is replica
+    print("   ✅ Dashboard read served by the replica")
+
+def test_read_your_writes():
+    """After a write the session reads from the primary for the rest of the request"""
+    print("✍️ Testing read-your-writes")
+    Session, _, primary, _ = routed_sessions()
+    db = Session()
+    assert flights(db) == ["FL-REPLICA"]
+    booking = create_booking(db, "FL-PRIMARY", "Bob", "bob@example.com")
+    assert get_booking_by_id(db, booking.booking_id).flight_id == "FL-PRIMARY"
+    assert flights(db) == ["FL-PRIMARY"]
+    assert db.get_bind(clause=select(Booking)) is primary
+
+    fresh = Session()
+    assert flights(fresh) == ["FL-REPLICA"]
+    use_primary(fresh)
+    assert flights(fresh) == ["FL-PRIMARY"]
+    print("   ✅ Writer sticks to the primary; other sessions still use the replica unless told not to")
+
+def test_locking_reads_use_primary():
+    """SELECT ... FOR UPDATE is never sent to a replica"""
+    print("🔒 Testing locking reads")
+    Session, _, primary, _ = routed_sessions()
+    db = Session()
+    assert db.get_bind(clause=select(Booking).with_for_update()) is primary
+    print("   ✅ FOR UPDATE on the primary")
+
+def test_lag_and_outage_fall_back():
+    """Lagging, unreachable or unmeasured replicas are skipped until a later check finds them healthy"""
+    print("⏳ Testing lag fallback")
+    Session, replicas, primary, replica = routed_sessions(replica_lag=30.0)
+    assert flights(Session()) == []
+
+    replicas.lags[replica] = 1.0
+    assert flights(Session()) == [], "reads use the last measurement; only check() re-measures"
+    replicas.clock.now = 10.0
+    replicas.check()
+    assert flights(Session()) == ["FL-REPLICA"]
+    assert replicas.checks == 2
+
+    replicas.clock.now = 100.0
+    assert replicas.pick() is None, "a measurement the probe stopped refreshing is not trusted"
+
+    replicas.lags[replica] = None
+    replicas.check()
+    assert replicas.pick() is None and Session().get_bind(clause=select(Booking)) is primary
+    print("   ✅ 30s lag, stale measurement and outage served by the primary, healthy replica used again")
+
+def test_lag_is_probed_in_background():
+    """Routing never runs the lag query itself; the probe thread keeps measurements fresh"""
+    print("🛰️ Testing background lag probe")
+    replica = sqlite_engine("probed.db")
+    replicas = MeasuredReplicas([replica], {replica: 0.0}, max_lag=5, check_interval=0.05)
+    replicas.clock = time.monotonic
+    assert replicas.pick() is None and replicas.checks == 0
+    replicas.start()
+    try:
+        deadline = time.monotonic() + 2
+        while replicas.checks < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert replicas.checks >= 3
+        checks = replicas.checks
+        replicas.stop()
+        replicas._thread.join(1)
+        assert [replicas.pick() for _ in range(50)] == [replica] * 50
+        assert replicas.checks == checks
+    finally:
+        replicas.stop()
+    print(f"   ✅ {checks} background measurements, 50 picks without a query")
+
+def test_no_replicas_is_primary_only():
+    """Without replicas a RoutingSession behaves like a plain Session"""
+    print("🏠 Testing primary-only")
+    primary = sqlite_engine("only.db")
+    db = sessionmaker(class_=RoutingSession, bind=primary, replicas=ReplicaSet([]))()
+    create_booking(db, "FL1", "Ada", "ada@example.com")
+    assert flights(db) == ["FL1"] and db.get_bind(clause=select(Booking)) is primary
+    print("   ✅ Everything on the primary")
+
+if __name__ == "__main__":
+    print("🧪 Testing Read Replica Routing\n")
+    test_reads_go_to_replica()
+    test_read_your_writes()
+    test_locking_reads_use_primary()
+    test_lag_and_outage_fall_back()
+    test_lag_is_probed_in_background()
+    test_no_replicas_is_primary_only()
+    print("\n✅ Testing complete!")
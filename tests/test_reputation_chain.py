@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test script for reputation record chain verification (runs offline on in-memory log entries)
+"""
+
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+from db_service import ReputationRecordService
+from reputation_chain import verify_entries
+from reputation_models import (
+    EventType, TripStatus, TripData, OutcomeData, VerificationData, ReferralData, ReputationRecord
+)
+
+WALLET = "0x" + "Cd" * 20
+
+def make_record(n):
+    return ReputationRecord(
+        record_id=f"record{n:020d}",
+        traveler_wallet=WALLET,
+        platform_wallet="0x" + "0" * 40,
+        event_type=EventType.BOOKING_CREATED if n % 2 == 0 else EventType.TRIP_COMPLETED,
+        event_timestamp=datetime(2024, 1, 1) + timedelta(hours=n),
+        trip_data=TripData(
+            destination="Lisbon, Portugal",
+            cost_usd=Decimal("1234.50"),
+            cost_usdc=Decimal("1234.500000"),
+            duration_days=4,
+            start_date=date(2024, 3, 1),
+            end_date=date(2024, 3, 5),
+            booking_id=f"BK{n}",
+            plan_id="PLAN1"
+        ),
+        outcome_data=OutcomeData(status=TripStatus.COMPLETED, rating=5 if n % 2 else None),
+        verification_data=VerificationData(payment_tx_hash="0x" + "2" * 64, ipfs_hash=f"Qm{n:044d}"),
+        referral_data=ReferralData()
+    )
+
+def build_chain(count):
+    """Yield log entries lazily, chained the way ReputationRecordService.append chains them"""
+    previous = None
+    for n in range(count):
+        entry = ReputationRecordService.new_entry(make_record(n), previous)
+        entry.id = n + 1
+        yield entry
+        previous = entry
+
+def test_intact_chain_verifies():
+    """A freshly written chain verifies, and stored records round-trip to the same hash"""
+    print("🔗 Testing intact chain")
+    entries = list(build_chain(5))
+    assert entries[0].previous_hash is None
+    assert entries[3].previous_hash == entries[2].record_hash
+    assert ReputationRecordService.to_record(entries[3]).verification_data.previous_record_hash == entries[2].record_hash
+    assert ReputationRecordService.to_record(entries[3]).calculate_hash() == entries[3].record_hash
+
+    result = verify_entries(WALLET.lower(), iter(entries))
+    assert result.valid and result.records == 5
+    assert result.head_hash == entries[-1].record_hash
+    print("   ✅ 5 records verified")
+
+def test_tampering_is_detected():
+    """Edited, removed and reordered entries are reported"""
+    print("🕵️ Testing tamper detection")
+    edited = list(build_chain(6))
+    edited[2].record = {**edited[2].record, "trip_data": {**edited[2].record["trip_data"], "cost_usd": "1.00"}}
+    result = verify_entries(WALLET.lower(), edited)
+    assert not result.valid and result.invalid == 1
+    assert "record hash mismatch" in result.errors[0]
+
+    removed = [entry for i, entry in enumerate(build_chain(6)) if i != 3]
+    result = verify_entries(WALLET.lower(), removed)
+    assert result.invalid == 1 and "previous_hash" in result.errors[0]
+
+    # Rewrite a record and re-hash it consistently in the columns: the next record's hashed link still breaks
+    rewritten = list(build_chain(6))
+    forged = ReputationRecordService.to_record(rewritten[2])
+    forged.trip_data.cost_usd = Decimal("1.00")
+    forged.invalidate_serialization()
+    rewritten[2].record = forged.model_dump(mode="json")
+    rewritten[2].record_hash = forged.calculate_hash()
+    rewritten[3].previous_hash = rewritten[2].record_hash
+    result = verify_entries(WALLET.lower(), rewritten)
+    assert result.invalid == 1 and "previous_record_hash" in result.errors[0]
+
+    swapped = list(build_chain(6))
+    swapped[1], swapped[2] = swapped[2], swapped[1]
+    result = verify_entries(WALLET.lower(), swapped)
+    assert result.invalid == 3
+    print("   ✅ Edit, consistent rewrite, removal and reorder detected")
+
+def test_streams_long_chains():
+    """Verification consumes an iterator without materializing the chain"""
+    print("🌊 Testing streaming verification")
+    result = verify_entries(WALLET.lower(), build_chain(2000))
+    assert result.valid and result.records == 2000
+    print(f"   ✅ {result.records} records verified from a generator")
+
+if __name__ == "__main__":
+    print("🧪 Testing Reputation Record Chain\n")
+    test_intact_chain_verifies()
+    test_tampering_is_detected()
+    test_streams_long_chains()
+    print("\n✅ Testing complete!")
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test script for the ReputationRecord fast path (trusted construction and cached serialization)
+"""
+
+import json
+from reputation_models import ReputationRecord, EventType, TripStatus
+from tools.reputation_benchmark import sample_rows
+
+def test_trusted_matches_validated():
+    """from_trusted rebuilds the same record, and hash, as full validation"""
+    print("⚡ Testing trusted construction")
+    for row in sample_rows(len(EventType) * 2):
+        trusted = ReputationRecord.from_trusted(row)
+        validated = ReputationRecord.model_validate(row)
+        assert trusted == validated
+        assert trusted.calculate_hash() == validated.calculate_hash()
+        assert isinstance(trusted.event_type, EventType)
+        assert isinstance(trusted.outcome_data.status, TripStatus)
+    print("   ✅ Trusted records equal validated ones")
+
+def test_serialization_is_canonical_and_shared():
+    """to_ipfs_json and calculate_hash share one sorted-key serialization"""
+    print("🧾 Testing canonical serialization")
+    record = ReputationRecord.from_trusted(sample_rows(1)[0])
+    document = record.to_ipfs_json()
+    assert list(json.loads(document)) == sorted(json.loads(document))
+    assert record.canonical_json() is record.canonical_json()
+    assert json.loads(document)["trip_data"]["cost_usd"] == 1234.5
+    print("   ✅ One cached serialization, keys sorted")
+
+def test_mutation_invalidates_cache():
+    """Assigning a field, or invalidating after a nested edit, changes the hash"""
+    print("♻️ Testing cache invalidation")
+    record = ReputationRecord.from_trusted(sample_rows(1)[0])
+    original = record.calculate_hash()
+
+    record.record_id = "changed" + "0" * 20
+    assert record.calculate_hash() != original
+
+    renamed = record.calculate_hash()
+    record.verification_data.previous_record_hash = "Qm" + "9" * 44
+    record.invalidate_serialization()
+    assert record.calculate_hash() != renamed
+    print("   ✅ Stale serializations are not reused")
+
+if __name__ == "__main__":
+    print("🧪 Testing Reputation Record Fast Path\n")
+    test_trusted_matches_validated()
+    test_serialization_is_canonical_and_shared()
+    test_mutation_invalidates_cache()
+    print("\n✅ Testing complete!")
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test script for the versioned reputation scoring policies (scalar and batch paths must agree)
+"""
+
+import random
+from decimal import Decimal
+import numpy as np
+from reputation_models import ReputationLevel, ReputationSummary
+from reputation_scoring import (
+    LEVELS, SCORING_POLICIES, ScoringPolicy, ScoringPolicyV1, divide_half_even, get_policy, register_policy,
+    scoring_policy
+)
+
+def wallet(n):
+    return f"0x{n:040x}"
+
+def summary_for(n, total, completed, disputed, referrals, rating_count, rating_total, countries):
+    """A summary with the rates apply_record would have stored for these counters"""
+    summary = ReputationSummary(
+        wallet_address=wallet(n),
+        total_bookings=total,
+        completed_bookings=completed,
+        disputed_bookings=disputed,
+        successful_referrals=referrals,
+        rating_count=rating_count,
+        rating_total=rating_total,
+        countries_visited=[f"Country {i}" for i in range(countries)]
+    )
+    if rating_count:
+        summary.average_rating = (Decimal(rating_total) / rating_count).quantize(Decimal('0.01'))
+    if total:
+        summary.completion_rate = min(Decimal('1'), Decimal(completed) / total).quantize(Decimal('0.0001'))
+    return summary
+
+def test_half_even_division():
+    """Ties round to the even neighbour, like Decimal.quantize"""
+    print("➗ Testing half-even division")
+    numerator = np.array([5, 15, 25, 7, 10, 0], dtype=np.int64)
+    denominator = np.array([10, 10, 10, 2, 0, 3], dtype=np.int64)
+    assert divide_half_even(numerator, denominator).tolist() == [0, 2, 2, 4, 0, 0]
+    print("   ✅ Ties round to even, zero denominators give 0")
+
+def test_batch_matches_scalar():
+    """score_batch / level_batch equal score / level for every wallet"""
+    print("🧮 Testing scalar and batch agreement")
+    rng = random.Random(16)
+    rows = [
+        # Rounding edges: 0.95005 -> 0.9500 (no top bonus), 0.95015 -> 0.9502, 899/200 = 4.495 -> 4.50
+        (20000, 19001, 0, 0, 0, 0, 0),
+        (20000, 19003, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 200, 899, 0),
+        (0, 0, 3, 0, 0, 0, 0),
+        (5, 7, 0, 0, 0, 0, 0),
+        (1, 1, 0, 200, 1, 5, 100)
+    ]
+    for _ in range(3000):
+        total = rng.randint(0, 60)
+        completed = rng.randint(0, total + 2)
+        rating_count = rng.randint(0, completed + 1)
+        rows.append((
+            total,
+            completed,
+            rng.randint(0, 5),
+            rng.randint(0, 20),
+            rating_count,
+            sum(rng.randint(1, 5) for _ in range(rating_count)),
+            rng.randint(0, 15)
+        ))
+
+    for policy in SCORING_POLICIES.values():
+        columns = {
+            name: np.array([row[i] for row in rows], dtype=np.int64)
+            for i, name in enumerate(policy.batch_inputs)
+        }
+        cents = policy.score_batch(columns)
+        levels = policy.level_batch(cents)
+        for n, row in enumerate(rows):
+            score = policy.score(summary_for(n, *row))
+            assert Decimal(int(cents[n])) / 100 == score, (policy.version, row, cents[n], score)
+            assert LEVELS[levels[n]] == policy.level(score), (policy.version, row)
+    print(f"   ✅ {len(rows)} wallets scored identically by {len(SCORING_POLICIES)} policies")
+
+def test_level_thresholds():
+    """Levels change exactly at each minimum score; ranges for /levels come from the same minimums"""
+    print("🏅 Testing level thresholds")
+    policy = get_policy("v1")
+    assert policy.level(Decimal("0")) == ReputationLevel.NEW
+    assert policy.level(Decimal("24.99")) == ReputationLevel.NEW
+    assert policy.level(Decimal("25")) == ReputationLevel.BRONZE
+    assert policy.level(Decimal("499.99")) == ReputationLevel.PLATINUM
+    assert policy.level(Decimal("500")) == ReputationLevel.DIAMOND
+    assert policy.level_batch(np.array([2499, 2500, 49999, 50000])).tolist() == [0, 1, 4, 5]
+
+    ranges = policy.level_ranges()
+    assert [level for level, _, _ in ranges] == LEVELS
+    assert ranges[1] == (ReputationLevel.BRONZE, 25, 74)
+    assert ranges[-1] == (ReputationLevel.DIAMOND, 500, 1000)
+    for (_, _, maximum), (level, minimum, _) in zip(ranges, ranges[1:]):
+        assert policy.level(Decimal(maximum)) != level and policy.level(Decimal(minimum)) == level
+    print("   ✅ Bisect thresholds and displayed ranges agree")
+
+def test_summary_uses_active_policy():
+    """ReputationSummary scores and levels through the active policy"""
+    print("🔌 Testing summary delegation")
+    summary = summary_for(1, 10, 10, 0, 2, 10, 47, 3)
+    summary.reputation_score = summary.calculate_reputation_score()
+    summary.update_reputation_level()
+    assert summary.reputation_score == scoring_policy.score(summary) == Decimal("275")
+    assert summary.reputation_level == scoring_policy.level(Decimal("275")) == ReputationLevel.GOLD
+    print("   ✅ Summary score 275, level gold")
+
+def test_registry():
+    """Unknown versions are rejected; versions register once; policies need ascending minimums and both scorers"""
+    print("📚 Testing policy registry")
+    try:
+        get_policy("v999")
+        assert False, "unknown version accepted"
+    except ValueError:
+        pass
+
+    class Duplicate(ScoringPolicy):
+        version = "v1"
+        level_minimums = (1, 2, 3, 4, 5)
+    try:
+        register_policy(Duplicate)
+        assert False, "duplicate version accepted"
+    except ValueError:
+        pass
+
+    class Unordered(ScoringPolicyV1):
+        version = "unordered"
+        level_minimums = (5, 4, 3, 2, 1)
+    try:
+        Unordered()
+        assert False, "unordered thresholds accepted"
+    except ValueError:
+        pass
+
+    class Incomplete(ScoringPolicy):
+        version = "incomplete"
+        level_minimums = (1, 2, 3, 4, 5)
+
+        def score(self, summary):
+            return Decimal(0)
+    try:
+        register_policy(Incomplete)
+        assert False, "policy without score_batch registered"
+    except TypeError:
+        pass
+    assert set(SCORING_POLICIES) == {"v1"}
+    print("   ✅ Registry guards versions, thresholds and missing scorers")
+
+if __name__ == "__main__":
+    print("🧪 Testing Reputation Scoring Policies\n")
+    test_half_even_division()
+    test_batch_matches_scalar()
+    test_level_thresholds()
+    test_summary_uses_active_policy()
+    test_registry()
+    print("\n✅ Testing complete!")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test script for incremental reputation summary updates (runs offline)
+"""
+
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+from reputation_models import (
+    EventType, TripStatus, ReputationLevel, TripData, OutcomeData,
+    VerificationData, ReferralData, ReputationRecord, ReputationSummary
+)
+
+WALLET = "0x" + "ab" * 20
+
+def make_record(event_type, destination="Paris, France", cost="1000.00", rating=None, days_ago=0, **referral):
+    start = date(2024, 6, 1)
+    return ReputationRecord(
+        traveler_wallet=WALLET,
+        platform_wallet="0x" + "0" * 40,
+        event_type=event_type,
+        event_timestamp=datetime(2024, 7, 1) - timedelta(days=days_ago),
+        trip_data=TripData(
+            destination=destination,
+            cost_usd=Decimal(cost),
+            cost_usdc=Decimal(cost),
+            duration_days=5,
+            start_date=start,
+            end_date=start + timedelta(days=5),
+            booking_id="BK1",
+            plan_id="PLAN1"
+        ),
+        outcome_data=OutcomeData(status=TripStatus.COMPLETED, rating=rating),
+        verification_data=VerificationData(payment_tx_hash="0x" + "1" * 64, ipfs_hash="Qm" + "a" * 44),
+        referral_data=ReferralData(**referral)
+    )
+
+def test_counters_and_rates():
+    """Bookings, completions, disputes and spend fold into counters and rates"""
+    print("📊 Testing summary counters")
+    summary = ReputationSummary(wallet_address=WALLET)
+    records = [
+        make_record(EventType.BOOKING_CREATED, days_ago=10),
+        make_record(EventType.BOOKING_CREATED, "Rome, Italy", "500.50", days_ago=30),
+        make_record(EventType.BOOKING_CREATED, days_ago=5),
+        make_record(EventType.BOOKING_CREATED, days_ago=1),
+        make_record(EventType.TRIP_COMPLETED, rating=5),
+        make_record(EventType.TRIP_COMPLETED, "Rome, Italy", rating=4),
+        make_record(EventType.TRIP_REVIEWED, rating=4),
+        make_record(EventType.DISPUTE_RAISED),
+        make_record(EventType.TRIP_CANCELLED)
+    ]
+    for record in records:
+        summary.apply_record(record)
+
+    assert summary.total_bookings == 4
+    assert summary.completed_bookings == 2
+    assert summary.disputed_bookings == 1
+    assert summary.cancelled_bookings == 1
+    assert summary.total_spent_usd == Decimal("3500.50")
+    assert summary.completion_rate == Decimal("0.5000")
+    assert summary.dispute_rate == Decimal("0.2500")
+    assert summary.average_rating == Decimal("4.33")
+    assert summary.countries_visited == ["France", "Italy"]
+    assert summary.total_travel_days == 10
+    assert summary.first_booking_date == date(2024, 6, 1)
+    assert summary.last_booking_date == date(2024, 6, 30)
+    print("   ✅ Counters, running average and rates correct")
+
+def test_score_and_level_follow_the_model():
+    """The stored score is the model's own calculation"""
+    print("🏅 Testing score and level")
+    summary = ReputationSummary(wallet_address=WALLET)
+    for _ in range(3):
+        summary.apply_record(make_record(EventType.BOOKING_CREATED))
+        summary.apply_record(make_record(EventType.TRIP_COMPLETED, rating=5))
+    summary.apply_record(make_record(EventType.REFERRAL_BONUS_PAID, commission_amount=Decimal("12.5")))
+
+    # 3 completions (30) + 100% completion (50) + 5.0 rating (100) + referral (5) + 1 country (5)
+    assert summary.reputation_score == summary.calculate_reputation_score() == Decimal("190")
+    assert summary.reputation_level == ReputationLevel.GOLD
+    assert summary.successful_referrals == 1
+    assert summary.total_commission_earned == Decimal("12.5")
+    print(f"   ✅ Score {summary.reputation_score} ({summary.reputation_level.value})")
+
+def test_round_trip_continues_incrementally():
+    """A summary reloaded from its stored columns keeps accumulating exactly"""
+    print("🔁 Testing stored summary round trip")
+    summary = ReputationSummary(wallet_address=WALLET)
+    for rating in [5, 4, 4]:
+        summary.apply_record(make_record(EventType.BOOKING_CREATED))
+        summary.apply_record(make_record(EventType.TRIP_COMPLETED, rating=rating))
+
+    reloaded = ReputationSummary(**summary.model_dump())
+    reloaded.apply_record(make_record(EventType.TRIP_REVIEWED, rating=4))
+    summary.apply_record(make_record(EventType.TRIP_REVIEWED, rating=4))
+    assert reloaded.rating_total == 17 and reloaded.rating_count == 4
+    assert reloaded.average_rating == summary.average_rating == Decimal("4.25")
+    assert reloaded.reputation_score == summary.reputation_score
+    print("   ✅ Reloaded summary matches the in-memory one")
+
+if __name__ == "__main__":
+    print("🧪 Testing Reputation Summary Updates\n")
+    test_counters_and_rates()
+    test_score_and_level_follow_the_model()
+    test_round_trip_continues_incrementally()
+    print("\n✅ Testing complete!")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test script for structured Amadeus search results
+"""
+
+from search_results import (
+    FlightOffer, flight_results, hotel_results, activity_results,
+    render_flight_results, render_hotel_results, render_activity_results, SearchResults
+)
+
+FLIGHT_OFFER = {
+    "id": "1",
+    "validatingAirlineCodes": ["AF"],
+    "price": {"currency": "EUR", "total": "512.30", "grandTotal": "512.30"},
+    "itineraries": [{"segments": [
+        {"departure": {"iataCode": "EWR", "at": "2025-08-01T18:00:00"}, "arrival": {"iataCode": "CDG", "at": "2025-08-02T07:30:00"}}
+    ]}]
+}
+
+HOTEL_OFFER = {
+    "hotel": {"hotelId": "HLPAR123", "name": "Hotel Lutetia", "rating": "5"},
+    "offers": [{"id": "OFFER1", "checkInDate": "2025-08-01", "checkOutDate": "2025-08-05", "price": {"currency": "EUR", "total": "800.00"}}]
+}
+
+def test_flight_offer_keeps_upstream_data():
+    """Origin, currency and times come from the payload, not defaults"""
+    print("✈️ Testing flight offer parsing")
+    results = flight_results([FLIGHT_OFFER, {"itineraries": [{}]}], "JFK", "CDG", "2025-08-01")
+    offer = results.items[0]
+    assert isinstance(offer, FlightOffer)
+    assert (offer.origin, offer.airline, offer.price, offer.currency) == ("EWR", "AF", 512.30, "EUR")
+    assert offer.departure_at == "2025-08-01T18:00:00"
+    assert results.total == 2 and len(results.items) == 1
+    assert render_flight_results(results, "JFK", "CDG", "2025-08-01") == (
+        "Found 2 flights from JFK to CDG on 2025-08-01:\n1. AF - $512.30"
+    )
+    print("   ✅ Flight offer parsed and rendered")
+
+def test_hotel_nights_come_from_offer_dates():
+    """Per-night price is derived from the real stay length"""
+    print("🏨 Testing hotel offer parsing")
+    results = hotel_results([HOTEL_OFFER], "2025-08-01", "2025-08-08")
+    hotel = results.items[0]
+    assert hotel.nights == 4
+    assert hotel.price_per_night == 200.0
+    assert hotel.to_plan_dict("Paris") == {
+        "name": "Hotel Lutetia", "location": "Paris", "price_per_night": 200.0, "nights": 4, "total": 800.0
+    }
+    assert render_hotel_results(results, "Paris") == "Found 1 hotels in Paris:\n1. Hotel Lutetia (5★) - 800.00 EUR"
+    print("   ✅ Hotel offer parsed with 4 nights")
+
+def test_activities_and_errors_render():
+    """Activities render by name and errors pass through unchanged"""
+    print("🎭 Testing activity parsing and error rendering")
+    results = activity_results([{"name": "Louvre Museum", "category": "SIGHTS", "geoCode": {"latitude": 48.86, "longitude": 2.33}}])
+    assert results.items[0].latitude == 48.86
+    assert render_activity_results(results, "Paris") == "Popular activities in Paris:\n1. Louvre Museum (SIGHTS)"
+    assert render_activity_results(SearchResults.not_configured(), "Paris") == "Amadeus API credentials not configured."
+    assert render_activity_results(SearchResults(), "Paris") == "No activities found in Paris."
+    print("   ✅ Activities and errors rendered")
+
+if __name__ == "__main__":
+    print("🧪 Testing Structured Search Results\n")
+    test_flight_offer_keeps_upstream_data()
+    test_hotel_nights_come_from_offer_dates()
+    test_activities_and_errors_render()
+    print("\n✅ Testing complete!")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test script for guarded single-statement status updates (runs offline; bookings against a temporary SQLite file)
+"""
+
+import os
+import uuid
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from db_service import (
+    PlanService, create_booking, get_booking_by_id, plan_status_update,
+    update_booking_payment_status, update_booking_status
+)
+from models import Booking
+
+def booking_sessions():
+    """Session factory over a fresh SQLite bookings table (one connection per session), counting statements sent"""
+    path = os.path.join(tempfile.mkdtemp(), "bookings.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"timeout": 30}, poolclass=NullPool)
+    Booking.__table__.create(engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, sql, *args: statements.append(sql))
+    return sessionmaker(bind=engine), statements
+
+def test_plan_update_is_guarded():
+    """Plan status changes are one UPDATE ... RETURNING that only matches allowed current statuses"""
+    print("🛡️ Testing plan transition guard")
+    compiled = plan_status_update(uuid.uuid4(), "confirmed").compile(
+        dialect=postgresql.dialect(), compile_kwargs={"render_postcompile": True}
+    )
+    sql = str(compiled)
+    assert sql.startswith("UPDATE plans SET") and "RETURNING plans.id" in sql
+    assert "plans.status IN (%(status_1_1)s)" in sql and compiled.params["status_1_1"] == "generated"
+    assert PlanService.update_plan_status(None, "not-a-uuid", "confirmed") is None
+    try:
+        plan_status_update(uuid.uuid4(), "booked")
+        assert False, "unknown status accepted"
+    except ValueError:
+        pass
+    print("   ✅ generated -> confirmed only; unknown statuses rejected")
+
+def test_booking_confirm_is_one_statement():
+    """Confirming a booking sends a single UPDATE ... RETURNING and returns the updated row"""
+    print("⚡ Testing single-statement confirm")
+    Session, statements = booking_sessions()
+    db = Session()
+    booking = create_booking(db, "FL1", "Ada", "ada@example.com")
+    statements.clear()
+
+    confirmed = update_booking_status(db, booking.booking_id, "confirmed", payment_status="completed")
+    assert [sql.split()[0] for sql in statements] == ["UPDATE"]
+    assert "RETURNING" in statements[0]
+    assert confirmed.status == "confirmed" and confirmed.payment_status == "completed"
+    assert len(statements) == 1
+    print("   ✅ 1 statement, no SELECT or refresh")
+
+def test_booking_transitions():
+    """Repeated and out-of-order changes match no row and leave the booking as it was"""
+    print("🔒 Testing booking transitions")
+    Session, _ = booking_sessions()
+    db = Session()
+    booking_id = create_booking(db, "FL1", "Ada", "ada@example.com").booking_id
+
+    assert update_booking_status(db, booking_id, "confirmed", payment_status="completed") is not None
+    assert update_booking_status(db, booking_id, "confirmed", payment_status="completed") is None
+    assert update_booking_payment_status(db, booking_id, "failed") is None
+    assert update_booking_status(db, "TRV-MISSING", "confirmed") is None
+    assert update_booking_status(db, booking_id, "cancelled").status == "cancelled"
+    assert update_booking_status(db, booking_id, "confirmed") is None
+
+    booking = get_booking_by_id(Session(), booking_id)
+    assert booking.status == "cancelled" and booking.payment_status == "completed"
+    print("   ✅ Double confirm refused, cancel allowed, cancelled stays cancelled")
+
+def test_concurrent_confirms():
+    """Of several confirms racing for one booking, exactly one succeeds"""
+    print("🏁 Testing concurrent confirms")
+    Session, _ = booking_sessions()
+    booking_id = create_booking(Session(), "FL1", "Ada", "ada@example.com").booking_id
+
+    def confirm(_):
+        db = Session()
+        try:
+            return update_booking_status(db, booking_id, "confirmed", payment_status="completed")
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(confirm, range(8)))
+    assert sum(result is not None for result in results) == 1
+    print("   ✅ 8 confirms, 1 winner")
+
+if __name__ == "__main__":
+    print("🧪 Testing Guarded Status Updates\n")
+    test_plan_update_is_guarded()
+    test_booking_confirm_is_one_statement()
+    test_booking_transitions()
+    test_concurrent_confirms()
+    print("\n✅ Testing complete!")
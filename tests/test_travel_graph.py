@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test script for the travel planner graph fan-out (runs offline with slow fake searches)
+"""
+
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.request import Request
+import nodes.travel_planner as travel_planner
+from agent_tools import _sdk_http
+from search_results import SearchResults
+from travel_graph import travel_app
+
+SEARCH_DELAY = 0.3
+
+def slow_search(*args):
+    time.sleep(SEARCH_DELAY)
+    return SearchResults.not_configured()
+
+def run_with_searches(search, **overrides):
+    """Invoke the graph with every Amadeus search replaced by ``search``"""
+    originals = {
+        name: getattr(travel_planner, name)
+        for name in ["search_flights_direct", "search_hotels_direct", "search_activities_direct", *overrides]
+    }
+    try:
+        travel_planner.search_flights_direct = search
+        travel_planner.search_hotels_direct = search
+        travel_planner.search_activities_direct = search
+        for name, value in overrides.items():
+            setattr(travel_planner, name, value)
+        start = time.perf_counter()
+        result = travel_app.invoke({"destination": "Paris", "budget": 5000})
+        return result, time.perf_counter() - start
+    finally:
+        for name, value in originals.items():
+            setattr(travel_planner, name, value)
+
+def test_searches_run_concurrently():
+    """Flights, hotels and activities overlap and join at assemble_plan"""
+    print("⚡ Testing concurrent search fan-out")
+    result, elapsed = run_with_searches(slow_search)
+    assert result["plan"]["flights"] and result["plan"]["hotels"] and result["plan"]["activities"]
+    assert elapsed < SEARCH_DELAY * 2
+    assert set(result["node_timings"]) == {"search_flights", "search_hotels", "get_activities"}
+    assert all(t["source"] == "demo" for t in result["node_timings"].values())
+    print(f"   ✅ 3 searches completed in {elapsed:.2f}s")
+
+def test_branch_timeout_falls_back():
+    """A branch that runs over its deadline uses fallback data without delaying the plan"""
+    print("⏱️ Testing per-branch timeout")
+    result, elapsed = run_with_searches(slow_search, FLIGHT_SEARCH_TIMEOUT=0.05)
+    flight_timing = result["node_timings"]["search_flights"]
+    assert flight_timing["source"] == "fallback"
+    assert "timed out" in flight_timing["error"]
+    assert result["flights"][0]["airline"] == "DemoAir"
+    assert result["node_timings"]["search_hotels"]["source"] == "demo"
+    assert result["payment_status"] == "success"
+    print(f"   ✅ Flight branch fell back after {flight_timing['seconds']}s")
+
+def test_timed_out_search_releases_its_thread():
+    """The branch deadline also bounds the blocking SDK request, so the worker thread is not left hanging"""
+    print("🧵 Testing thread release after timeout")
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(2)
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    finished = threading.Event()
+
+    def sdk_search(url):
+        try:
+            _sdk_http(Request(url))
+        finally:
+            finished.set()
+
+    start = time.perf_counter()
+    try:
+        travel_planner._call_with_timeout(sdk_search, 0.2, f"http://127.0.0.1:{server.server_address[1]}/")
+        assert False, "slow search did not time out"
+    except TimeoutError:
+        pass
+    assert finished.wait(1), "worker thread still blocked on the socket"
+    released = time.perf_counter() - start
+    server.shutdown()
+    assert released < 1
+    print(f"   ✅ Worker thread released after {released:.2f}s")
+
+if __name__ == "__main__":
+    print("🧪 Testing Travel Planner Graph\n")
+    test_searches_run_concurrently()
+    test_branch_timeout_falls_back()
+    test_timed_out_search_releases_its_thread()
+    print("\n✅ Testing complete!")
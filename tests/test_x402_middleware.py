@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test script for the ASGI x402 middleware (runs offline against the local stand-in facilitator)
+"""
+
+import time
+import asyncio
+from datetime import datetime, timedelta
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from facilitator_client import FacilitatorClient
+from payment_cache import PaymentCache
+from tools.facilitator_stub import RECIPIENT, create_app
+from x402_middleware import X402Middleware
+
+PRICING = {"/api/flights/search": "0.01", "/api/flights/book": {"amount": "0.10", "description": "Flight booking"}}
+
+def make_app(facilitator_app=None):
+    """FastAPI app with the x402 middleware registered the way the backends do it"""
+    app = FastAPI()
+    app.state.chunks_sent = 0
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    @app.get("/api/flights/search")
+    async def search():
+        async def results():
+            for n in range(3):
+                app.state.chunks_sent += 1
+                yield f"flight {n}\n".encode()
+                await asyncio.sleep(0)
+        return StreamingResponse(results(), media_type="text/plain")
+
+    facilitator = FacilitatorClient(base_url="http://facilitator.test", transport=httpx.ASGITransport(app=facilitator_app or create_app()))
+    middleware = X402Middleware(RECIPIENT, PRICING, facilitator=facilitator, payment_cache=PaymentCache(redis_url=""))
+    app.add_middleware(middleware.bind)
+    return app, middleware
+
+def payment_header(n, amount="0.01"):
+    return {"X-PAYMENT": f'{{"transactionHash": "0x{n:064x}", "amount": "{amount}", "to": "{RECIPIENT}"}}'}
+
+async def request(app, method, path, headers=None):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api.test") as client:
+        return await client.request(method, path, headers=headers)
+
+def test_free_route_passes_through():
+    """Unpriced routes reach the app without a payment"""
+    print("🆓 Testing free route")
+    app, _ = make_app()
+    response = asyncio.run(request(app, "GET", "/health"))
+    assert response.status_code == 200 and response.json() == {"status": "healthy"}
+    print("   ✅ /health served without payment")
+
+def test_payment_required_body():
+    """Prebuilt 402 bodies are valid JSON with route metadata and a fresh expiresAt"""
+    print("💳 Testing 402 body")
+    app, middleware = make_app()
+    response = asyncio.run(request(app, "POST", "/api/flights/book"))
+    assert response.status_code == 402
+    assert response.headers["X-Payment-Required"] == "true"
+    assert int(response.headers["Content-Length"]) == len(response.content)
+    requirement = response.json()["paymentRequirements"][0]
+    assert requirement["amount"] == "0.10" and requirement["description"] == "Flight booking"
+    expires_at = datetime.fromisoformat(requirement["expiresAt"].rstrip("Z"))
+    assert abs(expires_at - (datetime.utcnow() + timedelta(minutes=5))) < timedelta(seconds=5)
+    assert len(middleware._payment_required_bodies) == 2 * len(PRICING)
+    print("   ✅ 402 with description and expiresAt ~5 minutes out")
+
+def test_paid_streaming_response():
+    """A verified request streams the endpoint's response through unbuffered"""
+    print("🌊 Testing streaming pass-through")
+    app, _ = make_app()
+    response = asyncio.run(request(app, "GET", "/api/flights/search", payment_header(1)))
+    assert response.status_code == 200
+    assert response.text == "flight 0\nflight 1\nflight 2\n"
+    assert app.state.chunks_sent == 3
+    print("   ✅ Streamed body delivered after payment")
+
+def test_rejected_payment():
+    """Underpaid and replayed payments get 402 with an error"""
+    print("🚫 Testing rejected payments")
+    app, _ = make_app()
+
+    async def run():
+        short = await request(app, "GET", "/api/flights/search", payment_header(2, "0.001"))
+        paid = await request(app, "GET", "/api/flights/search", payment_header(3))
+        replay = await request(app, "GET", "/api/flights/search", payment_header(3))
+        expired = {"X-PAYMENT": payment_header(4)["X-PAYMENT"][:-1] + ', "expiresAt": 0}'}
+        first = await request(app, "GET", "/api/flights/search", expired)
+        expired_replay = await request(app, "GET", "/api/flights/search", expired)
+        return short, paid, replay, first, expired_replay
+
+    short, paid, replay, first, expired_replay = asyncio.run(run())
+    assert short.status_code == 402 and short.json()["error"] == "Payment verification failed"
+    assert paid.status_code == 200
+    assert replay.status_code == 402
+    assert first.status_code == 200 and expired_replay.status_code == 402
+    print("   ✅ Underpayment and replay rejected, client expiresAt ignored")
+
+def test_non_http_scopes_pass_through():
+    """Lifespan and other non-HTTP scopes go straight to the wrapped app"""
+    print("🔁 Testing non-HTTP scopes")
+    seen = []
+
+    async def inner(scope, receive, send):
+        seen.append(scope["type"])
+
+    middleware = X402Middleware(RECIPIENT, PRICING, payment_cache=PaymentCache(redis_url=""), app=inner)
+    asyncio.run(middleware({"type": "lifespan"}, None, None))
+    assert seen == ["lifespan"]
+    print("   ✅ Lifespan scope forwarded")
+
+def test_rejection_cost():
+    """Report the per-rejection cost of the prebuilt 402 body"""
+    print("⏱️ Testing rejection cost")
+    _, middleware = make_app()
+    route_price = middleware.router.match("POST", "/api/flights/book")
+    rounds = 20000
+    started = time.perf_counter()
+    for _ in range(rounds):
+        middleware._payment_required_body(route_price)
+    elapsed = (time.perf_counter() - started) / rounds
+    print(f"   ✅ {elapsed * 1e6:.2f} µs per 402 body")
+
+if __name__ == "__main__":
+    print("🧪 Testing x402 ASGI Middleware\n")
+    test_free_route_passes_through()
+    test_payment_required_body()
+    test_paid_streaming_response()
+    test_rejected_payment()
+    test_non_http_scopes_pass_through()
+    test_rejection_cost()
+    print("\n✅ Testing complete!")
@@ -0,0 +1,162 @@
+"""
+Load benchmark for sync vs async database sessions in FastAPI handlers
+
+Serves one endpoint two ways:
+- /sync/plans/{wallet}: an ``async def`` handler querying through a sync
+  Session (the previous get_db path), which blocks the event loop for the
+  whole round trip;
+- /async/plans/{wallet}: the same query through AsyncSession and
+  AsyncPlanService.
+--db-latency-ms adds a server-side pg_sleep to each request, standing in for
+a database across a network.
+
+    python -m tools.db_load_benchmark serve [--port 8600] [--workers 1] [--db-latency-ms 5]
+    python -m tools.db_load_benchmark bench [--workers 1] [--requests 2000] [--concurrency 1 8 32 64] [--db-latency-ms 5]
+
+bench seeds a throwaway wallet with plans, starts `serve` in a child process
+and reports requests/second (and per worker) for each path and concurrency,
+then deletes the seeded plans. Needs DATABASE_URL and asyncpg.
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import subprocess
+from typing import List
+import httpx
+import uvicorn
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from database import SessionLocal, close_async_db, get_async_db, get_db
+from db_service import AsyncPlanService, PlanService
+from models import Plan
+
+BENCH_WALLET = "0x" + "be" * 20
+DB_LATENCY_SECONDS = float(os.getenv("DB_BENCH_LATENCY", "0"))  # set by `serve` for its workers
+
+app = FastAPI(title="database load benchmark")
+
+
+def plan_summaries(plans: List[Plan]) -> List[dict]:
+    return [{"plan_id": str(plan.id), "destination": plan.destination, "status": plan.status} for plan in plans]
+
+
+@app.get("/sync/plans/{wallet}")
+async def sync_plans(wallet: str, db: Session = Depends(get_db)):
+    if DB_LATENCY_SECONDS:
+        db.execute(text("SELECT pg_sleep(:seconds)"), {"seconds": DB_LATENCY_SECONDS})
+    return plan_summaries(PlanService.get_user_plans(db, wallet))
+
+
+@app.get("/async/plans/{wallet}")
+async def async_plans(wallet: str, db: AsyncSession = Depends(get_async_db)):
+    if DB_LATENCY_SECONDS:
+        await db.execute(text("SELECT pg_sleep(:seconds)"), {"seconds": DB_LATENCY_SECONDS})
+    return plan_summaries(await AsyncPlanService.get_user_plans(db, wallet))
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await close_async_db()
+
+
+def seed_plans(count: int):
+    db = SessionLocal()
+    try:
+        for n in range(count):
+            PlanService.create_plan(
+                db, BENCH_WALLET, f"Bench City {n}", 1000 + n, {"grand_total": 1000 + n}, commit=False
+            )
+        db.commit()
+    finally:
+        db.close()
+
+
+def delete_seeded_plans():
+    db = SessionLocal()
+    try:
+        db.query(Plan).filter(Plan.user_wallet == BENCH_WALLET).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def start_server_process(workers: int, db_latency_ms: float):
+    """Run `serve` in a child process on a free local port; returns the process and its base URL"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    process = subprocess.Popen([
+        sys.executable, "-m", "tools.db_load_benchmark", "serve", "--port", str(port),
+        "--workers", str(workers), "--db-latency-ms", str(db_latency_ms)
+    ])
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            httpx.get(f"{base_url}/docs", timeout=1.0)
+            return process, base_url
+        except httpx.HTTPError:
+            if time.monotonic() > deadline or process.poll() is not None:
+                process.terminate()
+                raise RuntimeError("Benchmark server did not start")
+            time.sleep(0.1)
+
+
+async def load(url: str, requests: int, concurrency: int) -> float:
+    """Requests/second for `requests` GETs of url, `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60.0) as client:
+        async def one():
+            async with semaphore:
+                response = await client.get(url)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*[one() for _ in range(requests)])
+        return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync vs async database session load benchmark")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve_parser = subparsers.add_parser("serve", help="Serve the benchmark endpoints")
+    serve_parser.add_argument("--port", type=int, default=8600)
+    bench_parser = subparsers.add_parser("bench", help="Measure requests/second for both session paths")
+    bench_parser.add_argument("--requests", type=int, default=2000)
+    bench_parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    bench_parser.add_argument("--plans", type=int, default=20, help="Plans seeded for the benchmark wallet")
+    for sub in (serve_parser, bench_parser):
+        sub.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+        sub.add_argument("--db-latency-ms", type=float, default=5.0, help="pg_sleep added to each request")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        os.environ["DB_BENCH_LATENCY"] = str(args.db_latency_ms / 1000)
+        uvicorn.run("tools.db_load_benchmark:app", host="127.0.0.1", port=args.port, workers=args.workers, log_level="warning")
+        return
+
+    print(f"🏗️  Seeding {args.plans} plans for {BENCH_WALLET}...")
+    seed_plans(args.plans)
+    process, base_url = start_server_process(args.workers, args.db_latency_ms)
+    try:
+        for concurrency in args.concurrency:
+            for path in ("sync", "async"):
+                rps = asyncio.run(load(f"{base_url}/{path}/plans/{BENCH_WALLET}", args.requests, concurrency))
+                print(
+                    f"📊 {path:>5} sessions, concurrency {concurrency:>3}: "
+                    f"{rps:8,.0f} requests/s ({rps / args.workers:,.0f} per worker)"
+                )
+    finally:
+        process.terminate()
+        process.wait()
+        delete_seeded_plans()
+
+
+if __name__ == "__main__":
+    main()
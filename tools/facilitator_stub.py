@@ -0,0 +1,209 @@
+"""
+Local stand-in for the x402 payment facilitator, plus a verification benchmark
+
+The stub serves POST /verify with the facilitator's request and response
+shape. A payment is valid when its amount covers the expected amount and it
+names the expected recipient. Latency and a failure rate can be injected.
+GET /stats reports how many requests it served and from how many client
+connections; DELETE /stats resets the counters.
+
+    python -m tools.facilitator_stub serve [--port 8402] [--latency-ms 5] [--failure-rate 0]
+    python -m tools.facilitator_stub bench [--requests 2000] [--concurrency 50] [--latency-ms 5]
+
+bench starts the stub in a separate process, so it does not compete with
+the client for the GIL. It verifies the same payments two ways:
+- with a new httpx.AsyncClient per request (the previous middleware
+  behaviour);
+- with the shared FacilitatorClient pool.
+For each it reports p50/p99 latency, throughput and the connections
+opened.
+"""
+import sys
+import time
+import socket
+import subprocess
+import random
+import asyncio
+import argparse
+import threading
+from decimal import Decimal, InvalidOperation
+from typing import List, Tuple
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from facilitator_client import FacilitatorClient
+
+RECIPIENT = "0x" + "ab" * 20
+
+
+def create_app(latency: float = 0.0, failure_rate: float = 0.0, seed: int = 0) -> FastAPI:
+    """Stub facilitator app; latency in seconds, failure_rate in [0, 1] answers 503"""
+    app = FastAPI(title="x402 facilitator stub")
+    app.state.requests = 0
+    app.state.connections = set()
+    app.state.failure_rate = failure_rate
+    rng = random.Random(seed)
+
+    @app.post("/verify")
+    async def verify(request: Request):
+        app.state.requests += 1
+        if request.client is not None:
+            app.state.connections.add((request.client.host, request.client.port))
+        if latency:
+            await asyncio.sleep(latency)
+        if rng.random() < app.state.failure_rate:
+            return JSONResponse({"error": "facilitator overloaded"}, status_code=503)
+
+        body = await request.json()
+        payment = body.get("payment") or {}
+        try:
+            paid = Decimal(str(payment.get("amount", "0")))
+            expected = Decimal(str(body.get("expectedAmount", "0")))
+        except InvalidOperation:
+            return JSONResponse({"valid": False, "reason": "malformed amount"})
+        if str(payment.get("to", "")).lower() != str(body.get("expectedRecipient", "")).lower():
+            return JSONResponse({"valid": False, "reason": "wrong recipient"})
+        if paid < expected:
+            return JSONResponse({"valid": False, "reason": "insufficient amount"})
+        return JSONResponse({"valid": True, "transactionHash": payment.get("transactionHash")})
+
+    @app.get("/stats")
+    async def stats():
+        return {"requests": app.state.requests, "connections": len(app.state.connections)}
+
+    @app.delete("/stats")
+    async def reset_stats():
+        app.state.requests = 0
+        app.state.connections = set()
+        return {"status": "reset"}
+
+    return app
+
+
+def serve_in_thread(app: FastAPI) -> Tuple[uvicorn.Server, str]:
+    """Run the app on an ephemeral local port in a daemon thread; returns the server and its base URL"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning", lifespan="off"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("Facilitator stub did not start")
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}"
+
+
+def start_stub_process(latency_ms: float, failure_rate: float) -> Tuple[subprocess.Popen, str]:
+    """Run `serve` in a child process on a free local port; returns the process and its base URL"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    process = subprocess.Popen([
+        sys.executable, "-m", "tools.facilitator_stub", "serve", "--port", str(port),
+        "--latency-ms", str(latency_ms), "--failure-rate", str(failure_rate)
+    ])
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            httpx.get(f"{base_url}/stats", timeout=1.0)
+            return process, base_url
+        except httpx.HTTPError:
+            if time.monotonic() > deadline or process.poll() is not None:
+                process.terminate()
+                raise RuntimeError("Facilitator stub did not start")
+            time.sleep(0.1)
+
+
+def sample_payment(n: int, amount: str = "0.01") -> dict:
+    return {"transactionHash": f"0x{n:064x}", "amount": amount, "to": RECIPIENT}
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def _run(verify_one, requests: int, concurrency: int) -> List[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one(n: int):
+        async with semaphore:
+            started = time.perf_counter()
+            await verify_one(n)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*[one(n) for n in range(requests)])
+    return latencies
+
+
+async def bench_per_request_client(base_url: str, requests: int, concurrency: int) -> List[float]:
+    """Previous behaviour: a new AsyncClient (and connection) for every verification"""
+    async def verify_one(n: int):
+        async with httpx.AsyncClient() as client:
+            response = await client.post(
+                f"{base_url}/verify",
+                json={"payment": sample_payment(n), "expectedAmount": "0.01", "expectedRecipient": RECIPIENT, "network": "base-mainnet"},
+                timeout=10.0
+            )
+            response.json()
+    return await _run(verify_one, requests, concurrency)
+
+
+async def bench_shared_client(base_url: str, requests: int, concurrency: int) -> List[float]:
+    """Shared pool: one FacilitatorClient for the whole run"""
+    client = FacilitatorClient(base_url=base_url, max_connections=concurrency)
+
+    async def verify_one(n: int):
+        await client.verify(sample_payment(n), "0.01", RECIPIENT)
+    try:
+        return await _run(verify_one, requests, concurrency)
+    finally:
+        await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="x402 facilitator stand-in")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve_parser = subparsers.add_parser("serve", help="Serve the stub facilitator")
+    serve_parser.add_argument("--port", type=int, default=8402)
+    bench_parser = subparsers.add_parser("bench", help="Benchmark per-request vs shared facilitator clients")
+    bench_parser.add_argument("--requests", type=int, default=2000)
+    bench_parser.add_argument("--concurrency", type=int, default=50)
+    for sub in (serve_parser, bench_parser):
+        sub.add_argument("--latency-ms", type=float, default=5.0, help="Injected verification latency")
+        sub.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of calls answered with 503")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        app = create_app(latency=args.latency_ms / 1000, failure_rate=args.failure_rate)
+        uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+        return
+
+    process, base_url = start_stub_process(args.latency_ms, args.failure_rate)
+    try:
+        for name, bench in (("per-request client", bench_per_request_client), ("shared pool", bench_shared_client)):
+            httpx.delete(f"{base_url}/stats")
+            started = time.perf_counter()
+            latencies = asyncio.run(bench(base_url, args.requests, args.concurrency))
+            elapsed = time.perf_counter() - started
+            stats = httpx.get(f"{base_url}/stats").json()
+            print(
+                f"📊 {name:>18}: p50 {percentile(latencies, 0.50) * 1000:6.2f} ms  "
+                f"p99 {percentile(latencies, 0.99) * 1000:6.2f} ms  "
+                f"{args.requests / elapsed:7,.0f} verifications/s  "
+                f"{stats['connections']} connections"
+            )
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    main()
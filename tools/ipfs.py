@@ -32,29 +32,15 @@ def upload_to_ipfs(json_payload):
         raise Exception(f"Unexpected response from Pinata: {data}")
     return data["IpfsHash"]
 
-def retrieve_referrals_by_wallet(wallet_address: str, gateway_url: str = "https://gateway.pinata.cloud/ipfs/"):
+def retrieve_referrals_by_wallet(wallet_address: str, limit: int = 100):
     """
-    Retrieve referral records from IPFS by wallet address. This is a demo implementation that expects a list of known IPFS hashes.
+    Retrieve referral records by wallet address from the referral index.
     Args:
         wallet_address (str): The wallet address to search for (referrer or referee).
-        gateway_url (str): The IPFS gateway URL to use for fetching records.
+        limit (int): Maximum number of records to return, newest first.
     Returns:
-        list: List of matching referral records.
+        list: List of matching referral records, each with its "ipfs_hash".
     """
-    # In a real system, you would index or search IPFS. For demo, scan a known list of hashes.
-    known_hashes = os.getenv("REFERRAL_IPFS_HASHES", "").split(",")
-    matches = []
-    for ipfs_hash in known_hashes:
-        ipfs_hash = ipfs_hash.strip()
-        if not ipfs_hash:
-            continue
-        try:
-            url = f"{gateway_url}{ipfs_hash}"
-            resp = requests.get(url)
-            resp.raise_for_status()
-            record = resp.json()
-            if wallet_address.lower() in (str(record.get("referrer_wallet", "")).lower(), str(record.get("referee_wallet", "")).lower()):
-                matches.append({"ipfs_hash": ipfs_hash, **record})
-        except Exception as e:
-            print(f"[ipfs.py] Error fetching {ipfs_hash}: {e}")
-    return matches 
\ No newline at end of file
+    # Imported here so `python -m tools.referral_index` doesn't load itself twice via the package
+    from tools.referral_index import find_referrals_by_wallet
+    return find_referrals_by_wallet(wallet_address, limit=limit)
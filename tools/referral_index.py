@@ -0,0 +1,156 @@
+"""
+Postgres index of referral records pinned to IPFS
+
+Referral records are indexed by referrer and referee wallet when they are
+uploaded, so looking up a wallet's referrals is one indexed query instead
+of fetching every known hash from a public gateway. Records pinned before
+the index existed can be loaded once with the backfill command:
+
+    python -m tools.referral_index backfill [HASH ...]
+
+(defaults to the hashes in REFERRAL_IPFS_HASHES).
+"""
+import os
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+import requests
+from dotenv import load_dotenv
+from sqlalchemy import desc, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models import Referral
+
+load_dotenv()
+
+DEFAULT_GATEWAY_URL = "https://gateway.pinata.cloud/ipfs/"
+
+
+def normalize_wallet(wallet: Optional[str]) -> Optional[str]:
+    """Lowercase a wallet address for indexing ("" and None both mean no wallet)"""
+    return wallet.strip().lower() if wallet else None
+
+
+def referral_row(cid: str, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Build an index row for a referral record; None if it has no referrer"""
+    referrer = normalize_wallet(record.get("referrer_wallet"))
+    if not referrer:
+        return None
+    tx_id = record.get("payment_transaction_id")
+    return {
+        "cid": cid,
+        "referrer_wallet": referrer,
+        "referee_wallet": normalize_wallet(record.get("referee_wallet")),
+        "payment_transaction_id": str(tx_id) if tx_id else None,
+        "record": record
+    }
+
+
+def _insert_rows(db: Session, rows: List[Dict[str, Any]]) -> int:
+    if not rows:
+        return 0
+    result = db.execute(
+        insert(Referral).values(rows).on_conflict_do_nothing(index_elements=["cid"])
+    )
+    db.commit()
+    return result.rowcount
+
+
+def index_referral(cid: str, record: Dict[str, Any], db: Optional[Session] = None) -> bool:
+    """
+    Add an uploaded referral record to the index (idempotent per CID).
+
+    Returns True if a new row was written.
+    """
+    row = referral_row(cid, record)
+    if row is None:
+        return False
+
+    own_session = db is None
+    db = db or SessionLocal()
+    try:
+        return _insert_rows(db, [row]) > 0
+    finally:
+        if own_session:
+            db.close()
+
+
+def find_referrals_by_wallet(wallet_address: str, limit: int = 100, db: Optional[Session] = None) -> List[Dict[str, Any]]:
+    """Return referral records where the wallet is referrer or referee, newest first"""
+    wallet = normalize_wallet(wallet_address)
+    if not wallet:
+        return []
+
+    own_session = db is None
+    db = db or SessionLocal()
+    try:
+        referrals = (
+            db.query(Referral)
+            .filter(or_(Referral.referrer_wallet == wallet, Referral.referee_wallet == wallet))
+            .order_by(desc(Referral.created_at))
+            .limit(limit)
+            .all()
+        )
+        return [referral.to_dict() for referral in referrals]
+    finally:
+        if own_session:
+            db.close()
+
+
+def _fetch_record(session: requests.Session, gateway_url: str, ipfs_hash: str) -> Optional[Dict[str, Any]]:
+    try:
+        response = session.get(f"{gateway_url}{ipfs_hash}", timeout=30)
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        print(f"⚠️ Could not fetch {ipfs_hash}: {e}")
+        return None
+
+
+def backfill(hashes: Iterable[str], gateway_url: str = DEFAULT_GATEWAY_URL, workers: int = 8) -> Dict[str, int]:
+    """Fetch existing referral records from the gateway and index them (safe to re-run)"""
+    hashes = [h.strip() for h in hashes if h and h.strip()]
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=workers) as executor:
+        records = list(executor.map(lambda h: _fetch_record(session, gateway_url, h), hashes))
+
+    rows = []
+    for ipfs_hash, record in zip(hashes, records):
+        row = referral_row(ipfs_hash, record) if isinstance(record, dict) else None
+        if row is not None:
+            rows.append(row)
+
+    db = SessionLocal()
+    try:
+        inserted = _insert_rows(db, rows)
+    finally:
+        db.close()
+
+    return {
+        "hashes": len(hashes),
+        "fetched": sum(record is not None for record in records),
+        "referrals": len(rows),
+        "inserted": inserted
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Referral index maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    backfill_parser = subparsers.add_parser("backfill", help="Index referral records that are already on IPFS")
+    backfill_parser.add_argument("hashes", nargs="*", help="IPFS hashes (defaults to REFERRAL_IPFS_HASHES)")
+    backfill_parser.add_argument("--gateway", default=DEFAULT_GATEWAY_URL, help="IPFS gateway URL")
+    backfill_parser.add_argument("--workers", type=int, default=8, help="Concurrent gateway fetches")
+    args = parser.parse_args()
+
+    if args.command == "backfill":
+        hashes = args.hashes or os.getenv("REFERRAL_IPFS_HASHES", "").split(",")
+        result = backfill(hashes, gateway_url=args.gateway, workers=args.workers)
+        print(
+            f"✅ Backfill complete: {result['fetched']}/{result['hashes']} fetched, "
+            f"{result['referrals']} referral records, {result['inserted']} newly indexed"
+        )
+
+
+if __name__ == "__main__":
+    main()
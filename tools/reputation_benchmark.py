@@ -0,0 +1,93 @@
+"""
+Bulk-replay benchmark for reputation records
+
+Replays N stored records (``model_dump(mode="json")``, as kept in
+reputation_records) the way the chain verifier and the records endpoint do:
+rebuild the model, serialize it for IPFS and hash it. Compares full
+validation plus the previous json.dumps/pydantic_encoder serialization
+against ReputationRecord.from_trusted and the cached orjson serialization.
+
+    python -m tools.reputation_benchmark [--records N]
+"""
+import json
+import time
+import hashlib
+import argparse
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pydantic.json import pydantic_encoder
+from reputation_models import (
+    EventType, TripStatus, TripData, OutcomeData, VerificationData, ReferralData, ReputationRecord
+)
+
+
+def sample_rows(count: int):
+    """Stored-row dicts for ``count`` varied records"""
+    rows = []
+    for n in range(count):
+        start = date(2024, 1, 1) + timedelta(days=n % 300)
+        record = ReputationRecord(
+            record_id=f"bench{n:024d}",
+            traveler_wallet=f"0x{n:040x}",
+            platform_wallet="0x" + "0" * 40,
+            event_type=list(EventType)[n % len(EventType)],
+            event_timestamp=datetime(2024, 1, 1) + timedelta(minutes=n),
+            trip_data=TripData(
+                destination="Lisbon, Portugal",
+                cost_usd=Decimal("1234.50") + n,
+                cost_usdc=Decimal("1234.500000") + n,
+                duration_days=5,
+                start_date=start,
+                end_date=start + timedelta(days=5),
+                booking_id=f"BK{n}",
+                plan_id=f"PLAN{n}"
+            ),
+            outcome_data=OutcomeData(status=TripStatus.COMPLETED, rating=n % 5 + 1, feedback="Great trip"),
+            verification_data=VerificationData(payment_tx_hash="0x" + "ab" * 32, ipfs_hash=f"Qm{n:044d}"),
+            referral_data=ReferralData(referrer_wallet="0x" + "cd" * 20, commission_amount=Decimal("12.5")),
+            metadata={"source": "benchmark"}
+        )
+        rows.append(record.model_dump(mode="json"))
+    return rows
+
+
+def replay_validated(rows):
+    """Previous path: full validation, then json.dumps twice (IPFS document and hash)"""
+    for row in rows:
+        record = ReputationRecord.model_validate(row)
+        document = json.dumps(record.model_dump(exclude_none=True), indent=2, default=pydantic_encoder)
+        content = json.dumps(record.model_dump(exclude_none=True), indent=2, default=pydantic_encoder)
+        hashlib.sha256(content.encode()).hexdigest()
+
+
+def replay_trusted(rows):
+    """Fast path: trusted construction, one cached orjson serialization shared by both"""
+    for row in rows:
+        record = ReputationRecord.from_trusted(row)
+        record.to_ipfs_json()
+        record.calculate_hash()
+
+
+def timed(func, rows) -> float:
+    started = time.perf_counter()
+    func(rows)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reputation record replay benchmark")
+    parser.add_argument("--records", type=int, default=20000, help="Records to replay")
+    args = parser.parse_args()
+
+    print(f"🏗️  Building {args.records} sample records...")
+    rows = sample_rows(args.records)
+
+    baseline = timed(replay_validated, rows)
+    fast = timed(replay_trusted, rows)
+    print(f"📊 Validated + json.dumps: {baseline:.3f}s ({args.records / baseline:,.0f} records/s)")
+    print(f"⚡ Trusted + cached orjson: {fast:.3f}s ({args.records / fast:,.0f} records/s)")
+    print(f"✅ Speedup: {baseline / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
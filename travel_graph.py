@@ -28,40 +28,31 @@ travel_graph.add_node("confirm_bookings", confirm_bookings_node)
 travel_graph.add_node("store_platform_fee", store_platform_fee_node)
 travel_graph.add_node("error_handler", error_handler_node)
 
-# Entry point
-travel_graph.set_entry_point("search_flights")
+# Fan out: flights, hotels and activities only depend on the destination, so
+# all three start together. Each node returns just the keys it owns (plus its
+# node_timings entry) so the concurrent writes merge cleanly, and each branch
+# enforces its own timeout with a demo-data fallback.
+SEARCH_NODES = ["search_flights", "search_hotels", "get_activities"]
+for node in SEARCH_NODES:
+    travel_graph.set_entry_point(node)
 
-# Define parallel execution after flights
-def should_continue_to_parallel(state):
-    """Determine if we should continue to parallel execution"""
-    return "search_hotels" if state.get("flights") else "error_handler"
+# Join: assemble_plan runs once all three searches have finished
+travel_graph.add_edge(SEARCH_NODES, "assemble_plan")
 
-def should_continue_to_assemble(state):
-    """Determine if we should continue to assemble plan"""
-    return "assemble_plan" if (state.get("hotels") and state.get("activities")) else "error_handler"
+def should_continue_to_budget(state):
+    """Determine if we have everything needed to check the budget"""
+    has_results = state.get("flights") and state.get("hotels") and state.get("activities")
+    return "budget_branch" if has_results else "error_handler"
 
-# Add edges for parallel execution
-travel_graph.add_conditional_edges(
-    "search_flights",
-    should_continue_to_parallel,
-    {
-        "search_hotels": "search_hotels",
-        "error_handler": "error_handler"
-    }
-)
-
-travel_graph.add_edge("search_hotels", "get_activities")
+# Budget check/branch
 travel_graph.add_conditional_edges(
-    "get_activities",
-    should_continue_to_assemble,
+    "assemble_plan",
+    should_continue_to_budget,
     {
-        "assemble_plan": "assemble_plan",
+        "budget_branch": "budget_branch",
         "error_handler": "error_handler"
     }
 )
-
-# Budget check/branch
-travel_graph.add_edge("assemble_plan", "budget_branch")
 travel_graph.add_edge("budget_branch", "wait_for_confirmation")
 
 # User confirmation
@@ -5,125 +5,185 @@ Implements HTTP 402 Payment Required status for cryptocurrency payments
 using the x402 standard with Coinbase CDP integration.
 """
 
-from fastapi import HTTPException, Request, Response
-from typing import Dict, Optional, Callable
+from starlette.types import ASGIApp, Receive, Scope, Send
+from typing import Any, Dict, List, Optional, Tuple
 import json
 import asyncio
 import logging
 from datetime import datetime, timedelta
 from wallet import create_wallet, get_wallet_balances_async
 import os
-import httpx
+from facilitator_client import FacilitatorClient, FacilitatorError, FacilitatorUnavailable, facilitator_client
+from payment_cache import PaymentCache, payment_cache as shared_payment_cache
+from pricing_router import PricingRouter, RoutePrice
 
 logger = logging.getLogger(__name__)
 
+_EXPIRES_AT_PLACEHOLDER = "__x402_expires_at__"
+_CORS_HEADERS = [(b"access-control-allow-origin", b"*")]
+_PAYMENT_REQUIRED_HEADERS = _CORS_HEADERS + [
+    (b"x-payment-required", b"true"),
+    (b"access-control-allow-headers", b"X-PAYMENT")
+]
+_VERIFICATION_UNAVAILABLE_BODY = json.dumps({"error": "Payment verification temporarily unavailable"}).encode()
+
+
+async def _send_json(send: Send, status: int, body: bytes, headers: List[Tuple[bytes, bytes]]):
+    """Send a complete JSON response straight over ASGI"""
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            *headers
+        ]
+    })
+    await send({"type": "http.response.body", "body": body})
+
 class X402PaymentError(Exception):
     """Custom exception for x402 payment errors"""
     pass
 
 class X402Middleware:
     """
-    FastAPI middleware for x402 payment processing
+    ASGI middleware for x402 payment processing
+
+    Unpriced routes go straight to the wrapped app; paid requests are passed
+    through untouched once verified, so streaming responses keep streaming.
     """
     
     def __init__(self, 
                  payment_address: str,
-                 pricing: Dict[str, str],
-                 facilitator_url: str = "https://facilitator.coinbase.com",
-                 payment_service: Optional['TravelBookingPaymentService'] = None):
+                 pricing: Dict[str, Any],
+                 facilitator_url: Optional[str] = None,
+                 payment_service: Optional['TravelBookingPaymentService'] = None,
+                 facilitator: Optional[FacilitatorClient] = None,
+                 payment_cache: Optional[PaymentCache] = None,
+                 app: Optional[ASGIApp] = None):
         """
         Initialize x402 middleware
         
         Args:
             payment_address: Wallet address to receive payments
-            pricing: Dict mapping endpoints to USDC amounts (e.g., {"search": "0.01"})
-            facilitator_url: Coinbase facilitator service URL
+            pricing: Dict mapping "/path" or "METHOD /path" to USDC amounts (e.g., {"/api/flights/search": "0.01"})
+                     or to {"amount": ..., **metadata}; compiled once into a PricingRouter
+            facilitator_url: Facilitator service URL (defaults to the shared facilitator_client's URL)
             payment_service: Optional payment service for split payment processing
+            facilitator: Optional facilitator client (defaults to the shared, app-lifetime facilitator_client)
+            payment_cache: Optional verified-payment cache (defaults to the shared payment_cache)
+            app: Wrapped ASGI app (set by app.add_middleware(middleware.bind))
         """
         self.payment_address = payment_address
         self.pricing = pricing
-        self.facilitator_url = facilitator_url
+        self.router = PricingRouter(pricing)
+        if facilitator is None:
+            facilitator = FacilitatorClient(base_url=facilitator_url) if facilitator_url else facilitator_client
+        self.facilitator = facilitator
+        self.facilitator_url = facilitator.base_url
         self.payment_service = payment_service
-        self.verified_payments = {}  # Cache for verified payments
+        self.payment_cache = payment_cache or shared_payment_cache  # one use per transaction hash
+        self.app = app
         
-    async def __call__(self, request: Request, call_next: Callable) -> Response:
+        # 402 bodies prebuilt per priced route, split around the expiresAt value
+        self._payment_required_bodies: Dict[Tuple[str, str, Optional[str]], Tuple[bytes, bytes]] = {}
+        for route_price in self.router.routes():
+            for error in (None, "Payment verification failed"):
+                self._payment_required_bodies[(route_price.method, route_price.pattern, error)] = \
+                    self._build_payment_required_body(route_price.amount, error, route_price.metadata)
+    
+    def bind(self, app: ASGIApp) -> "X402Middleware":
+        """Wrap an ASGI app; register with app.add_middleware(middleware.bind)"""
+        self.app = app
+        return self
+        
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """
         Process request and handle x402 payment requirements
         """
-        endpoint = str(request.url.path)
-        
-        # Check if endpoint requires payment
-        if not self._endpoint_requires_payment(endpoint):
-            return await call_next(request)
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        # Get payment amount for this endpoint
-        payment_amount = self._get_payment_amount(endpoint)
-        if not payment_amount:
-            return await call_next(request)
+        # One compiled lookup prices the route; free routes pass straight through
+        route_price = self.router.match(scope["method"], scope["path"])
+        if route_price is None:
+            await self.app(scope, receive, send)
+            return
+        payment_amount = route_price.amount
             
         # Check for payment header
-        x_payment = request.headers.get("X-PAYMENT")
+        x_payment = None
+        for name, value in scope["headers"]:
+            if name == b"x-payment":
+                x_payment = value.decode("latin-1")
+                break
         
         if not x_payment:
             # Return 402 with payment requirements
-            return self._create_payment_required_response(payment_amount)
+            await self._send_payment_required(send, route_price)
+            return
         
         # Verify payment
         try:
             is_valid = await self._verify_payment(x_payment, payment_amount)
-            if is_valid:
-                logger.info(f"Payment verified for {endpoint}, amount: {payment_amount} USDC")
-                return await call_next(request)
-            else:
-                raise X402PaymentError("Payment verification failed")
-                
+        except FacilitatorUnavailable as e:
+            # Circuit open: fail fast without asking the client to pay again
+            logger.warning(f"Payment verification skipped: {e}")
+            await self._send_verification_unavailable(send, e.retry_after)
+            return
         except Exception as e:
             logger.error(f"Payment verification error: {e}")
-            return self._create_payment_required_response(
-                payment_amount, 
-                error="Payment verification failed"
-            )
-    
-    def _endpoint_requires_payment(self, endpoint: str) -> bool:
-        """Check if endpoint requires payment"""
-        return any(pattern in endpoint for pattern in self.pricing.keys())
-    
-    def _get_payment_amount(self, endpoint: str) -> Optional[str]:
-        """Get payment amount for endpoint"""
-        for pattern, amount in self.pricing.items():
-            if pattern in endpoint:
-                return amount
-        return None
+            is_valid = False
+        
+        if not is_valid:
+            await self._send_payment_required(send, route_price, error="Payment verification failed")
+            return
+        
+        logger.info(f"Payment verified for {scope['path']}, amount: {payment_amount} USDC")
+        await self.app(scope, receive, send)
     
-    def _create_payment_required_response(self, amount: str, error: Optional[str] = None) -> Response:
-        """Create HTTP 402 response with payment requirements"""
+    def _build_payment_required_body(self, amount: str, error: Optional[str] = None,
+                                     metadata: Optional[Dict[str, Any]] = None) -> Tuple[bytes, bytes]:
+        """Serialize HTTP 402 payment requirements once, as the bytes before and after the expiresAt value"""
         payment_requirements = {
             "paymentRequirements": [{
+                **(metadata or {}),
                 "scheme": "erc3009",
                 "amount": amount,
                 "currency": "USDC",
                 "recipient": self.payment_address,
                 "network": "base-mainnet",
                 "chainId": 8453,  # Base mainnet
-                "expiresAt": (datetime.utcnow() + timedelta(minutes=5)).isoformat() + "Z"
+                "expiresAt": _EXPIRES_AT_PLACEHOLDER
             }]
         }
         
         if error:
             payment_requirements["error"] = error
-            
-        response = Response(
-            content=json.dumps(payment_requirements),
-            status_code=402,
-            headers={
-                "Content-Type": "application/json",
-                "X-Payment-Required": "true",
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Headers": "X-PAYMENT"
-            }
-        )
         
-        return response
+        head, tail = json.dumps(payment_requirements).encode().split(_EXPIRES_AT_PLACEHOLDER.encode())
+        return head, tail
+    
+    def _payment_required_body(self, route_price: RoutePrice, error: Optional[str] = None) -> bytes:
+        """HTTP 402 body with payment requirements (route metadata, e.g. description, is included)"""
+        key = (route_price.method, route_price.pattern, error)
+        parts = self._payment_required_bodies.get(key)
+        if parts is None:
+            parts = self._payment_required_bodies[key] = self._build_payment_required_body(
+                route_price.amount, error, route_price.metadata
+            )
+        expires_at = (datetime.utcnow() + timedelta(minutes=5)).isoformat() + "Z"
+        return parts[0] + expires_at.encode() + parts[1]
+    
+    async def _send_payment_required(self, send: Send, route_price: RoutePrice, error: Optional[str] = None):
+        """Send HTTP 402 response with payment requirements"""
+        await _send_json(send, 402, self._payment_required_body(route_price, error), _PAYMENT_REQUIRED_HEADERS)
+    
+    async def _send_verification_unavailable(self, send: Send, retry_after: float):
+        """Send HTTP 503 response while the facilitator circuit is open"""
+        retry_after_header = (b"retry-after", str(max(1, int(retry_after + 0.999))).encode())
+        await _send_json(send, 503, _VERIFICATION_UNAVAILABLE_BODY, _CORS_HEADERS + [retry_after_header])
     
     async def _verify_payment(self, payment_payload: str, expected_amount: str) -> bool:
         """
@@ -133,47 +193,47 @@ class X402Middleware:
             # Parse payment payload
             payment_data = json.loads(payment_payload)
             
-            # Check if we've already verified this payment
+            # Claim the transaction hash; replays are rejected without asking the facilitator
             payment_hash = payment_data.get("transactionHash")
-            if payment_hash in self.verified_payments:
-                return self.verified_payments[payment_hash]
+            if payment_hash:
+                state = await self.payment_cache.claim(payment_hash)
+                if state is not None:
+                    logger.warning(f"Rejected payment {payment_hash}: already {state}")
+                    return False
             
-            # Verify with facilitator
-            async with httpx.AsyncClient() as client:
-                verification_response = await client.post(
-                    f"{self.facilitator_url}/verify",
-                    json={
-                        "payment": payment_data,
-                        "expectedAmount": expected_amount,
-                        "expectedRecipient": self.payment_address,
-                        "network": "base-mainnet"
-                    },
-                    timeout=10.0
-                )
-                
-                if verification_response.status_code == 200:
-                    result = verification_response.json()
-                    is_valid = result.get("valid", False)
-                    
-                    # If payment is valid, process split payment
-                    if is_valid and hasattr(self, 'payment_service'):
-                        try:
-                            total_amount = float(expected_amount)
-                            split_result = await self.payment_service.process_split_payment(payment_data, total_amount)
-                            logger.info(f"Split payment result: {split_result}")
-                        except Exception as split_error:
-                            logger.error(f"Split payment processing failed: {split_error}")
-                            # Don't fail the payment verification if split processing fails
-                    
-                    # Cache result
-                    if payment_hash:
-                        self.verified_payments[payment_hash] = is_valid
-                    
-                    return is_valid
+            # Verify with the facilitator over the shared connection pool
+            try:
+                result = await self.facilitator.verify(payment_data, expected_amount, self.payment_address)
+            except FacilitatorError as e:
+                # No verdict: release the claim so the client can retry
+                if payment_hash:
+                    await self.payment_cache.release(payment_hash)
+                if isinstance(e, FacilitatorUnavailable):
+                    raise
+                logger.error(f"Facilitator verification failed: {e}")
+                return False
+            
+            is_valid = result.get("valid", False)
+            if payment_hash:
+                if is_valid:
+                    await self.payment_cache.mark_used(payment_hash, result)
                 else:
-                    logger.error(f"Facilitator verification failed: {verification_response.status_code}")
-                    return False
-                    
+                    await self.payment_cache.mark_invalid(payment_hash)
+            
+            # If payment is valid, process split payment
+            if is_valid and self.payment_service is not None:
+                try:
+                    total_amount = float(expected_amount)
+                    split_result = await self.payment_service.process_split_payment(payment_data, total_amount)
+                    logger.info(f"Split payment result: {split_result}")
+                except Exception as split_error:
+                    logger.error(f"Split payment processing failed: {split_error}")
+                    # Don't fail the payment verification if split processing fails
+            
+            return is_valid
+            
+        except FacilitatorUnavailable:
+            raise
         except Exception as e:
             logger.error(f"Payment verification error: {e}")
             return False